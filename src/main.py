@@ -14,6 +14,26 @@ from src.routes.ai_studio import ai_studio_bp
 from src.routes.business_ideas import business_ideas_bp
 from src.routes.graphics import graphics_bp
 from src.routes.ai_business_builder import ai_business_builder_bp
+from src.routes.messaging import messaging_bp
+from src.routes.realtime import realtime_bp
+from src.routes.network import network_bp
+from src.routes.creators import creators_bp
+from src.routes.teams import teams_bp
+from src.routes.finance import finance_bp
+from src.routes.images import images_bp
+from src.services import pubsub, social_graph, creator_search, autocomplete, compression
+from src.services.reputation import reputation_cli
+from src.services.activity_log import activity_log, activity_cli
+from src.services.usage_meter import meter as usage_meter
+from src.services.rate_limit import limiter
+from src.services.earnings import earnings_cli
+from src.services.exports import runner as export_runner, exports_cli
+from src.services.catalog_import import catalog_cli
+from src.services.tagging import tags_cli
+from src.services.asset_store import store as asset_store, assets_cli
+from src.services.entitlements import entitlements, entitlements_cli
+from src.services.notifications import pipeline as notification_pipeline, notifications_cli
+from src.services.thumbnails import thumbnails
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
@@ -33,17 +53,98 @@ app.register_blueprint(ai_studio_bp, url_prefix='/api/ai-studio')
 app.register_blueprint(business_ideas_bp)
 app.register_blueprint(graphics_bp)
 app.register_blueprint(ai_business_builder_bp)
+app.register_blueprint(messaging_bp, url_prefix='/api/messages')
+app.register_blueprint(realtime_bp, url_prefix='/api/realtime')
+app.register_blueprint(network_bp, url_prefix='/api/network')
+app.register_blueprint(creators_bp, url_prefix='/api/creators')
+app.register_blueprint(teams_bp, url_prefix='/api/teams')
+app.register_blueprint(finance_bp, url_prefix='/api/finance')
+app.register_blueprint(images_bp)
 
 # Database configuration
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL') or f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 db.init_app(app)
 
+# Codec for CompressedText columns (COMPRESSION_DICTIONARY=path enables a trained zstd dictionary;
+# COMPRESSION_PREVIOUS_DICTIONARIES=path:path keeps rows written with replaced ones readable)
+app.config['COMPRESSION_DICTIONARY'] = os.environ.get('COMPRESSION_DICTIONARY')
+app.config['COMPRESSION_PREVIOUS_DICTIONARIES'] = os.environ.get('COMPRESSION_PREVIOUS_DICTIONARIES')
+compression.init_app(app)
+app.cli.add_command(compression.compression_cli)
+
+# Push channel broker (set PUBSUB_URL to share events across workers)
+app.config['PUBSUB_URL'] = os.environ.get('PUBSUB_URL')
+pubsub.init_app(app)
+
+# Batched, coalescing notification writer
+notification_pipeline.init_app(app)
+app.cli.add_command(notifications_cli)
+
+# In-memory connection/follow graph, built on first use
+social_graph.init_app(app)
+
+# Faceted creator search index, built on first use
+creator_search.init_app(app)
+
+# Marketplace search-box suggestions, built on first use
+autocomplete.init_app(app)
+
+# Review aggregates are maintained on flush; this rebuilds them from scratch
+app.cli.add_command(reputation_cli)
+
+# Monthly-partitioned team activity log with batched appends
+activity_log.init_app(app)
+app.cli.add_command(activity_cli)
+
+# AI_DETERMINISTIC=1 seeds every AI generator from its request inputs (otherwise only requests with a "seed")
+app.config['AI_DETERMINISTIC'] = os.environ.get('AI_DETERMINISTIC') == '1'
+
+# In-memory AI usage counters and tier quotas, flushed in batches
+usage_meter.init_app(app)
+
+# GCRA rate limits (RATE_LIMIT_STORAGE=sqlite:///path shares them across workers)
+app.config['RATE_LIMIT_STORAGE'] = os.environ.get('RATE_LIMIT_STORAGE')
+limiter.init_app(app)
+
+# Earnings rollups are maintained on flush; this rebuilds them from history
+app.cli.add_command(earnings_cli)
+
+# Background gzip exports
+export_runner.init_app(app)
+app.cli.add_command(exports_cli)
+
+# Bulk NDJSON/CSV catalog import for ops (creators use POST /api/marketplace/import)
+app.cli.add_command(catalog_cli)
+
+# Tag assignments are maintained on flush; this backfills them from the JSON tag columns
+app.cli.add_command(tags_cli)
+
+# Graphic files on disk behind signed URLs (USE_X_SENDFILE=1 hands serving to the front proxy)
+app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE') == '1'
+asset_store.init_app(app)
+app.cli.add_command(assets_cli)
+
+# Purchase entitlements are maintained on flush; checks go through per-user sets (ENTITLEMENT_BLOOM=1 adds a negative filter)
+app.config['ENTITLEMENT_BLOOM'] = os.environ.get('ENTITLEMENT_BLOOM') == '1'
+entitlements.init_app(app)
+app.cli.add_command(entitlements_cli)
+
+# WebP thumbnails of static images for listings, rendered on first request (needs Pillow; without it listings use the originals)
+thumbnails.init_app(app)
+
 # Import all models to ensure they are registered
 from src.models.business_idea import BusinessIdea
 from src.models.service import Service
 from src.models.subscription import Subscription
-from src.models.transaction import Transaction
+from src.models.transaction import Transaction, EarningsRollup, EarningsBackfill, ExportJob
+from src.models.creator_profile import CreatorProfile
+from src.models.networking import Conversation, ConversationParticipant, Message
+from src.models.team import Team, TeamMember, TeamProject, TeamActivity
+from src.models.usage import AIUsage, AIUsageLease
+from src.models.tag import Tag, TagAssignment
+from src.models.generation import ArtifactBlob, GeneratedArtifact
+from src.models.entitlement import Entitlement
 
 with app.app_context():
     db.create_all()
@@ -1,4 +1,5 @@
 from src.models.user import db
+from src.models.compressed_text import CompressedText
 from datetime import datetime
 
 class BusinessIdea(db.Model):
@@ -14,22 +15,24 @@ class BusinessIdea(db.Model):
     is_featured = db.Column(db.Boolean, default=False)
     tags = db.Column(db.Text, nullable=True)  # JSON string of tags
     image_url = db.Column(db.String(255), nullable=True)
-    rating = db.Column(db.Float, default=0.0)
+    rating = db.Column(db.Float, default=0.0, index=True)  # Kept by services.reputation
     review_count = db.Column(db.Integer, default=0)
     sales_count = db.Column(db.Integer, default=0)
     
-    # Business plan content
-    executive_summary = db.Column(db.Text, nullable=True)
-    market_analysis = db.Column(db.Text, nullable=True)
-    business_model = db.Column(db.Text, nullable=True)
-    financial_projections = db.Column(db.Text, nullable=True)
-    marketing_strategy = db.Column(db.Text, nullable=True)
+    # Business plan content, compressed and deferred as one group: listings never load it, undefer_group('plan') does
+    executive_summary = db.deferred(db.Column(CompressedText, nullable=True), group='plan')
+    market_analysis = db.deferred(db.Column(CompressedText, nullable=True), group='plan')
+    business_model = db.deferred(db.Column(CompressedText, nullable=True), group='plan')
+    financial_projections = db.deferred(db.Column(CompressedText, nullable=True), group='plan')
+    marketing_strategy = db.deferred(db.Column(CompressedText, nullable=True), group='plan')
+    
+    __table_args__ = (db.Index('ix_business_idea_published_category', 'is_published', 'category', 'created_at'),)
     
     def __repr__(self):
         return f'<BusinessIdea {self.title}>'
 
-    def to_dict(self):
-        return {
+    def to_dict(self, include_plan=True):
+        data = {
             'id': self.id,
             'title': self.title,
             'description': self.description,
@@ -45,13 +48,18 @@ class BusinessIdea(db.Model):
             'image_url': self.image_url,
             'rating': self.rating,
             'review_count': self.review_count,
-            'sales_count': self.sales_count,
-            'executive_summary': self.executive_summary,
-            'market_analysis': self.market_analysis,
-            'business_model': self.business_model,
-            'financial_projections': self.financial_projections,
-            'marketing_strategy': self.marketing_strategy
+            'sales_count': self.sales_count
         }
+        # Plan text is for the creator and buyers; without it the deferred group is never loaded
+        if include_plan:
+            data.update({
+                'executive_summary': self.executive_summary,
+                'market_analysis': self.market_analysis,
+                'business_model': self.business_model,
+                'financial_projections': self.financial_projections,
+                'marketing_strategy': self.marketing_strategy
+            })
+        return data
 
     def to_summary_dict(self):
         """Simplified version for listings"""
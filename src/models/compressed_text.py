@@ -0,0 +1,117 @@
+from sqlalchemy.types import Text, TypeDecorator
+import hashlib
+import struct
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # optional: zlib is always available
+    zstandard = None
+
+# Compressed values are stored as BLOBs starting with NUL, which no stored text does
+MAGIC = b'\x00c'
+ZLIB = b'z'
+ZSTD = b's'
+ZSTD_DICT = b'D'  # followed by the 4-byte id of the dictionary it was compressed with
+LEGACY_ZSTD_DICT = b'd'  # written before ids were stored; resolved from the zstd frame header
+DICTIONARY_ID = struct.Struct('>I')
+
+DEFAULT_THRESHOLD = 512
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 9
+
+def dictionary_id(dictionary):
+    """Stable id of a dictionary's bytes, stored in front of every value compressed with it"""
+    return DICTIONARY_ID.unpack(hashlib.sha256(dictionary).digest()[:DICTIONARY_ID.size])[0]
+
+# Values name the dictionary they need, so a newly trained one can be deployed while rows written
+# with earlier ones stay readable; recompress then moves them to the current dictionary
+class Codec:
+    """Encodes text for CompressedText columns; configured once per process by services.compression"""
+    
+    def __init__(self, threshold=DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self.use_zstd = zstandard is not None
+        self.dictionary = None
+        self.dictionary_id = None
+        self.dictionaries = {}  # id -> dictionary, the current one and every earlier one still readable
+    
+    def configure(self, threshold=DEFAULT_THRESHOLD, dictionary=None, use_zstd=True, previous_dictionaries=()):
+        self.threshold = threshold
+        self.use_zstd = use_zstd and zstandard is not None
+        self.dictionaries = {}
+        if zstandard is not None:
+            for data in (*previous_dictionaries, dictionary):
+                if data:
+                    self.dictionaries[dictionary_id(data)] = zstandard.ZstdCompressionDict(data)
+        if dictionary and self.use_zstd:
+            self.dictionary_id = dictionary_id(dictionary)
+            self.dictionary = self.dictionaries[self.dictionary_id]
+        else:
+            self.dictionary_id = None
+            self.dictionary = None
+    
+    def encode(self, text):
+        """Text below the threshold, or that does not shrink, is stored as is"""
+        data = text.encode('utf-8')
+        if len(data) < self.threshold:
+            return text
+        if self.dictionary is not None:
+            kind = ZSTD_DICT + DICTIONARY_ID.pack(self.dictionary_id)
+            payload = zstandard.ZstdCompressor(level=ZSTD_LEVEL, dict_data=self.dictionary).compress(data)
+        elif self.use_zstd:
+            kind = ZSTD
+            payload = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+        else:
+            kind = ZLIB
+            payload = zlib.compress(data, ZLIB_LEVEL)
+        if len(payload) + len(MAGIC) + len(kind) >= len(data):
+            return text
+        return MAGIC + kind + payload
+    
+    def decode(self, value):
+        if value is None or isinstance(value, str):
+            return value
+        value = bytes(value)
+        if not value.startswith(MAGIC):
+            return value.decode('utf-8')
+        kind = value[len(MAGIC):len(MAGIC) + 1]
+        payload = value[len(MAGIC) + 1:]
+        if kind == ZLIB:
+            return zlib.decompress(payload).decode('utf-8')
+        if zstandard is None:
+            raise RuntimeError('zstandard is required to read this value')
+        if kind == ZSTD_DICT:
+            (wanted,) = DICTIONARY_ID.unpack_from(payload)
+            dictionary = self.dictionaries.get(wanted)
+            payload = payload[DICTIONARY_ID.size:]
+            if dictionary is None:
+                raise RuntimeError(f'Compression dictionary {wanted:08x} is required to read this value')
+            return zstandard.ZstdDecompressor(dict_data=dictionary).decompress(payload).decode('utf-8')
+        if kind == LEGACY_ZSTD_DICT:
+            return zstandard.ZstdDecompressor(dict_data=self._legacy_dictionary(payload)).decompress(payload).decode('utf-8')
+        return zstandard.ZstdDecompressor().decompress(payload).decode('utf-8')
+    
+    def _legacy_dictionary(self, payload):
+        # Trained dictionaries put their zstd id in the frame header; raw ones (id 0) can only be the current one
+        frame_id = zstandard.get_frame_parameters(payload).dict_id
+        for dictionary in self.dictionaries.values():
+            if frame_id and dictionary.dict_id() == frame_id:
+                return dictionary
+        if self.dictionary is None:
+            raise RuntimeError('The compression dictionary is required to read this value')
+        return self.dictionary
+
+codec = Codec()
+
+class CompressedText(TypeDecorator):
+    """Text stored compressed above a size threshold; reads always return str"""
+    
+    impl = Text
+    cache_ok = True
+    
+    def process_bind_param(self, value, dialect):
+        return codec.encode(value) if value is not None else None
+    
+    def process_result_value(self, value, dialect):
+        return codec.decode(value)
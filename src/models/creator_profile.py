@@ -39,7 +39,7 @@ class CreatorProfile(db.Model):
     # Statistics
     total_projects = db.Column(db.Integer, default=0)
     completed_projects = db.Column(db.Integer, default=0)
-    client_satisfaction = db.Column(db.Float, default=0.0)  # Average rating
+    client_satisfaction = db.Column(db.Float, default=0.0, index=True)  # Average rating, kept by services.reputation
     response_time = db.Column(db.String(50), nullable=True)  # e.g., "within 1 hour"
     
     # Timestamps
@@ -275,7 +275,7 @@ class ServicePackage(db.Model):
     
     # Statistics
     orders_count = db.Column(db.Integer, default=0)
-    rating = db.Column(db.Float, default=0.0)
+    rating = db.Column(db.Float, default=0.0, index=True)  # Kept by services.reputation
     review_count = db.Column(db.Integer, default=0)
     
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -341,6 +341,9 @@ class CreatorReview(db.Model):
     reviewer = db.relationship('User', foreign_keys=[reviewer_id])
     service_package = db.relationship('ServicePackage', foreign_keys=[service_package_id])
     
+    # One review per reviewer and creator; edits go through PUT
+    __table_args__ = (db.UniqueConstraint('creator_profile_id', 'reviewer_id', name='unique_creator_review'),)
+    
     def __repr__(self):
         return f'<CreatorReview {self.rating} stars for Creator {self.creator_profile_id}>'
     
@@ -366,3 +369,46 @@ class CreatorReview(db.Model):
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
+
+# Running review sums for one rated subject (creator profile, package or business idea)
+class RatingAggregate(db.Model):
+    __table_args__ = (db.UniqueConstraint('subject_type', 'subject_id', name='unique_rating_subject'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    subject_type = db.Column(db.String(30), nullable=False)  # creator_profile, service_package, business_idea
+    subject_id = db.Column(db.Integer, nullable=False)
+    
+    review_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_sum = db.Column(db.Integer, nullable=False, default=0)
+    
+    # Sub-ratings are optional, so each keeps its own count
+    communication_sum = db.Column(db.Integer, nullable=False, default=0)
+    communication_count = db.Column(db.Integer, nullable=False, default=0)
+    quality_sum = db.Column(db.Integer, nullable=False, default=0)
+    quality_count = db.Column(db.Integer, nullable=False, default=0)
+    delivery_sum = db.Column(db.Integer, nullable=False, default=0)
+    delivery_count = db.Column(db.Integer, nullable=False, default=0)
+    value_sum = db.Column(db.Integer, nullable=False, default=0)
+    value_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<RatingAggregate {self.subject_type} {self.subject_id}>'
+    
+    @staticmethod
+    def _average(total, count):
+        return round(total / count, 2) if count else None
+    
+    def to_dict(self):
+        return {
+            'subject_type': self.subject_type,
+            'subject_id': self.subject_id,
+            'review_count': self.review_count,
+            'rating': self._average(self.rating_sum, self.review_count),
+            'communication_rating': self._average(self.communication_sum, self.communication_count),
+            'quality_rating': self._average(self.quality_sum, self.quality_count),
+            'delivery_rating': self._average(self.delivery_sum, self.delivery_count),
+            'value_rating': self._average(self.value_sum, self.value_count),
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
@@ -0,0 +1,27 @@
+from src.models.user import db
+from datetime import datetime
+
+# Access a user holds to a purchased item, kept in step with purchase transactions by services.entitlements
+class Entitlement(db.Model):
+    __table_args__ = (
+        # Leading user_id loads a user's whole set and answers point checks from the index
+        db.UniqueConstraint('user_id', 'item_type', 'item_id', name='unique_entitlement'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    item_type = db.Column(db.String(20), nullable=False)  # business_idea, service, graphic, curated_idea
+    item_id = db.Column(db.Integer, nullable=False)
+    transaction_id = db.Column(db.Integer, db.ForeignKey('transaction.id'), nullable=True)
+    granted_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<Entitlement {self.user_id} {self.item_type} {self.item_id}>'
+    
+    def to_dict(self):
+        return {
+            'item_type': self.item_type,
+            'item_id': self.item_id,
+            'transaction_id': self.transaction_id,
+            'granted_at': self.granted_at.isoformat() if self.granted_at else None
+        }
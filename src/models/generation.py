@@ -0,0 +1,43 @@
+from src.models.user import db
+from src.models.compressed_text import CompressedText
+from datetime import datetime
+
+# Content-addressed JSON body: a full snapshot or a delta against a parent version, stored once
+class ArtifactBlob(db.Model):
+    hash = db.Column(db.String(64), primary_key=True)  # sha256 of body
+    body = db.Column(CompressedText, nullable=False)  # canonical JSON
+    size = db.Column(db.Integer, nullable=False)  # uncompressed bytes
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<ArtifactBlob {self.hash[:12]}>'
+
+# One version of a generated business idea or plan owned by a user
+class GeneratedArtifact(db.Model):
+    __table_args__ = (db.Index('ix_generated_artifact_dedup', 'user_id', 'kind', 'content_hash', unique=True),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    kind = db.Column(db.String(20), nullable=False)  # idea, plan
+    parent_id = db.Column(db.Integer, db.ForeignKey('generated_artifact.id'), nullable=True)  # refined from / plan for
+    content_hash = db.Column(db.String(64), nullable=False)  # sha256 of the full materialized content
+    blob_hash = db.Column(db.String(64), db.ForeignKey('artifact_blob.hash'), nullable=False)
+    is_delta = db.Column(db.Boolean, nullable=False, default=False)  # blob is a delta against parent_id
+    chain_length = db.Column(db.Integer, nullable=False, default=0)  # deltas to apply after the nearest snapshot
+    title = db.Column(db.String(200), nullable=True)
+    request = db.Column(db.Text, nullable=True)  # prompt or refinement request
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<GeneratedArtifact {self.kind} {self.id}>'
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'parent_id': self.parent_id,
+            'content_hash': self.content_hash,
+            'title': self.title,
+            'request': self.request,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
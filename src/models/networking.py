@@ -1,4 +1,5 @@
 from src.models.user import db
+from src.models.compressed_text import CompressedText
 from datetime import datetime
 
 class Connection(db.Model):
@@ -36,7 +37,7 @@ class Connection(db.Model):
 class Post(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     author_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    content = db.Column(db.Text, nullable=False)
+    content = db.Column(CompressedText, nullable=False)
     post_type = db.Column(db.String(50), nullable=False, default='text')  # text, image, video, article, project_showcase, idea_share
     
     # Media attachments
@@ -220,7 +221,7 @@ class Message(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     conversation_id = db.Column(db.Integer, db.ForeignKey('conversation.id'), nullable=False)
     sender_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    content = db.Column(db.Text, nullable=False)
+    content = db.Column(CompressedText, nullable=False)
     message_type = db.Column(db.String(20), nullable=False, default='text')  # text, image, file, voice
     
     # File attachments
@@ -240,7 +241,10 @@ class Message(db.Model):
     
     # Relationships
     sender = db.relationship('User', foreign_keys=[sender_id])
-    conversation = db.relationship('Conversation', backref='messages')
+    conversation = db.relationship('Conversation', backref=db.backref('messages', lazy='dynamic'))
+    
+    # Composite index backing cursor-paginated history
+    __table_args__ = (db.Index('ix_message_conversation_id_id', 'conversation_id', 'id'),)
     
     def __repr__(self):
         return f'<Message {self.id} from {self.sender_id}>'
@@ -286,17 +290,14 @@ class Conversation(db.Model):
         return f'<Conversation {self.id} ({self.conversation_type})>'
     
     def to_dict(self, current_user_id=None):
-        # Get unread message count for current user
+        # Unread count and last message come from the participant's inbox counters
         unread_count = 0
+        last_message = None
         if current_user_id:
             participant = next((p for p in self.participants if p.user_id == current_user_id), None)
             if participant:
-                unread_count = len([m for m in self.messages if not m.is_read and m.sender_id != current_user_id])
-        
-        # Get last message
-        last_message = None
-        if self.messages:
-            last_message = sorted(self.messages, key=lambda x: x.created_at, reverse=True)[0].to_dict()
+                unread_count = participant.unread_count or 0
+                last_message = participant.last_message_snapshot()
         
         return {
             'id': self.id,
@@ -323,6 +324,15 @@ class ConversationParticipant(db.Model):
     # Participant settings
     is_muted = db.Column(db.Boolean, default=False)
     last_read_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_read_message_id = db.Column(db.Integer, nullable=True)
+    
+    # Inbox counters, maintained on send and read
+    unread_count = db.Column(db.Integer, nullable=False, default=0)
+    last_message_id = db.Column(db.Integer, nullable=True)
+    last_message_sender_id = db.Column(db.Integer, nullable=True)
+    last_message_preview = db.Column(db.String(200), nullable=True)
+    last_message_type = db.Column(db.String(20), nullable=True)
+    last_message_at = db.Column(db.DateTime, nullable=True)
     
     # Timestamps
     joined_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -332,11 +342,27 @@ class ConversationParticipant(db.Model):
     user = db.relationship('User', foreign_keys=[user_id])
     
     # Unique constraint
-    __table_args__ = (db.UniqueConstraint('conversation_id', 'user_id', name='unique_conversation_participant'),)
+    __table_args__ = (
+        db.UniqueConstraint('conversation_id', 'user_id', name='unique_conversation_participant'),
+        db.Index('ix_conversation_participant_inbox', 'user_id', 'status', 'last_message_at'),
+    )
     
     def __repr__(self):
         return f'<ConversationParticipant {self.user_id} in {self.conversation_id}>'
     
+    def last_message_snapshot(self):
+        """Last message as seen from this participant's inbox, without loading the message"""
+        if not self.last_message_id:
+            return None
+        return {
+            'id': self.last_message_id,
+            'conversation_id': self.conversation_id,
+            'sender_id': self.last_message_sender_id,
+            'content': self.last_message_preview,
+            'message_type': self.last_message_type,
+            'created_at': self.last_message_at.isoformat() if self.last_message_at else None
+        }
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -347,6 +373,8 @@ class ConversationParticipant(db.Model):
             'status': self.status,
             'is_muted': self.is_muted,
             'last_read_at': self.last_read_at.isoformat() if self.last_read_at else None,
+            'last_read_message_id': self.last_read_message_id,
+            'unread_count': self.unread_count,
             'joined_at': self.joined_at.isoformat() if self.joined_at else None,
             'left_at': self.left_at.isoformat() if self.left_at else None
         }
@@ -377,6 +405,18 @@ class Follow(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
+# Append-only log of connection and follow edits, written in the same transaction as the edit;
+# each worker's in-memory social graph replays it to stay current (services.social_graph)
+class SocialGraphChange(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    op = db.Column(db.String(20), nullable=False)  # add_connection, remove_connection, add_follow, remove_follow
+    first_id = db.Column(db.Integer, nullable=False)
+    second_id = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    
+    def __repr__(self):
+        return f'<SocialGraphChange {self.id} {self.op} {self.first_id} {self.second_id}>'
+
 class Notification(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -389,6 +429,9 @@ class Notification(db.Model):
     related_post_id = db.Column(db.Integer, db.ForeignKey('post.id'), nullable=True)
     related_comment_id = db.Column(db.Integer, db.ForeignKey('post_comment.id'), nullable=True)
     
+    # Aggregation ("Alice and 240 others liked your post")
+    actor_count = db.Column(db.Integer, nullable=False, default=1)
+    
     # Action URL
     action_url = db.Column(db.String(500), nullable=True)
     
@@ -406,6 +449,11 @@ class Notification(db.Model):
     related_post = db.relationship('Post', foreign_keys=[related_post_id])
     related_comment = db.relationship('PostComment', foreign_keys=[related_comment_id])
     
+    __table_args__ = (
+        db.Index('ix_notification_user_inbox', 'user_id', 'is_archived', 'created_at'),
+        db.Index('ix_notification_sweep', 'is_archived', 'created_at'),
+    )
+    
     def __repr__(self):
         return f'<Notification {self.notification_type} for {self.user_id}>'
     
@@ -420,6 +468,7 @@ class Notification(db.Model):
             'related_user': self.related_user.to_public_dict() if self.related_user else None,
             'related_post_id': self.related_post_id,
             'related_comment_id': self.related_comment_id,
+            'actor_count': self.actor_count,
             'action_url': self.action_url,
             'is_read': self.is_read,
             'is_archived': self.is_archived,
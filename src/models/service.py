@@ -21,6 +21,8 @@ class Service(db.Model):
     # Service packages (JSON string)
     packages = db.Column(db.Text, nullable=True)  # JSON string of service packages
     
+    __table_args__ = (db.Index('ix_service_published_category', 'is_published', 'category', 'created_at'),)
+    
     def __repr__(self):
         return f'<Service {self.title}>'
 
@@ -0,0 +1,35 @@
+from src.models.user import db
+from datetime import datetime
+
+# Normalized tag dictionary shared by every tagged model
+class Tag(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), unique=True, nullable=False)  # lowercased, trimmed
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<Tag {self.name}>'
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name
+        }
+
+# One tag on one row of a tagged model, kept in step with its JSON column by services.tagging
+class TagAssignment(db.Model):
+    __table_args__ = (
+        # Leading tag_id serves ?tag= filters and per-tag counts from the index alone
+        db.UniqueConstraint('tag_id', 'subject_type', 'subject_id', name='unique_tag_assignment'),
+        db.Index('ix_tag_assignment_subject', 'subject_id', 'subject_type'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    tag_id = db.Column(db.Integer, db.ForeignKey('tag.id'), nullable=False)
+    subject_type = db.Column(db.String(30), nullable=False)  # business_idea, post, team_project, portfolio_item, service_package
+    subject_id = db.Column(db.Integer, nullable=False)
+    
+    tag = db.relationship('Tag')
+    
+    def __repr__(self):
+        return f'<TagAssignment {self.tag_id} on {self.subject_type} {self.subject_id}>'
@@ -21,7 +21,10 @@ class Team(db.Model):
     def __repr__(self):
         return f'<Team {self.name}>'
     
-    def to_dict(self):
+    def to_dict(self, member_count=None):
+        # Callers listing many teams pass a count from a GROUP BY query
+        if member_count is None:
+            member_count = TeamMember.query.filter_by(team_id=self.id).count()
         return {
             'id': self.id,
             'name': self.name,
@@ -33,12 +36,12 @@ class Team(db.Model):
             'is_active': self.is_active,
             'team_type': self.team_type,
             'max_members': self.max_members,
-            'member_count': len(self.members),
+            'member_count': member_count,
             'settings': self.settings
         }
     
     def get_member_count(self):
-        return len([m for m in self.members if m.status == 'active'])
+        return TeamMember.query.filter_by(team_id=self.id, status='active').count()
     
     def can_add_member(self):
         return self.get_member_count() < self.max_members
@@ -59,7 +62,10 @@ class TeamMember(db.Model):
     inviter = db.relationship('User', foreign_keys=[invited_by])
     
     # Unique constraint
-    __table_args__ = (db.UniqueConstraint('team_id', 'user_id', name='unique_team_member'),)
+    __table_args__ = (
+        db.UniqueConstraint('team_id', 'user_id', name='unique_team_member'),
+        db.Index('ix_team_member_user_status', 'user_id', 'status'),
+    )
     
     def __repr__(self):
         return f'<TeamMember {self.user_id} in Team {self.team_id}>'
@@ -96,6 +102,8 @@ class TeamProject(db.Model):
     # Project data (JSON)
     project_data = db.Column(db.Text, nullable=True)  # JSON string containing project-specific data
     
+    __table_args__ = (db.Index('ix_team_project_team_status', 'team_id', 'status', 'priority'),)
+    
     # Relationships
     creator = db.relationship('User', foreign_keys=[created_by])
     collaborations = db.relationship('ProjectCollaboration', backref='project', lazy=True, cascade='all, delete-orphan')
@@ -104,7 +112,9 @@ class TeamProject(db.Model):
     def __repr__(self):
         return f'<TeamProject {self.name}>'
     
-    def to_dict(self):
+    def to_dict(self, collaboration_count=None):
+        if collaboration_count is None:
+            collaboration_count = ProjectCollaboration.query.filter_by(project_id=self.id).count()
         return {
             'id': self.id,
             'team_id': self.team_id,
@@ -120,7 +130,7 @@ class TeamProject(db.Model):
             'priority': self.priority,
             'tags': self.tags,
             'project_data': self.project_data,
-            'collaboration_count': len(self.collaborations)
+            'collaboration_count': collaboration_count
         }
 
 class ProjectCollaboration(db.Model):
@@ -167,6 +177,8 @@ class TeamActivity(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_public = db.Column(db.Boolean, default=True)
     
+    __table_args__ = (db.Index('ix_team_activity_team_created', 'team_id', 'created_at'),)
+    
     # Relationships
     user = db.relationship('User', foreign_keys=[user_id])
     
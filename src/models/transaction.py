@@ -24,7 +24,7 @@ class Transaction(db.Model):
     
     def __repr__(self):
         return f'<Transaction {self.transaction_type} ${self.amount}>'
-
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -45,3 +45,79 @@ class Transaction(db.Model):
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
+
+# Daily/monthly totals per seller (seller_id=0 is platform-wide) and item type ('all' sums every type)
+class EarningsRollup(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    granularity = db.Column(db.String(5), nullable=False)  # day, month
+    period_start = db.Column(db.Date, nullable=False)
+    seller_id = db.Column(db.Integer, nullable=False, default=0)
+    item_type = db.Column(db.String(20), nullable=False, default='all')
+    currency = db.Column(db.String(3), nullable=False, default='USD')
+    
+    transaction_count = db.Column(db.Integer, nullable=False, default=0)
+    gross_amount = db.Column(db.Float, nullable=False, default=0.0)
+    commission_amount = db.Column(db.Float, nullable=False, default=0.0)
+    seller_amount = db.Column(db.Float, nullable=False, default=0.0)
+    
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('seller_id', 'granularity', 'item_type', 'currency', 'period_start', name='unique_earnings_rollup'),
+    )
+    
+    def __repr__(self):
+        return f'<EarningsRollup {self.granularity} {self.period_start} seller {self.seller_id}>'
+    
+    def to_dict(self):
+        return {
+            'granularity': self.granularity,
+            'period_start': self.period_start.isoformat() if self.period_start else None,
+            'seller_id': self.seller_id or None,
+            'item_type': self.item_type,
+            'currency': self.currency,
+            'transaction_count': self.transaction_count,
+            'gross_amount': round(self.gross_amount, 2),
+            'commission_amount': round(self.commission_amount, 2),
+            'seller_amount': round(self.seller_amount, 2)
+        }
+
+# Progress of a running earnings backfill; the row exists only while one is in progress
+class EarningsBackfill(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    last_id = db.Column(db.Integer, nullable=False, default=0)  # transactions up to here are rolled up
+    max_id = db.Column(db.Integer, nullable=False, default=0)  # the backfill stops here; later ids are new
+    started_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<EarningsBackfill {self.last_id}/{self.max_id}>'
+
+class ExportJob(db.Model):
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 hex
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    export_type = db.Column(db.String(30), nullable=False, default='transactions')
+    format = db.Column(db.String(10), nullable=False, default='csv')  # csv, ndjson
+    filters = db.Column(db.Text, nullable=True)  # JSON string
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, running, completed, failed, expired
+    file_path = db.Column(db.String(500), nullable=True)
+    row_count = db.Column(db.Integer, default=0)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    completed_at = db.Column(db.DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f'<ExportJob {self.id} {self.status}>'
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'export_type': self.export_type,
+            'format': self.format,
+            'filters': self.filters,
+            'status': self.status,
+            'row_count': self.row_count,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
+            'download_url': f'/api/finance/exports/{self.id}/download' if self.status == 'completed' else None
+        }
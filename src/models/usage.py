@@ -0,0 +1,39 @@
+from src.models.user import db
+from datetime import datetime
+
+class AIUsage(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    period = db.Column(db.String(6), nullable=False)  # YYYYMM
+    feature = db.Column(db.String(50), nullable=False)  # idea_generation, idea_enhancement, ...
+    count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (db.UniqueConstraint('user_id', 'period', 'feature', name='unique_ai_usage'),)
+    
+    def __repr__(self):
+        return f'<AIUsage {self.feature} x{self.count} for User {self.user_id} in {self.period}>'
+    
+    def to_dict(self):
+        return {
+            'user_id': self.user_id,
+            'period': self.period,
+            'feature': self.feature,
+            'count': self.count,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+# Share of a user's monthly quota reserved by one worker process; calls are checked against it in
+# memory and the flush moves what was used into ai_usage (services.usage_meter)
+class AIUsageLease(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    period = db.Column(db.String(6), nullable=False)  # YYYYMM
+    worker = db.Column(db.String(32), nullable=False)  # random id of the holding process
+    granted = db.Column(db.Integer, nullable=False, default=0)  # reserved and not yet flushed as usage
+    expires_at = db.Column(db.DateTime, nullable=False)  # renewed by every flush of a live worker
+    
+    __table_args__ = (db.UniqueConstraint('user_id', 'period', 'worker', name='unique_ai_usage_lease'),)
+    
+    def __repr__(self):
+        return f'<AIUsageLease {self.granted} for User {self.user_id} in {self.period} by {self.worker}>'
@@ -1,6 +1,7 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
+import bcrypt
 
 db = SQLAlchemy()
 
@@ -9,7 +10,7 @@ class User(db.Model):
     username = db.Column(db.String(80), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(128), nullable=False)
-    user_type = db.Column(db.String(20), nullable=False, default='client')  # client, creator
+    user_type = db.Column(db.String(20), nullable=False, default='client')  # client, creator, admin
     subscription_tier = db.Column(db.String(20), nullable=False, default='basic')  # basic, inventor, guru
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_active = db.Column(db.Boolean, default=True)
@@ -20,7 +21,7 @@ class User(db.Model):
     business_ideas = db.relationship('BusinessIdea', backref='creator', lazy=True)
     services = db.relationship('Service', backref='creator', lazy=True)
     subscriptions = db.relationship('Subscription', backref='user', lazy=True)
-    transactions = db.relationship('Transaction', backref='user', lazy=True)
+    transactions = db.relationship('Transaction', foreign_keys='Transaction.user_id', backref='user', lazy=True)
 
     def __repr__(self):
         return f'<User {self.username}>'
@@ -1,310 +1,33 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from src.services.usage_meter import metered
+from src.services import generation_store
+from src.services.business_templates import templates
+from src.services.seeded_generation import request_rng, seeded
+from src.models.generation import GeneratedArtifact
 import json
-import random
 import time
 
 ai_business_builder_bp = Blueprint('ai_business_builder', __name__)
 
-# Simulated OpenAI responses for business generation
+# Simulated OpenAI responses for business generation, compiled once in services.business_templates
 # In production, this would integrate with actual OpenAI API
 
-def generate_business_idea(prompt, industry, target_market, budget_range):
+def generate_business_idea(prompt, industry, target_market, budget_range, rng=None):
     """Simulate OpenAI business idea generation"""
-    
-    # Sample business ideas based on input parameters
-    business_templates = {
-        "technology": [
-            {
-                "title": "AI-Powered {industry} Platform",
-                "description": "Revolutionary platform that uses artificial intelligence to transform {industry} operations",
-                "market_size": "$50B+ global market",
-                "startup_cost": "Low to Medium",
-                "time_to_market": "6-12 months"
-            },
-            {
-                "title": "Blockchain-Based {industry} Solution",
-                "description": "Decentralized platform leveraging blockchain technology for {industry} transparency",
-                "market_size": "$25B+ emerging market",
-                "startup_cost": "Medium to High",
-                "time_to_market": "12-18 months"
-            }
-        ],
-        "ecommerce": [
-            {
-                "title": "Sustainable {target_market} Marketplace",
-                "description": "Eco-friendly marketplace connecting conscious consumers with sustainable products",
-                "market_size": "$15B+ growing market",
-                "startup_cost": "Medium",
-                "time_to_market": "3-6 months"
-            },
-            {
-                "title": "Personalized {target_market} Subscription Box",
-                "description": "AI-curated subscription service delivering personalized products monthly",
-                "market_size": "$10B+ subscription economy",
-                "startup_cost": "Low to Medium",
-                "time_to_market": "2-4 months"
-            }
-        ],
-        "services": [
-            {
-                "title": "On-Demand {industry} Services",
-                "description": "Mobile app connecting service providers with customers instantly",
-                "market_size": "$100B+ gig economy",
-                "startup_cost": "Medium",
-                "time_to_market": "4-8 months"
-            },
-            {
-                "title": "Virtual {industry} Consulting",
-                "description": "Remote consulting platform with AI-powered matching and tools",
-                "market_size": "$50B+ consulting market",
-                "startup_cost": "Low",
-                "time_to_market": "2-3 months"
-            }
-        ]
-    }
-    
-    # Select appropriate template based on industry
-    category = "technology" if industry.lower() in ["tech", "ai", "software", "saas"] else \
-               "ecommerce" if industry.lower() in ["retail", "ecommerce", "marketplace", "shopping"] else \
-               "services"
-    
-    template = random.choice(business_templates.get(category, business_templates["services"]))
-    
-    # Customize template with user inputs
-    idea = {
-        "title": template["title"].format(industry=industry, target_market=target_market),
-        "description": template["description"].format(industry=industry, target_market=target_market),
-        "detailed_description": f"This innovative business idea targets {target_market} in the {industry} sector. {template['description'].format(industry=industry, target_market=target_market)}. The solution addresses key pain points through cutting-edge technology and user-centric design.",
-        "industry": industry,
-        "target_market": target_market,
-        "market_size": template["market_size"],
-        "startup_cost": template["startup_cost"],
-        "time_to_market": template["time_to_market"],
-        "budget_range": budget_range,
-        "revenue_streams": generate_revenue_streams(category),
-        "key_features": generate_key_features(category, industry),
-        "competitive_advantages": generate_competitive_advantages(),
-        "implementation_steps": generate_implementation_steps(),
-        "financial_projections": generate_financial_projections(budget_range),
-        "marketing_strategy": generate_marketing_strategy(target_market),
-        "risk_analysis": generate_risk_analysis(),
-        "success_metrics": generate_success_metrics()
-    }
-    
-    return idea
-
-def generate_revenue_streams(category):
-    """Generate revenue streams based on business category"""
-    streams = {
-        "technology": [
-            "SaaS subscription fees",
-            "API usage charges",
-            "Premium feature upgrades",
-            "Enterprise licensing",
-            "Data analytics services"
-        ],
-        "ecommerce": [
-            "Product sales commissions",
-            "Subscription fees",
-            "Advertising revenue",
-            "Fulfillment services",
-            "Premium seller tools"
-        ],
-        "services": [
-            "Service commissions",
-            "Subscription fees",
-            "Premium memberships",
-            "Advertising revenue",
-            "Training and certification"
-        ]
-    }
-    return streams.get(category, streams["services"])
-
-def generate_key_features(category, industry):
-    """Generate key features based on category and industry"""
-    base_features = [
-        "User-friendly interface",
-        "Mobile-responsive design",
-        "Secure payment processing",
-        "Real-time notifications",
-        "Analytics dashboard"
-    ]
-    
-    tech_features = [
-        "AI-powered recommendations",
-        "Machine learning algorithms",
-        "API integrations",
-        "Cloud-based infrastructure",
-        "Advanced security protocols"
-    ]
-    
-    if category == "technology":
-        return base_features + tech_features
-    return base_features + [
-        "Customer support system",
-        "Review and rating system",
-        "Social media integration",
-        "Email marketing tools"
-    ]
-
-def generate_competitive_advantages():
-    """Generate competitive advantages"""
-    return [
-        "First-mover advantage in emerging market",
-        "Proprietary technology and algorithms",
-        "Strong network effects",
-        "Superior user experience",
-        "Cost-effective solution",
-        "Scalable business model"
-    ]
-
-def generate_implementation_steps():
-    """Generate implementation roadmap"""
-    return [
-        {
-            "phase": "Phase 1: Planning & Research",
-            "duration": "1-2 months",
-            "tasks": [
-                "Market research and validation",
-                "Competitive analysis",
-                "Technical architecture design",
-                "Team building and hiring"
-            ]
-        },
-        {
-            "phase": "Phase 2: MVP Development",
-            "duration": "2-4 months",
-            "tasks": [
-                "Core feature development",
-                "User interface design",
-                "Basic testing and QA",
-                "Initial user feedback"
-            ]
-        },
-        {
-            "phase": "Phase 3: Launch & Growth",
-            "duration": "3-6 months",
-            "tasks": [
-                "Public launch and marketing",
-                "User acquisition campaigns",
-                "Feature expansion",
-                "Performance optimization"
-            ]
-        },
-        {
-            "phase": "Phase 4: Scale & Expansion",
-            "duration": "6+ months",
-            "tasks": [
-                "Market expansion",
-                "Advanced features",
-                "Partnership development",
-                "Funding and investment"
-            ]
-        }
-    ]
+    return templates.render_idea(industry, target_market, budget_range, rng=rng or request_rng())
 
-def generate_financial_projections(budget_range):
-    """Generate financial projections based on budget"""
-    budget_multipliers = {
-        "under_10k": {"year1": 2, "year2": 5, "year3": 12},
-        "10k_50k": {"year1": 3, "year2": 8, "year3": 20},
-        "50k_100k": {"year1": 5, "year2": 15, "year3": 40},
-        "100k_plus": {"year1": 8, "year2": 25, "year3": 75}
-    }
-    
-    multiplier = budget_multipliers.get(budget_range, budget_multipliers["10k_50k"])
-    base_amount = 10000
-    
-    return {
-        "year_1": {
-            "revenue": base_amount * multiplier["year1"],
-            "expenses": base_amount * multiplier["year1"] * 0.8,
-            "profit": base_amount * multiplier["year1"] * 0.2
-        },
-        "year_2": {
-            "revenue": base_amount * multiplier["year2"],
-            "expenses": base_amount * multiplier["year2"] * 0.7,
-            "profit": base_amount * multiplier["year2"] * 0.3
-        },
-        "year_3": {
-            "revenue": base_amount * multiplier["year3"],
-            "expenses": base_amount * multiplier["year3"] * 0.6,
-            "profit": base_amount * multiplier["year3"] * 0.4
-        }
-    }
-
-def generate_marketing_strategy(target_market):
-    """Generate marketing strategy based on target market"""
-    return {
-        "target_audience": target_market,
-        "channels": [
-            "Social media marketing",
-            "Content marketing and SEO",
-            "Email marketing campaigns",
-            "Influencer partnerships",
-            "Paid advertising (Google, Facebook)"
-        ],
-        "budget_allocation": {
-            "Digital advertising": "40%",
-            "Content creation": "25%",
-            "Social media": "20%",
-            "Email marketing": "10%",
-            "Events and PR": "5%"
-        },
-        "key_metrics": [
-            "Customer acquisition cost (CAC)",
-            "Customer lifetime value (CLV)",
-            "Conversion rates",
-            "Brand awareness",
-            "Social media engagement"
-        ]
-    }
-
-def generate_risk_analysis():
-    """Generate risk analysis"""
-    return [
-        {
-            "risk": "Market Competition",
-            "probability": "High",
-            "impact": "Medium",
-            "mitigation": "Focus on unique value proposition and superior user experience"
-        },
-        {
-            "risk": "Technology Challenges",
-            "probability": "Medium",
-            "impact": "High",
-            "mitigation": "Invest in skilled development team and robust testing"
-        },
-        {
-            "risk": "Funding Shortfall",
-            "probability": "Medium",
-            "impact": "High",
-            "mitigation": "Develop multiple funding sources and lean operations"
-        },
-        {
-            "risk": "Regulatory Changes",
-            "probability": "Low",
-            "impact": "Medium",
-            "mitigation": "Stay informed about industry regulations and compliance"
-        }
-    ]
-
-def generate_success_metrics():
-    """Generate success metrics"""
-    return [
-        "Monthly active users (MAU)",
-        "Revenue growth rate",
-        "Customer retention rate",
-        "Net promoter score (NPS)",
-        "Market share percentage",
-        "Profit margins",
-        "User engagement metrics",
-        "Customer satisfaction scores"
-    ]
+def load_idea(user_id, data):
+    """The idea version a request refers to: ?idea_id, or a posted business_idea stored on the fly"""
+    if 'idea_id' in data:
+        return generation_store.get_owned(user_id, data['idea_id'], kind='idea')
+    artifact, _ = generation_store.save(user_id, 'idea', data['business_idea'])
+    return artifact
 
 @ai_business_builder_bp.route('/api/ai-business-builder/generate', methods=['POST'])
 @jwt_required()
+@seeded
+@metered('business_generation')
 def generate_business():
     """Generate a business idea using AI"""
     try:
@@ -331,15 +54,15 @@ def generate_business():
             data['budget_range']
         )
         
-        # Add metadata
-        business_idea['generated_by'] = current_user_id
-        business_idea['generated_at'] = time.strftime('%Y-%m-%d %H:%M:%S')
         business_idea['prompt'] = data['prompt']
         
+        # Stored once by content hash; the id stands in for the idea in refine and business-plan
+        artifact, _ = generation_store.save(current_user_id, 'idea', business_idea, request=data['prompt'])
+        
         return jsonify({
             'success': True,
             'message': 'Business idea generated successfully',
-            'data': business_idea
+            'data': generation_store.with_metadata(artifact, generation_store.strip_volatile(business_idea))
         }), 200
         
     except Exception as e:
@@ -350,22 +73,30 @@ def generate_business():
 
 @ai_business_builder_bp.route('/api/ai-business-builder/refine', methods=['POST'])
 @jwt_required()
+@metered('business_refinement')
 def refine_business():
     """Refine an existing business idea"""
     try:
         current_user_id = get_jwt_identity()
         data = request.get_json()
         
-        if 'business_idea' not in data or 'refinement_request' not in data:
+        if ('idea_id' not in data and 'business_idea' not in data) or 'refinement_request' not in data:
             return jsonify({
                 'success': False,
-                'message': 'Missing business_idea or refinement_request'
+                'message': 'Missing idea_id or refinement_request'
             }), 400
         
+        parent = load_idea(current_user_id, data)
+        if parent is None:
+            return jsonify({
+                'success': False,
+                'message': 'Business idea not found'
+            }), 404
+        
         # Simulate AI refinement
         time.sleep(1.5)
         
-        business_idea = data['business_idea']
+        business_idea = generation_store.materialize(parent)
         refinement = data['refinement_request']
         
         # Apply refinements based on request
@@ -381,17 +112,19 @@ def refine_business():
             business_idea['revenue_streams'].append("Premium consulting services")
             business_idea['revenue_streams'].append("White-label licensing")
         
-        business_idea['last_refined'] = time.strftime('%Y-%m-%d %H:%M:%S')
         business_idea['refinement_history'] = business_idea.get('refinement_history', [])
         business_idea['refinement_history'].append({
             'request': refinement,
             'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')
         })
         
+        # Stored as a delta against the version it was refined from
+        artifact, _ = generation_store.save(current_user_id, 'idea', business_idea, parent=parent, request=refinement)
+        
         return jsonify({
             'success': True,
             'message': 'Business idea refined successfully',
-            'data': business_idea
+            'data': generation_store.with_metadata(artifact, business_idea)
         }), 200
         
     except Exception as e:
@@ -400,68 +133,66 @@ def refine_business():
             'message': f'Error refining business idea: {str(e)}'
         }), 500
 
+def stored_business_plan():
+    """Response with the plan already generated for the requested idea version, or None"""
+    data = request.get_json(silent=True) or {}
+    if 'idea_id' not in data and 'business_idea' not in data:
+        return None
+    current_user_id = get_jwt_identity()
+    try:
+        idea = load_idea(current_user_id, data)
+    except Exception:
+        # Left to the view, which reports it
+        return None
+    if idea is None:
+        return None
+    existing = GeneratedArtifact.query.filter_by(
+        user_id=current_user_id, kind='plan', parent_id=idea.id
+    ).order_by(GeneratedArtifact.id.desc()).first()
+    if existing is None:
+        return None
+    return jsonify({
+        'success': True,
+        'message': 'Business plan generated successfully',
+        'data': generation_store.with_metadata(existing, generation_store.materialize(existing))
+    }), 200
+
 @ai_business_builder_bp.route('/api/ai-business-builder/business-plan', methods=['POST'])
 @jwt_required()
+# A plan already generated for this exact version is returned as is, without using quota
+@metered('business_plan', free=stored_business_plan)
 def generate_business_plan():
     """Generate a comprehensive business plan"""
     try:
         current_user_id = get_jwt_identity()
         data = request.get_json()
         
-        if 'business_idea' not in data:
+        if 'idea_id' not in data and 'business_idea' not in data:
             return jsonify({
                 'success': False,
-                'message': 'Missing business_idea'
+                'message': 'Missing idea_id'
             }), 400
         
+        idea = load_idea(current_user_id, data)
+        if idea is None:
+            return jsonify({
+                'success': False,
+                'message': 'Business idea not found'
+            }), 404
+        
         # Simulate AI business plan generation
         time.sleep(3)
         
-        business_idea = data['business_idea']
+        business_idea = generation_store.materialize(idea)
         
-        business_plan = {
-            'executive_summary': f"Executive Summary for {business_idea['title']}",
-            'company_description': business_idea['detailed_description'],
-            'market_analysis': {
-                'industry_overview': f"The {business_idea['industry']} industry is experiencing rapid growth",
-                'target_market': business_idea['target_market'],
-                'market_size': business_idea['market_size'],
-                'competitive_landscape': "Analysis of key competitors and market positioning"
-            },
-            'organization_management': {
-                'organizational_structure': "Lean startup structure with key roles defined",
-                'management_team': "Experienced team with relevant industry expertise",
-                'advisory_board': "Strategic advisors from industry and technology sectors"
-            },
-            'products_services': {
-                'description': business_idea['description'],
-                'key_features': business_idea['key_features'],
-                'competitive_advantages': business_idea['competitive_advantages']
-            },
-            'marketing_sales': business_idea['marketing_strategy'],
-            'funding_request': {
-                'funding_requirements': f"Seeking funding based on {business_idea['budget_range']} budget range",
-                'use_of_funds': [
-                    "Product development (40%)",
-                    "Marketing and sales (30%)",
-                    "Operations (20%)",
-                    "Working capital (10%)"
-                ]
-            },
-            'financial_projections': business_idea['financial_projections'],
-            'implementation_timeline': business_idea['implementation_steps'],
-            'risk_analysis': business_idea['risk_analysis'],
-            'appendix': {
-                'market_research': "Detailed market research data",
-                'financial_models': "Comprehensive financial models and assumptions",
-                'technical_specifications': "Technical architecture and requirements"
-            }
-        }
+        business_plan = templates.render_plan(business_idea)
+        
+        artifact, _ = generation_store.save(current_user_id, 'plan', business_plan, parent=idea)
         
         return jsonify({
             'success': True,
             'message': 'Business plan generated successfully',
-            'data': business_plan
+            'data': generation_store.with_metadata(artifact, business_plan)
         }), 200
         
     except Exception as e:
@@ -472,6 +203,8 @@ def generate_business_plan():
 
 @ai_business_builder_bp.route('/api/ai-business-builder/validate', methods=['POST'])
 @jwt_required()
+@seeded
+@metered('business_validation')
 def validate_business_idea():
     """Validate a business idea using AI analysis"""
     try:
@@ -489,54 +222,7 @@ def validate_business_idea():
         
         business_idea = data['business_idea']
         
-        validation_score = random.randint(65, 95)
-        
-        validation_result = {
-            'overall_score': validation_score,
-            'score_breakdown': {
-                'market_potential': random.randint(70, 95),
-                'technical_feasibility': random.randint(60, 90),
-                'financial_viability': random.randint(65, 85),
-                'competitive_advantage': random.randint(70, 90),
-                'execution_risk': random.randint(60, 80)
-            },
-            'strengths': [
-                "Strong market demand identified",
-                "Clear value proposition",
-                "Scalable business model",
-                "Experienced team requirements defined"
-            ],
-            'weaknesses': [
-                "High initial development costs",
-                "Competitive market landscape",
-                "Technology adoption challenges"
-            ],
-            'opportunities': [
-                "Growing market trends",
-                "Partnership possibilities",
-                "International expansion potential",
-                "Additional revenue streams"
-            ],
-            'threats': [
-                "New market entrants",
-                "Technology disruption",
-                "Economic downturns",
-                "Regulatory changes"
-            ],
-            'recommendations': [
-                "Conduct thorough market validation",
-                "Develop strategic partnerships",
-                "Focus on MVP development",
-                "Secure adequate funding",
-                "Build strong technical team"
-            ],
-            'next_steps': [
-                "Create detailed project timeline",
-                "Identify key performance indicators",
-                "Develop go-to-market strategy",
-                "Prepare investor pitch deck"
-            ]
-        }
+        validation_result = templates.render_validation(request_rng())
         
         return jsonify({
             'success': True,
@@ -550,3 +236,60 @@ def validate_business_idea():
             'message': f'Error validating business idea: {str(e)}'
         }), 500
 
+@ai_business_builder_bp.route('/api/ai-business-builder/artifacts', methods=['GET'])
+@jwt_required()
+def get_artifacts():
+    """The caller's generated ideas and plans, newest first, without their content"""
+    try:
+        current_user_id = get_jwt_identity()
+        page = request.args.get('page', 1, type=int)
+        per_page = min(request.args.get('per_page', 20, type=int), 100)
+        
+        query = GeneratedArtifact.query.filter_by(user_id=current_user_id)
+        if request.args.get('kind'):
+            query = query.filter_by(kind=request.args['kind'])
+        pagination = query.order_by(GeneratedArtifact.id.desc()).paginate(page=page, per_page=per_page, error_out=False)
+        
+        return jsonify({
+            'success': True,
+            'data': [artifact.to_dict() for artifact in pagination.items],
+            'pagination': {
+                'page': page,
+                'per_page': per_page,
+                'total': pagination.total,
+                'pages': pagination.pages,
+                'has_next': pagination.has_next,
+                'has_prev': pagination.has_prev
+            }
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error loading generation history: {str(e)}'
+        }), 500
+
+@ai_business_builder_bp.route('/api/ai-business-builder/artifacts/<int:artifact_id>', methods=['GET'])
+@jwt_required()
+def get_artifact(artifact_id):
+    """One stored idea or plan version with its full content"""
+    try:
+        current_user_id = get_jwt_identity()
+        artifact = generation_store.get_owned(current_user_id, artifact_id)
+        if artifact is None:
+            return jsonify({
+                'success': False,
+                'message': 'Not found'
+            }), 404
+        
+        return jsonify({
+            'success': True,
+            'data': generation_store.with_metadata(artifact, generation_store.materialize(artifact)),
+            'artifact': artifact.to_dict()
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error loading generated content: {str(e)}'
+        }), 500
@@ -2,8 +2,9 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from src.models.user import User, db
 from src.models.business_idea import BusinessIdea
+from src.services.usage_meter import meter, metered
+from src.services.seeded_generation import request_rng, seeded
 import json
-import random
 
 ai_studio_bp = Blueprint('ai_studio', __name__)
 
@@ -70,6 +71,8 @@ AI_MARKETING_CONTENT = [
 
 @ai_studio_bp.route('/generate-idea', methods=['POST'])
 @jwt_required()
+@seeded
+@metered('idea_generation')
 def generate_business_idea():
     try:
         user_id = get_jwt_identity()
@@ -87,12 +90,12 @@ def generate_business_idea():
         import time
         time.sleep(2)
         
-        # Select a random business idea and customize it
-        base_idea = random.choice(AI_BUSINESS_IDEAS)
+        # Select a random business idea and customize a copy of it
+        rng = request_rng()
+        base_idea = dict(rng.choice(AI_BUSINESS_IDEAS))
         
         # Customize based on user input
         if industry and industry != base_idea['category']:
-            base_idea = dict(base_idea)  # Make a copy
             base_idea['category'] = industry
             base_idea['title'] = f"{industry}-focused {base_idea['title']}"
         
@@ -104,7 +107,7 @@ def generate_business_idea():
             'message': 'Business idea generated successfully',
             'business_idea': base_idea,
             'generation_time': '2.3 seconds',
-            'confidence_score': random.uniform(0.85, 0.98)
+            'confidence_score': rng.uniform(0.85, 0.98)
         }), 200
         
     except Exception as e:
@@ -112,6 +115,7 @@ def generate_business_idea():
 
 @ai_studio_bp.route('/enhance-idea', methods=['POST'])
 @jwt_required()
+@metered('idea_enhancement')
 def enhance_business_idea():
     try:
         user_id = get_jwt_identity()
@@ -168,6 +172,7 @@ def enhance_business_idea():
 
 @ai_studio_bp.route('/generate-marketing', methods=['POST'])
 @jwt_required()
+@metered('marketing_content')
 def generate_marketing_content():
     try:
         user_id = get_jwt_identity()
@@ -228,6 +233,8 @@ def generate_marketing_content():
 
 @ai_studio_bp.route('/validate-idea', methods=['POST'])
 @jwt_required()
+@seeded
+@metered('idea_validation')
 def validate_business_idea():
     try:
         user_id = get_jwt_identity()
@@ -248,10 +255,11 @@ def validate_business_idea():
         time.sleep(2.5)
         
         # Generate validation scores
-        market_potential = random.uniform(0.7, 0.95)
-        competition_level = random.uniform(0.3, 0.8)
-        feasibility = random.uniform(0.6, 0.9)
-        innovation_score = random.uniform(0.5, 0.95)
+        rng = request_rng()
+        market_potential = rng.uniform(0.7, 0.95)
+        competition_level = rng.uniform(0.3, 0.8)
+        feasibility = rng.uniform(0.6, 0.9)
+        innovation_score = rng.uniform(0.5, 0.95)
         
         overall_score = (market_potential + (1 - competition_level) + feasibility + innovation_score) / 4
         
@@ -298,22 +306,8 @@ def get_usage_stats():
         if not user or user.user_type != 'creator':
             return jsonify({'error': 'Only creators can access AI Studio'}), 403
         
-        # Mock usage statistics based on subscription tier
-        if user.subscription_tier == 'basic':
-            monthly_limit = 10
-            used_this_month = random.randint(5, 10)
-        elif user.subscription_tier == 'inventor':
-            monthly_limit = 100
-            used_this_month = random.randint(20, 80)
-        else:  # guru
-            monthly_limit = -1  # unlimited
-            used_this_month = random.randint(50, 200)
-        
-        stats = {
-            'subscription_tier': user.subscription_tier,
-            'monthly_limit': monthly_limit,
-            'used_this_month': used_this_month,
-            'remaining': monthly_limit - used_this_month if monthly_limit > 0 else -1,
+        stats = meter.stats(user_id)
+        stats.update({
             'features_available': {
                 'idea_generation': True,
                 'idea_enhancement': user.subscription_tier in ['inventor', 'guru'],
@@ -322,7 +316,7 @@ def get_usage_stats():
                 'export_options': user.subscription_tier in ['inventor', 'guru'],
                 'advanced_analytics': user.subscription_tier == 'guru'
             }
-        }
+        })
         
         return jsonify({'usage_stats': stats}), 200
         
@@ -2,11 +2,13 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 from src.models.user import User, db
 from src.models.subscription import Subscription
+from src.services.rate_limit import limiter, json_field_key
 from datetime import datetime, timedelta
 
 auth_bp = Blueprint('auth', __name__)
 
 @auth_bp.route('/register', methods=['POST'])
+@limiter.limit('5/minute', key='ip')
 def register():
     try:
         data = request.get_json()
@@ -68,6 +70,11 @@ def register():
         return jsonify({'error': str(e)}), 500
 
 @auth_bp.route('/login', methods=['POST'])
+@limiter.limit('20/minute', key='ip')
+@limiter.limit('5/minute', key=json_field_key('email'))
+# Spread over many IPs, guesses at one account still meet this. It is loose enough that an attacker
+# cannot keep the owner out for long, while the per-IP limits above stop a single client much sooner
+@limiter.limit('30/hour', key=json_field_key('email', per_ip=False), burst=10)
 def login():
     try:
         data = request.get_json()
@@ -2,6 +2,8 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from src.models.user import db
 from src.models.business_idea import BusinessIdea
+from src.services.entitlements import entitlements, record_purchase
+from src.services.thumbnails import thumbnails
 import json
 
 business_ideas_bp = Blueprint('business_ideas', __name__)
@@ -156,7 +158,7 @@ def get_business_ideas():
         
         return jsonify({
             'success': True,
-            'data': paginated_ideas,
+            'data': thumbnails.with_thumbnails(paginated_ideas),
             'pagination': {
                 'page': page,
                 'per_page': per_page,
@@ -189,7 +191,7 @@ def get_business_idea_detail(idea_id):
         
         return jsonify({
             'success': True,
-            'data': idea
+            'data': dict(idea, purchased=entitlements.has(current_user_id, 'curated_idea', idea_id))
         }), 200
         
     except Exception as e:
@@ -230,13 +232,16 @@ def purchase_business_idea(idea_id):
                 'message': 'Business idea not found'
             }), 404
         
-        # In a real implementation, this would:
-        # 1. Process payment through Stripe/PayPal
-        # 2. Create a purchase record in the database
-        # 3. Grant access to the full business plan
-        # 4. Send confirmation email
+        if entitlements.has(current_user_id, 'curated_idea', idea_id):
+            return jsonify({
+                'success': False,
+                'message': 'You already own this business idea'
+            }), 409
+        
+        # Payment processing is still simulated; the completed transaction grants access
+        transaction = record_purchase(current_user_id, 'curated_idea', idea_id, float(idea['price']))
+        db.session.commit()
         
-        # For now, return a success message
         return jsonify({
             'success': True,
             'message': f'Successfully purchased "{idea["title"]}" for ${idea["price"]}',
@@ -244,12 +249,14 @@ def purchase_business_idea(idea_id):
                 'idea_id': idea_id,
                 'title': idea['title'],
                 'price': idea['price'],
-                'purchase_date': '2024-01-01T00:00:00Z',  # Current timestamp in real implementation
+                'transaction_id': transaction.id,
+                'purchase_date': transaction.created_at.isoformat() + 'Z',
                 'access_granted': True
             }
         }), 200
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({
             'success': False,
             'message': f'Error processing purchase: {str(e)}'
@@ -0,0 +1,320 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from src.models.user import db
+from src.models.business_idea import BusinessIdea
+from src.models.creator_profile import CreatorProfile, CreatorReview, ServicePackage
+from src.services.creator_search import get_index
+from src.services.reputation import get_aggregate
+from src.services.thumbnails import thumbnails
+from src.services import projections, tagging
+from sqlalchemy.exc import IntegrityError
+
+creators_bp = Blueprint('creators', __name__)
+
+def parse_list_arg(name):
+    """Accept both ?skill=a&skill=b and ?skill=a,b"""
+    values = []
+    for raw in request.args.getlist(name):
+        values.extend(v.strip() for v in raw.split(',') if v.strip())
+    return values
+
+def parse_rating(data, key, required=False):
+    """Validate a 1-5 score from a request body; raises ValueError"""
+    value = data.get(key)
+    if value is None:
+        if required:
+            raise ValueError(f'{key} is required')
+        return None
+    # bool is an int subclass; true must not count as a 1-star score
+    if isinstance(value, bool) or not isinstance(value, int) or not 1 <= value <= 5:
+        raise ValueError(f'{key} must be an integer from 1 to 5')
+    return value
+
+def parse_bool_arg(name):
+    value = request.args.get(name)
+    if value is None:
+        return None
+    return value.lower() in ('1', 'true', 'yes')
+
+@creators_bp.route('/search', methods=['GET'])
+def search_creators():
+    """Faceted creator discovery (public endpoint)"""
+    try:
+        page = request.args.get('page', 1, type=int)
+        per_page = max(min(request.args.get('per_page', 20, type=int), 100), 1)
+        
+        result = get_index().search(
+            skills=parse_list_arg('skill'),
+            industries=parse_list_arg('industry'),
+            languages=parse_list_arg('language'),
+            min_rate=request.args.get('min_rate', type=float),
+            max_rate=request.args.get('max_rate', type=float),
+            min_years=request.args.get('min_years', type=int),
+            max_years=request.args.get('max_years', type=int),
+            available=parse_bool_arg('available'),
+            verified=parse_bool_arg('verified'),
+            location=request.args.get('location'),
+            page=page,
+            per_page=per_page,
+            facet_limit=request.args.get('facet_limit', 20, type=int)
+        )
+        
+        # Fetch only the page of profiles, then restore rank order
+        fields = projections.parse_fields(CreatorProfile, request.args.get('fields'))
+        profiles = {}
+        if result['ids']:
+            query = CreatorProfile.query.filter(CreatorProfile.id.in_(result['ids']))
+            profiles = {p.id: p for p in projections.apply(query, CreatorProfile, fields).all()}
+        
+        return jsonify({
+            'creators': thumbnails.with_thumbnails(
+                [projections.project(profiles[pid], fields) for pid in result['ids'] if pid in profiles]
+            ),
+            'facets': result['facets'],
+            'pagination': {
+                'page': page,
+                'per_page': per_page,
+                'total': result['total'],
+                'pages': (result['total'] + per_page - 1) // per_page,
+                'has_next': page * per_page < result['total'],
+                'has_prev': page > 1
+            }
+        }), 200
+        
+    except projections.ProjectionError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@creators_bp.route('', methods=['GET'])
+def get_creators():
+    """List creator profiles; ?fields= selects the attributes returned"""
+    try:
+        page = request.args.get('page', 1, type=int)
+        per_page = max(min(request.args.get('per_page', 20, type=int), 100), 1)
+        fields = projections.parse_fields(CreatorProfile, request.args.get('fields'))
+        
+        query = CreatorProfile.query.order_by(
+            CreatorProfile.is_featured.desc(),
+            CreatorProfile.client_satisfaction.desc(),
+            CreatorProfile.id
+        )
+        pagination = projections.apply(query, CreatorProfile, fields).paginate(
+            page=page, per_page=per_page, error_out=False
+        )
+        
+        return jsonify({
+            'creators': thumbnails.with_thumbnails([projections.project(p, fields) for p in pagination.items]),
+            'pagination': {
+                'page': page,
+                'per_page': per_page,
+                'total': pagination.total,
+                'pages': pagination.pages,
+                'has_next': pagination.has_next,
+                'has_prev': pagination.has_prev
+            }
+        }), 200
+        
+    except projections.ProjectionError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@creators_bp.route('/<int:profile_id>', methods=['GET'])
+def get_creator(profile_id):
+    """Creator profile detail; ?fields= selects attributes and child collections"""
+    try:
+        fields = projections.parse_fields(CreatorProfile, request.args.get('fields'))
+        query = CreatorProfile.query.filter(CreatorProfile.id == profile_id)
+        profile = projections.apply(query, CreatorProfile, fields).first()
+        
+        if not profile:
+            return jsonify({'error': 'Creator not found'}), 404
+        
+        return jsonify({'creator': projections.project(profile, fields)}), 200
+        
+    except projections.ProjectionError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@creators_bp.route('/service-packages', methods=['GET'])
+def get_service_packages():
+    """Active service packages; ?fields=creator_profile.user.username pulls in owners in batches"""
+    try:
+        page = request.args.get('page', 1, type=int)
+        per_page = max(min(request.args.get('per_page', 20, type=int), 100), 1)
+        category = request.args.get('category')
+        fields = projections.parse_fields(ServicePackage, request.args.get('fields'))
+        
+        query = ServicePackage.query.filter(ServicePackage.is_active.is_(True))
+        if category and category != 'all':
+            query = query.filter(ServicePackage.category == category)
+        tags, tag_mode = tagging.parse_filter(request.args)
+        query = tagging.filter_tagged(query, 'service_package', tags, tag_mode)
+        query = query.order_by(ServicePackage.is_featured.desc(), ServicePackage.created_at.desc())
+        
+        pagination = projections.apply(query, ServicePackage, fields).paginate(
+            page=page, per_page=per_page, error_out=False
+        )
+        
+        return jsonify({
+            'service_packages': [projections.project(p, fields) for p in pagination.items],
+            'pagination': {
+                'page': page,
+                'per_page': per_page,
+                'total': pagination.total,
+                'pages': pagination.pages,
+                'has_next': pagination.has_next,
+                'has_prev': pagination.has_prev
+            }
+        }), 200
+        
+    except (projections.ProjectionError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+REVIEW_SCORES = ('communication_rating', 'quality_rating', 'delivery_rating', 'value_rating')
+
+@creators_bp.route('/<int:profile_id>/reviews', methods=['GET'])
+def get_creator_reviews(profile_id):
+    """Reviews for a creator with the precomputed rating breakdown"""
+    try:
+        page = request.args.get('page', 1, type=int)
+        per_page = max(min(request.args.get('per_page', 20, type=int), 100), 1)
+        
+        pagination = CreatorReview.query.filter_by(creator_profile_id=profile_id).order_by(
+            CreatorReview.created_at.desc()
+        ).paginate(page=page, per_page=per_page, error_out=False)
+        
+        aggregate = get_aggregate('creator_profile', profile_id)
+        
+        return jsonify({
+            'reviews': [review.to_dict() for review in pagination.items],
+            'reputation': aggregate.to_dict() if aggregate else None,
+            'pagination': {
+                'page': page,
+                'per_page': per_page,
+                'total': pagination.total,
+                'pages': pagination.pages,
+                'has_next': pagination.has_next,
+                'has_prev': pagination.has_prev
+            }
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@creators_bp.route('/<int:profile_id>/reviews', methods=['POST'])
+@jwt_required()
+def create_creator_review(profile_id):
+    try:
+        user_id = get_jwt_identity()
+        data = request.get_json() or {}
+        
+        profile = CreatorProfile.query.get(profile_id)
+        if not profile:
+            return jsonify({'error': 'Creator not found'}), 404
+        if profile.user_id == user_id:
+            return jsonify({'error': 'You cannot review yourself'}), 400
+        
+        try:
+            scores = {key: parse_rating(data, key) for key in REVIEW_SCORES}
+            rating = parse_rating(data, 'rating', required=True)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        package_id = data.get('service_package_id')
+        if package_id is not None and not ServicePackage.query.filter_by(
+            id=package_id, creator_profile_id=profile_id
+        ).first():
+            return jsonify({'error': 'Service package not found for this creator'}), 404
+        
+        idea_id = data.get('business_idea_id')
+        if idea_id is not None and not BusinessIdea.query.filter_by(
+            id=idea_id, creator_id=profile.user_id
+        ).first():
+            return jsonify({'error': 'Business idea not found for this creator'}), 404
+        
+        if CreatorReview.query.filter_by(creator_profile_id=profile_id, reviewer_id=user_id).first():
+            return jsonify({'error': 'You have already reviewed this creator'}), 409
+        
+        review = CreatorReview(
+            creator_profile_id=profile_id,
+            reviewer_id=user_id,
+            rating=rating,
+            title=data.get('title'),
+            comment=data.get('comment'),
+            project_type=data.get('project_type'),
+            service_package_id=package_id,
+            business_idea_id=idea_id,
+            **scores
+        )
+        db.session.add(review)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return jsonify({'error': 'You have already reviewed this creator'}), 409
+        
+        return jsonify({
+            'message': 'Review posted',
+            'review': review.to_dict()
+        }), 201
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@creators_bp.route('/reviews/<int:review_id>', methods=['PUT'])
+@jwt_required()
+def update_creator_review(review_id):
+    try:
+        user_id = get_jwt_identity()
+        data = request.get_json() or {}
+        
+        review = CreatorReview.query.get(review_id)
+        if not review or review.reviewer_id != user_id:
+            return jsonify({'error': 'Review not found'}), 404
+        
+        try:
+            for key in ('rating',) + REVIEW_SCORES:
+                if key in data:
+                    setattr(review, key, parse_rating(data, key, required=key == 'rating'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        for key in ('title', 'comment', 'project_type'):
+            if key in data:
+                setattr(review, key, data[key])
+        
+        db.session.commit()
+        
+        return jsonify({
+            'message': 'Review updated',
+            'review': review.to_dict()
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@creators_bp.route('/reviews/<int:review_id>', methods=['DELETE'])
+@jwt_required()
+def delete_creator_review(review_id):
+    try:
+        user_id = get_jwt_identity()
+        
+        review = CreatorReview.query.get(review_id)
+        if not review or review.reviewer_id != user_id:
+            return jsonify({'error': 'Review not found'}), 404
+        
+        db.session.delete(review)
+        db.session.commit()
+        
+        return jsonify({'message': 'Review deleted'}), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,183 @@
+from flask import Blueprint, Response, request, jsonify, send_file, stream_with_context
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from src.models.user import User, db
+from src.models.transaction import ExportJob
+from src.services.earnings import PLATFORM, ALL_TYPES, GRANULARITIES, query_rollups, summarize, item_type_breakdown
+from src.services import exports
+from datetime import datetime
+import os
+
+finance_bp = Blueprint('finance', __name__)
+
+def parse_range():
+    """Read granularity/start/end/item_type query args; raises ValueError on bad input"""
+    granularity = request.args.get('granularity', 'day')
+    if granularity not in GRANULARITIES:
+        raise ValueError('granularity must be day or month')
+    start = request.args.get('start')
+    end = request.args.get('end')
+    return {
+        'granularity': granularity,
+        'start': datetime.strptime(start, '%Y-%m-%d').date() if start else None,
+        'end': datetime.strptime(end, '%Y-%m-%d').date() if end else None,
+        'item_type': request.args.get('item_type', ALL_TYPES),
+        'currency': request.args.get('currency', 'USD')
+    }
+
+def export_scope(user_id, scope):
+    """Row restriction for an export: own purchases, own sales, or everything for admins"""
+    if scope == 'purchases':
+        return {'user_id': user_id}
+    if scope == 'sales':
+        return {'seller_id': user_id}
+    if scope == 'all':
+        user = User.query.get(user_id)
+        if user and user.user_type == 'admin':
+            return {}
+        raise PermissionError('Admin access required')
+    raise ValueError('scope must be purchases, sales or all')
+
+def rollup_report(seller_id, args):
+    rollups = query_rollups(seller_id, **args)
+    return {
+        'granularity': args['granularity'],
+        'item_type': args['item_type'],
+        'currency': args['currency'],
+        'totals': summarize(rollups),
+        'by_item_type': item_type_breakdown(
+            seller_id, args['granularity'], args['start'], args['end'], args['currency']
+        ),
+        'series': [rollup.to_dict() for rollup in rollups]
+    }
+
+@finance_bp.route('/earnings', methods=['GET'])
+@jwt_required()
+def get_earnings():
+    """The current seller's earnings, read only from rollup rows"""
+    try:
+        user_id = get_jwt_identity()
+        try:
+            args = parse_range()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return jsonify({'earnings': rollup_report(user_id, args)}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@finance_bp.route('/revenue', methods=['GET'])
+@jwt_required()
+def get_platform_revenue():
+    """Platform-wide revenue and commission from rollup rows (admins only)"""
+    try:
+        user_id = get_jwt_identity()
+        user = User.query.get(user_id)
+        
+        if not user or user.user_type != 'admin':
+            return jsonify({'error': 'Admin access required'}), 403
+        
+        try:
+            args = parse_range()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return jsonify({'revenue': rollup_report(PLATFORM, args)}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@finance_bp.route('/exports/transactions', methods=['GET'])
+@jwt_required()
+def stream_transactions_export():
+    """Stream transactions as CSV or NDJSON with constant memory"""
+    try:
+        user_id = get_jwt_identity()
+        export_format = request.args.get('format', 'csv')
+        if export_format not in exports.FORMATS:
+            return jsonify({'error': 'format must be csv or ndjson'}), 400
+        
+        try:
+            scope = export_scope(user_id, request.args.get('scope', 'purchases'))
+            filters = exports.parse_filters(request.args)
+        except PermissionError as e:
+            return jsonify({'error': str(e)}), 403
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        rows = exports.transaction_rows(filters, **scope)
+        body = stream_with_context(exports.ENCODERS[export_format](rows))
+        filename = f'transactions-{datetime.utcnow().strftime("%Y%m%d%H%M%S")}.{export_format}'
+        return Response(body, mimetype=exports.MIMETYPES[export_format], headers={
+            'Content-Disposition': f'attachment; filename="{filename}"'
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@finance_bp.route('/exports', methods=['POST'])
+@jwt_required()
+def create_export():
+    """Queue a gzip export in the background for very large date ranges"""
+    try:
+        user_id = get_jwt_identity()
+        data = request.get_json() or {}
+        export_format = data.get('format', 'csv')
+        if export_format not in exports.FORMATS:
+            return jsonify({'error': 'format must be csv or ndjson'}), 400
+        
+        try:
+            scope = export_scope(user_id, data.get('scope', 'purchases'))
+            filters = exports.parse_filters(data)
+        except PermissionError as e:
+            return jsonify({'error': str(e)}), 403
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        job = exports.runner.submit(user_id, export_format, filters, scope)
+        
+        return jsonify({
+            'message': 'Export queued',
+            'export': job.to_dict()
+        }), 202
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@finance_bp.route('/exports/<job_id>', methods=['GET'])
+@jwt_required()
+def get_export(job_id):
+    try:
+        user_id = get_jwt_identity()
+        job = db.session.get(ExportJob, job_id)
+        if not job or job.user_id != user_id:
+            return jsonify({'error': 'Export not found'}), 404
+        
+        return jsonify({'export': job.to_dict()}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@finance_bp.route('/exports/<job_id>/download', methods=['GET'])
+@jwt_required()
+def download_export(job_id):
+    try:
+        user_id = get_jwt_identity()
+        job = db.session.get(ExportJob, job_id)
+        if not job or job.user_id != user_id:
+            return jsonify({'error': 'Export not found'}), 404
+        if job.status == 'expired':
+            return jsonify({'error': 'Export has expired', 'export': job.to_dict()}), 410
+        if job.status != 'completed' or not job.file_path or not os.path.exists(job.file_path):
+            return jsonify({'error': 'Export is not ready', 'export': job.to_dict()}), 409
+        
+        return send_file(
+            job.file_path,
+            mimetype='application/gzip',
+            as_attachment=True,
+            download_name=f'transactions-{job.id}.{job.format}.gz'
+        )
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
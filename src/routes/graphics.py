@@ -1,6 +1,12 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, send_file
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from src.models.user import db
+from src.services.asset_store import InvalidSignature, store as asset_store
+from src.services.entitlements import entitlements, record_purchase
+from src.services.thumbnails import thumbnails
+from src.services.zip_stream import ZipMember, ZipStream
+from datetime import datetime
+from urllib.parse import quote, urlencode
 import json
 
 graphics_bp = Blueprint('graphics', __name__)
@@ -285,7 +291,7 @@ def get_graphics():
         
         return jsonify({
             'success': True,
-            'data': paginated_graphics,
+            'data': thumbnails.with_thumbnails(paginated_graphics),
             'pagination': {
                 'page': page,
                 'per_page': per_page,
@@ -359,11 +365,15 @@ def purchase_graphic(graphic_id):
                 'message': 'Graphic not found'
             }), 404
         
-        # In a real implementation, this would:
-        # 1. Process payment through Stripe/PayPal
-        # 2. Create a purchase record in the database
-        # 3. Grant access to download files
-        # 4. Send confirmation email with download links
+        if entitlements.has(current_user_id, 'graphic', graphic_id):
+            return jsonify({
+                'success': False,
+                'message': 'You already own this graphic'
+            }), 409
+        
+        # Payment processing is still simulated; the completed transaction grants download access
+        transaction = record_purchase(current_user_id, 'graphic', graphic_id, float(graphic['price']), seller_id=graphic['creator_id'])
+        db.session.commit()
         
         return jsonify({
             'success': True,
@@ -372,76 +382,164 @@ def purchase_graphic(graphic_id):
                 'graphic_id': graphic_id,
                 'title': graphic['title'],
                 'price': graphic['price'],
-                'purchase_date': '2024-01-01T00:00:00Z',
+                'transaction_id': transaction.id,
+                'purchase_date': transaction.created_at.isoformat() + 'Z',
                 'download_links': [
                     f'/api/graphics/{graphic_id}/download/source',
                     f'/api/graphics/{graphic_id}/download/preview',
-                    f'/api/graphics/{graphic_id}/download/documentation'
+                    f'/api/graphics/{graphic_id}/download/documentation',
+                    f'/api/graphics/{graphic_id}/download/bundle'
                 ]
             }
         }), 200
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({
             'success': False,
             'message': f'Error processing purchase: {str(e)}'
         }), 500
 
+def find_graphic(graphic_id):
+    return next((graphic for graphic in GRAPHICS_DATA if graphic['id'] == graphic_id), None)
+
+def can_download(user_id, graphic):
+    """Creators get their own files; everyone else needs a purchase (no query once the user's set is cached)"""
+    return graphic['creator_id'] == user_id or entitlements.has(user_id, 'graphic', graphic['id'])
+
+def download_info(graphic):
+    """Download name and description of each file type of a graphic"""
+    name = graphic["title"].replace(" ", "_")
+    return {
+        'source': {
+            'filename': f'{name}_Source_Files.zip',
+            'description': 'Complete source files in all available formats'
+        },
+        'preview': {
+            'filename': f'{name}_Preview.pdf',
+            'description': 'High-resolution preview of all graphics'
+        },
+        'documentation': {
+            'filename': f'{name}_Documentation.pdf',
+            'description': 'Usage guide and license information'
+        }
+    }
+
+BUNDLE = 'bundle'
+
+def bundle_for(graphic):
+    """A ZIP of every stored file of a graphic, or None while nothing is stored"""
+    members = []
+    try:
+        for file_type, info in download_info(graphic).items():
+            stored = asset_store.open(graphic['id'], file_type)
+            if stored is not None:
+                source, stat, crc = stored
+                members.append(ZipMember(info['filename'], source, stat.st_size, crc, stat.st_mtime))
+    except BaseException:
+        for member in members:
+            member.source.close()
+        raise
+    return ZipStream(members) if members else None
+
+def bundle_name(graphic):
+    return f'{graphic["title"].replace(" ", "_")}_Bundle.zip'
+
+def bundle_response(bundle, filename):
+    """Stream a bundle with Content-Length, honoring a single Range (and If-Range on its ETag)"""
+    etag = bundle.etag()
+    headers = {
+        'Content-Disposition': f"attachment; filename*=UTF-8''{quote(filename)}",
+        'Accept-Ranges': 'bytes',
+        'Cache-Control': 'private, no-cache',
+        'ETag': f'"{etag}"'
+    }
+    if request.if_none_match.contains(etag):
+        bundle.close()
+        return Response(status=304, headers=headers)
+    
+    start, stop, status = 0, bundle.length, 200
+    if_range = request.if_range
+    # The bundle has no Last-Modified, so a dated If-Range never matches
+    fresh = if_range.etag == etag if if_range.etag or if_range.date else True
+    if request.range is not None and fresh:
+        byte_range = request.range.range_for_length(bundle.length)
+        if byte_range is None:
+            headers['Content-Range'] = f'bytes */{bundle.length}'
+            bundle.close()
+            return Response(status=416, headers=headers)
+        start, stop = byte_range
+        status = 206
+        headers['Content-Range'] = f'bytes {start}-{stop - 1}/{bundle.length}'
+    
+    response = Response(bundle.iter_bytes(start, stop), status=status, mimetype='application/zip',
+                        headers=headers, direct_passthrough=True)
+    response.content_length = stop - start
+    response.call_on_close(bundle.close)
+    return response
+
+def format_size(size):
+    for unit in ('bytes', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f'{size} {unit}' if unit == 'bytes' else f'{size:.1f} {unit}'
+        size /= 1024
+
 @graphics_bp.route('/api/graphics/<int:graphic_id>/download/<file_type>', methods=['GET'])
 @jwt_required()
 def download_graphic_file(graphic_id, file_type):
-    """Download graphic files after purchase"""
+    """Issue a signed, expiring download URL for a graphic file"""
     try:
         current_user_id = get_jwt_identity()
         
-        # Find the graphic by ID
-        graphic = next((graphic for graphic in GRAPHICS_DATA if graphic['id'] == graphic_id), None)
-        
+        graphic = find_graphic(graphic_id)
         if not graphic:
             return jsonify({
                 'success': False,
                 'message': 'Graphic not found'
             }), 404
         
-        # In a real implementation, this would:
-        # 1. Verify user has purchased this graphic
-        # 2. Generate secure download link
-        # 3. Track download analytics
-        # 4. Return actual file or redirect to file URL
-        
-        download_info = {
-            'source': {
-                'filename': f'{graphic["title"].replace(" ", "_")}_Source_Files.zip',
-                'description': 'Complete source files in all available formats',
-                'size': graphic['file_size']
-            },
-            'preview': {
-                'filename': f'{graphic["title"].replace(" ", "_")}_Preview.pdf',
-                'description': 'High-resolution preview of all graphics',
-                'size': '5 MB'
-            },
-            'documentation': {
-                'filename': f'{graphic["title"].replace(" ", "_")}_Documentation.pdf',
-                'description': 'Usage guide and license information',
-                'size': '2 MB'
-            }
-        }
-        
-        if file_type not in download_info:
+        info = download_info(graphic)
+        if file_type not in info and file_type != BUNDLE:
             return jsonify({
                 'success': False,
                 'message': 'Invalid file type'
             }), 400
         
+        if not can_download(current_user_id, graphic):
+            return jsonify({
+                'success': False,
+                'message': 'Purchase this graphic to download its files'
+            }), 403
+        
+        if file_type == BUNDLE:
+            bundle = bundle_for(graphic)
+            size = bundle.length if bundle else None
+            if bundle is not None:
+                bundle.close()
+            filename, description = bundle_name(graphic), 'Every available file in one ZIP'
+        else:
+            stat = asset_store.stat(graphic_id, file_type)
+            size = stat.st_size if stat else None
+            filename, description = info[file_type]['filename'], info[file_type]['description']
+        if size is None:
+            return jsonify({
+                'success': False,
+                'message': 'File not available yet'
+            }), 404
+        
+        # The link itself carries the grant, so download managers can resume it without a JWT
+        params = asset_store.sign(graphic_id, file_type, current_user_id)
+        
         return jsonify({
             'success': True,
             'message': 'Download ready',
             'data': {
-                'download_url': f'/downloads/{graphic_id}/{file_type}',
-                'filename': download_info[file_type]['filename'],
-                'description': download_info[file_type]['description'],
-                'size': download_info[file_type]['size'],
-                'expires_at': '2024-01-08T00:00:00Z'  # 7 days from now
+                'download_url': f'/api/graphics/files/{graphic_id}/{file_type}?{urlencode(params)}',
+                'filename': filename,
+                'description': description,
+                'size': format_size(size),
+                'size_bytes': size,
+                'expires_at': datetime.utcfromtimestamp(params['e']).isoformat() + 'Z'
             }
         }), 200
         
@@ -451,6 +549,113 @@ def download_graphic_file(graphic_id, file_type):
             'message': f'Error processing download: {str(e)}'
         }), 500
 
+@graphics_bp.route('/api/graphics/files/<int:graphic_id>/<file_type>', methods=['GET', 'HEAD'])
+def serve_graphic_file(graphic_id, file_type):
+    """Serve a graphic file from a signed URL; supports Range/If-Range for resumable downloads"""
+    try:
+        graphic = find_graphic(graphic_id)
+        info = download_info(graphic) if graphic else {}
+        if file_type not in info and not (graphic and file_type == BUNDLE):
+            return jsonify({
+                'success': False,
+                'message': 'File not found'
+            }), 404
+        
+        try:
+            user_id = asset_store.verify(graphic_id, file_type, request.args)
+        except InvalidSignature as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 403
+        
+        # Re-checked so a refund also cuts off links already handed out
+        if not can_download(user_id, graphic):
+            return jsonify({
+                'success': False,
+                'message': 'Purchase this graphic to download its files'
+            }), 403
+        
+        # Assembled on the fly from the stored files; nothing is written per buyer
+        if file_type == BUNDLE:
+            bundle = bundle_for(graphic)
+            if bundle is None:
+                return jsonify({
+                    'success': False,
+                    'message': 'File not found'
+                }), 404
+            return bundle_response(bundle, bundle_name(graphic))
+        
+        path = asset_store.path_for(graphic_id, file_type)
+        if asset_store.stat(graphic_id, file_type) is None:
+            return jsonify({
+                'success': False,
+                'message': 'File not found'
+            }), 404
+        
+        # wsgi.file_wrapper (sendfile under gunicorn) or X-Sendfile with USE_X_SENDFILE
+        response = send_file(
+            path,
+            as_attachment=True,
+            download_name=info[file_type]['filename'],
+            conditional=True
+        )
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.headers.setdefault('Accept-Ranges', 'bytes')
+        return response
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error serving file: {str(e)}'
+        }), 500
+
+@graphics_bp.route('/api/graphics/<int:graphic_id>/files/<file_type>', methods=['PUT'])
+@jwt_required()
+def upload_graphic_file(graphic_id, file_type):
+    """Store a graphic file from the raw request body (creator only)"""
+    try:
+        current_user_id = get_jwt_identity()
+        
+        graphic = find_graphic(graphic_id)
+        if not graphic:
+            return jsonify({
+                'success': False,
+                'message': 'Graphic not found'
+            }), 404
+        
+        if graphic['creator_id'] != current_user_id:
+            return jsonify({
+                'success': False,
+                'message': 'Only the creator can upload files for this graphic'
+            }), 403
+        
+        if file_type not in download_info(graphic):
+            return jsonify({
+                'success': False,
+                'message': 'Invalid file type'
+            }), 400
+        
+        # Streamed to disk in chunks; never buffered in memory
+        size = asset_store.save(graphic_id, file_type, request.stream)
+        
+        return jsonify({
+            'success': True,
+            'message': 'File stored',
+            'data': {
+                'graphic_id': graphic_id,
+                'file_type': file_type,
+                'size': format_size(size),
+                'size_bytes': size
+            }
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error storing file: {str(e)}'
+        }), 500
+
 @graphics_bp.route('/api/graphics/creator/<int:creator_id>', methods=['GET'])
 @jwt_required()
 def get_creator_graphics(creator_id):
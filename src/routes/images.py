@@ -0,0 +1,40 @@
+from flask import Blueprint, jsonify, redirect, request, send_file
+from src.services.thumbnails import SIZES, UnsupportedImage, thumbnails
+from concurrent.futures import TimeoutError as RenderTimeout
+
+images_bp = Blueprint('images', __name__)
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+@images_bp.route('/api/images/<size>/<path:source>', methods=['GET', 'HEAD'])
+def get_thumbnail(size, source):
+    """WebP thumbnail of a site image; versioned URLs are cacheable forever"""
+    try:
+        if size not in SIZES:
+            return jsonify({'error': f'Unknown size, expected one of: {", ".join(SIZES)}'}), 404
+        if not thumbnails.available:
+            return jsonify({'error': 'Thumbnails are not available on this server'}), 503
+        source_path = thumbnails.resolve('/' + source)
+        if source_path is None:
+            return jsonify({'error': 'Image not found'}), 404
+        
+        # Unversioned or stale links are sent to the current version, which is the cacheable one
+        version = thumbnails.version('/' + source, fresh=True)
+        if request.args.get('v') != version:
+            response = redirect(thumbnails.url_for('/' + source, size, fresh=True), code=302)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        
+        path, key = thumbnails.derivative(source_path, size)
+        response = send_file(path, mimetype='image/webp', etag=key, conditional=True, max_age=None)
+        response.headers['Cache-Control'] = IMMUTABLE
+        return response
+        
+    except UnsupportedImage as e:
+        return jsonify({'error': str(e)}), 415
+    except RenderTimeout:
+        response = jsonify({'error': 'Thumbnail is still being rendered'})
+        response.headers['Retry-After'] = '2'
+        return response, 503
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
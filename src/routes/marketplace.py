@@ -1,13 +1,30 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+from flask import Blueprint, current_app, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt, verify_jwt_in_request
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import PyJWTError
 from src.models.user import User, db
 from src.models.business_idea import BusinessIdea
 from src.models.service import Service
 from src.models.transaction import Transaction
+from src.services.rate_limit import limiter
+from src.services import catalog_import, tagging, autocomplete
+from src.services.entitlements import ONE_TIME_TYPES, entitlements, record_purchase
+from src.services.thumbnails import thumbnails
+from sqlalchemy.orm import joinedload, undefer_group
 import json
 
 marketplace_bp = Blueprint('marketplace', __name__)
 
+IMPORT_MAX_ROWS = 5000
+
+def optional_identity():
+    """The caller's user id, or None when no token is sent or it is expired or invalid"""
+    try:
+        verify_jwt_in_request(optional=True)
+    except (JWTExtendedException, PyJWTError):
+        return None
+    return get_jwt_identity()
+
 @marketplace_bp.route('/business-ideas', methods=['GET'])
 def get_business_ideas():
     try:
@@ -31,6 +48,9 @@ def get_business_ideas():
                 BusinessIdea.description.contains(search)
             )
         
+        tags, tag_mode = tagging.parse_filter(request.args)
+        query = tagging.filter_tagged(query, 'business_idea', tags, tag_mode)
+        
         # Apply sorting
         if sort_by == 'price':
             if order == 'asc':
@@ -52,7 +72,7 @@ def get_business_ideas():
         ideas = pagination.items
         
         return jsonify({
-            'business_ideas': [idea.to_summary_dict() for idea in ideas],
+            'business_ideas': thumbnails.with_thumbnails([idea.to_summary_dict() for idea in ideas]),
             'pagination': {
                 'page': page,
                 'per_page': per_page,
@@ -63,18 +83,29 @@ def get_business_ideas():
             }
         }), 200
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @marketplace_bp.route('/business-ideas/<int:idea_id>', methods=['GET'])
 def get_business_idea(idea_id):
     try:
-        idea = BusinessIdea.query.get(idea_id)
+        # A stale token on a public page reads as anonymous rather than failing the request
+        user_id = optional_identity()
         
+        idea = db.session.get(BusinessIdea, idea_id)
         if not idea or not idea.is_published:
             return jsonify({'error': 'Business idea not found'}), 404
         
-        return jsonify({'business_idea': idea.to_dict()}), 200
+        # Plan text only for the creator and buyers; the deferred plan group loads on first access
+        purchased = entitlements.has(user_id, 'business_idea', idea_id)
+        include_plan = purchased or (user_id is not None and idea.creator_id == user_id)
+        
+        return jsonify({
+            'business_idea': idea.to_dict(include_plan=include_plan),
+            'purchased': purchased
+        }), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -96,10 +127,9 @@ def create_business_idea():
         data = request.get_json()
         
         # Validate required fields
-        required_fields = ['title', 'description', 'category', 'price']
-        for field in required_fields:
-            if field not in data or not data[field]:
-                return jsonify({'error': f'{field} is required'}), 400
+        missing = catalog_import.missing_fields('business_idea', data)
+        if missing:
+            return jsonify({'error': f'{missing[0]} is required'}), 400
         
         # Create business idea
         idea = BusinessIdea(
@@ -130,6 +160,50 @@ def create_business_idea():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@marketplace_bp.route('/import', methods=['POST'])
+@jwt_required()
+def import_catalog():
+    """Bulk import business ideas or services from an NDJSON or CSV upload"""
+    try:
+        user_id = get_jwt_identity()
+        user = User.query.get(user_id)
+        
+        if not user or user.user_type != 'creator':
+            return jsonify({'error': 'Only creators can import listings'}), 403
+        
+        if user.subscription_tier == 'basic':
+            return jsonify({'error': 'Upgrade to Inventor or Guru plan to import listings'}), 403
+        
+        item_type = request.args.get('item_type')
+        if item_type not in catalog_import.MODELS:
+            return jsonify({'error': 'item_type must be business_idea or service'}), 400
+        
+        # Either a multipart "file" field or the raw request body
+        upload = request.files.get('file')
+        if upload:
+            stream = upload.stream
+            guessed = catalog_import.guess_format(upload.filename, upload.mimetype)
+        else:
+            stream = request.stream
+            guessed = catalog_import.guess_format(mimetype=request.mimetype)
+        import_format = request.args.get('format', guessed)
+        if import_format not in catalog_import.FORMATS:
+            return jsonify({'error': 'format must be ndjson or csv'}), 400
+        
+        rows = catalog_import.read_rows(catalog_import.text_stream(stream), import_format)
+        report = catalog_import.import_catalog(
+            item_type, rows, user_id, max_rows=current_app.config.get('CATALOG_IMPORT_MAX_ROWS', IMPORT_MAX_ROWS)
+        )
+        
+        status = 201 if report['imported'] else 400
+        return jsonify({'message': f"Imported {report['imported']} of {report['received']} rows", 'report': report}), status
+        
+    except UnicodeDecodeError:
+        return jsonify({'error': 'Upload must be UTF-8 text'}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @marketplace_bp.route('/services', methods=['GET'])
 def get_services():
     try:
@@ -174,7 +248,7 @@ def get_services():
         services = pagination.items
         
         return jsonify({
-            'services': [service.to_summary_dict() for service in services],
+            'services': thumbnails.with_thumbnails([service.to_summary_dict() for service in services]),
             'pagination': {
                 'page': page,
                 'per_page': per_page,
@@ -218,10 +292,9 @@ def create_service():
         data = request.get_json()
         
         # Validate required fields
-        required_fields = ['title', 'description', 'category', 'starting_price', 'delivery_time']
-        for field in required_fields:
-            if field not in data or not data[field]:
-                return jsonify({'error': f'{field} is required'}), 400
+        missing = catalog_import.missing_fields('service', data)
+        if missing:
+            return jsonify({'error': f'{missing[0]} is required'}), 400
         
         # Create service
         service = Service(
@@ -250,6 +323,7 @@ def create_service():
 
 @marketplace_bp.route('/purchase', methods=['POST'])
 @jwt_required()
+@limiter.limit('10/minute', key='user')
 def purchase_item():
     try:
         user_id = get_jwt_identity()
@@ -261,51 +335,36 @@ def purchase_item():
         data = request.get_json()
         
         # Validate required fields
-        required_fields = ['item_type', 'item_id', 'amount']
+        required_fields = ['item_type', 'item_id']
         for field in required_fields:
             if field not in data:
                 return jsonify({'error': f'{field} is required'}), 400
         
         item_type = data['item_type']
         item_id = data['item_id']
-        amount = float(data['amount'])
         
-        # Get the item and seller
-        seller_id = None
+        # Get the item, seller and price; the amount charged never comes from the client
         if item_type == 'business_idea':
             item = BusinessIdea.query.get(item_id)
             if not item or not item.is_published:
                 return jsonify({'error': 'Business idea not found'}), 404
-            seller_id = item.creator_id
+            amount = item.price
         elif item_type == 'service':
             item = Service.query.get(item_id)
             if not item or not item.is_published:
                 return jsonify({'error': 'Service not found'}), 404
-            seller_id = item.creator_id
+            amount = item.starting_price
         else:
             return jsonify({'error': 'Invalid item type'}), 400
         
-        # Calculate commission
-        commission_rate = 0.1  # 10%
-        commission_amount = amount * commission_rate
-        seller_amount = amount - commission_amount
-        
-        # Create transaction
-        transaction = Transaction(
-            user_id=user_id,
-            transaction_type='purchase',
-            item_type=item_type,
-            item_id=item_id,
-            amount=amount,
-            status='completed',  # In real app, this would be 'pending' until payment is processed
-            payment_method=data.get('payment_method', 'credit_card'),
-            seller_id=seller_id,
-            commission_rate=commission_rate,
-            commission_amount=commission_amount,
-            seller_amount=seller_amount
-        )
+        if item_type in ONE_TIME_TYPES and entitlements.has(user_id, item_type, item.id):
+            return jsonify({'error': 'You have already purchased this item'}), 409
         
-        db.session.add(transaction)
+        transaction = record_purchase(
+            user_id, item_type, item.id, float(amount),
+            seller_id=item.creator_id,
+            payment_method=data.get('payment_method', 'credit_card')
+        )
         
         # Update item sales count
         if item_type == 'business_idea':
@@ -344,6 +403,33 @@ def get_categories():
     
     return jsonify({'categories': categories}), 200
 
+@marketplace_bp.route('/tags', methods=['GET'])
+def get_tags():
+    """Most used tags with counts; ?prefix= narrows them for autocomplete"""
+    try:
+        subject_type = request.args.get('type', 'business_idea')
+        if subject_type not in tagging.TAGGED:
+            return jsonify({'error': f"type must be one of {', '.join(tagging.TAGGED)}"}), 400
+        limit = min(request.args.get('limit', 10, type=int), 50)
+        
+        tags = tagging.tag_counts(subject_type, request.args.get('prefix'), limit)
+        return jsonify({'tags': tags}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@marketplace_bp.route('/autocomplete', methods=['GET'])
+def get_autocomplete():
+    """Suggestions for a search box prefix: titles, categories, tags and creators"""
+    try:
+        prefix = request.args.get('q', '')
+        limit = min(request.args.get('limit', 10, type=int), autocomplete.CACHE_DEPTH)
+        
+        return jsonify({'suggestions': autocomplete.get_index().suggest(prefix, limit)}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @marketplace_bp.route('/my-creations', methods=['GET'])
 @jwt_required()
 def get_my_creations():
@@ -361,8 +447,8 @@ def get_my_creations():
         services = Service.query.filter_by(creator_id=user_id).all()
         
         return jsonify({
-            'business_ideas': [idea.to_summary_dict() for idea in business_ideas],
-            'services': [service.to_summary_dict() for service in services]
+            'business_ideas': thumbnails.with_thumbnails([idea.to_summary_dict() for idea in business_ideas]),
+            'services': thumbnails.with_thumbnails([service.to_summary_dict() for service in services])
         }), 200
         
     except Exception as e:
@@ -375,13 +461,34 @@ def get_my_purchases():
         user_id = get_jwt_identity()
         
         # Get user's purchase transactions
-        transactions = Transaction.query.filter_by(
+        transactions = Transaction.query.options(joinedload(Transaction.seller)).filter_by(
             user_id=user_id, 
             transaction_type='purchase'
         ).order_by(Transaction.created_at.desc()).all()
         
+        # Buyers get the full plans they still hold, loaded in one query; refunded purchases list without them
+        idea_ids = {
+            t.item_id for t in transactions
+            if t.item_type == 'business_idea' and entitlements.has(user_id, 'business_idea', t.item_id)
+        }
+        ideas = {}
+        if idea_ids:
+            ideas = {
+                idea.id: idea for idea in
+                BusinessIdea.query.options(undefer_group('plan'), joinedload(BusinessIdea.creator)).filter(
+                    BusinessIdea.id.in_(idea_ids)
+                )
+            }
+        
+        purchases = []
+        for transaction in transactions:
+            purchase = transaction.to_dict()
+            if transaction.item_type == 'business_idea' and transaction.item_id in ideas:
+                purchase['business_idea'] = ideas[transaction.item_id].to_dict()
+            purchases.append(purchase)
+        
         return jsonify({
-            'purchases': [transaction.to_dict() for transaction in transactions]
+            'purchases': purchases
         }), 200
         
     except Exception as e:
@@ -0,0 +1,154 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from src.models.user import User, db
+from src.services import inbox
+
+messaging_bp = Blueprint('messaging', __name__)
+
+@messaging_bp.route('/conversations', methods=['GET'])
+@jwt_required()
+def get_conversations():
+    """Inbox: conversations with per-participant unread counts and last message"""
+    try:
+        user_id = get_jwt_identity()
+        page = request.args.get('page', 1, type=int)
+        per_page = request.args.get('per_page', 20, type=int)
+        
+        pagination = inbox.get_inbox(user_id, page=page, per_page=per_page)
+        
+        return jsonify({
+            'conversations': [c.to_dict(current_user_id=user_id) for c in pagination.items],
+            'unread_total': inbox.get_unread_total(user_id),
+            'pagination': {
+                'page': page,
+                'per_page': per_page,
+                'total': pagination.total,
+                'pages': pagination.pages,
+                'has_next': pagination.has_next,
+                'has_prev': pagination.has_prev
+            }
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@messaging_bp.route('/conversations', methods=['POST'])
+@jwt_required()
+def create_conversation():
+    try:
+        user_id = get_jwt_identity()
+        data = request.get_json()
+        
+        participant_ids = data.get('participant_ids') or []
+        if not participant_ids:
+            return jsonify({'error': 'participant_ids is required'}), 400
+        
+        found = User.query.filter(User.id.in_(participant_ids)).count()
+        if found != len(set(participant_ids)):
+            return jsonify({'error': 'One or more participants not found'}), 404
+        
+        conversation_type = 'group' if len(set(participant_ids) - {user_id}) > 1 else 'direct'
+        conversation = inbox.create_conversation(
+            user_id,
+            participant_ids,
+            conversation_type=conversation_type,
+            title=data.get('title'),
+            description=data.get('description')
+        )
+        db.session.commit()
+        
+        return jsonify({
+            'message': 'Conversation created successfully',
+            'conversation': conversation.to_dict(current_user_id=user_id)
+        }), 201
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@messaging_bp.route('/conversations/<int:conversation_id>/messages', methods=['GET'])
+@jwt_required()
+def get_messages(conversation_id):
+    """Cursor-paginated message history, newest first"""
+    try:
+        user_id = get_jwt_identity()
+        if not inbox.get_participant(conversation_id, user_id):
+            return jsonify({'error': 'Conversation not found'}), 404
+        
+        before = request.args.get('before', type=int)
+        limit = request.args.get('limit', inbox.DEFAULT_PAGE_SIZE, type=int)
+        
+        messages, next_cursor = inbox.get_history(conversation_id, before_id=before, limit=limit)
+        
+        return jsonify({
+            'messages': [message.to_dict() for message in messages],
+            'next_cursor': next_cursor
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@messaging_bp.route('/conversations/<int:conversation_id>/messages', methods=['POST'])
+@jwt_required()
+def send_message(conversation_id):
+    try:
+        user_id = get_jwt_identity()
+        if not inbox.get_participant(conversation_id, user_id):
+            return jsonify({'error': 'Conversation not found'}), 404
+        
+        data = request.get_json()
+        if not data.get('content'):
+            return jsonify({'error': 'content is required'}), 400
+        
+        message = inbox.send_message(
+            conversation_id,
+            user_id,
+            data['content'],
+            message_type=data.get('message_type', 'text'),
+            attachment_url=data.get('attachment_url'),
+            attachment_name=data.get('attachment_name'),
+            attachment_size=data.get('attachment_size')
+        )
+        db.session.commit()
+        inbox.publish_message(message)
+        
+        return jsonify({
+            'message': 'Message sent successfully',
+            'data': message.to_dict()
+        }), 201
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@messaging_bp.route('/conversations/<int:conversation_id>/read', methods=['POST'])
+@jwt_required()
+def mark_conversation_read(conversation_id):
+    """Mark all messages up to a message id as read"""
+    try:
+        user_id = get_jwt_identity()
+        participant = inbox.get_participant(conversation_id, user_id)
+        if not participant:
+            return jsonify({'error': 'Conversation not found'}), 404
+        
+        data = request.get_json() or {}
+        up_to_message_id = data.get('up_to_message_id') or participant.last_message_id
+        if not up_to_message_id:
+            return jsonify({'marked_read': 0, 'unread_count': participant.unread_count}), 200
+        
+        marked = inbox.mark_read(participant, int(up_to_message_id))
+        db.session.commit()
+        inbox.publish_read(participant, marked)
+        
+        return jsonify({
+            'marked_read': marked,
+            'unread_count': participant.unread_count,
+            'last_read_message_id': participant.last_read_message_id
+        }), 200
+        
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,252 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from src.models.user import User, db
+from src.models.networking import Connection, Follow, Post
+from src.services.social_graph import get_graph
+from src.services.notifications import notify
+from src.services import tagging
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime
+
+network_bp = Blueprint('network', __name__)
+
+def users_by_id(user_ids):
+    """Public profiles for a list of ids in one query, keeping the given order"""
+    if not user_ids:
+        return []
+    users = {u.id: u for u in User.query.filter(User.id.in_(user_ids)).all()}
+    return [users[uid].to_public_dict() for uid in user_ids if uid in users]
+
+@network_bp.route('/connections', methods=['POST'])
+@jwt_required()
+def request_connection():
+    try:
+        user_id = get_jwt_identity()
+        data = request.get_json()
+        
+        recipient_id = data.get('recipient_id')
+        if not recipient_id or recipient_id == user_id:
+            return jsonify({'error': 'A valid recipient_id is required'}), 400
+        
+        if not User.query.get(recipient_id):
+            return jsonify({'error': 'User not found'}), 404
+        
+        existing = Connection.query.filter(
+            ((Connection.requester_id == user_id) & (Connection.recipient_id == recipient_id)) |
+            ((Connection.requester_id == recipient_id) & (Connection.recipient_id == user_id))
+        ).first()
+        if existing:
+            return jsonify({'error': 'Connection already exists', 'connection': existing.to_dict()}), 400
+        
+        connection = Connection(
+            requester_id=user_id,
+            recipient_id=recipient_id,
+            message=data.get('message')
+        )
+        db.session.add(connection)
+        db.session.commit()
+        
+        notify(recipient_id, 'connection_request', actor_id=user_id, action_url='/network/requests')
+        
+        return jsonify({
+            'message': 'Connection request sent',
+            'connection': connection.to_dict()
+        }), 201
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@network_bp.route('/connections/<int:connection_id>/accept', methods=['POST'])
+@jwt_required()
+def accept_connection(connection_id):
+    try:
+        user_id = get_jwt_identity()
+        connection = Connection.query.get(connection_id)
+        
+        if not connection or connection.recipient_id != user_id:
+            return jsonify({'error': 'Connection request not found'}), 404
+        
+        if connection.status != 'pending':
+            return jsonify({'error': f'Connection is already {connection.status}'}), 400
+        
+        connection.status = 'accepted'
+        connection.accepted_at = datetime.utcnow()
+        db.session.commit()
+        
+        notify(connection.requester_id, 'connection_accepted', actor_id=user_id)
+        
+        return jsonify({
+            'message': 'Connection accepted',
+            'connection': connection.to_dict()
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@network_bp.route('/connections/<int:other_user_id>', methods=['DELETE'])
+@jwt_required()
+def remove_connection(other_user_id):
+    try:
+        user_id = get_jwt_identity()
+        connection = Connection.query.filter(
+            ((Connection.requester_id == user_id) & (Connection.recipient_id == other_user_id)) |
+            ((Connection.requester_id == other_user_id) & (Connection.recipient_id == user_id))
+        ).first()
+        
+        if not connection:
+            return jsonify({'error': 'Connection not found'}), 404
+        
+        db.session.delete(connection)
+        db.session.commit()
+        
+        return jsonify({'message': 'Connection removed'}), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@network_bp.route('/follow/<int:other_user_id>', methods=['POST'])
+@jwt_required()
+def follow_user(other_user_id):
+    try:
+        user_id = get_jwt_identity()
+        if other_user_id == user_id:
+            return jsonify({'error': 'You cannot follow yourself'}), 400
+        
+        if get_graph().is_following(user_id, other_user_id):
+            return jsonify({'message': 'Already following'}), 200
+        
+        if not User.query.get(other_user_id):
+            return jsonify({'error': 'User not found'}), 404
+        
+        db.session.add(Follow(follower_id=user_id, following_id=other_user_id))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Followed from another request since the graph was read
+            db.session.rollback()
+            return jsonify({'message': 'Already following'}), 200
+        
+        notify(other_user_id, 'follow', actor_id=user_id)
+        
+        return jsonify({'message': 'Now following'}), 201
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@network_bp.route('/follow/<int:other_user_id>', methods=['DELETE'])
+@jwt_required()
+def unfollow_user(other_user_id):
+    try:
+        user_id = get_jwt_identity()
+        follow = Follow.query.filter_by(follower_id=user_id, following_id=other_user_id).first()
+        
+        if not follow:
+            return jsonify({'error': 'Not following this user'}), 404
+        
+        db.session.delete(follow)
+        db.session.commit()
+        
+        return jsonify({'message': 'Unfollowed'}), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@network_bp.route('/relationship/<int:other_user_id>', methods=['GET'])
+@jwt_required()
+def get_relationship(other_user_id):
+    """Connection and follow state between the current user and another user"""
+    try:
+        user_id = get_jwt_identity()
+        graph = get_graph()
+        
+        return jsonify({
+            'user_id': other_user_id,
+            'connected': graph.are_connected(user_id, other_user_id),
+            'following': graph.is_following(user_id, other_user_id),
+            'followed_by': graph.is_following(other_user_id, user_id),
+            'mutual_connections': graph.mutual_count(user_id, other_user_id),
+            'connection_count': graph.connection_count(other_user_id),
+            'follower_count': graph.follower_count(other_user_id)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@network_bp.route('/mutual/<int:other_user_id>', methods=['GET'])
+@jwt_required()
+def get_mutual_connections(other_user_id):
+    try:
+        user_id = get_jwt_identity()
+        limit = min(request.args.get('limit', 20, type=int), 100)
+        
+        mutual = get_graph().mutual_connections(user_id, other_user_id)
+        
+        return jsonify({
+            'total': len(mutual),
+            'users': users_by_id(mutual[:limit])
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@network_bp.route('/suggestions', methods=['GET'])
+@jwt_required()
+def get_suggestions():
+    """People you may know, ranked by shared connections"""
+    try:
+        user_id = get_jwt_identity()
+        limit = min(request.args.get('limit', 10, type=int), 50)
+        
+        ranked = get_graph().suggestions(user_id, limit=limit)
+        shared = dict(ranked)
+        
+        users = users_by_id([uid for uid, _ in ranked])
+        for user in users:
+            user['mutual_connections'] = shared[user['id']]
+        
+        return jsonify({'suggestions': users}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@network_bp.route('/users/<int:author_id>/posts', methods=['GET'])
+@jwt_required()
+def get_user_posts(author_id):
+    """An author's posts, filtered by visibility with a single graph lookup"""
+    try:
+        user_id = get_jwt_identity()
+        page = request.args.get('page', 1, type=int)
+        per_page = request.args.get('per_page', 20, type=int)
+        
+        levels = get_graph().visible_post_levels(user_id, author_id)
+        
+        tags, tag_mode = tagging.parse_filter(request.args)
+        
+        query = Post.query.filter(
+            Post.author_id == author_id,
+            Post.visibility.in_(levels)
+        )
+        query = tagging.filter_tagged(query, 'post', tags, tag_mode)
+        pagination = query.order_by(Post.created_at.desc()).paginate(page=page, per_page=per_page, error_out=False)
+        
+        return jsonify({
+            'posts': [post.to_dict(current_user_id=user_id) for post in pagination.items],
+            'pagination': {
+                'page': page,
+                'per_page': per_page,
+                'total': pagination.total,
+                'pages': pagination.pages,
+                'has_next': pagination.has_next,
+                'has_prev': pagination.has_prev
+            }
+        }), 200
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
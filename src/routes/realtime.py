@@ -0,0 +1,81 @@
+from flask import Blueprint, Response, current_app, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+from src.services import pubsub
+
+realtime_bp = Blueprint('realtime', __name__)
+
+HEARTBEAT_SECONDS = 15
+TICKET_SECONDS = 60
+TICKET_SALT = 'realtime-stream-ticket'
+
+# EventSource cannot send an Authorization header, and a JWT in the URL would end up in access
+# logs and browser history for its whole lifetime. The stream takes a ticket instead: signed,
+# good for one minute and for nothing but opening the stream. When a connection drops after the
+# ticket has expired, the client fetches a new one and reconnects with ?last_event_id=.
+
+def _tickets():
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt=TICKET_SALT)
+
+def make_ticket(user_id):
+    return _tickets().dumps(user_id)
+
+def format_sse(event_id, event_type, payload):
+    return f'id: {event_id}\nevent: {event_type}\ndata: {payload}\n\n'
+
+def event_stream(subscription):
+    try:
+        # Tell the browser how long to wait before reconnecting
+        yield 'retry: 3000\n\n'
+        while True:
+            event = subscription.get(timeout=HEARTBEAT_SECONDS)
+            if event is None:
+                yield ': keep-alive\n\n'
+            else:
+                yield format_sse(*event)
+    finally:
+        subscription.close()
+
+@realtime_bp.route('/ticket', methods=['POST'])
+@jwt_required()
+def issue_ticket():
+    """Short-lived ticket for opening the event stream from a browser"""
+    return jsonify({
+        'ticket': make_ticket(get_jwt_identity()),
+        'expires_in': current_app.config.get('STREAM_TICKET_SECONDS', TICKET_SECONDS)
+    }), 201
+
+@realtime_bp.route('/stream', methods=['GET'])
+@jwt_required(optional=True)
+def stream():
+    """Server-sent events for the current user: messages, notifications and unread counts"""
+    try:
+        user_id = get_jwt_identity()
+        if user_id is None:
+            ticket = request.args.get('ticket')
+            if not ticket:
+                return jsonify({'error': 'A stream ticket or Authorization header is required'}), 401
+            try:
+                user_id = _tickets().loads(
+                    ticket, max_age=current_app.config.get('STREAM_TICKET_SECONDS', TICKET_SECONDS)
+                )
+            except SignatureExpired:
+                return jsonify({'error': 'Stream ticket expired'}), 401
+            except BadSignature:
+                return jsonify({'error': 'Invalid stream ticket'}), 401
+        
+        last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+        
+        subscription = pubsub.get_broker().subscribe(pubsub.user_channel(user_id), last_event_id=last_event_id)
+        
+        return Response(
+            event_stream(subscription),
+            mimetype='text/event-stream',
+            headers={
+                'Cache-Control': 'no-cache',
+                'X-Accel-Buffering': 'no'
+            }
+        )
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,160 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from src.models.user import db
+from src.models.team import Team, TeamMember, TeamProject, ProjectCollaboration
+from src.services import activity_log
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
+from itertools import islice
+
+teams_bp = Blueprint('teams', __name__)
+
+def accessible_team_ids(user_id):
+    """Ids of teams the user owns or is an active member of"""
+    member_of = db.select(TeamMember.team_id).where(
+        TeamMember.user_id == user_id,
+        TeamMember.status == 'active'
+    )
+    return db.select(Team.id).where(
+        Team.is_active.is_(True),
+        (Team.owner_id == user_id) | Team.id.in_(member_of)
+    )
+
+def member_counts(team_ids):
+    """{team_id: {'total': n, 'active': n}} from one grouped query"""
+    counts = {team_id: {'total': 0, 'active': 0} for team_id in team_ids}
+    rows = db.session.query(TeamMember.team_id, TeamMember.status, func.count()).filter(
+        TeamMember.team_id.in_(team_ids)
+    ).group_by(TeamMember.team_id, TeamMember.status)
+    for team_id, status, count in rows:
+        counts[team_id]['total'] += count
+        if status == 'active':
+            counts[team_id]['active'] = count
+    return counts
+
+def project_counts(team_ids):
+    """Per-team project totals broken down by status and priority from one grouped query"""
+    counts = {team_id: {'total': 0, 'by_status': {}, 'by_priority': {}} for team_id in team_ids}
+    rows = db.session.query(TeamProject.team_id, TeamProject.status, TeamProject.priority, func.count()).filter(
+        TeamProject.team_id.in_(team_ids)
+    ).group_by(TeamProject.team_id, TeamProject.status, TeamProject.priority)
+    for team_id, status, priority, count in rows:
+        team = counts[team_id]
+        team['total'] += count
+        team['by_status'][status] = team['by_status'].get(status, 0) + count
+        team['by_priority'][priority] = team['by_priority'].get(priority, 0) + count
+    return counts
+
+def recent_activity(team_ids, limit):
+    """Latest `limit` public activities per team from the partitioned activity log"""
+    found = activity_log.get_log().recent(team_ids, limit)
+    rows = [row for team_id in team_ids for row in found[team_id]]
+    serialized = iter(activity_log.to_dicts(rows))
+    return {team_id: list(islice(serialized, len(found[team_id]))) for team_id in team_ids}
+
+@teams_bp.route('/dashboard', methods=['GET'])
+@jwt_required()
+def get_dashboard():
+    """The user's teams with member, project and activity summaries in a fixed number of queries"""
+    try:
+        user_id = get_jwt_identity()
+        activity_limit = min(request.args.get('activity_limit', 10, type=int), 50)
+        
+        teams = Team.query.options(joinedload(Team.owner)).filter(
+            Team.id.in_(accessible_team_ids(user_id))
+        ).order_by(Team.updated_at.desc()).all()
+        team_ids = [team.id for team in teams]
+        
+        if not team_ids:
+            return jsonify({'teams': []}), 200
+        
+        members = member_counts(team_ids)
+        projects = project_counts(team_ids)
+        activity = recent_activity(team_ids, activity_limit) if activity_limit > 0 else {}
+        
+        result = []
+        for team in teams:
+            data = team.to_dict(member_count=members[team.id]['total'])
+            data['active_member_count'] = members[team.id]['active']
+            data['projects'] = projects[team.id]
+            data['recent_activity'] = activity.get(team.id, [])
+            result.append(data)
+        
+        return jsonify({'teams': result}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@teams_bp.route('/<int:team_id>/projects', methods=['GET'])
+@jwt_required()
+def get_team_projects(team_id):
+    """A team's projects with collaboration counts from one grouped query"""
+    try:
+        user_id = get_jwt_identity()
+        page = request.args.get('page', 1, type=int)
+        per_page = min(request.args.get('per_page', 20, type=int), 100)
+        status = request.args.get('status')
+        
+        if not db.session.execute(accessible_team_ids(user_id).where(Team.id == team_id)).first():
+            return jsonify({'error': 'Team not found'}), 404
+        
+        query = TeamProject.query.options(joinedload(TeamProject.creator)).filter_by(team_id=team_id)
+        if status and status != 'all':
+            query = query.filter_by(status=status)
+        pagination = query.order_by(TeamProject.updated_at.desc()).paginate(
+            page=page, per_page=per_page, error_out=False
+        )
+        
+        project_ids = [project.id for project in pagination.items]
+        collaboration_counts = dict(
+            db.session.query(ProjectCollaboration.project_id, func.count()).filter(
+                ProjectCollaboration.project_id.in_(project_ids)
+            ).group_by(ProjectCollaboration.project_id).all()
+        ) if project_ids else {}
+        
+        return jsonify({
+            'projects': [
+                project.to_dict(collaboration_count=collaboration_counts.get(project.id, 0))
+                for project in pagination.items
+            ],
+            'pagination': {
+                'page': page,
+                'per_page': per_page,
+                'total': pagination.total,
+                'pages': pagination.pages,
+                'has_next': pagination.has_next,
+                'has_prev': pagination.has_prev
+            }
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@teams_bp.route('/<int:team_id>/activity', methods=['GET'])
+@jwt_required()
+def get_team_activity(team_id):
+    """Cursor-paginated activity feed; ?before=<id> continues from the previous page"""
+    try:
+        user_id = get_jwt_identity()
+        limit = min(request.args.get('limit', 50, type=int), 200)
+        before = request.args.get('before', type=int)
+        
+        if not db.session.execute(accessible_team_ids(user_id).where(Team.id == team_id)).first():
+            return jsonify({'error': 'Team not found'}), 404
+        
+        # Fetch one extra row to learn whether another page exists
+        rows = list(islice(
+            activity_log.get_log().iter_team(team_id, before_id=before, chunk_size=limit + 1),
+            limit + 1
+        ))
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        
+        return jsonify({
+            'activities': activity_log.to_dicts(rows),
+            'next_cursor': str(rows[-1]['id']) if has_more else None,
+            'has_more': has_more
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,549 @@
+from flask import current_app
+from flask.cli import AppGroup
+from src.models.user import User, db
+from src.models.team import TeamActivity, TeamMember, TeamProject, ProjectCollaboration
+from sqlalchemy import Table, Column, Integer, BigInteger, String, Text, DateTime, Boolean, MetaData, Index, event, func, inspect
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta, timezone
+import atexit
+import click
+import gzip
+import json
+import os
+import random
+import re
+import threading
+
+PARTITION_PREFIX = 'team_activity_'
+PARTITION_PATTERN = re.compile(r'^team_activity_(\d{6})$')
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_FLUSH_SECONDS = 1.0
+DEFAULT_LIVE_MONTHS = 6
+MAX_FLUSH_ATTEMPTS = 5  # a batch failing this many flushes in a row goes to the dead-letter file
+DEAD_LETTER_FILE = 'dead_letter.ndjson'
+READ_CHUNK_SIZE = 500
+
+# Ids: 41 bits of milliseconds since ID_EPOCH (until 2089), 10 bits of node, 12 bits of sequence
+ID_EPOCH = datetime(2020, 1, 1, tzinfo=timezone.utc)
+NODE_BITS = 10
+SEQUENCE_BITS = 12
+IMPORT_NODE = 0  # reserved for import-legacy, so imported ids never meet live ones
+
+# Partitions live outside db.metadata so create_all() never touches them
+partition_metadata = MetaData()
+
+def partition_name(month):
+    return f'{PARTITION_PREFIX}{month}'
+
+def month_of(when):
+    return when.strftime('%Y%m')
+
+def month_of_id(activity_id):
+    """Ids start with the event's milliseconds, so the partition is recoverable from the id"""
+    millis = activity_id >> (NODE_BITS + SEQUENCE_BITS)
+    return (ID_EPOCH + timedelta(milliseconds=millis)).strftime('%Y%m')
+
+def _months_back(month, count):
+    year, mon = int(month[:4]), int(month[4:])
+    total = year * 12 + (mon - 1) - count
+    return f'{total // 12:04d}{total % 12 + 1:02d}'
+
+def partition_table(month):
+    name = partition_name(month)
+    table = partition_metadata.tables.get(name)
+    if table is None:
+        table = Table(
+            name, partition_metadata,
+            Column('id', BigInteger, primary_key=True, autoincrement=False),
+            Column('team_id', Integer, nullable=False),
+            Column('project_id', Integer, nullable=True),
+            Column('user_id', Integer, nullable=False),
+            Column('activity_type', String(50), nullable=False),
+            Column('activity_data', Text, nullable=True),
+            Column('created_at', DateTime, nullable=False),
+            Column('is_public', Boolean, nullable=False, default=True),
+            Index(f'ix_{name}_team_id', 'team_id', 'id'),
+        )
+    return table
+
+class IdGenerator:
+    """Time-ordered 63-bit ids, unique per node; more than 4096 in a millisecond carry into the next"""
+    
+    def __init__(self, node=None):
+        self._fixed_node = node
+        self._lock = threading.Lock()
+        self._reset()
+        if node is None and hasattr(os, 'register_at_fork'):
+            # A forked worker must not share its parent's node
+            os.register_at_fork(after_in_child=self._reset)
+    
+    def _reset(self):
+        self.node = self._fixed_node if self._fixed_node is not None else random.SystemRandom().randrange(1, 1 << NODE_BITS)
+        self._millis = -1
+        self._sequence = 0
+    
+    def next_id(self, when):
+        delta = when.replace(tzinfo=timezone.utc) - ID_EPOCH
+        millis = max(delta.days * 86400000 + delta.seconds * 1000 + delta.microseconds // 1000, 0)
+        with self._lock:
+            if millis <= self._millis:
+                # Same millisecond, or the clock stepped back: continue after the last id issued
+                millis = self._millis
+                self._sequence += 1
+                if self._sequence >> SEQUENCE_BITS:
+                    millis += 1
+                    self._sequence = 0
+            else:
+                self._sequence = 0
+            self._millis = millis
+            return (millis << (NODE_BITS + SEQUENCE_BITS)) | (self.node << SEQUENCE_BITS) | self._sequence
+
+class ActivityLog:
+    """Append-only team activity log stored in monthly partition tables"""
+    
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, flush_seconds=DEFAULT_FLUSH_SECONDS):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.app = None
+        self.archive_dir = None
+        self._lock = threading.Lock()
+        self._pending = []
+        self._failures = 0
+        self._wakeup = threading.Event()
+        self._worker = None
+        self._ids = IdGenerator()
+    
+    def init_app(self, app):
+        self.app = app
+        self.batch_size = app.config.get('ACTIVITY_BATCH_SIZE', self.batch_size)
+        self.flush_seconds = app.config.get('ACTIVITY_FLUSH_SECONDS', self.flush_seconds)
+        self.archive_dir = app.config.get(
+            'ACTIVITY_ARCHIVE_DIR',
+            os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database', 'activity_archive')
+        )
+        app.extensions['activity_log'] = self
+        atexit.register(self.flush)
+    
+    def next_id(self, when):
+        return self._ids.next_id(when)
+    
+    # Writes
+    
+    def append(self, team_id, user_id, activity_type, activity_data=None, project_id=None, is_public=True):
+        """Queue one activity; it is written with the next batch. Returns the activity id"""
+        now = datetime.utcnow()
+        row = {
+            'id': self.next_id(now),
+            'team_id': team_id,
+            'project_id': project_id,
+            'user_id': user_id,
+            'activity_type': activity_type,
+            'activity_data': activity_data if activity_data is None or isinstance(activity_data, str) else json.dumps(activity_data),
+            'created_at': now,
+            'is_public': is_public,
+        }
+        with self._lock:
+            self._pending.append(row)
+            pending = len(self._pending)
+        
+        self._ensure_worker()
+        if pending >= self.batch_size:
+            self._wakeup.set()
+        return row['id']
+    
+    def flush(self):
+        """Write queued activities, one executemany per partition; returns rows written"""
+        with self._lock:
+            rows, self._pending = self._pending, []
+        if not rows or self.app is None:
+            return 0
+        with self.app.app_context():
+            try:
+                self.write(rows)
+            except Exception:
+                db.session.rollback()
+                self._failures += 1
+                if self._failures >= MAX_FLUSH_ATTEMPTS:
+                    # Stop retrying a batch that keeps failing; replay-dead-letters re-queues it
+                    self._failures = 0
+                    self._dead_letter(rows)
+                else:
+                    # Back in front of anything queued since, so the next flush retries them in order
+                    with self._lock:
+                        self._pending[:0] = rows
+                raise
+        self._failures = 0
+        return len(rows)
+    
+    def clear(self):
+        """Drop queued activities without writing them"""
+        with self._lock:
+            self._pending = []
+            self._failures = 0
+    
+    def dead_letter_path(self):
+        return os.path.join(self.archive_dir, DEAD_LETTER_FILE)
+    
+    def _dead_letter(self, rows):
+        os.makedirs(self.archive_dir, exist_ok=True)
+        with open(self.dead_letter_path(), 'a', encoding='utf-8') as dead:
+            for row in rows:
+                dead.write(json.dumps(_serialize_row(row)) + '\n')
+        self.app.logger.error('Moved %d activities to %s after %d failed flushes',
+                              len(rows), self.dead_letter_path(), MAX_FLUSH_ATTEMPTS)
+    
+    def replay_dead_letters(self):
+        """Write dead-lettered activities back to their partitions; returns rows replayed"""
+        path = self.dead_letter_path()
+        if not os.path.exists(path):
+            return 0
+        # Rename first so rows dead-lettered while replaying land in a fresh file
+        replaying = f'{path}.replaying'
+        os.replace(path, replaying)
+        with open(replaying, encoding='utf-8') as dead:
+            rows = [_deserialize_row(json.loads(line)) for line in dead if line.strip()]
+        try:
+            self.write(rows)
+        except Exception:
+            db.session.rollback()
+            with open(path, 'a', encoding='utf-8') as dead, open(replaying, encoding='utf-8') as pending:
+                dead.writelines(pending)
+            os.remove(replaying)
+            raise
+        os.remove(replaying)
+        return len(rows)
+    
+    def write(self, rows):
+        """Insert already-built rows immediately, creating partitions as needed"""
+        by_month = {}
+        for row in rows:
+            by_month.setdefault(month_of(row['created_at']), []).append(row)
+        for month, month_rows in by_month.items():
+            table = self._ensure_partition(month)
+            db.session.execute(table.insert(), month_rows)
+        db.session.commit()
+    
+    def _ensure_partition(self, month):
+        table = partition_table(month)
+        # DDL on the session's connection so it shares the transaction (and SQLite's write lock)
+        table.create(db.session.connection(), checkfirst=True)
+        return table
+    
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            with self._lock:
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = threading.Thread(target=self._run, name='activity-log-flusher', daemon=True)
+                    self._worker.start()
+    
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_seconds)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                if self.app is not None:
+                    self.app.logger.exception('Activity log flush failed')
+    
+    # Reads
+    
+    def partitions(self):
+        """Months with a live partition table, oldest first"""
+        # Read every time: compaction and other workers add and drop partitions behind this process
+        names = db.session.execute(
+            db.text("SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE :prefix"),
+            {'prefix': f'{PARTITION_PREFIX}%'}
+        ).scalars()
+        return sorted(m.group(1) for m in map(PARTITION_PATTERN.match, names) if m)
+    
+    def iter_team(self, team_id, before_id=None, include_private=False, chunk_size=READ_CHUNK_SIZE):
+        """Yield a team's activity rows newest first, walking partitions with a keyset cursor"""
+        months = [m for m in reversed(self.partitions()) if before_id is None or m <= month_of_id(before_id)]
+        for month in months:
+            table = partition_table(month)
+            cursor = before_id
+            while True:
+                query = db.select(table).where(table.c.team_id == team_id)
+                if not include_private:
+                    query = query.where(table.c.is_public.is_(True))
+                if cursor is not None:
+                    query = query.where(table.c.id < cursor)
+                rows = db.session.execute(query.order_by(table.c.id.desc()).limit(chunk_size)).mappings().all()
+                for row in rows:
+                    yield dict(row)
+                if len(rows) < chunk_size:
+                    break
+                cursor = rows[-1]['id']
+    
+    def recent(self, team_ids, limit):
+        """Latest `limit` public rows per team; touches older partitions only for teams still short"""
+        found = {team_id: [] for team_id in team_ids}
+        for month in reversed(self.partitions()):
+            wanting = [team_id for team_id, rows in found.items() if len(rows) < limit]
+            if not wanting:
+                break
+            table = partition_table(month)
+            ranked = db.select(
+                table,
+                func.row_number().over(partition_by=table.c.team_id, order_by=table.c.id.desc()).label('position')
+            ).where(table.c.team_id.in_(wanting), table.c.is_public.is_(True)).subquery()
+            rows = db.session.execute(
+                db.select(ranked).where(ranked.c.position <= limit).order_by(ranked.c.id.desc())
+            ).mappings()
+            for row in rows:
+                bucket = found[row['team_id']]
+                if len(bucket) < limit:
+                    bucket.append(dict(row))
+        return found
+    
+    # Retention
+    
+    def archive_path(self, month):
+        return os.path.join(self.archive_dir, f'{partition_name(month)}.ndjson.gz')
+    
+    def archived_months(self):
+        if not self.archive_dir or not os.path.isdir(self.archive_dir):
+            return []
+        months = []
+        for filename in os.listdir(self.archive_dir):
+            match = PARTITION_PATTERN.match(filename.split('.', 1)[0])
+            if match and filename.endswith('.ndjson.gz'):
+                months.append(match.group(1))
+        return sorted(months)
+    
+    def compact(self, live_months=DEFAULT_LIVE_MONTHS, now=None):
+        """Move partitions older than live_months into gzip NDJSON archives and drop them"""
+        cutoff = _months_back(month_of(now or datetime.utcnow()), live_months)
+        os.makedirs(self.archive_dir, exist_ok=True)
+        compacted = []
+        for month in [m for m in self.partitions() if m < cutoff]:
+            table = partition_table(month)
+            path = self.archive_path(month)
+            temp_path = f'{path}.tmp'
+            # Write to a temp file first so a crash never leaves a half archive behind
+            with gzip.open(temp_path, 'wt', encoding='utf-8') as archive:
+                if os.path.exists(path):
+                    with gzip.open(path, 'rt', encoding='utf-8') as existing:
+                        for line in existing:
+                            archive.write(line)
+                rows = db.session.execute(db.select(table).order_by(table.c.id)).mappings()
+                for row in rows.yield_per(READ_CHUNK_SIZE):
+                    archive.write(json.dumps(_serialize_row(row)) + '\n')
+            os.replace(temp_path, path)
+            table.drop(db.session.connection())
+            db.session.commit()
+            partition_metadata.remove(table)
+            compacted.append(month)
+        return compacted
+    
+    def purge_archives(self, keep_months, now=None):
+        """Delete archives older than keep_months; returns the months removed"""
+        cutoff = _months_back(month_of(now or datetime.utcnow()), keep_months)
+        removed = []
+        for month in self.archived_months():
+            if month < cutoff:
+                os.remove(self.archive_path(month))
+                removed.append(month)
+        return removed
+    
+    def iter_archive(self, month, team_id=None):
+        """Stream rows back out of a compressed archive"""
+        with gzip.open(self.archive_path(month), 'rt', encoding='utf-8') as archive:
+            for line in archive:
+                row = json.loads(line)
+                if team_id is None or row['team_id'] == team_id:
+                    yield row
+
+def _serialize_row(row):
+    # Ids pass 2**53, so they travel as strings like the next_cursor built from them
+    data = {
+        key: value.isoformat() if isinstance(value, datetime) else value
+        for key, value in row.items()
+    }
+    data['id'] = str(data['id'])
+    return data
+
+def _deserialize_row(data):
+    return dict(data, id=int(data['id']), created_at=datetime.fromisoformat(data['created_at']))
+
+def to_dicts(rows):
+    """Serialize log rows like TeamActivity.to_dict, loading actors in one query"""
+    user_ids = {row['user_id'] for row in rows}
+    users = {u.id: u for u in User.query.filter(User.id.in_(user_ids)).all()} if user_ids else {}
+    result = []
+    for row in rows:
+        data = _serialize_row(row)
+        data.pop('position', None)
+        user = users.get(row['user_id'])
+        data['user'] = user.to_public_dict() if user else None
+        result.append(data)
+    return result
+
+activity_log = ActivityLog()
+
+def get_log():
+    return current_app.extensions['activity_log']
+
+def append(team_id, user_id, activity_type, activity_data=None, project_id=None, is_public=True):
+    """Queue an activity on the app's log"""
+    return get_log().append(
+        team_id,
+        user_id,
+        activity_type,
+        activity_data=activity_data,
+        project_id=project_id,
+        is_public=is_public
+    )
+
+# Team changes become activities once their transaction commits; rows flushed inside a savepoint
+# that is rolled back are dropped with it
+
+def _status_change(obj):
+    """(old, new) status when a flush changed it, else None"""
+    history = inspect(obj).attrs.status.history
+    if not history.has_changes():
+        return None
+    return (history.deleted[0] if history.deleted else None), obj.status
+
+def _load_previous_status(target, value, oldvalue, initiator):
+    return value
+
+# active_history loads an expired status before it is overwritten, so the flush can see what it was
+for _status in (TeamMember.status, TeamProject.status):
+    event.listen(_status, 'set', _load_previous_status, retval=True, active_history=True)
+
+def _team_activities(session):
+    activities = []
+    for obj in session.new:
+        if isinstance(obj, TeamProject):
+            activities.append((obj.team_id, obj.created_by, 'project_created', {'name': obj.name}, obj.id))
+        elif isinstance(obj, TeamMember) and obj.status == 'active':
+            activities.append((obj.team_id, obj.user_id, 'member_joined', {'role': obj.role}, None))
+        elif isinstance(obj, ProjectCollaboration):
+            with session.no_autoflush:
+                project = session.get(TeamProject, obj.project_id)
+            if project is not None:
+                activities.append((project.team_id, obj.user_id, 'collaborator_joined', {'role': obj.role}, project.id))
+    for obj in session.dirty:
+        if isinstance(obj, TeamMember):
+            change = _status_change(obj)
+            if change and change[1] == 'active':
+                activities.append((obj.team_id, obj.user_id, 'member_joined', {'role': obj.role}, None))
+            elif change and change[0] == 'active':
+                activities.append((obj.team_id, obj.user_id, 'member_left', None, None))
+        elif isinstance(obj, TeamProject):
+            change = _status_change(obj)
+            if change:
+                # No column records who changed it; the project's creator stands in as the actor
+                activities.append((obj.team_id, obj.created_by, f'project_{obj.status}', {'name': obj.name}, obj.id))
+    for obj in session.deleted:
+        if isinstance(obj, TeamMember) and obj.status == 'active':
+            activities.append((obj.team_id, obj.user_id, 'member_left', None, None))
+    return activities
+
+@event.listens_for(Session, 'after_flush')
+def _collect_team_activity(session, flush_context):
+    activities = _team_activities(session)
+    if activities:
+        savepoint = session.get_nested_transaction()
+        session.info.setdefault('team_activity', []).extend((savepoint, a) for a in activities)
+
+@event.listens_for(Session, 'after_commit')
+def _append_team_activity(session):
+    queued = session.info.pop('team_activity', None)
+    if not queued:
+        return
+    try:
+        log = current_app.extensions.get('activity_log')
+    except RuntimeError:
+        return
+    if log is None:
+        return
+    for _, (team_id, user_id, activity_type, activity_data, project_id) in queued:
+        log.append(team_id, user_id, activity_type, activity_data=activity_data, project_id=project_id)
+
+def _within(transaction, ancestor):
+    while transaction is not None:
+        if transaction is ancestor:
+            return True
+        transaction = transaction.parent
+    return False
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_team_activity(session, previous_transaction):
+    if not previous_transaction.nested:
+        session.info.pop('team_activity', None)
+        return
+    queued = session.info.get('team_activity')
+    if queued:
+        queued[:] = [entry for entry in queued if not _within(entry[0], previous_transaction)]
+
+activity_cli = AppGroup('activity', help='Team activity log maintenance')
+
+@activity_cli.command('compact')
+@click.option('--live-months', default=DEFAULT_LIVE_MONTHS, show_default=True, help='Months kept as live partitions')
+@click.option('--keep-archives', default=None, type=int, help='Delete archives older than N months')
+def compact_command(live_months, keep_archives):
+    """Archive old activity partitions and apply archive retention"""
+    log = get_log()
+    compacted = log.compact(live_months)
+    click.echo(f'Archived {len(compacted)} partitions: {", ".join(compacted) or "none"}')
+    if keep_archives is not None:
+        removed = log.purge_archives(keep_archives)
+        click.echo(f'Deleted {len(removed)} archives')
+
+@activity_cli.command('replay-dead-letters')
+def replay_dead_letters_command():
+    """Write activities that repeatedly failed to flush back into the log"""
+    replayed = get_log().replay_dead_letters()
+    click.echo(f'Replayed {replayed} activities')
+
+def _legacy_batches(batch_size):
+    """Old team_activity rows in (created_at, id) order, keyset-paged; undated rows come last"""
+    table = TeamActivity.__table__
+    last = None
+    while True:
+        query = db.select(table).where(table.c.created_at.isnot(None))
+        if last is not None:
+            query = query.where(db.tuple_(table.c.created_at, table.c.id) > db.tuple_(*last))
+        rows = db.session.execute(
+            query.order_by(table.c.created_at, table.c.id).limit(batch_size)
+        ).mappings().all()
+        if not rows:
+            break
+        last = (rows[-1]['created_at'], rows[-1]['id'])
+        yield rows
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            db.select(table).where(table.c.created_at.is_(None), table.c.id > last_id)
+            .order_by(table.c.id).limit(batch_size)
+        ).mappings().all()
+        if not rows:
+            break
+        last_id = rows[-1]['id']
+        yield rows
+
+@activity_cli.command('import-legacy')
+@click.option('--batch-size', default=5000, show_default=True)
+def import_legacy_command(batch_size):
+    """Copy rows from the old team_activity table into monthly partitions"""
+    log = get_log()
+    # Rows arrive in time order, so ids sharing a timestamp are spread by the sequence (and
+    # carried into later milliseconds past 4096) instead of colliding
+    ids = IdGenerator(node=IMPORT_NODE)
+    imported_at = datetime.utcnow()
+    copied = 0
+    # Keyset batches, since each write commits the session
+    for rows in _legacy_batches(batch_size):
+        batch = []
+        for row in rows:
+            row = dict(row)
+            row['created_at'] = row['created_at'] or imported_at
+            row['is_public'] = True if row['is_public'] is None else row['is_public']
+            row['id'] = ids.next_id(row['created_at'])
+            batch.append(row)
+        log.write(batch)
+        copied += len(batch)
+    click.echo(f'Copied {copied} activities')
@@ -0,0 +1,172 @@
+from flask.cli import AppGroup
+import base64
+import click
+import hashlib
+import hmac
+import os
+import tempfile
+import time
+import zlib
+
+FILE_TYPES = ('source', 'preview', 'documentation')
+DEFAULT_URL_TTL_SECONDS = 7 * 24 * 3600
+COPY_BUFFER_SIZE = 1024 * 1024
+FILE_MODE = 0o644  # mkstemp creates files readable by the owner only
+
+def _crc_of(source):
+    crc = 0
+    while chunk := source.read(COPY_BUFFER_SIZE):
+        crc = zlib.crc32(chunk, crc)
+    return crc
+
+class InvalidSignature(Exception):
+    pass
+
+class AssetStore:
+    """Graphic files on local disk, handed out through expiring HMAC-signed URLs"""
+    
+    def __init__(self):
+        self.app = None
+        self.root = None
+        self.url_ttl = DEFAULT_URL_TTL_SECONDS
+        self._key = None
+    
+    def init_app(self, app):
+        self.app = app
+        self.root = app.config.get(
+            'ASSET_DIR',
+            os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database', 'assets')
+        )
+        self.url_ttl = app.config.get('ASSET_URL_TTL_SECONDS', self.url_ttl)
+        secret = app.config.get('ASSET_URL_SECRET') or app.config['SECRET_KEY']
+        # Derived so a leaked download key cannot sign sessions and vice versa
+        self._key = hmac.new(secret.encode('utf-8'), b'graphic-asset-urls', hashlib.sha256).digest()
+        app.extensions['assets'] = self
+    
+    def path_for(self, graphic_id, file_type):
+        if file_type not in FILE_TYPES:
+            raise ValueError(f'Unknown file type: {file_type}')
+        return os.path.join(self.root, 'graphics', str(int(graphic_id)), file_type)
+    
+    def stat(self, graphic_id, file_type):
+        """os.stat_result of a stored file, or None"""
+        try:
+            return os.stat(self.path_for(graphic_id, file_type))
+        except FileNotFoundError:
+            return None
+    
+    def save(self, graphic_id, file_type, stream):
+        """Copy a binary stream to disk in fixed-size chunks and swap it in atomically; returns bytes written"""
+        path = self.path_for(graphic_id, file_type)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # A unique temp file beside the target: concurrent uploads of the same file never share one
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=f'.{file_type}.', suffix='.tmp')
+        crc = 0
+        try:
+            with os.fdopen(fd, 'wb') as output:
+                while True:
+                    chunk = stream.read(COPY_BUFFER_SIZE)
+                    if not chunk:
+                        break
+                    crc = zlib.crc32(chunk, crc)
+                    output.write(chunk)
+            os.chmod(tmp_path, FILE_MODE)
+            # The rename keeps size and mtime, so this is the stat of exactly the bytes checksummed,
+            # even if another upload replaces the file right after
+            stat = os.stat(tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self._write_checksum(path, stat, crc)
+        return stat.st_size
+    
+    # CRC-32 sidecar ("size mtime_ns crc"), so ZIP bundles can write headers before streaming data
+    
+    def _write_checksum(self, path, stat, crc):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.crc.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as output:
+                output.write(f'{stat.st_size} {stat.st_mtime_ns} {crc}')
+            os.replace(tmp_path, f'{path}.crc')
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    
+    def checksum(self, graphic_id, file_type, stat=None):
+        """CRC-32 of a stored file, computed once and reused until the file changes"""
+        path = self.path_for(graphic_id, file_type)
+        stat = stat or os.stat(path)
+        crc = self._cached_checksum(path, stat)
+        if crc is None:
+            with open(path, 'rb') as source:
+                crc = _crc_of(source)
+            self._write_checksum(path, stat, crc)
+        return crc
+    
+    def open(self, graphic_id, file_type):
+        """(open file, its stat, its CRC-32) of a stored file, or None; the three always agree"""
+        path = self.path_for(graphic_id, file_type)
+        try:
+            source = open(path, 'rb')
+        except FileNotFoundError:
+            return None
+        # A replacing upload swaps in a new inode, so the handle keeps the bytes this stat describes
+        try:
+            stat = os.fstat(source.fileno())
+            crc = self._cached_checksum(path, stat)
+            if crc is None:
+                crc = _crc_of(source)
+                source.seek(0)
+                self._write_checksum(path, stat, crc)
+        except BaseException:
+            source.close()
+            raise
+        return source, stat, crc
+    
+    def _cached_checksum(self, path, stat):
+        try:
+            with open(f'{path}.crc') as handle:
+                size, mtime_ns, crc = (int(part) for part in handle.read().split())
+        except (FileNotFoundError, ValueError):
+            return None
+        return crc if size == stat.st_size and mtime_ns == stat.st_mtime_ns else None
+    
+    def _signature(self, graphic_id, file_type, user_id, expires):
+        message = f'{int(graphic_id)}:{file_type}:{user_id}:{int(expires)}'.encode('utf-8')
+        digest = hmac.new(self._key, message, hashlib.sha256).digest()
+        return base64.urlsafe_b64encode(digest[:18]).decode('ascii')
+    
+    def sign(self, graphic_id, file_type, user_id, ttl=None):
+        """Query parameters for a download URL: {'u', 'e', 's'}"""
+        expires = int(time.time()) + (ttl if ttl is not None else self.url_ttl)
+        return {'u': user_id, 'e': expires, 's': self._signature(graphic_id, file_type, user_id, expires)}
+    
+    def verify(self, graphic_id, file_type, params):
+        """Check a signed URL's query parameters without touching the database; returns the user id"""
+        try:
+            user_id = int(params['u'])
+            expires = int(params['e'])
+            signature = params['s']
+        except (KeyError, TypeError, ValueError):
+            raise InvalidSignature('Missing or malformed signature')
+        expected = self._signature(graphic_id, file_type, user_id, expires)
+        if not hmac.compare_digest(signature.encode('utf-8'), expected.encode('ascii')):
+            raise InvalidSignature('Invalid signature')
+        if expires < time.time():
+            raise InvalidSignature('Download link has expired')
+        return user_id
+
+store = AssetStore()
+
+assets_cli = AppGroup('assets', help='Graphic asset files')
+
+@assets_cli.command('put')
+@click.argument('graphic_id', type=int)
+@click.argument('file_type', type=click.Choice(FILE_TYPES))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+def put_command(graphic_id, file_type, path):
+    """Store a local file as a graphic's source, preview or documentation download"""
+    with open(path, 'rb') as source:
+        size = store.save(graphic_id, file_type, source)
+    click.echo(f'Stored {size} bytes as graphic {graphic_id} {file_type}')
@@ -0,0 +1,504 @@
+from flask import current_app
+from src.models.user import User, db
+from src.models.business_idea import BusinessIdea
+from src.models.service import Service
+from src.services.catalog_import import catalog_imported
+from src.services.tagging import parse_tags
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from itertools import chain
+import heapq
+import threading
+import time
+
+MAX_TITLE_WORDS = 4  # a title is also found by the start of its first few words
+SCAN_LIMIT = 2000  # ranges up to this size are scanned, larger ones come from the top-k cache
+CACHE_DEPTH = 50
+CACHE_SIZE = 4096
+WARM_PREFIX_LENGTH = 3
+RATING_WEIGHT = 5.0
+REBUILD_INTERVAL_SECONDS = 900
+BUILD_CHUNK_SIZE = 5000
+DELTA_LIMIT = 1000  # keys added or removed since the arrays were laid out before they are merged in
+
+# item_type -> (model, popularity column)
+SOURCES = {
+    'business_idea': (BusinessIdea, 'sales_count'),
+    'service': (Service, 'orders_count'),
+}
+
+def _normalize(text):
+    return ' '.join(str(text).lower().split())
+
+def _keys(text):
+    """Sorted-array keys for a phrase: the phrase itself plus suffixes starting at later words"""
+    words = _normalize(text).split()
+    return tuple(dict.fromkeys(' '.join(words[i:]) for i in range(min(len(words), MAX_TITLE_WORDS))))
+
+def _weight(count, rating):
+    return 1.0 + (count or 0) + RATING_WEIGHT * (rating or 0.0)
+
+def document(item_type, row, username):
+    """Flatten a listing (or a row with the same attributes) into an autocomplete document"""
+    _, count_column = SOURCES[item_type]
+    return {
+        'item_type': item_type,
+        'id': row.id,
+        'title': row.title,
+        'category': row.category,
+        'tags': parse_tags(getattr(row, 'tags', None)),
+        'creator_id': row.creator_id,
+        'username': username,
+        'weight': _weight(getattr(row, count_column), row.rating),
+    }
+
+def _groups(doc):
+    """Aggregate suggestions a listing feeds, as group key -> display text"""
+    groups = {('category', doc['item_type'], _normalize(doc['category'])): doc['category']}
+    for tag in doc['tags']:
+        groups[('tag', doc['item_type'], tag)] = tag
+    if doc['username']:
+        groups[('creator', None, doc['creator_id'])] = doc['username']
+    return groups
+
+class _Entry:
+    __slots__ = ('kind', 'item_type', 'item_id', 'text', 'keys', 'weight', 'members')
+    
+    def __init__(self, kind, item_type, item_id, text, weight):
+        self.kind = kind
+        self.item_type = item_type
+        self.item_id = item_id
+        self.text = text
+        self.keys = _keys(text)
+        self.weight = weight
+        self.members = 0
+    
+    def to_dict(self):
+        return {
+            'text': self.text,
+            'kind': self.kind,
+            'item_type': self.item_type,
+            'id': self.item_id,
+            'score': round(self.weight, 2)
+        }
+
+def _weight_of(entry):
+    return entry.weight
+
+def _best(entries, limit):
+    # One entry can sit under several keys of the same range
+    return heapq.nlargest(limit, dict.fromkeys(entries), key=_weight_of)
+
+def _merged(keys, entries, delta_keys, delta_entries, dropped):
+    """New sorted arrays: the delta merged into the main arrays, dropped entries left out"""
+    merged_keys, merged_entries = [], []
+    i = 0
+    for key, entry in zip(delta_keys, delta_entries):
+        j = bisect_right(keys, key, i)
+        merged_keys.extend(keys[i:j])
+        merged_entries.extend(entries[i:j])
+        merged_keys.append(key)
+        merged_entries.append(entry)
+        i = j
+    merged_keys.extend(keys[i:])
+    merged_entries.extend(entries[i:])
+    if dropped:
+        kept = [i for i, entry in enumerate(merged_entries) if entry not in dropped]
+        merged_keys = [merged_keys[i] for i in kept]
+        merged_entries = [merged_entries[i] for i in kept]
+    return merged_keys, merged_entries
+
+class _PrefixTable:
+    """Sorted keys with a parallel entry array; wide prefix ranges keep a cached top-k"""
+    
+    # Once laid out, the main arrays are never edited in place: additions go to a small sorted
+    # delta and removals to a dropped set, both consulted by reads. When they grow past
+    # DELTA_LIMIT the arrays are rebuilt from a snapshot outside the index lock and swapped in.
+    
+    def __init__(self):
+        self.keys = []
+        self.entries = []
+        self._delta_keys = []
+        self._delta_entries = []
+        self._dropped = set()
+        self._merging = False
+        self._cache = OrderedDict()
+        self._loading = True
+    
+    def add(self, entry):
+        if self._loading:
+            self.keys.extend(entry.keys)
+            self.entries.extend([entry] * len(entry.keys))
+            return
+        for key in entry.keys:
+            i = bisect_right(self._delta_keys, key)
+            self._delta_keys.insert(i, key)
+            self._delta_entries.insert(i, entry)
+            self._offer(entry, key)
+    
+    def remove(self, entry):
+        for key in entry.keys:
+            i = bisect_left(self._delta_keys, key)
+            while i < len(self._delta_keys) and self._delta_keys[i] == key:
+                if self._delta_entries[i] is entry:
+                    del self._delta_keys[i]
+                    del self._delta_entries[i]
+                    break
+                i += 1
+            self._invalidate(entry, key)
+        # Entries are never added back once removed, so the object itself marks its stale keys
+        self._dropped.add(entry)
+    
+    # Merging
+    
+    def merge_due(self):
+        return not self._merging and len(self._delta_keys) + len(self._dropped) >= DELTA_LIMIT
+    
+    def start_merge(self):
+        """Snapshot what a merge folds in; call under the index lock"""
+        self._merging = True
+        return self.keys, self.entries, list(self._delta_keys), list(self._delta_entries), set(self._dropped)
+    
+    def finish_merge(self, snapshot, merged=None):
+        """Swap in arrays built from the snapshot, keeping changes made since; call under the index lock"""
+        self._merging = False
+        if merged is None:
+            return
+        _, _, delta_keys, delta_entries, dropped = snapshot
+        self.keys, self.entries = merged
+        folded = set(zip(delta_keys, map(id, delta_entries)))
+        kept = [i for i, pair in enumerate(zip(self._delta_keys, map(id, self._delta_entries))) if pair not in folded]
+        self._delta_keys = [self._delta_keys[i] for i in kept]
+        self._delta_entries = [self._delta_entries[i] for i in kept]
+        self._dropped -= dropped
+    
+    def reweigh(self, entry, old_weight):
+        if self._loading:
+            return
+        for key in entry.keys:
+            if entry.weight >= old_weight:
+                self._offer(entry, key)
+            else:
+                self._invalidate(entry, key)
+    
+    def finish(self, warm_length=WARM_PREFIX_LENGTH):
+        """Sort everything added while loading, then cache the widest short prefixes"""
+        self._loading = False
+        # Sort a permutation rather than (key, entry) pairs: no tuples for the collector to walk
+        order = sorted(range(len(self.keys)), key=self.keys.__getitem__)
+        self.keys = [self.keys[i] for i in order]
+        self.entries = [self.entries[i] for i in order]
+        for length in range(1, warm_length + 1):
+            i = 0
+            while i < len(self.keys):
+                prefix = self.keys[i][:length]
+                if len(prefix) < length:
+                    i += 1
+                    continue
+                end = bisect_left(self.keys, prefix + '\uffff', i)
+                if end - i > SCAN_LIMIT:
+                    self._store(prefix, _best(self.entries[i:end], CACHE_DEPTH))
+                i = end
+    
+    def _store(self, prefix, ranked):
+        self._cache[prefix] = ranked
+        self._cache.move_to_end(prefix)
+        while len(self._cache) > CACHE_SIZE:
+            self._cache.popitem(last=False)
+    
+    def _offer(self, entry, key):
+        # Fold a new or heavier entry into every cached prefix of its key
+        for length in range(1, len(key) + 1):
+            ranked = self._cache.get(key[:length])
+            if ranked is None:
+                continue
+            if entry in ranked:
+                ranked.sort(key=_weight_of, reverse=True)
+            elif len(ranked) < CACHE_DEPTH or entry.weight > ranked[-1].weight:
+                ranked.append(entry)
+                ranked.sort(key=_weight_of, reverse=True)
+                del ranked[CACHE_DEPTH:]
+    
+    def _invalidate(self, entry, key):
+        # A cached top-k that loses or lowers a member is recomputed on next use
+        for length in range(1, len(key) + 1):
+            ranked = self._cache.get(key[:length])
+            if ranked is not None and entry in ranked:
+                del self._cache[key[:length]]
+    
+    def _range(self, prefix):
+        start = bisect_left(self.keys, prefix)
+        end = bisect_left(self.keys, prefix + '\uffff', start)
+        delta_start = bisect_left(self._delta_keys, prefix)
+        delta_end = bisect_left(self._delta_keys, prefix + '\uffff', delta_start)
+        return end - start + delta_end - delta_start, start, end, delta_start, delta_end
+    
+    def _candidates(self, start, end, delta_start, delta_end):
+        entries = self.entries[start:end]
+        if self._dropped:
+            entries = [entry for entry in entries if entry not in self._dropped]
+        return chain(entries, self._delta_entries[delta_start:delta_end])
+    
+    def top(self, prefix, limit):
+        size, *bounds = self._range(prefix)
+        if size <= SCAN_LIMIT:
+            return _best(self._candidates(*bounds), limit)
+        ranked = self._cache.get(prefix)
+        if ranked is None:
+            ranked = _best(self._candidates(*bounds), CACHE_DEPTH)
+            self._store(prefix, ranked)
+        else:
+            self._cache.move_to_end(prefix)
+        return ranked[:limit]
+
+class AutocompleteIndex:
+    """Prefix suggestions over listing titles, categories, tags and creators, ranked by popularity"""
+    
+    def __init__(self, rebuild_interval=REBUILD_INTERVAL_SECONDS):
+        self.rebuild_interval = rebuild_interval
+        self.app = None
+        self._lock = threading.Lock()
+        self._state = self._empty()
+        self._replay = None
+        self._last_rebuild = 0.0
+        self.built = False
+    
+    @staticmethod
+    def _empty():
+        table = _PrefixTable()
+        table.finish()
+        return {'docs': {}, 'titles': {}, 'groups': {}, 'table': table}
+    
+    def _load_documents(self):
+        for item_type, (model, count_column) in SOURCES.items():
+            columns = [model.id, model.title, model.category, model.creator_id, getattr(model, count_column), model.rating]
+            if item_type == 'business_idea':
+                columns.append(model.tags)
+            rows = db.session.query(*columns, User.username).join(User, User.id == model.creator_id).filter(
+                model.is_published.is_(True)
+            ).execution_options(yield_per=BUILD_CHUNK_SIZE)
+            for row in rows:
+                yield document(item_type, row, row.username)
+    
+    def build(self):
+        """Load every published listing and lay out the sorted arrays"""
+        docs, titles, groups = {}, {}, {}
+        table = _PrefixTable()
+        for doc in self._load_documents():
+            doc_key = (doc['item_type'], doc['id'])
+            docs[doc_key] = doc
+            entry = titles[doc_key] = _Entry('title', doc['item_type'], doc['id'], doc['title'], doc['weight'])
+            table.add(entry)
+            for (kind, item_type, value), text in _groups(doc).items():
+                entry = groups.get((kind, item_type, value))
+                if entry is None:
+                    entry = groups[(kind, item_type, value)] = _Entry(
+                        kind, item_type, value if kind == 'creator' else None, text, 0.0
+                    )
+                entry.weight += doc['weight']
+                entry.members += 1
+        for entry in groups.values():
+            table.add(entry)
+        table.finish()
+        state = {'docs': docs, 'titles': titles, 'groups': groups, 'table': table}
+        with self._lock:
+            # Replay anything committed while the arrays were being built
+            for doc_key, doc in self._replay or ():
+                self._apply(state, state['docs'].get(doc_key), doc)
+            self._replay = None
+            self._state = state
+            self._last_rebuild = time.monotonic()
+            self.built = True
+    
+    def _apply(self, state, old, doc):
+        table = state['table']
+        deltas = {}
+        for sign, source in ((-1, old), (1, doc)):
+            if source is None:
+                continue
+            for group_key, text in _groups(source).items():
+                delta = deltas.setdefault(group_key, [text, 0.0, 0])
+                delta[1] += sign * source['weight']
+                delta[2] += sign
+        
+        groups = state['groups']
+        for (kind, item_type, value), (text, weight, members) in deltas.items():
+            if not weight and not members:
+                continue
+            entry = groups.get((kind, item_type, value))
+            if entry is None:
+                entry = groups[(kind, item_type, value)] = _Entry(
+                    kind, item_type, value if kind == 'creator' else None, text, weight
+                )
+                entry.members = members
+                table.add(entry)
+                continue
+            old_weight = entry.weight
+            entry.weight += weight
+            entry.members += members
+            if entry.members <= 0:
+                del groups[(kind, item_type, value)]
+                table.remove(entry)
+            else:
+                table.reweigh(entry, old_weight)
+        
+        source = doc or old
+        doc_key = (source['item_type'], source['id'])
+        entry = state['titles'].get(doc_key)
+        if doc is None:
+            state['docs'].pop(doc_key, None)
+            if entry is not None:
+                del state['titles'][doc_key]
+                table.remove(entry)
+            return
+        state['docs'][doc_key] = doc
+        if entry is not None and entry.text == doc['title']:
+            old_weight = entry.weight
+            entry.weight = doc['weight']
+            table.reweigh(entry, old_weight)
+            return
+        if entry is not None:
+            table.remove(entry)
+        entry = state['titles'][doc_key] = _Entry('title', doc['item_type'], doc['id'], doc['title'], doc['weight'])
+        table.add(entry)
+    
+    def upsert(self, doc):
+        self._change((doc['item_type'], doc['id']), doc)
+    
+    def remove(self, item_type, item_id):
+        self._change((item_type, item_id), None)
+    
+    def _change(self, doc_key, doc):
+        with self._lock:
+            state = self._state
+            old = state['docs'].get(doc_key)
+            if old is not None or doc is not None:
+                self._apply(state, old, doc)
+            if self._replay is not None:
+                self._replay.append((doc_key, doc))
+            table = state['table']
+            snapshot = table.start_merge() if table.merge_due() else None
+        if snapshot is not None:
+            self._merge(table, snapshot)
+    
+    def _merge(self, table, snapshot):
+        # The O(n) rebuild runs without the lock; only the swap holds it
+        merged = None
+        try:
+            merged = _merged(*snapshot)
+        finally:
+            with self._lock:
+                table.finish_merge(snapshot, merged)
+    
+    def clear(self):
+        """Forget the arrays; the next get_index() builds them from the database again"""
+        with self._lock:
+            self._state = self._empty()
+            self._replay = None
+            self.built = False
+    
+    def _maybe_rebuild(self):
+        # Pick up changes written with Core statements (ratings, usernames) at most once per interval
+        if self.app is None or time.monotonic() - self._last_rebuild < self.rebuild_interval:
+            return
+        with self._lock:
+            if self._replay is not None:
+                return
+            self._replay = []
+            self._last_rebuild = time.monotonic()
+        threading.Thread(target=self._rebuild, name='autocomplete-rebuild', daemon=True).start()
+    
+    def _rebuild(self):
+        with self.app.app_context():
+            try:
+                self.build()
+            except Exception:
+                with self._lock:
+                    self._replay = None
+                self.app.logger.exception('Autocomplete rebuild failed')
+    
+    def suggest(self, prefix, limit=10):
+        """Best-weighted entries whose title, category, tag or username (or a later word) starts with prefix"""
+        prefix = _normalize(prefix)
+        if not prefix:
+            return []
+        self._maybe_rebuild()
+        with self._lock:
+            return [entry.to_dict() for entry in self._state['table'].top(prefix, limit)]
+
+def init_app(app):
+    index = AutocompleteIndex(
+        rebuild_interval=app.config.get('AUTOCOMPLETE_REBUILD_SECONDS', REBUILD_INTERVAL_SECONDS)
+    )
+    index.app = app
+    app.extensions['autocomplete'] = index
+
+def get_index():
+    """Return the app's autocomplete index, building it from the database on first use"""
+    index = current_app.extensions['autocomplete']
+    if not index.built:
+        index.build()
+    return index
+
+def _usernames(connection, user_ids):
+    if not user_ids:
+        return {}
+    return dict(connection.execute(db.select(User.id, User.username).where(User.id.in_(user_ids))).all())
+
+# Keep the index in step with committed listing changes
+
+@event.listens_for(Session, 'after_flush')
+def _collect_listing_changes(session, flush_context):
+    changed = []
+    removed = []
+    for obj in chain(session.new, session.dirty):
+        for item_type, (model, _) in SOURCES.items():
+            if isinstance(obj, model):
+                (changed if obj.is_published else removed).append((item_type, obj))
+    for obj in session.deleted:
+        for item_type, (model, _) in SOURCES.items():
+            if isinstance(obj, model):
+                removed.append((item_type, obj))
+    if not changed and not removed:
+        return
+    usernames = _usernames(session.connection(), {obj.creator_id for _, obj in changed})
+    changes = session.info.setdefault('autocomplete_changes', [])
+    changes.extend(('upsert', document(item_type, obj, usernames.get(obj.creator_id))) for item_type, obj in changed)
+    changes.extend(('remove', (item_type, obj.id)) for item_type, obj in removed)
+
+@event.listens_for(Session, 'after_commit')
+def _apply_listing_changes(session):
+    changes = session.info.pop('autocomplete_changes', None)
+    if not changes:
+        return
+    try:
+        index = current_app.extensions.get('autocomplete')
+    except RuntimeError:
+        return
+    # An unbuilt index will load these rows when it is first used
+    if index is None or not index.built:
+        return
+    for op, payload in changes:
+        if op == 'upsert':
+            index.upsert(payload)
+        else:
+            index.remove(*payload)
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_listing_changes(session, previous_transaction):
+    session.info.pop('autocomplete_changes', None)
+
+# Bulk imports bypass the ORM, so each committed chunk is read back once
+
+@catalog_imported.connect
+def _index_imported(sender, item_type, ids, **kwargs):
+    index = sender.extensions.get('autocomplete')
+    if index is None or not index.built or item_type not in SOURCES or not ids:
+        return
+    model, _ = SOURCES[item_type]
+    rows = model.query.filter(model.id.in_(ids), model.is_published.is_(True)).all()
+    usernames = _usernames(db.session.connection(), {row.creator_id for row in rows})
+    for row in rows:
+        index.upsert(document(item_type, row, usernames.get(row.creator_id)))
@@ -0,0 +1,509 @@
+from string import Formatter
+import random
+
+# Simulated OpenAI output for the AI Business Builder, compiled once at import.
+# Static sections are shared between calls as frozen containers: they serialize like
+# dicts and lists, refuse mutation, and deepcopy into plain mutable copies.
+
+class FrozenDict(dict):
+    """Read-only dict shared between generated results"""
+    
+    def _readonly(self, *args, **kwargs):
+        raise TypeError('Compiled template data is read-only')
+    
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = __ior__ = _readonly
+    
+    def __copy__(self):
+        return dict(self)
+    
+    def __deepcopy__(self, memo):
+        return thaw(self)
+    
+    def __reduce__(self):
+        return (dict, (thaw(self),))
+
+class FrozenList(tuple):
+    """Read-only list shared between generated results"""
+    
+    def __copy__(self):
+        return list(self)
+    
+    def __deepcopy__(self, memo):
+        return thaw(self)
+    
+    def __reduce__(self):
+        return (list, (thaw(self),))
+
+def freeze(value):
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return FrozenList(freeze(item) for item in value)
+    return value
+
+def thaw(value):
+    """Plain mutable copy of frozen (or plain) nested data"""
+    if isinstance(value, dict):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw(item) for item in value]
+    return value
+
+class Template:
+    """A str.format template split once into literal text and field names"""
+    
+    __slots__ = ('segments',)
+    
+    def __init__(self, text):
+        segments = []
+        for literal, field, spec, conversion in Formatter().parse(text):
+            if spec or conversion:
+                raise ValueError(f'Unsupported format spec in template: {text!r}')
+            segments.append((literal, field))
+        self.segments = tuple(segments)
+    
+    def render(self, values):
+        parts = []
+        for literal, field in self.segments:
+            parts.append(literal)
+            if field is not None:
+                parts.append(values[field])
+        return ''.join(parts)
+
+# Template sources
+
+IDEA_TEMPLATES = {
+    "technology": [
+        {
+            "title": "AI-Powered {industry} Platform",
+            "description": "Revolutionary platform that uses artificial intelligence to transform {industry} operations",
+            "market_size": "$50B+ global market",
+            "startup_cost": "Low to Medium",
+            "time_to_market": "6-12 months"
+        },
+        {
+            "title": "Blockchain-Based {industry} Solution",
+            "description": "Decentralized platform leveraging blockchain technology for {industry} transparency",
+            "market_size": "$25B+ emerging market",
+            "startup_cost": "Medium to High",
+            "time_to_market": "12-18 months"
+        }
+    ],
+    "ecommerce": [
+        {
+            "title": "Sustainable {target_market} Marketplace",
+            "description": "Eco-friendly marketplace connecting conscious consumers with sustainable products",
+            "market_size": "$15B+ growing market",
+            "startup_cost": "Medium",
+            "time_to_market": "3-6 months"
+        },
+        {
+            "title": "Personalized {target_market} Subscription Box",
+            "description": "AI-curated subscription service delivering personalized products monthly",
+            "market_size": "$10B+ subscription economy",
+            "startup_cost": "Low to Medium",
+            "time_to_market": "2-4 months"
+        }
+    ],
+    "services": [
+        {
+            "title": "On-Demand {industry} Services",
+            "description": "Mobile app connecting service providers with customers instantly",
+            "market_size": "$100B+ gig economy",
+            "startup_cost": "Medium",
+            "time_to_market": "4-8 months"
+        },
+        {
+            "title": "Virtual {industry} Consulting",
+            "description": "Remote consulting platform with AI-powered matching and tools",
+            "market_size": "$50B+ consulting market",
+            "startup_cost": "Low",
+            "time_to_market": "2-3 months"
+        }
+    ]
+}
+
+DETAILED_DESCRIPTION = ("This innovative business idea targets {target_market} in the {industry} sector. "
+                        "{description}. The solution addresses key pain points through cutting-edge technology "
+                        "and user-centric design.")
+
+CATEGORY_INDUSTRIES = {
+    "technology": ["tech", "ai", "software", "saas"],
+    "ecommerce": ["retail", "ecommerce", "marketplace", "shopping"]
+}
+DEFAULT_CATEGORY = "services"
+
+REVENUE_STREAMS = {
+    "technology": [
+        "SaaS subscription fees",
+        "API usage charges",
+        "Premium feature upgrades",
+        "Enterprise licensing",
+        "Data analytics services"
+    ],
+    "ecommerce": [
+        "Product sales commissions",
+        "Subscription fees",
+        "Advertising revenue",
+        "Fulfillment services",
+        "Premium seller tools"
+    ],
+    "services": [
+        "Service commissions",
+        "Subscription fees",
+        "Premium memberships",
+        "Advertising revenue",
+        "Training and certification"
+    ]
+}
+
+BASE_FEATURES = [
+    "User-friendly interface",
+    "Mobile-responsive design",
+    "Secure payment processing",
+    "Real-time notifications",
+    "Analytics dashboard"
+]
+
+TECH_FEATURES = [
+    "AI-powered recommendations",
+    "Machine learning algorithms",
+    "API integrations",
+    "Cloud-based infrastructure",
+    "Advanced security protocols"
+]
+
+GENERAL_FEATURES = [
+    "Customer support system",
+    "Review and rating system",
+    "Social media integration",
+    "Email marketing tools"
+]
+
+COMPETITIVE_ADVANTAGES = [
+    "First-mover advantage in emerging market",
+    "Proprietary technology and algorithms",
+    "Strong network effects",
+    "Superior user experience",
+    "Cost-effective solution",
+    "Scalable business model"
+]
+
+IMPLEMENTATION_STEPS = [
+    {
+        "phase": "Phase 1: Planning & Research",
+        "duration": "1-2 months",
+        "tasks": [
+            "Market research and validation",
+            "Competitive analysis",
+            "Technical architecture design",
+            "Team building and hiring"
+        ]
+    },
+    {
+        "phase": "Phase 2: MVP Development",
+        "duration": "2-4 months",
+        "tasks": [
+            "Core feature development",
+            "User interface design",
+            "Basic testing and QA",
+            "Initial user feedback"
+        ]
+    },
+    {
+        "phase": "Phase 3: Launch & Growth",
+        "duration": "3-6 months",
+        "tasks": [
+            "Public launch and marketing",
+            "User acquisition campaigns",
+            "Feature expansion",
+            "Performance optimization"
+        ]
+    },
+    {
+        "phase": "Phase 4: Scale & Expansion",
+        "duration": "6+ months",
+        "tasks": [
+            "Market expansion",
+            "Advanced features",
+            "Partnership development",
+            "Funding and investment"
+        ]
+    }
+]
+
+BUDGET_MULTIPLIERS = {
+    "under_10k": {"year1": 2, "year2": 5, "year3": 12},
+    "10k_50k": {"year1": 3, "year2": 8, "year3": 20},
+    "50k_100k": {"year1": 5, "year2": 15, "year3": 40},
+    "100k_plus": {"year1": 8, "year2": 25, "year3": 75}
+}
+DEFAULT_BUDGET = "10k_50k"
+BASE_AMOUNT = 10000
+PROJECTION_RATIOS = {"year1": (0.8, 0.2), "year2": (0.7, 0.3), "year3": (0.6, 0.4)}  # expenses, profit
+
+MARKETING_STRATEGY = {
+    "channels": [
+        "Social media marketing",
+        "Content marketing and SEO",
+        "Email marketing campaigns",
+        "Influencer partnerships",
+        "Paid advertising (Google, Facebook)"
+    ],
+    "budget_allocation": {
+        "Digital advertising": "40%",
+        "Content creation": "25%",
+        "Social media": "20%",
+        "Email marketing": "10%",
+        "Events and PR": "5%"
+    },
+    "key_metrics": [
+        "Customer acquisition cost (CAC)",
+        "Customer lifetime value (CLV)",
+        "Conversion rates",
+        "Brand awareness",
+        "Social media engagement"
+    ]
+}
+
+RISK_ANALYSIS = [
+    {
+        "risk": "Market Competition",
+        "probability": "High",
+        "impact": "Medium",
+        "mitigation": "Focus on unique value proposition and superior user experience"
+    },
+    {
+        "risk": "Technology Challenges",
+        "probability": "Medium",
+        "impact": "High",
+        "mitigation": "Invest in skilled development team and robust testing"
+    },
+    {
+        "risk": "Funding Shortfall",
+        "probability": "Medium",
+        "impact": "High",
+        "mitigation": "Develop multiple funding sources and lean operations"
+    },
+    {
+        "risk": "Regulatory Changes",
+        "probability": "Low",
+        "impact": "Medium",
+        "mitigation": "Stay informed about industry regulations and compliance"
+    }
+]
+
+SUCCESS_METRICS = [
+    "Monthly active users (MAU)",
+    "Revenue growth rate",
+    "Customer retention rate",
+    "Net promoter score (NPS)",
+    "Market share percentage",
+    "Profit margins",
+    "User engagement metrics",
+    "Customer satisfaction scores"
+]
+
+PLAN_TEMPLATES = {
+    "executive_summary": "Executive Summary for {title}",
+    "industry_overview": "The {industry} industry is experiencing rapid growth",
+    "funding_requirements": "Seeking funding based on {budget_range} budget range"
+}
+
+PLAN_SECTIONS = {
+    "competitive_landscape": "Analysis of key competitors and market positioning",
+    "organization_management": {
+        "organizational_structure": "Lean startup structure with key roles defined",
+        "management_team": "Experienced team with relevant industry expertise",
+        "advisory_board": "Strategic advisors from industry and technology sectors"
+    },
+    "use_of_funds": [
+        "Product development (40%)",
+        "Marketing and sales (30%)",
+        "Operations (20%)",
+        "Working capital (10%)"
+    ],
+    "appendix": {
+        "market_research": "Detailed market research data",
+        "financial_models": "Comprehensive financial models and assumptions",
+        "technical_specifications": "Technical architecture and requirements"
+    }
+}
+
+VALIDATION_SCORE_RANGE = (65, 95)
+VALIDATION_BREAKDOWN_RANGES = {
+    "market_potential": (70, 95),
+    "technical_feasibility": (60, 90),
+    "financial_viability": (65, 85),
+    "competitive_advantage": (70, 90),
+    "execution_risk": (60, 80)
+}
+
+VALIDATION_SECTIONS = {
+    "strengths": [
+        "Strong market demand identified",
+        "Clear value proposition",
+        "Scalable business model",
+        "Experienced team requirements defined"
+    ],
+    "weaknesses": [
+        "High initial development costs",
+        "Competitive market landscape",
+        "Technology adoption challenges"
+    ],
+    "opportunities": [
+        "Growing market trends",
+        "Partnership possibilities",
+        "International expansion potential",
+        "Additional revenue streams"
+    ],
+    "threats": [
+        "New market entrants",
+        "Technology disruption",
+        "Economic downturns",
+        "Regulatory changes"
+    ],
+    "recommendations": [
+        "Conduct thorough market validation",
+        "Develop strategic partnerships",
+        "Focus on MVP development",
+        "Secure adequate funding",
+        "Build strong technical team"
+    ],
+    "next_steps": [
+        "Create detailed project timeline",
+        "Identify key performance indicators",
+        "Develop go-to-market strategy",
+        "Prepare investor pitch deck"
+    ]
+}
+
+# Compilation
+
+def _financial_projections(multiplier):
+    return {
+        f"year_{year}": {
+            "revenue": BASE_AMOUNT * multiplier[key],
+            "expenses": BASE_AMOUNT * multiplier[key] * PROJECTION_RATIOS[key][0],
+            "profit": BASE_AMOUNT * multiplier[key] * PROJECTION_RATIOS[key][1]
+        }
+        for year, key in ((1, "year1"), (2, "year2"), (3, "year3"))
+    }
+
+class _IdeaTemplate:
+    __slots__ = ('title', 'description', 'detailed_description', 'market_size', 'startup_cost', 'time_to_market')
+    
+    def __init__(self, source):
+        self.title = Template(source["title"])
+        self.description = Template(source["description"])
+        self.detailed_description = Template(DETAILED_DESCRIPTION.replace("{description}", source["description"]))
+        self.market_size = source["market_size"]
+        self.startup_cost = source["startup_cost"]
+        self.time_to_market = source["time_to_market"]
+
+class CompiledTemplates:
+    """Every generator template, pre-split and frozen"""
+    
+    def __init__(self):
+        self.categories = {
+            industry: category for category, industries in CATEGORY_INDUSTRIES.items() for industry in industries
+        }
+        self.ideas = {
+            category: tuple(_IdeaTemplate(source) for source in sources) for category, sources in IDEA_TEMPLATES.items()
+        }
+        self.revenue_streams = freeze(REVENUE_STREAMS)
+        self.key_features = freeze({
+            category: BASE_FEATURES + (TECH_FEATURES if category == "technology" else GENERAL_FEATURES)
+            for category in IDEA_TEMPLATES
+        })
+        self.competitive_advantages = freeze(COMPETITIVE_ADVANTAGES)
+        self.implementation_steps = freeze(IMPLEMENTATION_STEPS)
+        self.financial_projections = freeze({
+            budget: _financial_projections(multiplier) for budget, multiplier in BUDGET_MULTIPLIERS.items()
+        })
+        self.marketing = freeze(MARKETING_STRATEGY)
+        self.risk_analysis = freeze(RISK_ANALYSIS)
+        self.success_metrics = freeze(SUCCESS_METRICS)
+        self.plan = {key: Template(text) for key, text in PLAN_TEMPLATES.items()}
+        self.plan_sections = freeze(PLAN_SECTIONS)
+        self.validation_sections = freeze(VALIDATION_SECTIONS)
+        self.validation_ranges = tuple(VALIDATION_BREAKDOWN_RANGES.items())
+    
+    def category(self, industry):
+        return self.categories.get(industry.lower(), DEFAULT_CATEGORY)
+    
+    def render_idea(self, industry, target_market, budget_range, rng=random):
+        """A business idea: one random template, substituted, with the shared sections attached"""
+        category = self.category(industry)
+        template = rng.choice(self.ideas[category])
+        values = {'industry': industry, 'target_market': target_market}
+        return {
+            "title": template.title.render(values),
+            "description": template.description.render(values),
+            "detailed_description": template.detailed_description.render(values),
+            "industry": industry,
+            "target_market": target_market,
+            "market_size": template.market_size,
+            "startup_cost": template.startup_cost,
+            "time_to_market": template.time_to_market,
+            "budget_range": budget_range,
+            "revenue_streams": self.revenue_streams[category],
+            "key_features": self.key_features[category],
+            "competitive_advantages": self.competitive_advantages,
+            "implementation_steps": self.implementation_steps,
+            "financial_projections": self.financial_projections.get(budget_range, self.financial_projections[DEFAULT_BUDGET]),
+            "marketing_strategy": self.render_marketing(target_market),
+            "risk_analysis": self.risk_analysis,
+            "success_metrics": self.success_metrics
+        }
+    
+    def render_marketing(self, target_market):
+        marketing = self.marketing
+        return {
+            "target_audience": target_market,
+            "channels": marketing["channels"],
+            "budget_allocation": marketing["budget_allocation"],
+            "key_metrics": marketing["key_metrics"]
+        }
+    
+    def render_plan(self, business_idea):
+        """A business plan built around an idea"""
+        plan = self.plan
+        sections = self.plan_sections
+        return {
+            'executive_summary': plan['executive_summary'].render(business_idea),
+            'company_description': business_idea['detailed_description'],
+            'market_analysis': {
+                'industry_overview': plan['industry_overview'].render(business_idea),
+                'target_market': business_idea['target_market'],
+                'market_size': business_idea['market_size'],
+                'competitive_landscape': sections['competitive_landscape']
+            },
+            'organization_management': sections['organization_management'],
+            'products_services': {
+                'description': business_idea['description'],
+                'key_features': business_idea['key_features'],
+                'competitive_advantages': business_idea['competitive_advantages']
+            },
+            'marketing_sales': business_idea['marketing_strategy'],
+            'funding_request': {
+                'funding_requirements': plan['funding_requirements'].render(business_idea),
+                'use_of_funds': sections['use_of_funds']
+            },
+            'financial_projections': business_idea['financial_projections'],
+            'implementation_timeline': business_idea['implementation_steps'],
+            'risk_analysis': business_idea['risk_analysis'],
+            'appendix': sections['appendix']
+        }
+    
+    def render_validation(self, rng=random):
+        """Validation scores with the shared SWOT sections"""
+        result = {
+            'overall_score': rng.randint(*VALIDATION_SCORE_RANGE),
+            'score_breakdown': {key: rng.randint(low, high) for key, (low, high) in self.validation_ranges}
+        }
+        result.update(self.validation_sections)
+        return result
+
+templates = CompiledTemplates()
@@ -0,0 +1,177 @@
+from flask import current_app
+from flask.cli import AppGroup
+from blinker import Namespace
+from src.models.user import User, db
+from src.models.business_idea import BusinessIdea
+from src.models.service import Service
+from sqlalchemy import insert
+import click
+import csv
+import io
+import json
+
+IMPORT_CHUNK_SIZE = 500
+FORMATS = ('ndjson', 'csv')
+
+# Shared with the single-listing create routes so both paths accept the same rows
+REQUIRED_FIELDS = {
+    'business_idea': ('title', 'description', 'category', 'price'),
+    'service': ('title', 'description', 'category', 'starting_price', 'delivery_time'),
+}
+
+TEXT_FIELDS = {
+    'business_idea': ('image_url', 'executive_summary', 'market_analysis', 'business_model',
+                      'financial_projections', 'marketing_strategy'),
+    'service': ('image_url',),
+}
+
+MODELS = {'business_idea': BusinessIdea, 'service': Service}
+
+signals = Namespace()
+
+# Sent once per committed chunk with the new ids, so listing indexes refresh per batch rather than per row
+catalog_imported = signals.signal('catalog-imported')
+
+def missing_fields(item_type, data):
+    return [field for field in REQUIRED_FIELDS[item_type] if field not in data or not data[field]]
+
+def _json_list(value, field):
+    """Accept a list, a JSON-encoded list, or (for CSV cells) a comma-separated string"""
+    if value in (None, ''):
+        return []
+    if isinstance(value, str):
+        text = value.strip()
+        if text.startswith('['):
+            try:
+                value = json.loads(text)
+            except ValueError:
+                raise ValueError(f'{field} is not valid JSON')
+        else:
+            value = [part.strip() for part in text.split(',') if part.strip()]
+    if not isinstance(value, list):
+        raise ValueError(f'{field} must be a list')
+    return value
+
+def _flag(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes', 'y')
+    return bool(value)
+
+def validate_row(item_type, data):
+    """Column values for one listing, or raise ValueError with every problem found"""
+    if not isinstance(data, dict):
+        raise ValueError('row must be an object')
+    errors = [f'{field} is required' for field in missing_fields(item_type, data)]
+    values = {field: data.get(field) or '' for field in TEXT_FIELDS[item_type]}
+    values['is_published'] = _flag(data.get('is_published', False))
+    
+    price_field = 'price' if item_type == 'business_idea' else 'starting_price'
+    if data.get(price_field):
+        try:
+            values[price_field] = float(data[price_field])
+        except (TypeError, ValueError):
+            errors.append(f'{price_field} must be a number')
+    
+    try:
+        if item_type == 'business_idea':
+            values['tags'] = json.dumps(_json_list(data.get('tags'), 'tags'))
+        else:
+            values['packages'] = json.dumps(_json_list(data.get('packages'), 'packages'))
+    except ValueError as e:
+        errors.append(str(e))
+    
+    if errors:
+        raise ValueError('; '.join(errors))
+    for field in REQUIRED_FIELDS[item_type]:
+        values.setdefault(field, str(data[field]).strip())
+    return values
+
+def read_rows(stream, import_format):
+    """Yield (row_number, data) from a text stream; data is an Exception for unparseable lines"""
+    if import_format == 'csv':
+        reader = csv.DictReader(stream)
+        for number, row in enumerate(reader, 1):
+            # Blank cells mean "not given", the same as a missing JSON key
+            yield number, {key: value for key, value in row.items() if key and value not in (None, '')}
+        return
+    number = 0
+    for line in stream:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            yield number, json.loads(line)
+        except ValueError as e:
+            yield number, ValueError(f'invalid JSON: {e}')
+
+def text_stream(binary):
+    return io.TextIOWrapper(binary, encoding='utf-8-sig', newline='')
+
+def guess_format(filename=None, mimetype=None):
+    name = (filename or '').lower()
+    if name.endswith('.csv') or mimetype in ('text/csv', 'application/csv'):
+        return 'csv'
+    return 'ndjson'
+
+def _insert_chunk(item_type, creator_id, chunk, report):
+    """Insert one chunk of (row_number, values) in its own transaction"""
+    table = MODELS[item_type].__table__
+    rows = [dict(values, creator_id=creator_id) for _, values in chunk]
+    try:
+        ids = db.session.execute(
+            insert(table).returning(table.c.id, sort_by_parameter_order=True),
+            rows
+        ).scalars().all()
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        report['failed'] += len(chunk)
+        report['errors'].extend({'row': number, 'errors': [str(e)]} for number, _ in chunk)
+        return
+    report['imported'] += len(ids)
+    report['ids'].extend(ids)
+    catalog_imported.send(current_app._get_current_object(), item_type=item_type, ids=ids, creator_id=creator_id)
+
+def import_catalog(item_type, rows, creator_id, chunk_size=IMPORT_CHUNK_SIZE, max_rows=None):
+    """Validate and bulk-insert (row_number, data) pairs; returns a per-row error report"""
+    report = {'item_type': item_type, 'received': 0, 'imported': 0, 'failed': 0,
+              'truncated': False, 'errors': [], 'ids': []}
+    chunk = []
+    for number, data in rows:
+        if max_rows is not None and report['received'] >= max_rows:
+            report['truncated'] = True
+            break
+        report['received'] += 1
+        try:
+            if isinstance(data, Exception):
+                raise data
+            chunk.append((number, validate_row(item_type, data)))
+        except ValueError as e:
+            report['failed'] += 1
+            report['errors'].append({'row': number, 'errors': str(e).split('; ')})
+            continue
+        if len(chunk) >= chunk_size:
+            _insert_chunk(item_type, creator_id, chunk, report)
+            chunk = []
+    if chunk:
+        _insert_chunk(item_type, creator_id, chunk, report)
+    return report
+
+catalog_cli = AppGroup('catalog', help='Marketplace catalog maintenance')
+
+@catalog_cli.command('import')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--type', 'item_type', type=click.Choice(sorted(MODELS)), required=True)
+@click.option('--creator-id', type=int, required=True, help='Owner of the imported listings')
+@click.option('--format', 'import_format', type=click.Choice(FORMATS), default=None, help='Defaults to the file extension')
+@click.option('--chunk-size', default=IMPORT_CHUNK_SIZE, show_default=True)
+def import_command(path, item_type, creator_id, import_format, chunk_size):
+    """Bulk import business ideas or services from an NDJSON or CSV file"""
+    if db.session.get(User, creator_id) is None:
+        raise click.ClickException(f'No user with id {creator_id}')
+    with open(path, 'rb') as handle:
+        rows = read_rows(text_stream(handle), import_format or guess_format(path))
+        report = import_catalog(item_type, rows, creator_id, chunk_size)
+    for error in report['errors']:
+        click.echo(f"  row {error['row']}: {'; '.join(error['errors'])}")
+    click.echo(f"Imported {report['imported']} of {report['received']} rows ({report['failed']} failed)")
@@ -0,0 +1,130 @@
+from flask.cli import AppGroup
+from src.models.user import db
+from src.models.compressed_text import CompressedText, codec, zstandard
+import click
+import os
+import time
+
+RECOMPRESS_BATCH_SIZE = 500
+DICTIONARY_SIZE = 112640
+TRAINING_SAMPLES = 5000
+
+def _read_dictionary(path):
+    if path and os.path.exists(path):
+        with open(path, 'rb') as handle:
+            return handle.read()
+    return None
+
+def init_app(app):
+    """Configure the shared codec; COMPRESSION_DICTIONARY is the zstd dictionary to write with, the previous ones stay readable"""
+    previous = app.config.get('COMPRESSION_PREVIOUS_DICTIONARIES') or []
+    if isinstance(previous, str):
+        previous = [path for path in previous.split(os.pathsep) if path]
+    codec.configure(
+        threshold=app.config.get('COMPRESSION_THRESHOLD', codec.threshold),
+        dictionary=_read_dictionary(app.config.get('COMPRESSION_DICTIONARY')),
+        use_zstd=app.config.get('COMPRESSION_USE_ZSTD', True),
+        previous_dictionaries=[data for data in map(_read_dictionary, previous) if data]
+    )
+    app.extensions['compression'] = codec
+
+def compressed_columns():
+    """(table, column) for every CompressedText column in the metadata"""
+    for table in db.metadata.sorted_tables:
+        for column in table.columns:
+            if isinstance(column.type, CompressedText):
+                yield table, column
+
+def _raw(column):
+    # Bypass the type so rows come back exactly as stored: str for text, bytes for compressed
+    return db.type_coerce(column, db.Text).label('raw')
+
+def recompress_column(table, column, batch_size=RECOMPRESS_BATCH_SIZE, pause=0.0):
+    """Re-encode stored values with the current codec in keyset-paged batches; returns rows rewritten"""
+    key = table.primary_key.columns.values()[0]
+    update = table.update().where(key == db.bindparam('_key')).values(
+        {column.name: db.bindparam('_value', type_=column.type)}
+    )
+    last_key = None
+    rewritten = 0
+    while True:
+        query = db.select(key, _raw(column)).where(column.isnot(None))
+        if last_key is not None:
+            query = query.where(key > last_key)
+        rows = db.session.execute(query.order_by(key).limit(batch_size)).all()
+        if not rows:
+            break
+        changed = []
+        for row_key, raw in rows:
+            text = codec.decode(raw)
+            encoded = codec.encode(text)
+            if encoded != raw:
+                changed.append({'_key': row_key, '_value': text})
+        if changed:
+            db.session.execute(update, changed)
+        # One short write transaction per batch keeps the app responsive while this runs
+        db.session.commit()
+        rewritten += len(changed)
+        last_key = rows[-1][0]
+        if pause:
+            time.sleep(pause)
+    return rewritten
+
+def column_stats(table, column):
+    """Row count, compressed row count and stored bytes for one column"""
+    stored = db.func.length(db.cast(column, db.LargeBinary))
+    row = db.session.execute(db.select(
+        db.func.count(column),
+        db.func.coalesce(db.func.sum(stored), 0),
+        db.func.count(db.case((db.func.typeof(column) == 'blob', 1)))
+    )).one()
+    return {'rows': row[0], 'stored_bytes': row[1], 'compressed_rows': row[2]}
+
+def train_dictionary(samples=TRAINING_SAMPLES, size=DICTIONARY_SIZE):
+    """Train a zstd dictionary on a sample of values from every compressed column"""
+    if zstandard is None:
+        raise RuntimeError('zstandard is not installed')
+    texts = []
+    for table, column in compressed_columns():
+        rows = db.session.execute(
+            db.select(_raw(column)).where(column.isnot(None)).order_by(db.func.random()).limit(samples)
+        ).scalars()
+        texts.extend(codec.decode(raw).encode('utf-8') for raw in rows)
+    return zstandard.train_dictionary(size, texts).as_bytes()
+
+compression_cli = AppGroup('compression', help='Compressed text column maintenance')
+
+@compression_cli.command('recompress')
+@click.option('--batch-size', default=RECOMPRESS_BATCH_SIZE, show_default=True)
+@click.option('--pause', default=0.05, show_default=True, help='Seconds to sleep between batches')
+@click.option('--table', 'only_table', default=None, help='Limit to one table')
+def recompress_command(batch_size, pause, only_table):
+    """Compress existing rows (or move them to the current codec) without blocking the app"""
+    for table, column in compressed_columns():
+        if only_table and table.name != only_table:
+            continue
+        rewritten = recompress_column(table, column, batch_size, pause)
+        click.echo(f'  {table.name}.{column.name}: {rewritten} rows rewritten')
+
+@compression_cli.command('stats')
+def stats_command():
+    """Stored size of every compressed column"""
+    for table, column in compressed_columns():
+        stats = column_stats(table, column)
+        click.echo(f"  {table.name}.{column.name}: {stats['rows']} rows, {stats['compressed_rows']} compressed, "
+                   f"{stats['stored_bytes']} bytes stored")
+
+@compression_cli.command('train-dictionary')
+@click.argument('path', type=click.Path(dir_okay=False))
+@click.option('--samples', default=TRAINING_SAMPLES, show_default=True, help='Rows sampled per column')
+@click.option('--size', default=DICTIONARY_SIZE, show_default=True, help='Dictionary size in bytes')
+def train_dictionary_command(path, samples, size):
+    """Write a zstd dictionary trained on stored content; point COMPRESSION_DICTIONARY at it"""
+    try:
+        dictionary = train_dictionary(samples, size)
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+    with open(path, 'wb') as handle:
+        handle.write(dictionary)
+    click.echo(f'Wrote {len(dictionary)} byte dictionary to {path}; run "flask compression recompress" after deploying it, '
+               f'keeping the old one in COMPRESSION_PREVIOUS_DICTIONARIES until that finishes')
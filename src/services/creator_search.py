@@ -0,0 +1,353 @@
+from flask import current_app
+from src.models.user import db
+from src.models.creator_profile import CreatorProfile
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from bisect import bisect_left, bisect_right
+from itertools import chain
+import json
+import threading
+import time
+
+FACETS = ('skills', 'industries', 'languages')
+RANGES = ('hourly_rate', 'years_experience')
+FACET_SCAN_LIMIT = 100
+REBUILD_INTERVAL_SECONDS = 30
+BUILD_CHUNK_SIZE = 5000
+
+DOCUMENT_COLUMNS = (
+    CreatorProfile.id, CreatorProfile.skills, CreatorProfile.industries, CreatorProfile.languages,
+    CreatorProfile.hourly_rate, CreatorProfile.years_experience, CreatorProfile.is_available_for_hire,
+    CreatorProfile.is_verified, CreatorProfile.client_satisfaction, CreatorProfile.profile_completion,
+    CreatorProfile.completed_projects, CreatorProfile.location
+)
+
+def _normalize(value):
+    return str(value).strip().lower()
+
+def _parse_list(raw):
+    """Decode a JSON-encoded list column into normalized, de-duplicated values"""
+    if not raw:
+        return ()
+    try:
+        values = json.loads(raw)
+    except (TypeError, ValueError):
+        values = raw.split(',')
+    if isinstance(values, str):
+        values = [values]
+    return tuple(dict.fromkeys(_normalize(v) for v in values if str(v).strip()))
+
+def document_from_profile(profile):
+    """Flatten a CreatorProfile (or a row with the same attributes) into an index document"""
+    return {
+        'id': profile.id,
+        'skills': _parse_list(profile.skills),
+        'industries': _parse_list(profile.industries),
+        'languages': _parse_list(profile.languages),
+        'hourly_rate': profile.hourly_rate,
+        'years_experience': profile.years_experience,
+        'is_available_for_hire': bool(profile.is_available_for_hire),
+        'is_verified': bool(profile.is_verified),
+        'client_satisfaction': profile.client_satisfaction or 0.0,
+        'profile_completion': profile.profile_completion or 0,
+        'completed_projects': profile.completed_projects or 0,
+        'location': _normalize(profile.location) if profile.location else None,
+    }
+
+def _rank_key(doc):
+    return (-doc['client_satisfaction'], -doc['profile_completion'], -doc['completed_projects'], doc['id'])
+
+# A published snapshot is never modified: changes are applied to a copy that replaces it, so searches
+# read it without the lock while commits on other threads update the index
+class _Snapshot:
+    """Bitmaps laid out in rank order: bit i is the i-th best-ranked profile"""
+    
+    def __init__(self, docs):
+        ordered = sorted(docs.values(), key=_rank_key)
+        self.ids_by_slot = [doc['id'] for doc in ordered]
+        self.slot_of = {profile_id: slot for slot, profile_id in enumerate(self.ids_by_slot)}
+        self.all_bits = 0
+        self.available = 0
+        self.verified = 0
+        self.postings = {facet: {} for facet in FACETS}
+        self.numeric = {field: {} for field in RANGES}
+        self.locations = {}
+        self.popular = {}
+        self.sorted_values = {field: [] for field in RANGES}
+        for slot, doc in enumerate(ordered):
+            self._set(slot, doc)
+        for field in RANGES:
+            self.sorted_values[field] = sorted(self.numeric[field])
+    
+    def copy(self):
+        clone = _Snapshot.__new__(_Snapshot)
+        clone.ids_by_slot = list(self.ids_by_slot)
+        clone.slot_of = dict(self.slot_of)
+        clone.all_bits = self.all_bits
+        clone.available = self.available
+        clone.verified = self.verified
+        clone.postings = {facet: dict(postings) for facet, postings in self.postings.items()}
+        clone.numeric = {field: dict(buckets) for field, buckets in self.numeric.items()}
+        clone.locations = dict(self.locations)
+        clone.popular = dict(self.popular)
+        clone.sorted_values = {field: list(values) for field, values in self.sorted_values.items()}
+        return clone
+    
+    def _set(self, slot, doc):
+        bit = 1 << slot
+        self.all_bits |= bit
+        if doc['is_available_for_hire']:
+            self.available |= bit
+        if doc['is_verified']:
+            self.verified |= bit
+        for facet in FACETS:
+            postings = self.postings[facet]
+            for value in doc[facet]:
+                postings[value] = postings.get(value, 0) | bit
+        for field in RANGES:
+            value = doc[field]
+            if value is not None:
+                self.numeric[field][value] = self.numeric[field].get(value, 0) | bit
+        if doc['location']:
+            self.locations[doc['location']] = self.locations.get(doc['location'], 0) | bit
+    
+    def _clear(self, slot, doc):
+        mask = ~(1 << slot)
+        self.all_bits &= mask
+        self.available &= mask
+        self.verified &= mask
+        for facet in FACETS:
+            for value in doc[facet]:
+                self.postings[facet][value] &= mask
+        for field in RANGES:
+            if doc[field] is not None:
+                self.numeric[field][doc[field]] &= mask
+        if doc['location']:
+            self.locations[doc['location']] &= mask
+    
+    def upsert(self, old_doc, doc):
+        slot = self.slot_of.get(doc['id'])
+        if slot is None:
+            # New profiles go to the end until the next rank rebuild
+            slot = len(self.ids_by_slot)
+            self.ids_by_slot.append(doc['id'])
+            self.slot_of[doc['id']] = slot
+        elif old_doc is not None:
+            self._clear(slot, old_doc)
+        self._set(slot, doc)
+        for facet in FACETS:
+            if old_doc is None or old_doc[facet] != doc[facet]:
+                self.popular.pop(facet, None)
+        for field in RANGES:
+            value = doc[field]
+            values = self.sorted_values[field]
+            if value is not None:
+                i = bisect_left(values, value)
+                if i == len(values) or values[i] != value:
+                    values.insert(i, value)
+    
+    def remove(self, doc):
+        slot = self.slot_of.pop(doc['id'], None)
+        if slot is not None:
+            self._clear(slot, doc)
+            self.ids_by_slot[slot] = None
+            for facet in FACETS:
+                if doc[facet]:
+                    self.popular.pop(facet, None)
+    
+    def range_bits(self, field, low=None, high=None):
+        values = self.sorted_values[field]
+        start = bisect_left(values, low) if low is not None else 0
+        end = bisect_right(values, high) if high is not None else len(values)
+        bits = 0
+        buckets = self.numeric[field]
+        for value in values[start:end]:
+            bits |= buckets[value]
+        return bits
+
+class CreatorSearchIndex:
+    """Faceted creator search over bitmap posting lists kept in memory"""
+    
+    def __init__(self, rebuild_interval=REBUILD_INTERVAL_SECONDS):
+        self.rebuild_interval = rebuild_interval
+        self._docs = {}
+        self._snapshot = _Snapshot({})
+        self._lock = threading.Lock()
+        self._rank_stale = False
+        self._last_rebuild = 0.0
+        self.built = False
+    
+    def build(self):
+        """Load every profile from the database and lay out the bitmaps"""
+        rows = db.session.query(*DOCUMENT_COLUMNS).execution_options(yield_per=BUILD_CHUNK_SIZE)
+        self.load(document_from_profile(row) for row in rows)
+    
+    def load(self, documents):
+        docs = {doc['id']: doc for doc in documents}
+        snapshot = _Snapshot(docs)
+        with self._lock:
+            self._docs = docs
+            self._snapshot = snapshot
+            self._rank_stale = False
+            self._last_rebuild = time.monotonic()
+            self.built = True
+    
+    def upsert(self, doc):
+        self.apply([('upsert', doc)])
+    
+    def remove(self, profile_id):
+        self.apply([('remove', profile_id)])
+    
+    def apply(self, changes):
+        """Apply ('upsert', doc) and ('remove', profile_id) changes to a copy and publish it"""
+        with self._lock:
+            snapshot = self._snapshot.copy()
+            for op, payload in changes:
+                if op == 'upsert':
+                    old_doc = self._docs.get(payload['id'])
+                    self._docs[payload['id']] = payload
+                    snapshot.upsert(old_doc, payload)
+                    if old_doc is None or _rank_key(old_doc) != _rank_key(payload):
+                        self._rank_stale = True
+                else:
+                    doc = self._docs.pop(payload, None)
+                    if doc is not None:
+                        snapshot.remove(doc)
+            self._snapshot = snapshot
+    
+    def _maybe_rebuild(self):
+        # Re-lay the bitmaps in rank order at most once per interval, off the request thread
+        if not self._rank_stale or time.monotonic() - self._last_rebuild < self.rebuild_interval:
+            return
+        with self._lock:
+            if not self._rank_stale:
+                return
+            self._rank_stale = False
+            self._last_rebuild = time.monotonic()
+            docs = dict(self._docs)
+        threading.Thread(target=self._rebuild, args=(docs,), name='creator-search-rebuild', daemon=True).start()
+    
+    def _rebuild(self, docs):
+        snapshot = _Snapshot(docs)
+        with self._lock:
+            # Replay anything that changed while the new snapshot was built
+            for profile_id, doc in self._docs.items():
+                if docs.get(profile_id) is not doc:
+                    snapshot.upsert(docs.get(profile_id), doc)
+            for profile_id, doc in docs.items():
+                if profile_id not in self._docs:
+                    snapshot.remove(doc)
+            self._snapshot = snapshot
+    
+    def search(self, skills=(), industries=(), languages=(), min_rate=None, max_rate=None,
+               min_years=None, max_years=None, available=None, verified=None, location=None,
+               page=1, per_page=20, facet_limit=20):
+        """Filter, rank and paginate; returns profile ids in rank order, the total and facet counts"""
+        self._maybe_rebuild()
+        snap = self._snapshot
+        bits = snap.all_bits
+        
+        for facet, values in (('skills', skills), ('industries', industries), ('languages', languages)):
+            postings = snap.postings[facet]
+            for value in values:
+                bits &= postings.get(_normalize(value), 0)
+                if not bits:
+                    break
+        
+        if bits and (min_rate is not None or max_rate is not None):
+            bits &= snap.range_bits('hourly_rate', min_rate, max_rate)
+        if bits and (min_years is not None or max_years is not None):
+            bits &= snap.range_bits('years_experience', min_years, max_years)
+        if bits and available is not None:
+            bits = bits & snap.available if available else bits & ~snap.available
+        if bits and verified is not None:
+            bits = bits & snap.verified if verified else bits & ~snap.verified
+        if bits and location:
+            needle = _normalize(location)
+            location_bits = 0
+            for value, value_bits in snap.locations.items():
+                if needle in value:
+                    location_bits |= value_bits
+            bits &= location_bits
+        
+        total = bits.bit_count()
+        
+        # Lowest set bits are the best-ranked matches
+        ids = []
+        remaining = bits
+        skip = max(page - 1, 0) * per_page
+        while remaining and len(ids) < per_page:
+            lowest = remaining & -remaining
+            remaining ^= lowest
+            if skip:
+                skip -= 1
+                continue
+            ids.append(snap.ids_by_slot[lowest.bit_length() - 1])
+        
+        facets = {}
+        if facet_limit:
+            for facet in FACETS:
+                postings = snap.postings[facet]
+                popular = list(postings) if len(postings) <= FACET_SCAN_LIMIT else snap.popular.get(facet)
+                if popular is None:
+                    # Only the most common values are counted against the result set
+                    popular = snap.popular[facet] = [
+                        value for value, _ in sorted(postings.items(), key=lambda item: -item[1].bit_count())
+                    ][:FACET_SCAN_LIMIT]
+                counts = [(value, (postings[value] & bits).bit_count()) for value in popular]
+                counts = sorted((c for c in counts if c[1]), key=lambda c: (-c[1], c[0]))[:facet_limit]
+                facets[facet] = dict(counts)
+        
+        return {'ids': ids, 'total': total, 'facets': facets}
+
+def init_app(app):
+    app.extensions['creator_search'] = CreatorSearchIndex(
+        rebuild_interval=app.config.get('CREATOR_SEARCH_REBUILD_SECONDS', REBUILD_INTERVAL_SECONDS)
+    )
+
+def get_index():
+    """Return the app's creator index, building it from the database on first use"""
+    index = current_app.extensions['creator_search']
+    if not index.built:
+        index.build()
+    return index
+
+def queue_profile_refresh(session, profile_ids):
+    """Re-read profiles changed with Core statements so the index picks them up on commit"""
+    if not profile_ids:
+        return
+    rows = session.connection().execute(
+        db.select(*DOCUMENT_COLUMNS).where(CreatorProfile.id.in_(profile_ids))
+    )
+    changes = session.info.setdefault('creator_search_changes', [])
+    changes.extend(('upsert', document_from_profile(row)) for row in rows)
+
+# Keep the index in step with committed CreatorProfile changes
+
+@event.listens_for(Session, 'after_flush')
+def _collect_profile_changes(session, flush_context):
+    changes = session.info.setdefault('creator_search_changes', [])
+    for obj in chain(session.new, session.dirty):
+        if isinstance(obj, CreatorProfile):
+            changes.append(('upsert', document_from_profile(obj)))
+    for obj in session.deleted:
+        if isinstance(obj, CreatorProfile):
+            changes.append(('remove', obj.id))
+
+@event.listens_for(Session, 'after_commit')
+def _apply_profile_changes(session):
+    changes = session.info.pop('creator_search_changes', None)
+    if not changes:
+        return
+    try:
+        index = current_app.extensions.get('creator_search')
+    except RuntimeError:
+        return
+    # An unbuilt index will load these rows when it is first used
+    if index is None or not index.built:
+        return
+    index.apply(changes)
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_profile_changes(session, previous_transaction):
+    session.info.pop('creator_search_changes', None)
@@ -0,0 +1,244 @@
+from flask.cli import AppGroup
+from src.models.user import db
+from src.models.transaction import Transaction, EarningsRollup, EarningsBackfill
+from sqlalchemy import event, func, inspect
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from datetime import datetime
+import click
+
+PLATFORM = 0
+ALL_TYPES = 'all'
+GRANULARITIES = ('day', 'month')
+BACKFILL_CHUNK_SIZE = 5000
+BACKFILL_ID = 1
+
+def period_start(granularity, when):
+    when = when or datetime.utcnow()
+    day = when.date() if isinstance(when, datetime) else when
+    return day.replace(day=1) if granularity == 'month' else day
+
+def _counts(transaction_type, status):
+    return transaction_type == 'purchase' and status == 'completed'
+
+def _accumulate(totals, values, sign):
+    """Add one transaction to every rollup row it belongs to"""
+    delta = (
+        sign,
+        sign * (values['amount'] or 0.0),
+        sign * (values['commission_amount'] or 0.0),
+        sign * (values['seller_amount'] or 0.0),
+    )
+    currency = values['currency'] or 'USD'
+    sellers = {PLATFORM, values['seller_id'] or PLATFORM}
+    for granularity in GRANULARITIES:
+        start = period_start(granularity, values['created_at'])
+        for seller_id in sellers:
+            for item_type in {values['item_type'], ALL_TYPES}:
+                key = (seller_id, granularity, item_type, currency, start)
+                current = totals.get(key, (0, 0.0, 0.0, 0.0))
+                totals[key] = tuple(a + b for a, b in zip(current, delta))
+
+def _rows(totals):
+    now = datetime.utcnow()
+    return [
+        {
+            'seller_id': seller_id,
+            'granularity': granularity,
+            'item_type': item_type,
+            'currency': currency,
+            'period_start': start,
+            'transaction_count': count,
+            'gross_amount': gross,
+            'commission_amount': commission,
+            'seller_amount': seller,
+            'updated_at': now,
+        }
+        for (seller_id, granularity, item_type, currency, start), (count, gross, commission, seller) in totals.items()
+        # An edited amount nets to zero transactions but still moves the sums
+        if count or gross or commission or seller
+    ]
+
+def _upsert(connection, totals):
+    """Add totals onto rollup rows in one executemany upsert"""
+    rows = _rows(totals)
+    if not rows:
+        return 0
+    table = EarningsRollup.__table__
+    statement = sqlite_insert(table)
+    statement = statement.on_conflict_do_update(
+        index_elements=['seller_id', 'granularity', 'item_type', 'currency', 'period_start'],
+        set_={
+            'transaction_count': table.c.transaction_count + statement.excluded.transaction_count,
+            'gross_amount': table.c.gross_amount + statement.excluded.gross_amount,
+            'commission_amount': table.c.commission_amount + statement.excluded.commission_amount,
+            'seller_amount': table.c.seller_amount + statement.excluded.seller_amount,
+            'updated_at': statement.excluded.updated_at,
+        }
+    )
+    connection.execute(statement, rows)
+    return len(rows)
+
+ROLLUP_FIELDS = ('transaction_type', 'status', 'amount', 'commission_amount', 'seller_amount',
+                 'seller_id', 'item_type', 'currency', 'created_at')
+
+def _values(transaction, committed=False):
+    state = inspect(transaction)
+    values = {}
+    for key in ROLLUP_FIELDS:
+        history = state.attrs[key].history
+        values[key] = history.deleted[0] if committed and history.deleted else getattr(transaction, key)
+    return values
+
+def _load_previous_value(target, value, oldvalue, initiator):
+    return value
+
+# active_history loads an expired value before it is overwritten, so a transaction changed after
+# a commit still takes back what it counted before
+for _key in ROLLUP_FIELDS:
+    event.listen(getattr(Transaction, _key), 'set', _load_previous_value, retval=True, active_history=True)
+
+# Fold completed purchases (and later refunds or edits) into the rollups in the same transaction.
+# While a backfill runs, transactions it has yet to read are left to it: it will count their
+# current state, so a delta applied now would be counted twice
+
+def _changes(session):
+    """(transaction id, values, sign) for every rollup contribution a flush adds or removes"""
+    changes = []
+    for transaction in session.new:
+        if isinstance(transaction, Transaction):
+            values = _values(transaction)
+            if _counts(values['transaction_type'], values['status']):
+                changes.append((transaction.id, values, 1))
+    for transaction in session.dirty:
+        if isinstance(transaction, Transaction) and session.is_modified(transaction, include_collections=False):
+            before = _values(transaction, committed=True)
+            after = _values(transaction)
+            if _counts(before['transaction_type'], before['status']):
+                changes.append((transaction.id, before, -1))
+            if _counts(after['transaction_type'], after['status']):
+                changes.append((transaction.id, after, 1))
+    for transaction in session.deleted:
+        if isinstance(transaction, Transaction):
+            before = _values(transaction, committed=True)
+            if _counts(before['transaction_type'], before['status']):
+                changes.append((transaction.id, before, -1))
+    return changes
+
+@event.listens_for(Session, 'after_flush')
+def _update_rollups(session, flush_context):
+    changes = _changes(session)
+    if not changes:
+        return
+    connection = session.connection()
+    # Read on the flush's connection, after its write, so a backfill chunk cannot commit in between
+    progress = connection.execute(
+        db.select(EarningsBackfill.last_id, EarningsBackfill.max_id).where(EarningsBackfill.id == BACKFILL_ID)
+    ).first()
+    totals = {}
+    for transaction_id, values, sign in changes:
+        if progress is None or not progress.last_id < transaction_id <= progress.max_id:
+            _accumulate(totals, values, sign)
+    if totals:
+        _upsert(connection, totals)
+
+def query_rollups(seller_id, granularity='day', start=None, end=None, item_type=ALL_TYPES, currency='USD'):
+    """Rollup rows for a seller (or PLATFORM) in a date range, oldest first"""
+    query = EarningsRollup.query.filter_by(
+        seller_id=seller_id,
+        granularity=granularity,
+        item_type=item_type,
+        currency=currency
+    )
+    if start is not None:
+        query = query.filter(EarningsRollup.period_start >= period_start(granularity, start))
+    if end is not None:
+        query = query.filter(EarningsRollup.period_start <= end)
+    return query.order_by(EarningsRollup.period_start).all()
+
+def summarize(rollups):
+    return {
+        'transaction_count': sum(r.transaction_count for r in rollups),
+        'gross_amount': round(sum(r.gross_amount for r in rollups), 2),
+        'commission_amount': round(sum(r.commission_amount for r in rollups), 2),
+        'seller_amount': round(sum(r.seller_amount for r in rollups), 2)
+    }
+
+def item_type_breakdown(seller_id, granularity, start=None, end=None, currency='USD'):
+    """Per-item-type totals summed over the range from rollup rows"""
+    query = db.session.query(
+        EarningsRollup.item_type,
+        func.sum(EarningsRollup.transaction_count),
+        func.sum(EarningsRollup.gross_amount),
+        func.sum(EarningsRollup.seller_amount)
+    ).filter(
+        EarningsRollup.seller_id == seller_id,
+        EarningsRollup.granularity == granularity,
+        EarningsRollup.currency == currency,
+        EarningsRollup.item_type != ALL_TYPES
+    )
+    if start is not None:
+        query = query.filter(EarningsRollup.period_start >= period_start(granularity, start))
+    if end is not None:
+        query = query.filter(EarningsRollup.period_start <= end)
+    return {
+        item_type: {'transaction_count': count, 'gross_amount': round(gross, 2), 'seller_amount': round(seller, 2)}
+        for item_type, count, gross, seller in query.group_by(EarningsRollup.item_type)
+    }
+
+def backfill(chunk_size=BACKFILL_CHUNK_SIZE, echo=None):
+    """Rebuild every rollup from Transaction history in chunks, resuming an interrupted run; returns purchases read"""
+    table = EarningsBackfill.__table__
+    progress = db.session.get(EarningsBackfill, BACKFILL_ID)
+    if progress is None:
+        # Purchases committed after this point are rolled up by the flush hook instead
+        db.session.execute(EarningsRollup.__table__.delete())
+        max_id = db.session.query(func.max(Transaction.id)).scalar() or 0
+        db.session.add(EarningsBackfill(id=BACKFILL_ID, last_id=0, max_id=max_id))
+        db.session.commit()
+        last_id = 0
+    else:
+        last_id, max_id = progress.last_id, progress.max_id
+    
+    columns = [Transaction.id] + [getattr(Transaction, key) for key in ROLLUP_FIELDS]
+    processed = 0
+    while last_id < max_id:
+        # Take the write lock before reading, so no change to the chunk commits between the read
+        # and the watermark moving past it
+        db.session.execute(table.update().where(table.c.id == BACKFILL_ID).values(last_id=last_id))
+        ids = db.session.execute(
+            db.select(Transaction.id).where(Transaction.id > last_id, Transaction.id <= max_id)
+            .order_by(Transaction.id).limit(chunk_size)
+        ).scalars().all()
+        chunk_end = ids[-1] if len(ids) == chunk_size else max_id
+        rows = db.session.execute(
+            db.select(*columns).where(
+                Transaction.id > last_id,
+                Transaction.id <= chunk_end,
+                Transaction.transaction_type == 'purchase',
+                Transaction.status == 'completed'
+            )
+        ).mappings().all()
+        totals = {}
+        for row in rows:
+            _accumulate(totals, row, 1)
+        _upsert(db.session.connection(), totals)
+        db.session.execute(table.update().where(table.c.id == BACKFILL_ID).values(last_id=chunk_end))
+        # Commit per chunk so a long backfill holds the write lock only briefly
+        db.session.commit()
+        last_id = chunk_end
+        processed += len(rows)
+        if echo:
+            echo(processed)
+    db.session.execute(table.delete().where(table.c.id == BACKFILL_ID))
+    db.session.commit()
+    return processed
+
+earnings_cli = AppGroup('earnings', help='Earnings rollup maintenance')
+
+@earnings_cli.command('backfill')
+@click.option('--chunk-size', default=BACKFILL_CHUNK_SIZE, show_default=True)
+def backfill_command(chunk_size):
+    """Rebuild daily and monthly earnings rollups from transaction history, resuming an interrupted run"""
+    processed = backfill(chunk_size, echo=lambda n: click.echo(f'  {n} transactions'))
+    click.echo(f'Rolled up {processed} transactions')
@@ -0,0 +1,309 @@
+from flask import current_app
+from flask.cli import AppGroup
+from src.models.user import db
+from src.models.entitlement import Entitlement
+from src.models.transaction import Transaction
+from sqlalchemy import event, inspect
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from collections import OrderedDict
+import click
+import hashlib
+import math
+import threading
+import time
+
+ENTITLED_TYPES = ('business_idea', 'service', 'graphic', 'curated_idea')
+ONE_TIME_TYPES = ('business_idea', 'graphic', 'curated_idea')  # digital goods; a service can be ordered again
+COMMISSION_RATE = 0.1
+
+DEFAULT_CACHE_USERS = 10000
+DEFAULT_CACHE_SECONDS = 300.0  # bounds how long a refund made on another worker can go unnoticed
+RECHECK_SECONDS = 2.0  # a miss against a set older than this reloads it, catching other workers' purchases
+BLOOM_ERROR_RATE = 0.01
+DEFAULT_BLOOM_REBUILD_SECONDS = 60.0
+BUILD_CHUNK_SIZE = 10000
+
+def _bloom_key(user_id, item_type, item_id):
+    return f'{user_id}:{item_type}:{item_id}'.encode('utf-8')
+
+class BloomFilter:
+    """Bit array answering "definitely not present" or "maybe present"; k positions from one blake2b digest"""
+    
+    def __init__(self, capacity, error_rate=BLOOM_ERROR_RATE):
+        capacity = max(capacity, 1024)
+        self.size = int(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+    
+    def _positions(self, key):
+        digest = hashlib.blake2b(key, digest_size=16).digest()
+        a = int.from_bytes(digest[:8], 'little')
+        b = int.from_bytes(digest[8:], 'little') | 1
+        return [(a + i * b) % self.size for i in range(self.hashes)]
+    
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+    
+    def __contains__(self, key):
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+# A hit in a user's set costs no query; a miss reloads the set only when it is a few seconds old.
+# With ENTITLEMENT_BLOOM on, checks the filter rules out are denied without loading anything. The
+# filter is rebuilt in the background, so with several workers a purchase made on another worker
+# can be refused here until the next rebuild (ENTITLEMENT_BLOOM_REBUILD_SECONDS).
+class EntitlementCache:
+    """Per-user entitlement sets in an LRU, with an optional Bloom filter over every entitlement"""
+    
+    def __init__(self, max_users=DEFAULT_CACHE_USERS, ttl=DEFAULT_CACHE_SECONDS):
+        self.max_users = max_users
+        self.ttl = ttl
+        self.use_bloom = False
+        self.bloom_rebuild_seconds = DEFAULT_BLOOM_REBUILD_SECONDS
+        self.app = None
+        self._lock = threading.Lock()
+        self._users = OrderedDict()  # user_id -> (frozenset of (item_type, item_id), loaded_at)
+        self._bloom = None
+        self._bloom_built_at = None
+        self._bloom_building = False
+        self._bloom_backlog = None  # grants committed while a rebuild is scanning
+    
+    def init_app(self, app):
+        self.app = app
+        self.max_users = app.config.get('ENTITLEMENT_CACHE_USERS', self.max_users)
+        self.ttl = app.config.get('ENTITLEMENT_CACHE_SECONDS', self.ttl)
+        self.use_bloom = app.config.get('ENTITLEMENT_BLOOM', self.use_bloom)
+        self.bloom_rebuild_seconds = app.config.get('ENTITLEMENT_BLOOM_REBUILD_SECONDS', self.bloom_rebuild_seconds)
+        app.extensions['entitlements'] = self
+    
+    def _load(self, user_id):
+        rows = db.session.execute(
+            db.select(Entitlement.item_type, Entitlement.item_id).where(Entitlement.user_id == user_id)
+        ).all()
+        items = frozenset((item_type, item_id) for item_type, item_id in rows)
+        with self._lock:
+            self._users[user_id] = (items, time.monotonic())
+            self._users.move_to_end(user_id)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+        return items
+    
+    def _cached(self, user_id):
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is not None:
+                self._users.move_to_end(user_id)
+        return entry
+    
+    def items_for(self, user_id):
+        """Every (item_type, item_id) the user holds"""
+        entry = self._cached(user_id)
+        if entry is not None and time.monotonic() - entry[1] < self.ttl:
+            return entry[0]
+        return self._load(user_id)
+    
+    def has(self, user_id, item_type, item_id):
+        if user_id is None:
+            return False
+        key = (item_type, int(item_id))
+        entry = self._cached(user_id)
+        if entry is not None:
+            age = time.monotonic() - entry[1]
+            if age < self.ttl and key in entry[0]:
+                return True
+            if age < RECHECK_SECONDS:
+                return False
+        bloom = self._current_bloom()
+        if bloom is not None and _bloom_key(user_id, *key) not in bloom:
+            return False
+        return key in self._load(user_id)
+    
+    def _current_bloom(self):
+        if not self.use_bloom:
+            return None
+        stale = self._bloom_built_at is None or time.monotonic() - self._bloom_built_at > self.bloom_rebuild_seconds
+        if stale and not self._bloom_building and self.app is not None:
+            self._bloom_building = True
+            self._bloom_backlog = []
+            threading.Thread(target=self._rebuild_bloom, name='entitlement-bloom', daemon=True).start()
+        return self._bloom
+    
+    def _rebuild_bloom(self):
+        try:
+            with self.app.app_context():
+                count = db.session.query(db.func.count(Entitlement.id)).scalar()
+                bloom = BloomFilter(count * 2)
+                result = db.session.execute(
+                    db.select(Entitlement.user_id, Entitlement.item_type, Entitlement.item_id)
+                    .execution_options(yield_per=BUILD_CHUNK_SIZE)
+                )
+                for user_id, item_type, item_id in result:
+                    bloom.add(_bloom_key(user_id, item_type, item_id))
+                db.session.remove()
+            with self._lock:
+                for key in self._bloom_backlog:
+                    bloom.add(key)
+                self._bloom = bloom
+        finally:
+            with self._lock:
+                # Also after a failed scan, so it is retried on the next interval rather than every check
+                self._bloom_built_at = time.monotonic()
+                self._bloom_building = False
+                self._bloom_backlog = None
+    
+    def apply(self, changes):
+        """Forget the sets of users whose entitlements changed and add new grants to the filter"""
+        with self._lock:
+            for user_id, item_type, item_id, granted in changes:
+                self._users.pop(user_id, None)
+                if granted:
+                    key = _bloom_key(user_id, item_type, item_id)
+                    if self._bloom is not None:
+                        self._bloom.add(key)
+                    if self._bloom_backlog is not None:
+                        self._bloom_backlog.append(key)
+    
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+            self._bloom = None
+            self._bloom_built_at = None
+
+entitlements = EntitlementCache()
+
+def record_purchase(user_id, item_type, item_id, amount, seller_id=None, payment_method='credit_card'):
+    """Add a completed purchase transaction; the entitlement is granted when it flushes"""
+    commission_amount = amount * COMMISSION_RATE
+    transaction = Transaction(
+        user_id=user_id,
+        transaction_type='purchase',
+        item_type=item_type,
+        item_id=item_id,
+        amount=amount,
+        status='completed',  # In real app, this would be 'pending' until payment is processed
+        payment_method=payment_method,
+        seller_id=seller_id,
+        commission_rate=COMMISSION_RATE,
+        commission_amount=commission_amount,
+        seller_amount=amount - commission_amount
+    )
+    db.session.add(transaction)
+    return transaction
+
+def _grant(connection, transactions):
+    rows = [{
+        'user_id': t.user_id,
+        'item_type': t.item_type,
+        'item_id': t.item_id,
+        'transaction_id': t.id
+    } for t in transactions]
+    connection.execute(
+        sqlite_insert(Entitlement.__table__).on_conflict_do_nothing(
+            index_elements=['user_id', 'item_type', 'item_id']
+        ),
+        rows
+    )
+
+def _revoke(connection, transaction):
+    """Drop the grant this transaction made, then fall back to any other completed purchase of the item"""
+    table = Entitlement.__table__
+    connection.execute(table.delete().where(
+        table.c.user_id == transaction.user_id,
+        table.c.item_type == transaction.item_type,
+        table.c.item_id == transaction.item_id,
+        table.c.transaction_id == transaction.id
+    ))
+    other = db.select(Transaction.user_id, Transaction.item_type, Transaction.item_id, Transaction.id).where(
+        Transaction.user_id == transaction.user_id,
+        Transaction.item_type == transaction.item_type,
+        Transaction.item_id == transaction.item_id,
+        Transaction.transaction_type == 'purchase',
+        Transaction.status == 'completed',
+        Transaction.id != transaction.id
+    ).limit(1)
+    connection.execute(
+        sqlite_insert(table).from_select(['user_id', 'item_type', 'item_id', 'transaction_id'], other)
+        .on_conflict_do_nothing(index_elements=['user_id', 'item_type', 'item_id'])
+    )
+
+def _entitling(transaction):
+    return (transaction.transaction_type == 'purchase' and transaction.item_type in ENTITLED_TYPES
+            and transaction.item_id is not None)
+
+def backfill(chunk_size=BUILD_CHUNK_SIZE, echo=None):
+    """Grant entitlements for every completed purchase in keyset-paged chunks; returns purchases read"""
+    last_id = 0
+    processed = 0
+    while True:
+        transactions = Transaction.query.filter(
+            Transaction.id > last_id,
+            Transaction.transaction_type == 'purchase',
+            Transaction.status == 'completed',
+            Transaction.item_type.in_(ENTITLED_TYPES),
+            Transaction.item_id.isnot(None)
+        ).order_by(Transaction.id).limit(chunk_size).all()
+        if not transactions:
+            break
+        _grant(db.session.connection(), transactions)
+        db.session.commit()
+        last_id = transactions[-1].id
+        processed += len(transactions)
+        if echo:
+            echo(processed)
+    entitlements.clear()
+    return processed
+
+entitlements_cli = AppGroup('entitlements', help='Purchase entitlements')
+
+@entitlements_cli.command('backfill')
+@click.option('--chunk-size', default=BUILD_CHUNK_SIZE, show_default=True)
+def backfill_command(chunk_size):
+    """Grant entitlements for completed purchases recorded before the entitlement table existed"""
+    processed = backfill(chunk_size, echo=lambda n: click.echo(f'  {n} purchases'))
+    click.echo(f'Granted entitlements for {processed} purchases')
+
+# Grant on completed purchases and revoke on refunds inside the same transaction
+
+@event.listens_for(Session, 'after_flush')
+def _sync_entitlements(session, flush_context):
+    granted = []
+    revoked = []
+    for transaction in session.new:
+        if isinstance(transaction, Transaction) and _entitling(transaction) and transaction.status == 'completed':
+            granted.append(transaction)
+    for transaction in session.dirty:
+        if (isinstance(transaction, Transaction) and _entitling(transaction)
+                and inspect(transaction).attrs.status.history.has_changes()):
+            (granted if transaction.status == 'completed' else revoked).append(transaction)
+    for transaction in session.deleted:
+        if isinstance(transaction, Transaction) and _entitling(transaction):
+            revoked.append(transaction)
+    if not granted and not revoked:
+        return
+    
+    connection = session.connection()
+    if granted:
+        _grant(connection, granted)
+    for transaction in revoked:
+        _revoke(connection, transaction)
+    changes = session.info.setdefault('entitlement_changes', [])
+    changes.extend((t.user_id, t.item_type, t.item_id, True) for t in granted)
+    changes.extend((t.user_id, t.item_type, t.item_id, False) for t in revoked)
+
+@event.listens_for(Session, 'after_commit')
+def _apply_entitlement_changes(session):
+    changes = session.info.pop('entitlement_changes', None)
+    if not changes:
+        return
+    try:
+        cache = current_app.extensions.get('entitlements')
+    except RuntimeError:
+        return
+    if cache is not None:
+        cache.apply(changes)
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_entitlement_changes(session, previous_transaction):
+    session.info.pop('entitlement_changes', None)
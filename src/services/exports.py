@@ -0,0 +1,237 @@
+from flask.cli import AppGroup
+from src.models.user import User, db
+from src.models.transaction import Transaction, ExportJob
+from sqlalchemy.orm import aliased
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import click
+import csv
+import gzip
+import io
+import json
+import os
+import time
+import uuid
+
+FORMATS = ('csv', 'ndjson')
+STREAM_CHUNK_SIZE = 1000
+DEFAULT_EXPORT_WORKERS = 2
+DEFAULT_RETENTION_HOURS = 24
+PURGE_INTERVAL_SECONDS = 3600
+
+EXPORT_COLUMNS = (
+    'id', 'created_at', 'transaction_type', 'status', 'item_type', 'item_id', 'amount', 'currency',
+    'commission_rate', 'commission_amount', 'seller_amount', 'payment_method', 'user_id', 'buyer_username',
+    'seller_id', 'seller_username'
+)
+
+def parse_filters(args):
+    """Normalize export filters from query args or a JSON body; raises ValueError"""
+    filters = {}
+    for key in ('start', 'end'):
+        if args.get(key):
+            filters[key] = datetime.strptime(args[key], '%Y-%m-%d').date().isoformat()
+    for key in ('status', 'transaction_type', 'item_type'):
+        if args.get(key):
+            filters[key] = args[key]
+    return filters
+
+def transaction_rows(filters, user_id=None, seller_id=None, chunk_size=STREAM_CHUNK_SIZE):
+    """Stream export rows as tuples with buyer and seller joined in, chunk by chunk from the cursor"""
+    buyer = aliased(User)
+    seller = aliased(User)
+    query = db.select(
+        Transaction.id, Transaction.created_at, Transaction.transaction_type, Transaction.status,
+        Transaction.item_type, Transaction.item_id, Transaction.amount, Transaction.currency,
+        Transaction.commission_rate, Transaction.commission_amount, Transaction.seller_amount,
+        Transaction.payment_method, Transaction.user_id, buyer.username,
+        Transaction.seller_id, seller.username
+    ).join(buyer, buyer.id == Transaction.user_id).outerjoin(seller, seller.id == Transaction.seller_id)
+    
+    if user_id is not None:
+        query = query.where(Transaction.user_id == user_id)
+    if seller_id is not None:
+        query = query.where(Transaction.seller_id == seller_id)
+    if filters.get('start'):
+        query = query.where(Transaction.created_at >= datetime.fromisoformat(filters['start']))
+    if filters.get('end'):
+        query = query.where(Transaction.created_at < datetime.fromisoformat(filters['end']) + timedelta(days=1))
+    for key in ('status', 'transaction_type', 'item_type'):
+        if filters.get(key):
+            query = query.where(getattr(Transaction, key) == filters[key])
+    
+    # Core rows with yield_per: nothing accumulates in the identity map
+    result = db.session.execute(query.order_by(Transaction.id).execution_options(yield_per=chunk_size))
+    for partition in result.partitions():
+        yield from partition
+
+def _value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def encode_csv(rows, chunk_size=STREAM_CHUNK_SIZE):
+    """Yield CSV text in chunks of rows, header first"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    count = 0
+    for row in rows:
+        writer.writerow([_value(v) for v in row])
+        count += 1
+        if count % chunk_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def encode_ndjson(rows, chunk_size=STREAM_CHUNK_SIZE):
+    """Yield newline-delimited JSON in chunks of rows"""
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(dict(zip(EXPORT_COLUMNS, map(_value, row)))))
+        if len(lines) >= chunk_size:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+ENCODERS = {'csv': encode_csv, 'ndjson': encode_ndjson}
+MIMETYPES = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+class _Counted:
+    """Wraps a row iterator and counts what passes through"""
+    
+    def __init__(self, rows):
+        self.rows = rows
+        self.count = 0
+    
+    def __iter__(self):
+        for row in self.rows:
+            self.count += 1
+            yield row
+
+# The queue lives only in this process's thread pool. A restart leaves jobs that were queued or
+# running as 'pending'/'running' rows that nothing picks up again; `flask exports requeue` resubmits
+# them and is meant to run once after a deploy, before any other worker could still be running one.
+# Finished files are kept for EXPORT_RETENTION_HOURS, then deleted and their jobs marked 'expired'.
+class ExportRunner:
+    """Runs large exports on a small thread pool, writing gzip files for later download"""
+    
+    def __init__(self, max_workers=DEFAULT_EXPORT_WORKERS, retention_hours=DEFAULT_RETENTION_HOURS):
+        self.max_workers = max_workers
+        self.retention_hours = retention_hours
+        self.app = None
+        self.export_dir = None
+        self._executor = None
+        self._last_purge = 0.0
+    
+    def init_app(self, app):
+        self.app = app
+        self.max_workers = app.config.get('EXPORT_WORKERS', self.max_workers)
+        self.retention_hours = app.config.get('EXPORT_RETENTION_HOURS', self.retention_hours)
+        self.export_dir = app.config.get(
+            'EXPORT_DIR',
+            os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database', 'exports')
+        )
+        app.extensions['exports'] = self
+    
+    def submit(self, user_id, export_format, filters, scope):
+        """Record a job and queue it; scope is {'user_id': ...}, {'seller_id': ...} or {} for everything"""
+        job = ExportJob(
+            id=uuid.uuid4().hex,
+            user_id=user_id,
+            format=export_format,
+            filters=json.dumps(dict(filters, **scope)),
+            status='pending'
+        )
+        db.session.add(job)
+        db.session.commit()
+        
+        self._queue(self._run, job.id)
+        # Sweep expired files from the pool now and then, so no cron job is needed
+        if time.monotonic() - self._last_purge >= PURGE_INTERVAL_SECONDS:
+            self._last_purge = time.monotonic()
+            self._queue(self._purge_in_background)
+        return job
+    
+    def requeue(self):
+        """Resubmit jobs left pending or running by a previous process; returns how many"""
+        jobs = ExportJob.query.filter(ExportJob.status.in_(('pending', 'running'))).all()
+        for job in jobs:
+            job.status = 'pending'
+        db.session.commit()
+        for job in jobs:
+            self._queue(self._run, job.id)
+        return len(jobs)
+    
+    def purge(self, now=None):
+        """Delete files of exports completed over retention_hours ago; returns how many jobs expired"""
+        cutoff = (now or datetime.utcnow()) - timedelta(hours=self.retention_hours)
+        jobs = ExportJob.query.filter(ExportJob.status == 'completed', ExportJob.completed_at < cutoff).all()
+        for job in jobs:
+            if job.file_path and os.path.exists(job.file_path):
+                os.remove(job.file_path)
+            job.status = 'expired'
+            job.file_path = None
+        db.session.commit()
+        return len(jobs)
+    
+    def _queue(self, fn, *args):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='export')
+        return self._executor.submit(fn, *args)
+    
+    def _purge_in_background(self):
+        with self.app.app_context():
+            try:
+                self.purge()
+            except Exception:
+                db.session.rollback()
+                self.app.logger.exception('Export purge failed')
+    
+    def _run(self, job_id):
+        with self.app.app_context():
+            job = db.session.get(ExportJob, job_id)
+            job.status = 'running'
+            db.session.commit()
+            
+            filters = json.loads(job.filters or '{}')
+            scope = {key: filters.pop(key) for key in ('user_id', 'seller_id') if key in filters}
+            os.makedirs(self.export_dir, exist_ok=True)
+            path = os.path.join(self.export_dir, f'{job.id}.{job.format}.gz')
+            try:
+                rows = _Counted(transaction_rows(filters, **scope))
+                with gzip.open(f'{path}.tmp', 'wt', encoding='utf-8', newline='') as output:
+                    for chunk in ENCODERS[job.format](rows):
+                        output.write(chunk)
+                os.replace(f'{path}.tmp', path)
+                job.status = 'completed'
+                job.file_path = path
+                job.row_count = rows.count
+            except Exception as e:
+                db.session.rollback()
+                job = db.session.get(ExportJob, job_id)
+                job.status = 'failed'
+                job.error = str(e)
+                if os.path.exists(f'{path}.tmp'):
+                    os.remove(f'{path}.tmp')
+            job.completed_at = datetime.utcnow()
+            db.session.commit()
+
+runner = ExportRunner()
+
+exports_cli = AppGroup('exports', help='Background transaction exports')
+
+@exports_cli.command('purge')
+@click.option('--hours', default=None, type=int, help='Override EXPORT_RETENTION_HOURS')
+def purge_command(hours):
+    """Delete finished export files past their retention"""
+    if hours is not None:
+        runner.retention_hours = hours
+    click.echo(f'Expired {runner.purge()} exports')
+
+@exports_cli.command('requeue')
+def requeue_command():
+    """Run export jobs that a restart left pending or running"""
+    requeued = runner.requeue()
+    # The pool's threads are not daemons, so the command waits here until the exports finish
+    click.echo(f'Requeued {requeued} exports')
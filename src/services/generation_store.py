@@ -0,0 +1,158 @@
+from src.models.user import db
+from src.models.generation import ArtifactBlob, GeneratedArtifact
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from collections import OrderedDict
+from datetime import datetime
+import copy
+import hashlib
+import json
+import threading
+
+MAX_CHAIN_LENGTH = 8  # beyond this a refinement is stored as a fresh snapshot
+CACHE_SIZE = 256
+
+# Per-request metadata, filled in from the artifact row instead of being hashed and stored
+VOLATILE_KEYS = ('generated_by', 'generated_at', 'last_refined', 'artifact_id', 'parent_id')
+
+def canonical(content):
+    return json.dumps(content, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+
+def content_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def strip_volatile(content):
+    return {key: value for key, value in content.items() if key not in VOLATILE_KEYS}
+
+def make_delta(old, new):
+    """Top-level diff: appended list items, replaced keys and removed keys"""
+    delta = {'append': {}, 'set': {}, 'unset': [key for key in old if key not in new]}
+    for key, value in new.items():
+        before = old.get(key)
+        if key in old and before == value:
+            continue
+        if isinstance(before, list) and isinstance(value, list) and value[:len(before)] == before:
+            delta['append'][key] = value[len(before):]
+        else:
+            delta['set'][key] = value
+    return delta
+
+def apply_delta(base, delta):
+    content = copy.deepcopy(base)
+    for key in delta['unset']:
+        content.pop(key, None)
+    for key, items in delta['append'].items():
+        content[key] = content.get(key, []) + items
+    content.update(copy.deepcopy(delta['set']))
+    return content
+
+class _Cache:
+    """Materialized contents by artifact id; versions never change once written"""
+    
+    def __init__(self, size=CACHE_SIZE):
+        self.size = size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, artifact_id):
+        with self._lock:
+            content = self._items.get(artifact_id)
+            if content is not None:
+                self._items.move_to_end(artifact_id)
+            return content
+    
+    def put(self, artifact_id, content):
+        with self._lock:
+            self._items[artifact_id] = content
+            self._items.move_to_end(artifact_id)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+_cache = _Cache()
+
+def _store_blob(body):
+    blob_hash = content_hash(body)
+    db.session.execute(
+        sqlite_insert(ArtifactBlob.__table__).on_conflict_do_nothing(index_elements=['hash']),
+        [{'hash': blob_hash, 'body': body, 'size': len(body.encode('utf-8')), 'created_at': datetime.utcnow()}]
+    )
+    return blob_hash
+
+def materialize(artifact):
+    """Full content of a version: nearest snapshot plus the deltas after it"""
+    cached = _cache.get(artifact.id)
+    if cached is not None:
+        return copy.deepcopy(cached)
+    chain = [artifact]
+    while chain[-1].is_delta:
+        parent = _cache.get(chain[-1].parent_id)
+        if parent is not None:
+            break
+        chain.append(db.session.get(GeneratedArtifact, chain[-1].parent_id))
+    else:
+        parent = None
+    
+    hashes = [a.blob_hash for a in chain]
+    bodies = dict(db.session.query(ArtifactBlob.hash, ArtifactBlob.body).filter(ArtifactBlob.hash.in_(hashes)))
+    content = parent
+    for version in reversed(chain):
+        body = json.loads(bodies[version.blob_hash])
+        content = apply_delta(content, body) if version.is_delta else body
+        _cache.put(version.id, content)
+    return copy.deepcopy(content)
+
+def _find(user_id, kind, full_hash):
+    return GeneratedArtifact.query.filter_by(user_id=user_id, kind=kind, content_hash=full_hash).first()
+
+def save(user_id, kind, content, parent=None, request=None):
+    """Store a version once; identical content from the same user returns the existing version"""
+    content = strip_volatile(content)
+    text = canonical(content)
+    full_hash = content_hash(text)
+    existing = _find(user_id, kind, full_hash)
+    if existing is not None:
+        return existing, False
+    
+    artifact = GeneratedArtifact(
+        user_id=user_id,
+        kind=kind,
+        parent_id=parent.id if parent is not None else None,
+        content_hash=full_hash,
+        title=str(content.get('title') or content.get('executive_summary') or '')[:200] or None,
+        request=request
+    )
+    # Refinements of an idea are stored as deltas until the chain gets long
+    if parent is not None and parent.kind == kind and parent.chain_length < MAX_CHAIN_LENGTH:
+        artifact.is_delta = True
+        artifact.chain_length = parent.chain_length + 1
+        artifact.blob_hash = _store_blob(canonical(make_delta(materialize(parent), content)))
+    else:
+        artifact.blob_hash = _store_blob(text)
+    db.session.add(artifact)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # A concurrent request stored the same content first; the unique dedup index kept one
+        db.session.rollback()
+        existing = _find(user_id, kind, full_hash)
+        if existing is None:
+            raise
+        return existing, False
+    _cache.put(artifact.id, copy.deepcopy(content))
+    return artifact, True
+
+def get_owned(user_id, artifact_id, kind=None):
+    """A user's own version, or None"""
+    artifact = db.session.get(GeneratedArtifact, artifact_id)
+    if artifact is None or artifact.user_id != user_id or (kind and artifact.kind != kind):
+        return None
+    return artifact
+
+def with_metadata(artifact, content):
+    """Add back the per-version fields that are not part of the stored content"""
+    timestamp = artifact.created_at.strftime('%Y-%m-%d %H:%M:%S') if artifact.created_at else None
+    content = dict(content, artifact_id=artifact.id, parent_id=artifact.parent_id, generated_by=artifact.user_id)
+    content['generated_at'] = timestamp
+    if artifact.kind == 'idea' and artifact.parent_id is not None:
+        content['last_refined'] = timestamp
+    return content
@@ -0,0 +1,209 @@
+from src.models.user import db
+from src.models.networking import Conversation, ConversationParticipant, Message
+from src.services.pubsub import publish_to_user
+from sqlalchemy import case, func
+from sqlalchemy.orm import joinedload, selectinload
+from datetime import datetime
+
+PREVIEW_LENGTH = 200
+DEFAULT_PAGE_SIZE = 30
+MAX_PAGE_SIZE = 100
+
+def get_participant(conversation_id, user_id):
+    """Return the active participant row for a user in a conversation, or None"""
+    return ConversationParticipant.query.filter_by(
+        conversation_id=conversation_id,
+        user_id=user_id,
+        status='active'
+    ).first()
+
+def create_conversation(creator_id, participant_ids, conversation_type='direct', title=None, description=None):
+    """Create a conversation with the creator as admin and the given users as members"""
+    conversation = Conversation(
+        conversation_type=conversation_type,
+        title=title,
+        description=description
+    )
+    db.session.add(conversation)
+    db.session.flush()
+    
+    member_ids = [creator_id] + [uid for uid in dict.fromkeys(participant_ids) if uid != creator_id]
+    for uid in member_ids:
+        db.session.add(ConversationParticipant(
+            conversation_id=conversation.id,
+            user_id=uid,
+            role='admin' if uid == creator_id else 'member'
+        ))
+    
+    return conversation
+
+def send_message(conversation_id, sender_id, content, message_type='text',
+                 attachment_url=None, attachment_name=None, attachment_size=None):
+    """Insert a message and update every participant's inbox counters in one statement"""
+    now = datetime.utcnow()
+    message = Message(
+        conversation_id=conversation_id,
+        sender_id=sender_id,
+        content=content,
+        message_type=message_type,
+        attachment_url=attachment_url,
+        attachment_name=attachment_name,
+        attachment_size=attachment_size,
+        created_at=now
+    )
+    db.session.add(message)
+    db.session.flush()
+    
+    is_sender = ConversationParticipant.user_id == sender_id
+    db.session.execute(
+        db.update(ConversationParticipant)
+        .where(ConversationParticipant.conversation_id == conversation_id)
+        .where(ConversationParticipant.status == 'active')
+        .values(
+            unread_count=case(
+                (is_sender, ConversationParticipant.unread_count),
+                else_=ConversationParticipant.unread_count + 1
+            ),
+            last_read_message_id=case(
+                (is_sender, message.id),
+                else_=ConversationParticipant.last_read_message_id
+            ),
+            last_message_id=message.id,
+            last_message_sender_id=sender_id,
+            last_message_preview=(content or '')[:PREVIEW_LENGTH],
+            last_message_type=message_type,
+            last_message_at=now
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.session.execute(
+        db.update(Conversation)
+        .where(Conversation.id == conversation_id)
+        .values(last_message_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    
+    return message
+
+def mark_read(participant, up_to_message_id):
+    """Advance a participant's read marker and return how many messages it newly covers"""
+    conversation_id = participant.conversation_id
+    target = db.session.get(Message, up_to_message_id)
+    if target is not None and target.conversation_id != conversation_id:
+        raise ValueError('Message does not belong to this conversation')
+    
+    # A marker past the tail would swallow every later message, so it stops at the newest one
+    tail = db.session.query(func.max(Message.id)).filter(Message.conversation_id == conversation_id).scalar() or 0
+    up_to_message_id = min(up_to_message_id, tail)
+    previous = participant.last_read_message_id or 0
+    if up_to_message_id <= previous:
+        return 0
+    
+    # Reads are per participant: what this reader saw is the span between their old and new marker
+    from_others = (
+        Message.conversation_id == conversation_id,
+        Message.sender_id != participant.user_id,
+        Message.is_deleted.is_(False)
+    )
+    marked = db.session.query(func.count(Message.id)).filter(
+        *from_others,
+        Message.id > previous,
+        Message.id <= up_to_message_id
+    ).scalar()
+    remaining = db.session.query(func.count(Message.id)).filter(
+        *from_others,
+        Message.id > up_to_message_id
+    ).scalar()
+    
+    # is_read on the message only records that some recipient has seen it
+    now = datetime.utcnow()
+    db.session.execute(
+        db.update(Message)
+        .where(Message.conversation_id == conversation_id)
+        .where(Message.id > previous)
+        .where(Message.id <= up_to_message_id)
+        .where(Message.sender_id != participant.user_id)
+        .where(Message.is_read.is_(False))
+        .values(is_read=True, read_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    
+    # Unread counter is re-derived from the indexed tail after the read marker
+    participant.last_read_message_id = up_to_message_id
+    participant.last_read_at = now
+    participant.unread_count = remaining
+    
+    return marked
+
+def get_inbox(user_id, page=1, per_page=20):
+    """Paginate a user's conversations, most recently active first"""
+    query = Conversation.query.join(
+        ConversationParticipant,
+        ConversationParticipant.conversation_id == Conversation.id
+    ).filter(
+        ConversationParticipant.user_id == user_id,
+        ConversationParticipant.status == 'active'
+    ).options(
+        selectinload(Conversation.participants).joinedload(ConversationParticipant.user)
+    ).order_by(
+        ConversationParticipant.last_message_at.desc().nulls_last(),
+        Conversation.id.desc()
+    )
+    return query.paginate(page=page, per_page=per_page, error_out=False)
+
+def get_unread_total(user_id):
+    """Total unread messages across all of a user's conversations"""
+    return db.session.query(
+        func.coalesce(func.sum(ConversationParticipant.unread_count), 0)
+    ).filter(
+        ConversationParticipant.user_id == user_id,
+        ConversationParticipant.status == 'active'
+    ).scalar()
+
+def get_history(conversation_id, before_id=None, limit=DEFAULT_PAGE_SIZE):
+    """Return (messages, next_cursor) for a conversation, newest first"""
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    query = Message.query.filter(
+        Message.conversation_id == conversation_id
+    ).options(joinedload(Message.sender))
+    
+    if before_id:
+        query = query.filter(Message.id < before_id)
+    
+    # Fetch one extra row to know whether an older page exists
+    messages = query.order_by(Message.id.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(messages) > limit:
+        messages = messages[:limit]
+        next_cursor = messages[-1].id
+    
+    return messages, next_cursor
+
+def publish_message(message):
+    """Fan a committed message and the resulting unread counts out to every participant"""
+    rows = db.session.query(
+        ConversationParticipant.user_id,
+        ConversationParticipant.unread_count
+    ).filter(
+        ConversationParticipant.conversation_id == message.conversation_id,
+        ConversationParticipant.status == 'active'
+    ).all()
+    
+    payload = message.to_dict()
+    for user_id, unread_count in rows:
+        publish_to_user(user_id, 'message', payload)
+        if user_id != message.sender_id:
+            publish_to_user(user_id, 'unread', {
+                'conversation_id': message.conversation_id,
+                'delta': 1,
+                'unread_count': unread_count
+            })
+
+def publish_read(participant, marked):
+    """Tell a participant's other sessions that their unread count changed"""
+    publish_to_user(participant.user_id, 'unread', {
+        'conversation_id': participant.conversation_id,
+        'delta': -marked,
+        'unread_count': participant.unread_count,
+        'last_read_message_id': participant.last_read_message_id
+    })
@@ -0,0 +1,236 @@
+from flask.cli import AppGroup
+from src.models.user import User, db
+from src.models.networking import Notification
+from src.services.pubsub import publish_notification
+from datetime import datetime, timedelta
+import atexit
+import click
+import threading
+import time
+
+DEFAULT_WINDOW_SECONDS = 30
+DEFAULT_MAX_PENDING = 5000
+ARCHIVE_READ_AFTER_DAYS = 30
+DELETE_ARCHIVED_AFTER_DAYS = 90
+MAX_FLUSH_ATTEMPTS = 5  # groups that failed this many writes are dropped rather than retried forever
+
+# notification_type -> (title, single-actor message, aggregated message)
+NOTIFICATION_TEMPLATES = {
+    'post_like': ('New like', '{actor} liked your post', '{actor} and {others} liked your post'),
+    'comment': ('New comment', '{actor} commented on your post', '{actor} and {others} commented on your post'),
+    'comment_like': ('New like', '{actor} liked your comment', '{actor} and {others} liked your comment'),
+    'post_share': ('New share', '{actor} shared your post', '{actor} and {others} shared your post'),
+    'mention': ('New mention', '{actor} mentioned you', '{actor} and {others} mentioned you'),
+    'follow': ('New follower', '{actor} started following you', '{actor} and {others} started following you'),
+    'connection_request': ('Connection request', '{actor} wants to connect', '{actor} and {others} want to connect'),
+    'connection_accepted': ('Connection accepted', '{actor} accepted your connection request', '{actor} and {others} accepted your connection requests'),
+}
+
+def _others(count):
+    return '1 other' if count == 1 else f'{count} others'
+
+class _PendingGroup:
+    __slots__ = ('first_seen', 'actor_ids', 'action_url', 'attempts')
+    
+    def __init__(self, first_seen, action_url):
+        self.first_seen = first_seen
+        self.actor_ids = {}
+        self.action_url = action_url
+        self.attempts = 0
+
+class NotificationPipeline:
+    """Queues notification events, coalesces them per (user, type, target) window and bulk-inserts them"""
+    
+    def __init__(self, window_seconds=DEFAULT_WINDOW_SECONDS, max_pending=DEFAULT_MAX_PENDING):
+        self.window_seconds = window_seconds
+        self.max_pending = max_pending
+        self.app = None
+        self._lock = threading.Lock()
+        self._groups = {}
+        self._wakeup = threading.Event()
+        self._worker = None
+    
+    def init_app(self, app):
+        self.app = app
+        self.window_seconds = app.config.get('NOTIFICATION_WINDOW_SECONDS', self.window_seconds)
+        self.max_pending = app.config.get('NOTIFICATION_MAX_PENDING', self.max_pending)
+        app.extensions['notifications'] = self
+        atexit.register(self.flush, True)
+    
+    def notify(self, user_id, notification_type, actor_id=None, post_id=None, comment_id=None, action_url=None):
+        """Queue an event; it is written once its coalescing window closes"""
+        if actor_id is not None and actor_id == user_id:
+            return
+        
+        key = (user_id, notification_type, post_id, comment_id)
+        with self._lock:
+            group = self._groups.get(key)
+            if group is None:
+                group = self._groups[key] = _PendingGroup(time.monotonic(), action_url)
+            if actor_id is not None:
+                # dict keeps first-seen order and drops repeat actors
+                group.actor_ids.setdefault(actor_id, None)
+            pending = len(self._groups)
+        
+        self._ensure_worker()
+        if pending >= self.max_pending:
+            self._wakeup.set()
+    
+    def pending_count(self):
+        with self._lock:
+            return len(self._groups)
+    
+    def flush(self, force=False):
+        """Write every group whose window has closed (or all groups when forced); returns rows written"""
+        cutoff = time.monotonic() - self.window_seconds
+        with self._lock:
+            if force or len(self._groups) >= self.max_pending:
+                ripe = self._groups
+                self._groups = {}
+            else:
+                ripe = {k: g for k, g in self._groups.items() if g.first_seen <= cutoff}
+                for key in ripe:
+                    del self._groups[key]
+        
+        if not ripe or self.app is None:
+            return 0
+        
+        with self.app.app_context():
+            try:
+                rows = self._build_rows(ripe)
+                # Bulk INSERT ... RETURNING: one statement, and the pushed payloads carry real ids
+                notifications = db.session.scalars(
+                    db.insert(Notification).returning(Notification),
+                    rows
+                ).all()
+                payloads = [notification.to_dict() for notification in notifications]
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                self._requeue(ripe)
+                raise
+            
+            for payload in payloads:
+                publish_notification(payload['user_id'], payload)
+        
+        return len(payloads)
+    
+    def _requeue(self, groups):
+        """Put groups back after a failed write, merging with any that were queued since"""
+        dropped = 0
+        with self._lock:
+            for key, group in groups.items():
+                group.attempts += 1
+                current = self._groups.get(key)
+                if group.attempts >= MAX_FLUSH_ATTEMPTS:
+                    # Events queued since the failures still get their own attempts
+                    dropped += 1
+                    continue
+                if current is not None:
+                    group.first_seen = min(group.first_seen, current.first_seen)
+                    for actor_id in current.actor_ids:
+                        group.actor_ids.setdefault(actor_id, None)
+                self._groups[key] = group
+        if dropped and self.app is not None:
+            self.app.logger.error('Dropped %d notification groups after %d failed writes', dropped, MAX_FLUSH_ATTEMPTS)
+    
+    def _build_rows(self, groups):
+        actor_ids = {next(iter(g.actor_ids)) for g in groups.values() if g.actor_ids}
+        # Whole users, so to_dict's related_user comes from the identity map instead of a query per row
+        usernames = {
+            user.id: user.username for user in User.query.filter(User.id.in_(actor_ids)).all()
+        } if actor_ids else {}
+        
+        now = datetime.utcnow()
+        rows = []
+        for (user_id, notification_type, post_id, comment_id), group in groups.items():
+            first_actor = next(iter(group.actor_ids), None)
+            actor_count = max(len(group.actor_ids), 1)
+            title, single, aggregated = NOTIFICATION_TEMPLATES.get(
+                notification_type,
+                (notification_type.replace('_', ' ').capitalize(), '{actor}', '{actor} and {others}')
+            )
+            template = aggregated if actor_count > 1 else single
+            rows.append({
+                'user_id': user_id,
+                'notification_type': notification_type,
+                'title': title,
+                'message': template.format(
+                    actor=usernames.get(first_actor, 'Someone'),
+                    others=_others(actor_count - 1)
+                ),
+                'related_user_id': first_actor,
+                'related_post_id': post_id,
+                'related_comment_id': comment_id,
+                'actor_count': actor_count,
+                'action_url': group.action_url,
+                'is_read': False,
+                'is_archived': False,
+                'created_at': now,
+                'read_at': None
+            })
+        return rows
+    
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            with self._lock:
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = threading.Thread(target=self._run, name='notification-flusher', daemon=True)
+                    self._worker.start()
+    
+    def _run(self):
+        interval = max(min(self.window_seconds / 4, 5), 0.05)
+        while True:
+            self._wakeup.wait(interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                if self.app is not None:
+                    self.app.logger.exception('Notification flush failed')
+
+pipeline = NotificationPipeline()
+
+def notify(user_id, notification_type, actor_id=None, post_id=None, comment_id=None, action_url=None):
+    """Queue a notification on the shared pipeline"""
+    pipeline.notify(
+        user_id,
+        notification_type,
+        actor_id=actor_id,
+        post_id=post_id,
+        comment_id=comment_id,
+        action_url=action_url
+    )
+
+def sweep(archive_read_after_days=ARCHIVE_READ_AFTER_DAYS, delete_archived_after_days=DELETE_ARCHIVED_AFTER_DAYS):
+    """Archive old read notifications and delete long-archived ones; returns (archived, deleted)"""
+    now = datetime.utcnow()
+    
+    archived = db.session.execute(
+        db.update(Notification)
+        .where(Notification.is_archived.is_(False))
+        .where(Notification.is_read.is_(True))
+        .where(Notification.created_at < now - timedelta(days=archive_read_after_days))
+        .values(is_archived=True)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    
+    deleted = db.session.execute(
+        db.delete(Notification)
+        .where(Notification.is_archived.is_(True))
+        .where(Notification.created_at < now - timedelta(days=delete_archived_after_days))
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    
+    db.session.commit()
+    return archived, deleted
+
+notifications_cli = AppGroup('notifications', help='Notification pipeline maintenance')
+
+@notifications_cli.command('sweep')
+@click.option('--archive-after', default=ARCHIVE_READ_AFTER_DAYS, show_default=True, help='Archive read notifications older than N days')
+@click.option('--delete-after', default=DELETE_ARCHIVED_AFTER_DAYS, show_default=True, help='Delete archived notifications older than N days')
+def sweep_command(archive_after, delete_after):
+    """Archive and purge old notifications"""
+    archived, deleted = sweep(archive_after, delete_after)
+    click.echo(f'Archived {archived} notifications, deleted {deleted}')
@@ -0,0 +1,160 @@
+from src.models.user import User
+from src.models.creator_profile import CreatorProfile, WorkExperience, Education, PortfolioItem, ServicePackage
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only, selectinload
+from datetime import date, datetime
+
+MAX_DEPTH = 3
+
+# Fields each model may expose through ?fields=; relations map to their target model
+PROJECTION_SPECS = {
+    User: {
+        'columns': ('id', 'username', 'user_type', 'subscription_tier', 'profile_image', 'bio'),
+        'relations': {},
+        'default': ('id', 'username', 'user_type', 'subscription_tier', 'profile_image', 'bio'),
+    },
+    CreatorProfile: {
+        'columns': tuple(c.name for c in CreatorProfile.__table__.columns),
+        'relations': {
+            'user': User,
+            'work_experiences': WorkExperience,
+            'educations': Education,
+            'portfolio_items': PortfolioItem,
+            'service_packages': ServicePackage,
+        },
+        'default': (
+            'id', 'user_id', 'user', 'professional_title', 'tagline', 'years_experience', 'hourly_rate',
+            'availability', 'location', 'skills', 'industries', 'is_verified', 'is_featured',
+            'is_available_for_hire', 'profile_completion', 'completed_projects', 'client_satisfaction',
+            'response_time'
+        ),
+    },
+    WorkExperience: {
+        'columns': tuple(c.name for c in WorkExperience.__table__.columns),
+        'relations': {},
+        'default': ('id', 'company_name', 'position', 'start_date', 'end_date', 'is_current'),
+    },
+    Education: {
+        'columns': tuple(c.name for c in Education.__table__.columns),
+        'relations': {},
+        'default': ('id', 'institution_name', 'degree', 'field_of_study', 'start_date', 'end_date'),
+    },
+    PortfolioItem: {
+        'columns': tuple(c.name for c in PortfolioItem.__table__.columns),
+        'relations': {},
+        'default': ('id', 'title', 'category', 'image_url', 'project_url', 'is_featured'),
+    },
+    ServicePackage: {
+        'columns': tuple(c.name for c in ServicePackage.__table__.columns),
+        'relations': {'creator_profile': CreatorProfile},
+        'default': (
+            'id', 'creator_profile_id', 'name', 'description', 'category', 'price', 'pricing_type',
+            'delivery_time', 'revisions_included', 'is_featured', 'orders_count', 'rating', 'review_count'
+        ),
+    },
+}
+
+class ProjectionError(ValueError):
+    pass
+
+def parse_fields(model, raw):
+    """Turn 'id,name,creator_profile.user.username' into a validated field tree"""
+    if not raw:
+        return _default_tree(model)
+    
+    tree = {}
+    for path in (p.strip() for p in raw.split(',')):
+        if not path:
+            continue
+        parts = path.split('.')
+        if len(parts) > MAX_DEPTH:
+            raise ProjectionError(f'Field path too deep: {path}')
+        _add_path(model, tree, parts, path)
+    
+    if not tree:
+        return _default_tree(model)
+    # The primary key is always returned so clients can correlate rows
+    tree.setdefault(inspect(model).primary_key[0].name, None)
+    return tree
+
+def _add_path(model, tree, parts, path):
+    spec = PROJECTION_SPECS[model]
+    name = parts[0]
+    if name in spec['relations']:
+        target = spec['relations'][name]
+        subtree = tree.get(name)
+        if len(parts) == 1:
+            if subtree is None:
+                tree[name] = _default_tree(target)
+            return
+        if subtree is None:
+            subtree = tree[name] = {inspect(target).primary_key[0].name: None}
+        _add_path(target, subtree, parts[1:], path)
+    elif name in spec['columns'] and len(parts) == 1:
+        tree[name] = None
+    else:
+        raise ProjectionError(f'Unknown field: {path}')
+
+def _default_tree(model, depth=0):
+    spec = PROJECTION_SPECS[model]
+    tree = {}
+    for name in spec['default']:
+        if name in spec['relations']:
+            if depth < 1:
+                tree[name] = _default_tree(spec['relations'][name], depth + 1)
+        else:
+            tree[name] = None
+    return tree
+
+def _loader_columns(model, tree):
+    """Columns to SELECT for a model: requested fields plus keys the relation loaders need"""
+    mapper = inspect(model)
+    names = {mapper.primary_key[0].name}
+    for name, subtree in tree.items():
+        if subtree is None:
+            names.add(name)
+        else:
+            names.update(c.key for c in mapper.relationships[name].local_columns)
+    return [getattr(model, name) for name in names]
+
+def _loader_options(model, tree):
+    mapper = inspect(model)
+    options = []
+    for name, subtree in tree.items():
+        if subtree is None:
+            continue
+        relationship = mapper.relationships[name]
+        target = relationship.mapper.class_
+        columns = _loader_columns(target, subtree)
+        # The child side of one-to-many loads needs its foreign key
+        columns += [getattr(target, c.key) for c in relationship.remote_side if c.table is target.__table__]
+        loader = selectinload(getattr(model, name)).options(
+            load_only(*columns),
+            *_loader_options(target, subtree)
+        )
+        options.append(loader)
+    return options
+
+def apply(query, model, tree):
+    """Limit a query to the columns and relationships a projection needs"""
+    return query.options(load_only(*_loader_columns(model, tree)), *_loader_options(model, tree))
+
+def _serialize_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+def project(obj, tree):
+    """Serialize a loaded object to a dict containing only the projected fields"""
+    if obj is None:
+        return None
+    result = {}
+    for name, subtree in tree.items():
+        value = getattr(obj, name)
+        if subtree is None:
+            result[name] = _serialize_value(value)
+        elif isinstance(value, list):
+            result[name] = [project(item, subtree) for item in value]
+        else:
+            result[name] = project(value, subtree)
+    return result
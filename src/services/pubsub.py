@@ -0,0 +1,247 @@
+from flask import current_app
+from collections import deque
+from queue import SimpleQueue, Empty
+import itertools
+import json
+import logging
+import threading
+import time
+
+DEFAULT_REPLAY_SIZE = 200
+HISTORY_TTL_SECONDS = 600  # replay buffers of channels nobody listens on are dropped after this
+PRUNE_INTERVAL_SECONDS = 60
+RECONNECT_MAX_SECONDS = 30
+
+logger = logging.getLogger(__name__)
+
+class Subscription:
+    """A single listener on a channel; events are delivered through a lock-free queue"""
+    
+    __slots__ = ('broker', 'channel', 'queue', 'closed', 'held')
+    
+    def __init__(self, broker, channel):
+        self.broker = broker
+        self.channel = channel
+        self.queue = SimpleQueue()
+        self.closed = False
+        self.held = None  # live events that arrive while a replay is still being read
+    
+    def get(self, timeout=None):
+        """Next (event_id, event_type, payload) tuple, or None on timeout"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except Empty:
+            return None
+    
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.broker.unsubscribe(self)
+
+class InProcessBroker:
+    """Per-channel fan-out with a bounded replay buffer for Last-Event-ID resume"""
+    
+    def __init__(self, replay_size=DEFAULT_REPLAY_SIZE):
+        self.replay_size = replay_size
+        self._lock = threading.Lock()
+        self._subscribers = {}
+        self._history = {}
+        self._published_at = {}
+        self._pruned_at = time.monotonic()
+        # Seed ids from the clock so they keep increasing across restarts
+        self._ids = itertools.count(int(time.time() * 1000) * 1000)
+    
+    def next_id(self):
+        return str(next(self._ids))
+    
+    def publish(self, channel, event_type, data, event_id=None):
+        """Deliver an event to every subscriber of a channel and keep it for replay"""
+        payload = data if isinstance(data, str) else json.dumps(data)
+        event = (event_id or self.next_id(), event_type, payload)
+        
+        now = time.monotonic()
+        with self._lock:
+            history = self._history.get(channel)
+            if history is None:
+                history = self._history[channel] = deque(maxlen=self.replay_size)
+            history.append(event)
+            self._published_at[channel] = now
+            subscribers = tuple(self._subscribers.get(channel, ()))
+            if now - self._pruned_at > PRUNE_INTERVAL_SECONDS:
+                self._prune(now)
+        
+        for subscription in subscribers:
+            subscription.queue.put(event)
+        
+        return event[0]
+    
+    def subscribe(self, channel, last_event_id=None):
+        """Register a listener, replaying buffered events newer than last_event_id"""
+        subscription = Subscription(self, channel)
+        
+        # Replay under the lock so later publishes cannot overtake the backlog
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscription)
+            for event in self._events_after(self._history.get(channel, ()), last_event_id):
+                subscription.queue.put(event)
+        
+        return subscription
+    
+    def _prune(self, now):
+        """Drop replay buffers of channels with no listeners and nothing published lately; caller holds the lock"""
+        self._pruned_at = now
+        stale = [
+            channel for channel, published_at in self._published_at.items()
+            if now - published_at > HISTORY_TTL_SECONDS and channel not in self._subscribers
+        ]
+        for channel in stale:
+            del self._published_at[channel]
+            self._history.pop(channel, None)
+    
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.channel]
+    
+    def subscriber_count(self, channel=None):
+        with self._lock:
+            if channel is not None:
+                return len(self._subscribers.get(channel, ()))
+            return sum(len(s) for s in self._subscribers.values())
+    
+    @staticmethod
+    def _events_after(events, last_event_id):
+        if not last_event_id:
+            return []
+        try:
+            last = int(last_event_id)
+        except (TypeError, ValueError):
+            return []
+        return [event for event in events if int(event[0]) > last]
+
+class RedisBroker(InProcessBroker):
+    """Multi-worker broker backed by any Redis-compatible server"""
+    
+    # Events are appended to a capped stream per channel (ids and replay) and
+    # announced over PUBLISH; one listener thread per worker feeds the local
+    # fan-out, so idle subscribers hold no server connections.
+    
+    def __init__(self, url, replay_size=DEFAULT_REPLAY_SIZE, prefix='pubsub'):
+        super().__init__(replay_size=replay_size)
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('PUBSUB_URL requires the redis package (pip install redis)')
+        
+        self.prefix = prefix
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+        self._listener = threading.Thread(target=self._listen, name='pubsub-listener', daemon=True)
+        self._listener.start()
+    
+    def _stream(self, channel):
+        return f'{self.prefix}:stream:{channel}'
+    
+    def publish(self, channel, event_type, data, event_id=None):
+        payload = data if isinstance(data, str) else json.dumps(data)
+        event_id = self._redis.xadd(
+            self._stream(channel),
+            {'type': event_type, 'data': payload},
+            maxlen=self.replay_size,
+            approximate=True
+        )
+        self._redis.publish(
+            f'{self.prefix}:events',
+            json.dumps([channel, event_id, event_type, payload])
+        )
+        return event_id
+    
+    def subscribe(self, channel, last_event_id=None):
+        """Register a listener, replaying the stream after last_event_id before any live event"""
+        subscription = Subscription(self, channel)
+        if last_event_id:
+            subscription.held = []
+        # Registered first so nothing published during the replay is missed; live events are
+        # held back meanwhile and released in order, minus those the replay already covered
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscription)
+        if not last_event_id:
+            return subscription
+        
+        last = _stream_id(last_event_id)
+        try:
+            for event_id, fields in self._redis.xrange(self._stream(channel), min=f'({last_event_id}'):
+                subscription.queue.put((event_id, fields['type'], fields['data']))
+                last = _stream_id(event_id)
+        finally:
+            with self._lock:
+                held, subscription.held = subscription.held, None
+                for event in held:
+                    if _stream_id(event[0]) > last:
+                        subscription.queue.put(event)
+        return subscription
+    
+    def _deliver(self, channel, event):
+        with self._lock:
+            subscribers = tuple(self._subscribers.get(channel, ()))
+            for subscription in subscribers:
+                if subscription.held is not None:
+                    subscription.held.append(event)
+                else:
+                    subscription.queue.put(event)
+    
+    def _listen(self):
+        # Reconnects with backoff; events published while disconnected stay in the streams and
+        # reach clients through Last-Event-ID replay when they reconnect
+        delay = 1
+        while True:
+            try:
+                listener = self._redis.pubsub(ignore_subscribe_messages=True)
+                listener.subscribe(f'{self.prefix}:events')
+                delay = 1
+                for message in listener.listen():
+                    try:
+                        channel, event_id, event_type, payload = json.loads(message['data'])
+                    except (TypeError, ValueError):
+                        continue
+                    self._deliver(channel, (event_id, event_type, payload))
+            except Exception:
+                logger.exception('pubsub listener lost its connection; retrying in %ss', delay)
+            time.sleep(delay)
+            delay = min(delay * 2, RECONNECT_MAX_SECONDS)
+
+def _stream_id(event_id):
+    """Redis stream ids ('ms-seq') as comparable tuples; anything unparsable sorts first"""
+    try:
+        ms, _, seq = str(event_id).partition('-')
+        return int(ms), int(seq or 0)
+    except ValueError:
+        return (-1, -1)
+
+def init_app(app):
+    """Attach a broker to the app; PUBSUB_URL selects the shared backend for multi-worker runs"""
+    url = app.config.get('PUBSUB_URL')
+    replay_size = app.config.get('PUBSUB_REPLAY_SIZE', DEFAULT_REPLAY_SIZE)
+    if url:
+        broker = RedisBroker(url, replay_size=replay_size)
+    else:
+        broker = InProcessBroker(replay_size=replay_size)
+    app.extensions['pubsub'] = broker
+    return broker
+
+def get_broker():
+    return current_app.extensions['pubsub']
+
+def user_channel(user_id):
+    return f'user:{user_id}'
+
+def publish_to_user(user_id, event_type, data):
+    """Publish an event on a user's personal channel"""
+    return get_broker().publish(user_channel(user_id), event_type, data)
+
+def publish_notification(user_id, notification):
+    """Push a newly stored notification (model or dict) to its recipient"""
+    data = notification if isinstance(notification, dict) else notification.to_dict()
+    return publish_to_user(user_id, 'notification', data)
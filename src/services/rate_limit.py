@@ -0,0 +1,182 @@
+from flask import request, jsonify
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from functools import wraps
+import math
+import os
+import sqlite3
+import threading
+import time
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+LOCK_STRIPES = 64
+SWEEP_EVERY = 10000
+
+def parse_rate(rate):
+    """'10/minute' -> (10, 60.0)"""
+    count, _, period = rate.partition('/')
+    return int(count), float(PERIODS[period.strip().rstrip('s')])
+
+class MemoryStore:
+    """Per-process GCRA state: one float per key, guarded by striped locks"""
+    
+    def __init__(self):
+        self._tats = {}
+        self._locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        self._calls = 0
+    
+    def hit(self, key, now, interval, tolerance):
+        """Admit a request or return the seconds to wait before retrying"""
+        with self._locks[hash(key) % LOCK_STRIPES]:
+            tat = max(self._tats.get(key, now), now)
+            if tat - now > tolerance:
+                return tat - now - tolerance
+            self._tats[key] = tat + interval
+        
+        self._calls += 1
+        if self._calls % SWEEP_EVERY == 0:
+            self._sweep(now)
+        return 0.0
+    
+    def clear(self):
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            self._tats.clear()
+        finally:
+            for lock in self._locks:
+                lock.release()
+    
+    def _sweep(self, now):
+        # Keys whose arrival time has passed are indistinguishable from new ones. Each is rechecked
+        # under its stripe's lock, so a key hit again since the copy was taken survives
+        with self._locks[0]:
+            snapshot = self._tats.copy()
+        for key, tat in snapshot.items():
+            if tat <= now:
+                with self._locks[hash(key) % LOCK_STRIPES]:
+                    if self._tats.get(key, now + 1) <= now:
+                        del self._tats[key]
+
+class SQLiteStore:
+    """GCRA state in a shared SQLite file so every worker on the host sees the same limits"""
+    
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._calls = 0
+        connection = self._connection()
+        connection.execute('CREATE TABLE IF NOT EXISTS rate_limit (key TEXT PRIMARY KEY, tat REAL NOT NULL)')
+    
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+    
+    def hit(self, key, now, interval, tolerance):
+        connection = self._connection()
+        # The whole GCRA step is one statement, so concurrent workers cannot interleave
+        row = connection.execute(
+            'INSERT INTO rate_limit (key, tat) VALUES (?1, ?2 + ?3) '
+            'ON CONFLICT(key) DO UPDATE SET tat = MAX(tat, ?2) + ?3 '
+            'WHERE MAX(tat, ?2) - ?2 <= ?4 RETURNING tat',
+            (key, now, interval, tolerance)
+        ).fetchone()
+        if row is not None:
+            self._calls += 1
+            if self._calls % SWEEP_EVERY == 0:
+                self.sweep(now)
+            return 0.0
+        row = connection.execute('SELECT tat FROM rate_limit WHERE key = ?', (key,)).fetchone()
+        return max(row[0] - now - tolerance, 0.001) if row else 0.0
+    
+    def sweep(self, now):
+        self._connection().execute('DELETE FROM rate_limit WHERE tat <= ?', (now,))
+    
+    def clear(self):
+        self._connection().execute('DELETE FROM rate_limit')
+
+def _ip_key():
+    return request.remote_addr or 'unknown'
+
+def _user_key():
+    try:
+        verify_jwt_in_request(optional=True)
+        identity = get_jwt_identity()
+    except Exception:
+        identity = None
+    return f'user:{identity}' if identity is not None else f'ip:{_ip_key()}'
+
+KEY_FUNCTIONS = {
+    'ip': _ip_key,
+    'user': _user_key,
+    'route': lambda: 'all',
+}
+
+class RateLimiter:
+    """GCRA rate limits as route decorators, backed by memory or a shared SQLite file"""
+    
+    def __init__(self):
+        self.store = MemoryStore()
+        self.enabled = True
+    
+    def init_app(self, app):
+        self.enabled = app.config.get('RATE_LIMIT_ENABLED', True)
+        storage = app.config.get('RATE_LIMIT_STORAGE')
+        if storage and storage.startswith('sqlite:///'):
+            path = storage[len('sqlite:///'):]
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self.store = SQLiteStore(path)
+        else:
+            self.store = MemoryStore()
+        app.extensions['rate_limiter'] = self
+    
+    def clear(self):
+        """Forget every key's state"""
+        self.store.clear()
+    
+    def hit(self, key, count, period, burst=None):
+        """Seconds to wait, or 0.0 when the request is admitted"""
+        interval = period / count
+        tolerance = interval * ((burst or count) - 1)
+        return self.store.hit(key, time.time(), interval, tolerance)
+    
+    def limit(self, rate, key='ip', burst=None, scope=None):
+        """Decorator: allow `rate` (e.g. '5/minute') per ip, user, route or custom key function"""
+        count, period = parse_rate(rate)
+        key_function = KEY_FUNCTIONS[key] if isinstance(key, str) else key
+        name = key if isinstance(key, str) else getattr(key, '__name__', 'custom')
+        
+        def decorator(view):
+            prefix = f'{scope or view.__module__ + "." + view.__name__}:{name}:{rate}'
+            
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if self.enabled:
+                    subject = key_function()
+                    if subject is not None:
+                        wait = self.hit(f'{prefix}:{subject}', count, period, burst)
+                        if wait > 0:
+                            response = jsonify({'error': 'Too many requests, please try again later'})
+                            response.headers['Retry-After'] = str(max(math.ceil(wait), 1))
+                            return response, 429
+                return view(*args, **kwargs)
+            return wrapper
+        return decorator
+
+limiter = RateLimiter()
+
+def json_field_key(field, per_ip=True):
+    """Key requests by a field of the JSON body, e.g. the email being logged into, per client IP or overall"""
+    def key_function():
+        data = request.get_json(silent=True) or {}
+        value = data.get(field)
+        if not value:
+            return None
+        value = str(value).strip().lower()
+        return f'{value}@{_ip_key()}' if per_ip else value
+    key_function.__name__ = field if per_ip else f'{field}_overall'
+    return key_function
@@ -0,0 +1,192 @@
+from flask.cli import AppGroup
+from src.models.user import db
+from src.models.creator_profile import CreatorProfile, CreatorReview, RatingAggregate, ServicePackage
+from src.models.business_idea import BusinessIdea
+from src.services.creator_search import queue_profile_refresh
+from sqlalchemy import event, func, inspect
+from sqlalchemy.orm import Session
+from datetime import datetime
+import click
+
+SUB_RATINGS = ('communication', 'quality', 'delivery', 'value')
+
+# subject_type -> (CreatorReview foreign key, target model, average column, count column)
+SUBJECTS = {
+    'creator_profile': ('creator_profile_id', CreatorProfile, 'client_satisfaction', None),
+    'service_package': ('service_package_id', ServicePackage, 'rating', 'review_count'),
+    'business_idea': ('business_idea_id', BusinessIdea, 'rating', 'review_count'),
+}
+
+SUM_COLUMNS = ('review_count', 'rating_sum') + tuple(
+    column for name in SUB_RATINGS for column in (f'{name}_sum', f'{name}_count')
+)
+
+def _contribution(values):
+    """Aggregate column deltas a single review adds to each subject it rates"""
+    delta = {'review_count': 1, 'rating_sum': values['rating']}
+    for name in SUB_RATINGS:
+        score = values[f'{name}_rating']
+        if score is not None:
+            delta[f'{name}_sum'] = score
+            delta[f'{name}_count'] = 1
+    return delta
+
+def _review_values(review, committed=False):
+    """Column values of a review, either as flushed now or as they were before this flush"""
+    state = inspect(review)
+    keys = ['rating'] + [f'{name}_rating' for name in SUB_RATINGS] + [fk for fk, _, _, _ in SUBJECTS.values()]
+    values = {}
+    for key in keys:
+        if committed:
+            history = state.attrs[key].history
+            values[key] = history.deleted[0] if history.deleted else getattr(review, key)
+        else:
+            values[key] = getattr(review, key)
+    return values
+
+def _accumulate(deltas, values, sign):
+    contribution = _contribution(values)
+    for subject_type, (foreign_key, _, _, _) in SUBJECTS.items():
+        subject_id = values[foreign_key]
+        if subject_id is None:
+            continue
+        totals = deltas.setdefault((subject_type, subject_id), dict.fromkeys(SUM_COLUMNS, 0))
+        for column, amount in contribution.items():
+            totals[column] += sign * amount
+
+def _apply_deltas(connection, deltas):
+    """Add deltas to the aggregate rows in place, then copy the averages to the rated rows"""
+    table = RatingAggregate.__table__
+    now = datetime.utcnow()
+    refreshed = {subject_type: [] for subject_type in SUBJECTS}
+    
+    for (subject_type, subject_id), delta in deltas.items():
+        if not any(delta.values()):
+            continue
+        match = (table.c.subject_type == subject_type) & (table.c.subject_id == subject_id)
+        # Increment with SQL expressions so concurrent writers cannot lose updates
+        updated = connection.execute(
+            table.update().where(match).values(
+                updated_at=now,
+                **{column: table.c[column] + amount for column, amount in delta.items() if amount}
+            )
+        ).rowcount
+        if not updated:
+            connection.execute(table.insert().values(
+                subject_type=subject_type, subject_id=subject_id, updated_at=now, **delta
+            ))
+        refreshed[subject_type].append(subject_id)
+    
+    for subject_type, subject_ids in refreshed.items():
+        if subject_ids:
+            _sync_subjects(connection, subject_type, subject_ids)
+    return refreshed
+
+def _sync_subjects(connection, subject_type, subject_ids=None):
+    """Copy averages from rating_aggregate onto the rated table's stored columns"""
+    _, model, average_column, count_column = SUBJECTS[subject_type]
+    aggregate = RatingAggregate.__table__
+    target = model.__table__
+    
+    count = db.select(aggregate.c.review_count).where(
+        aggregate.c.subject_type == subject_type,
+        aggregate.c.subject_id == target.c.id
+    ).scalar_subquery()
+    rating_sum = db.select(aggregate.c.rating_sum).where(
+        aggregate.c.subject_type == subject_type,
+        aggregate.c.subject_id == target.c.id
+    ).scalar_subquery()
+    
+    values = {
+        average_column: db.case(
+            (func.coalesce(count, 0) > 0, func.round(rating_sum * 1.0 / count, 2)),
+            else_=0.0
+        )
+    }
+    if count_column:
+        values[count_column] = func.coalesce(count, 0)
+    
+    statement = target.update().values(**values)
+    if subject_ids is not None:
+        statement = statement.where(target.c.id.in_(subject_ids))
+    connection.execute(statement)
+
+def recompute():
+    """Rebuild every aggregate from CreatorReview with GROUP BY queries; returns rows written"""
+    review = CreatorReview.__table__
+    columns = [func.count().label('review_count'), func.sum(review.c.rating).label('rating_sum')]
+    for name in SUB_RATINGS:
+        score = review.c[f'{name}_rating']
+        columns.append(func.coalesce(func.sum(score), 0).label(f'{name}_sum'))
+        columns.append(func.count(score).label(f'{name}_count'))
+    
+    now = datetime.utcnow()
+    rows = []
+    for subject_type, (foreign_key, _, _, _) in SUBJECTS.items():
+        key = review.c[foreign_key]
+        for row in db.session.execute(db.select(key, *columns).where(key.isnot(None)).group_by(key)):
+            values = row._asdict()
+            rows.append(dict(
+                subject_type=subject_type,
+                subject_id=values.pop(foreign_key),
+                updated_at=now,
+                **values
+            ))
+    
+    connection = db.session.connection()
+    connection.execute(RatingAggregate.__table__.delete())
+    if rows:
+        connection.execute(RatingAggregate.__table__.insert(), rows)
+    for subject_type in SUBJECTS:
+        _sync_subjects(connection, subject_type)
+    db.session.commit()
+    return len(rows)
+
+def get_aggregate(subject_type, subject_id):
+    return RatingAggregate.query.filter_by(subject_type=subject_type, subject_id=subject_id).first()
+
+reputation_cli = AppGroup('reputation', help='Review aggregate maintenance')
+
+@reputation_cli.command('recompute')
+def recompute_command():
+    """Rebuild rating aggregates and stored averages from all reviews"""
+    written = recompute()
+    click.echo(f'Recomputed {written} rating aggregates')
+
+def _load_previous_value(target, value, oldvalue, initiator):
+    return value
+
+# active_history loads an expired value before it is overwritten, so an edit made to a review
+# after a commit still subtracts what the review contributed before
+for _key in ['rating'] + [f'{name}_rating' for name in SUB_RATINGS] + [fk for fk, _, _, _ in SUBJECTS.values()]:
+    event.listen(getattr(CreatorReview, _key), 'set', _load_previous_value, retval=True, active_history=True)
+
+# Fold review inserts, edits and deletes into the aggregates inside the same transaction
+
+@event.listens_for(Session, 'after_flush')
+def _update_aggregates(session, flush_context):
+    deltas = {}
+    for review in session.new:
+        if isinstance(review, CreatorReview):
+            _accumulate(deltas, _review_values(review), 1)
+    for review in session.dirty:
+        if isinstance(review, CreatorReview) and session.is_modified(review, include_collections=False):
+            _accumulate(deltas, _review_values(review, committed=True), -1)
+            _accumulate(deltas, _review_values(review), 1)
+    for review in session.deleted:
+        if isinstance(review, CreatorReview):
+            _accumulate(deltas, _review_values(review, committed=True), -1)
+    
+    if not deltas:
+        return
+    connection = session.connection()
+    refreshed = _apply_deltas(connection, deltas)
+    
+    # Loaded rows would otherwise serve the pre-update averages until commit
+    for subject_type, subject_ids in refreshed.items():
+        model = SUBJECTS[subject_type][1]
+        for subject_id in subject_ids:
+            obj = session.identity_map.get(session.identity_key(model, subject_id))
+            if obj is not None:
+                session.expire(obj)
+    queue_profile_refresh(session, refreshed['creator_profile'])
@@ -0,0 +1,59 @@
+from flask import current_app, g, make_response, request
+from flask_jwt_extended import get_jwt_identity
+from functools import wraps
+import hashlib
+import json
+import random
+
+# Bump when generator output changes so clients' stored ETags stop matching
+GENERATION_VERSION = '1'
+
+def canonical_inputs(data):
+    """Request body without the seed, serialized independently of key order and whitespace"""
+    if isinstance(data, dict):
+        data = {key: value for key, value in data.items() if key != 'seed'}
+    return json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+
+def derive_seed(endpoint, data, seed=None):
+    """Seed for a request: identical inputs (and explicit seed) on the same endpoint give the same seed"""
+    text = json.dumps([endpoint, canonical_inputs(data), seed], separators=(',', ':'), ensure_ascii=False)
+    return int.from_bytes(hashlib.sha256(text.encode('utf-8')).digest()[:8], 'big')
+
+def is_deterministic(data):
+    return bool(current_app.config.get('AI_DETERMINISTIC')) or (isinstance(data, dict) and 'seed' in data)
+
+def request_rng():
+    """The current request's own Random; never the shared module-level generator"""
+    rng = g.get('rng')
+    if rng is None:
+        rng = g.rng = random.Random()
+    return rng
+
+def seeded(view):
+    """Give the view a per-request Random, seeded from its inputs in deterministic mode"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        data = request.get_json(silent=True)
+        if not is_deterministic(data):
+            return view(*args, **kwargs)
+        
+        seed = data.get('seed') if isinstance(data, dict) else None
+        g.rng = random.Random(derive_seed(request.endpoint, data, seed))
+        # The ETag covers everything the response depends on, so it is known before generating
+        etag = hashlib.sha256(json.dumps(
+            [GENERATION_VERSION, request.endpoint, get_jwt_identity(), canonical_inputs(data), seed],
+            separators=(',', ':'), ensure_ascii=False
+        ).encode('utf-8')).hexdigest()[:32]
+        
+        # These are POSTs, but in this mode they are pure functions of the request
+        if request.if_none_match.contains(etag):
+            response = make_response('', 304)
+            response.set_etag(etag)
+            return response
+        
+        response = make_response(view(*args, **kwargs))
+        if response.status_code == 200:
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    return wrapper
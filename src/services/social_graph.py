@@ -0,0 +1,247 @@
+from flask import current_app
+from src.models.user import db
+from src.models.networking import Connection, Follow, SocialGraphChange
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+from datetime import datetime, timedelta
+from itertools import chain
+import threading
+import time
+
+EMPTY = array('l')
+BUILD_CHUNK_SIZE = 10000
+CHANGE_RETENTION_SECONDS = 24 * 3600
+PRUNE_INTERVAL_SECONDS = 3600
+OPS = ('add_connection', 'remove_connection', 'add_follow', 'remove_follow')
+
+def _contains(neighbors, user_id):
+    i = bisect_left(neighbors, user_id)
+    return i < len(neighbors) and neighbors[i] == user_id
+
+def _add(adjacency, a, b):
+    neighbors = adjacency.get(a)
+    if neighbors is None:
+        adjacency[a] = array('l', (b,))
+    elif not _contains(neighbors, b):
+        insort(neighbors, b)
+
+def _remove(adjacency, a, b):
+    neighbors = adjacency.get(a)
+    if neighbors is not None:
+        i = bisect_left(neighbors, b)
+        if i < len(neighbors) and neighbors[i] == b:
+            del neighbors[i]
+            if not neighbors:
+                del adjacency[a]
+
+# Every edit to the tables is also appended to SocialGraphChange in the same transaction, and
+# each use first replays the entries this worker has not applied yet (one indexed query). Replay
+# sets each edge to a definite state, so entries committed while build() was reading are safe to
+# apply over rows that already include them. SQLite serializes writers, so ids follow commit order.
+class SocialGraph:
+    """In-memory adjacency over accepted connections and follows, as sorted array('l') neighbor sets"""
+    
+    def __init__(self):
+        self._connections = {}
+        self._following = {}
+        self._followers = {}
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self.built = False
+        self.change_id = 0
+        self._synced_at = None
+    
+    def build(self):
+        """Load the whole graph from the Connection and Follow tables"""
+        # Read first: anything committed from here on is replayed by the next sync
+        change_id = db.session.query(db.func.max(SocialGraphChange.id)).scalar() or 0
+        connections = {}
+        following = {}
+        followers = {}
+        
+        rows = db.session.query(Connection.requester_id, Connection.recipient_id).filter(
+            Connection.status == 'accepted'
+        ).execution_options(yield_per=BUILD_CHUNK_SIZE)
+        for requester_id, recipient_id in rows:
+            connections.setdefault(requester_id, []).append(recipient_id)
+            connections.setdefault(recipient_id, []).append(requester_id)
+        
+        rows = db.session.query(Follow.follower_id, Follow.following_id).execution_options(
+            yield_per=BUILD_CHUNK_SIZE
+        )
+        for follower_id, following_id in rows:
+            following.setdefault(follower_id, []).append(following_id)
+            followers.setdefault(following_id, []).append(follower_id)
+        
+        def compact(adjacency):
+            return {user_id: array('l', sorted(set(ids))) for user_id, ids in adjacency.items()}
+        
+        with self._lock:
+            self._connections = compact(connections)
+            self._following = compact(following)
+            self._followers = compact(followers)
+            self.change_id = change_id
+            self._synced_at = time.monotonic()
+            self.built = True
+    
+    def sync(self):
+        """Build on first use, then apply changes committed by any session or worker since"""
+        with self._sync_lock:
+            # Entries older than the retention may have been pruned, so a long-idle graph reloads
+            if not self.built or time.monotonic() - self._synced_at > CHANGE_RETENTION_SECONDS / 2:
+                self.build()
+            changes = db.session.query(
+                SocialGraphChange.id, SocialGraphChange.op, SocialGraphChange.first_id, SocialGraphChange.second_id
+            ).filter(SocialGraphChange.id > self.change_id).order_by(SocialGraphChange.id).all()
+            for change_id, op, first_id, second_id in changes:
+                if op in OPS:
+                    getattr(self, op)(first_id, second_id)
+                self.change_id = change_id
+            self._synced_at = time.monotonic()
+    
+    # Incremental updates
+    
+    def add_connection(self, a, b):
+        with self._lock:
+            _add(self._connections, a, b)
+            _add(self._connections, b, a)
+    
+    def remove_connection(self, a, b):
+        with self._lock:
+            _remove(self._connections, a, b)
+            _remove(self._connections, b, a)
+    
+    def add_follow(self, follower_id, following_id):
+        with self._lock:
+            _add(self._following, follower_id, following_id)
+            _add(self._followers, following_id, follower_id)
+    
+    def remove_follow(self, follower_id, following_id):
+        with self._lock:
+            _remove(self._following, follower_id, following_id)
+            _remove(self._followers, following_id, follower_id)
+    
+    # Queries
+    
+    def connections_of(self, user_id):
+        return self._connections.get(user_id, EMPTY)
+    
+    def connection_count(self, user_id):
+        return len(self._connections.get(user_id, EMPTY))
+    
+    def are_connected(self, a, b):
+        neighbors = self._connections.get(a)
+        return neighbors is not None and _contains(neighbors, b)
+    
+    def is_following(self, follower_id, following_id):
+        neighbors = self._following.get(follower_id)
+        return neighbors is not None and _contains(neighbors, following_id)
+    
+    def follower_count(self, user_id):
+        return len(self._followers.get(user_id, EMPTY))
+    
+    def following_count(self, user_id):
+        return len(self._following.get(user_id, EMPTY))
+    
+    def mutual_connections(self, a, b):
+        """Sorted ids of users connected to both a and b"""
+        first = self._connections.get(a, EMPTY)
+        second = self._connections.get(b, EMPTY)
+        if len(first) > len(second):
+            first, second = second, first
+        return sorted(set(first).intersection(second))
+    
+    def mutual_count(self, a, b):
+        first = self._connections.get(a, EMPTY)
+        second = self._connections.get(b, EMPTY)
+        if len(first) > len(second):
+            first, second = second, first
+        return len(set(first).intersection(second))
+    
+    def suggestions(self, user_id, limit=10, exclude=()):
+        """Degree-2 users ranked by number of shared connections: [(user_id, shared), ...]"""
+        neighbors = self._connections.get(user_id, EMPTY)
+        if not neighbors:
+            return []
+        
+        counts = Counter(chain.from_iterable(
+            self._connections.get(n, EMPTY) for n in neighbors
+        ))
+        counts.pop(user_id, None)
+        for n in chain(neighbors, exclude):
+            counts.pop(n, None)
+        
+        ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit]
+    
+    def can_view_post(self, viewer_id, post):
+        """Visibility check for a post without touching the database"""
+        if post.visibility == 'public':
+            return True
+        if viewer_id is None:
+            return False
+        if post.author_id == viewer_id:
+            return True
+        if post.visibility == 'connections':
+            return self.are_connected(viewer_id, post.author_id)
+        return False
+    
+    def visible_post_levels(self, viewer_id, author_id):
+        """Post visibility values a viewer may see on an author's posts"""
+        if viewer_id is not None and viewer_id == author_id:
+            return ['public', 'connections', 'private']
+        if viewer_id is not None and self.are_connected(viewer_id, author_id):
+            return ['public', 'connections']
+        return ['public']
+
+def init_app(app):
+    app.extensions['social_graph'] = SocialGraph()
+
+def get_graph():
+    """Return the app's graph, current with everything committed so far"""
+    graph = current_app.extensions['social_graph']
+    graph.sync()
+    return graph
+
+# Log Connection and Follow changes alongside them; a rolled-back transaction or savepoint takes
+# its log entries with it
+
+_pruned_at = None
+
+@event.listens_for(Session, 'after_flush')
+def _log_graph_changes(session, flush_context):
+    global _pruned_at
+    changes = []
+    for obj in session.new:
+        if isinstance(obj, Connection):
+            op = 'add_connection' if obj.status == 'accepted' else 'remove_connection'
+            changes.append((op, obj.requester_id, obj.recipient_id))
+        elif isinstance(obj, Follow):
+            changes.append(('add_follow', obj.follower_id, obj.following_id))
+    for obj in session.dirty:
+        if isinstance(obj, Connection) and inspect(obj).attrs.status.history.has_changes():
+            op = 'add_connection' if obj.status == 'accepted' else 'remove_connection'
+            changes.append((op, obj.requester_id, obj.recipient_id))
+    for obj in session.deleted:
+        if isinstance(obj, Connection):
+            changes.append(('remove_connection', obj.requester_id, obj.recipient_id))
+        elif isinstance(obj, Follow):
+            changes.append(('remove_follow', obj.follower_id, obj.following_id))
+    if not changes:
+        return
+    
+    connection = session.connection()
+    now = datetime.utcnow()
+    connection.execute(SocialGraphChange.__table__.insert(), [
+        {'op': op, 'first_id': first_id, 'second_id': second_id, 'created_at': now}
+        for op, first_id, second_id in changes
+    ])
+    if _pruned_at is None or time.monotonic() - _pruned_at > PRUNE_INTERVAL_SECONDS:
+        _pruned_at = time.monotonic()
+        table = SocialGraphChange.__table__
+        connection.execute(table.delete().where(
+            table.c.created_at < now - timedelta(seconds=CHANGE_RETENTION_SECONDS)
+        ))
@@ -0,0 +1,195 @@
+from flask.cli import AppGroup
+from src.models.user import db
+from src.models.tag import Tag, TagAssignment
+from src.models.business_idea import BusinessIdea
+from src.models.networking import Post
+from src.models.team import TeamProject
+from src.models.creator_profile import PortfolioItem, ServicePackage
+from src.services.catalog_import import catalog_imported
+from sqlalchemy import event, false, func, inspect
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+import click
+import json
+
+MAX_TAG_LENGTH = 50
+FILTER_MODES = ('any', 'all')
+BACKFILL_CHUNK_SIZE = 2000
+IN_CHUNK_SIZE = 500
+
+# subject_type -> (model, JSON list column mirrored into tag assignments)
+TAGGED = {
+    'business_idea': (BusinessIdea, 'tags'),
+    'post': (Post, 'tags'),
+    'team_project': (TeamProject, 'tags'),
+    'portfolio_item': (PortfolioItem, 'technologies_used'),
+    'service_package': (ServicePackage, 'features'),
+}
+
+def normalize(name):
+    """'  #Machine   Learning ' -> 'machine learning'; None for blanks"""
+    text = ' '.join(str(name).split()).lstrip('#').strip().lower()
+    return text[:MAX_TAG_LENGTH] or None
+
+def parse_tags(raw):
+    """Decode a JSON list column into de-duplicated tag names; tolerates comma-separated text"""
+    if not raw:
+        return ()
+    try:
+        values = json.loads(raw)
+    except (TypeError, ValueError):
+        values = raw.split(',')
+    if isinstance(values, str):
+        values = [values]
+    if not isinstance(values, list):
+        return ()
+    names = (normalize(v) for v in values if isinstance(v, (str, int, float)))
+    return tuple(dict.fromkeys(name for name in names if name))
+
+def _chunks(values, size=IN_CHUNK_SIZE):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+def tag_ids(connection, names, create=False):
+    """name -> id for the given names, inserting missing ones when create is set"""
+    names = list(dict.fromkeys(names))
+    if not names:
+        return {}
+    table = Tag.__table__
+    if create:
+        connection.execute(
+            sqlite_insert(table).on_conflict_do_nothing(index_elements=['name']),
+            [{'name': name} for name in names]
+        )
+    ids = {}
+    for chunk in _chunks(names):
+        ids.update(connection.execute(db.select(table.c.name, table.c.id).where(table.c.name.in_(chunk))).all())
+    return ids
+
+def replace_assignments(connection, subject_type, tags_by_subject):
+    """Make the assignments of each subject id exactly the given names"""
+    if not tags_by_subject:
+        return
+    table = TagAssignment.__table__
+    for chunk in _chunks(tags_by_subject):
+        connection.execute(table.delete().where(
+            table.c.subject_type == subject_type,
+            table.c.subject_id.in_(chunk)
+        ))
+    ids = tag_ids(connection, (name for names in tags_by_subject.values() for name in names), create=True)
+    rows = [
+        {'tag_id': ids[name], 'subject_type': subject_type, 'subject_id': subject_id}
+        for subject_id, names in tags_by_subject.items()
+        for name in names
+    ]
+    if rows:
+        connection.execute(table.insert(), rows)
+
+def parse_filter(args):
+    """Read ?tag=a,b (or repeated ?tag=) and ?tag_mode=any|all; raises ValueError"""
+    names = [normalize(part) for value in args.getlist('tag') for part in value.split(',')]
+    names = list(dict.fromkeys(name for name in names if name))
+    mode = args.get('tag_mode', 'any')
+    if mode not in FILTER_MODES:
+        raise ValueError('tag_mode must be any or all')
+    return names, mode
+
+def filter_tagged(query, subject_type, names, mode='any'):
+    """Restrict a query on a tagged model to rows carrying any (or all) of the tags"""
+    if not names:
+        return query
+    model, _ = TAGGED[subject_type]
+    ids = list(tag_ids(db.session.connection(), names).values())
+    if not ids or (mode == 'all' and len(ids) < len(names)):
+        return query.filter(false())
+    matching = db.select(TagAssignment.subject_id).where(
+        TagAssignment.subject_type == subject_type,
+        TagAssignment.tag_id.in_(ids)
+    )
+    if mode == 'all' and len(ids) > 1:
+        matching = matching.group_by(TagAssignment.subject_id).having(func.count() == len(ids))
+    return query.filter(model.id.in_(matching))
+
+def tag_counts(subject_type=None, prefix=None, limit=10):
+    """Most used tags, optionally for one subject type and starting with a prefix"""
+    count = db.select(func.count()).where(TagAssignment.tag_id == Tag.id)
+    if subject_type:
+        count = count.where(TagAssignment.subject_type == subject_type)
+    # Counted per tag from the (tag_id, subject_type) index, so only matching tags are touched
+    count = count.scalar_subquery().label('count')
+    query = db.session.query(Tag.name, count)
+    prefix = normalize(prefix) if prefix else None
+    if prefix:
+        # A range on the unique name index; SQLite's case-insensitive LIKE can't use it
+        query = query.filter(Tag.name >= prefix, Tag.name < prefix + '\uffff')
+    rows = query.filter(count > 0).order_by(count.desc(), Tag.name).limit(limit).all()
+    return [{'name': name, 'count': n} for name, n in rows]
+
+def backfill(chunk_size=BACKFILL_CHUNK_SIZE, echo=None):
+    """Rebuild every assignment from the JSON columns in keyset-paged chunks; returns rows read"""
+    connection = db.session.connection()
+    connection.execute(TagAssignment.__table__.delete())
+    processed = 0
+    for subject_type, (model, column) in TAGGED.items():
+        last_id = 0
+        while True:
+            rows = db.session.execute(
+                db.select(model.id, getattr(model, column)).where(model.id > last_id).order_by(model.id).limit(chunk_size)
+            ).all()
+            if not rows:
+                break
+            replace_assignments(db.session.connection(), subject_type, {
+                subject_id: names for subject_id, raw in rows if (names := parse_tags(raw))
+            })
+            db.session.commit()
+            last_id = rows[-1][0]
+            processed += len(rows)
+            if echo:
+                echo(subject_type, processed)
+    # Drop dictionary entries nothing uses any more
+    db.session.execute(Tag.__table__.delete().where(
+        ~Tag.__table__.c.id.in_(db.select(TagAssignment.tag_id))
+    ))
+    db.session.commit()
+    return processed
+
+tags_cli = AppGroup('tags', help='Tag index maintenance')
+
+@tags_cli.command('backfill')
+@click.option('--chunk-size', default=BACKFILL_CHUNK_SIZE, show_default=True)
+def backfill_command(chunk_size):
+    """Rebuild tag assignments from the JSON tag columns"""
+    processed = backfill(chunk_size, echo=lambda subject_type, n: click.echo(f'  {subject_type}: {n} rows'))
+    click.echo(f'Indexed tags for {processed} rows')
+
+# Mirror JSON tag column changes into assignments inside the same transaction
+
+@event.listens_for(Session, 'after_flush')
+def _sync_assignments(session, flush_context):
+    changes = {}
+    for obj in session.new:
+        for subject_type, (model, column) in TAGGED.items():
+            if isinstance(obj, model) and (names := parse_tags(getattr(obj, column))):
+                changes.setdefault(subject_type, {})[obj.id] = names
+    for obj in session.dirty:
+        for subject_type, (model, column) in TAGGED.items():
+            if isinstance(obj, model) and inspect(obj).attrs[column].history.has_changes():
+                changes.setdefault(subject_type, {})[obj.id] = parse_tags(getattr(obj, column))
+    for obj in session.deleted:
+        for subject_type, (model, column) in TAGGED.items():
+            if isinstance(obj, model):
+                changes.setdefault(subject_type, {})[obj.id] = ()
+    for subject_type, tags_by_subject in changes.items():
+        replace_assignments(session.connection(), subject_type, tags_by_subject)
+
+# Bulk imports bypass the ORM, so index each committed chunk in one pass
+
+@catalog_imported.connect
+def _index_imported(sender, item_type, ids, **kwargs):
+    if item_type not in TAGGED or not ids:
+        return
+    model, column = TAGGED[item_type]
+    rows = db.session.execute(db.select(model.id, getattr(model, column)).where(model.id.in_(ids))).all()
+    replace_assignments(db.session.connection(), item_type, {subject_id: parse_tags(raw) for subject_id, raw in rows})
+    db.session.commit()
@@ -0,0 +1,268 @@
+from werkzeug.security import safe_join
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import multiprocessing
+import os
+import threading
+import time
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # optional: without Pillow listings keep pointing at the original images
+    Image = None
+
+# Longest edge in pixels; only these presets are rendered, so URLs cannot ask for arbitrary work
+SIZES = {
+    'avatar': 96,
+    'thumb': 240,
+    'card': 480,
+}
+DERIVATIVE_VERSION = '1'  # bump when rendering changes so derivatives get new keys and URLs
+DEFAULT_QUALITY = 80
+DEFAULT_CACHE_BYTES = 512 * 1024 * 1024
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+RENDER_TIMEOUT_SECONDS = 30
+DIGEST_CACHE_SIZE = 10000
+VERSION_RECHECK_SECONDS = 5.0  # how long a listing trusts a source's version before stat-ing it again
+READ_BUFFER_SIZE = 1024 * 1024
+
+# Listing fields that hold an image path -> (field the thumbnail URL goes in, size preset)
+THUMBNAIL_FIELDS = {
+    'image_url': ('thumbnail_url', 'card'),
+    'image': ('thumbnail_url', 'card'),
+    'preview_image': ('preview_thumbnail_url', 'card'),
+    'profile_image': ('profile_thumbnail_url', 'avatar'),
+}
+
+class UnsupportedImage(ValueError):
+    pass
+
+def _render(source_path, output_path, edge, quality):
+    """Resize to fit an edge x edge box and encode as WebP; runs in a worker process"""
+    try:
+        with Image.open(source_path) as image:
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail((edge, edge), Image.Resampling.LANCZOS)  # decodes JPEGs at reduced scale
+            if image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+            tmp_path = f'{output_path}.{os.getpid()}.tmp'
+            try:
+                image.save(tmp_path, 'WEBP', quality=quality, method=4)
+                os.replace(tmp_path, output_path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+    except (OSError, Image.DecompressionBombError):
+        raise UnsupportedImage('Cannot make a thumbnail of this image') from None
+    return os.path.getsize(output_path)
+
+# Derivatives are named by a hash of the source bytes, the preset and the renderer version, so a
+# changed source gets a new URL and every URL can be cached as immutable. Recency is kept in memory
+# and mirrored into file mtimes, which order the cache again after a restart. With several workers
+# each evicts against its own view; a derivative removed under another worker is simply re-rendered.
+class ThumbnailService:
+    """Resized WebP copies of static images, rendered in a process pool into a size-bounded disk cache"""
+    
+    def __init__(self):
+        self.app = None
+        self.source_root = None
+        self.cache_dir = None
+        self.max_bytes = DEFAULT_CACHE_BYTES
+        self.workers = DEFAULT_WORKERS
+        self.quality = DEFAULT_QUALITY
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pending = {}  # key -> Future, so concurrent first requests render once
+        self._entries = None  # key -> bytes on disk, least recently used first; scanned on first use
+        self._total = 0
+        self._digests = OrderedDict()  # source path -> (size, mtime_ns, sha256)
+        self._versions = OrderedDict()  # site-relative source -> (checked at, version or None)
+    
+    def init_app(self, app):
+        self.app = app
+        self.source_root = app.static_folder
+        self.cache_dir = app.config.get(
+            'THUMBNAIL_DIR',
+            os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database', 'thumbnails')
+        )
+        self.max_bytes = app.config.get('THUMBNAIL_CACHE_BYTES', self.max_bytes)
+        self.workers = app.config.get('THUMBNAIL_WORKERS', self.workers)
+        self.quality = app.config.get('THUMBNAIL_QUALITY', self.quality)
+        app.extensions['thumbnails'] = self
+    
+    @property
+    def available(self):
+        return Image is not None and self.source_root is not None
+    
+    def resolve(self, source):
+        """Filesystem path of a site-relative image such as /images/x.jpg, or None"""
+        if not source or not source.startswith('/') or self.source_root is None:
+            return None
+        path = safe_join(self.source_root, source.lstrip('/'))
+        return path if path and os.path.isfile(path) else None
+    
+    def source_digest(self, path):
+        """SHA-256 of a source file, rehashed only when its size or mtime changes"""
+        stat = os.stat(path)
+        with self._lock:
+            entry = self._digests.get(path)
+            if entry is not None and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+                self._digests.move_to_end(path)
+                return entry[2]
+        digest = hashlib.sha256()
+        with open(path, 'rb') as source:
+            while chunk := source.read(READ_BUFFER_SIZE):
+                digest.update(chunk)
+        digest = digest.hexdigest()
+        with self._lock:
+            self._digests[path] = (stat.st_size, stat.st_mtime_ns, digest)
+            self._digests.move_to_end(path)
+            while len(self._digests) > DIGEST_CACHE_SIZE:
+                self._digests.popitem(last=False)
+        return digest
+    
+    def version(self, source, fresh=False):
+        """Short source hash used as the ?v= of thumbnail URLs, or None when none can be made"""
+        if not self.available:
+            return None
+        # Listings ask for the same few images on every request; within the recheck window they
+        # are answered from memory without touching the filesystem
+        now = time.monotonic()
+        if not fresh:
+            with self._lock:
+                entry = self._versions.get(source)
+                if entry is not None and now - entry[0] < VERSION_RECHECK_SECONDS:
+                    self._versions.move_to_end(source)
+                    return entry[1]
+        path = self.resolve(source)
+        try:
+            version = self.source_digest(path)[:16] if path else None
+        except FileNotFoundError:
+            version = None
+        with self._lock:
+            self._versions[source] = (now, version)
+            self._versions.move_to_end(source)
+            while len(self._versions) > DIGEST_CACHE_SIZE:
+                self._versions.popitem(last=False)
+        return version
+    
+    def url_for(self, source, size, fresh=False):
+        version = self.version(source, fresh=fresh)
+        if version is None:
+            return None
+        return f'/api/images/{size}/{source.lstrip("/")}?v={version}'
+    
+    def with_thumbnails(self, data):
+        """Copy of a listing dict, nested dicts and lists included, with thumbnail URLs beside image fields"""
+        if isinstance(data, list):
+            return [self.with_thumbnails(item) for item in data]
+        if not isinstance(data, dict):
+            return data
+        result = {}
+        for name, value in data.items():
+            result[name] = self.with_thumbnails(value) if isinstance(value, (dict, list)) else value
+            if name in THUMBNAIL_FIELDS:
+                field, size = THUMBNAIL_FIELDS[name]
+                result[field] = self.url_for(value, size) if isinstance(value, str) else None
+        return result
+    
+    def _key(self, digest, size):
+        text = f'{DERIVATIVE_VERSION}:{digest}:{SIZES[size]}:{self.quality}'
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()[:32]
+    
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f'{key}.webp')
+    
+    def _scan(self):
+        found = []
+        if os.path.isdir(self.cache_dir):
+            for directory, _, names in os.walk(self.cache_dir):
+                for name in names:
+                    if name.endswith('.webp'):
+                        stat = os.stat(os.path.join(directory, name))
+                        found.append((stat.st_mtime, name[:-5], stat.st_size))
+        found.sort()
+        self._entries = OrderedDict((key, size) for _, key, size in found)
+        self._total = sum(size for _, _, size in found)
+    
+    def _touch(self, key):
+        with self._lock:
+            if self._entries is None:
+                self._scan()
+            known = key in self._entries
+            if known:
+                self._entries.move_to_end(key)
+        if not known:
+            # Rendered by another worker since this one scanned
+            try:
+                self._add(key, os.path.getsize(self._path(key)))
+            except FileNotFoundError:
+                return False
+        try:
+            os.utime(self._path(key))
+        except FileNotFoundError:
+            with self._lock:
+                self._total -= self._entries.pop(key, 0)
+            return False
+        return True
+    
+    def _add(self, key, size):
+        evicted = []
+        with self._lock:
+            if self._entries is None:
+                self._scan()
+            self._total += size - self._entries.pop(key, 0)
+            self._entries[key] = size
+            while self._total > self.max_bytes and len(self._entries) > 1:
+                old_key, old_size = self._entries.popitem(last=False)
+                self._total -= old_size
+                evicted.append(old_key)
+        for old_key in evicted:
+            try:
+                os.remove(self._path(old_key))
+            except FileNotFoundError:
+                pass
+    
+    def _submit(self, key, source_path, size):
+        with self._lock:
+            future = self._pending.get(key)
+            if future is not None:
+                return future
+            if self._executor is None:
+                # spawn: forking a threaded server can copy held locks into the children
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+                )
+            output_path = self._path(key)
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            future = self._pending[key] = self._executor.submit(
+                _render, source_path, output_path, SIZES[size], self.quality
+            )
+        # Recorded even if the request that asked for it has given up waiting
+        future.add_done_callback(lambda done: self._finished(key, done))
+        return future
+    
+    def _finished(self, key, future):
+        with self._lock:
+            self._pending.pop(key, None)
+        if not future.cancelled() and future.exception() is None:
+            self._add(key, future.result())
+    
+    def derivative(self, source_path, size, timeout=RENDER_TIMEOUT_SECONDS):
+        """Path and cache key of a source's thumbnail, rendering it on first request"""
+        if size not in SIZES:
+            raise KeyError(size)
+        key = self._key(self.source_digest(source_path), size)
+        if self._touch(key):
+            return self._path(key), key
+        self._submit(key, source_path, size).result(timeout=timeout)
+        return self._path(key), key
+    
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+thumbnails = ThumbnailService()
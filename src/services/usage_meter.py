@@ -0,0 +1,404 @@
+from flask import jsonify
+from flask_jwt_extended import get_jwt_identity
+from src.models.user import User, db
+from src.models.usage import AIUsage, AIUsageLease
+from sqlalchemy import bindparam, func, literal, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from datetime import datetime, timedelta
+from functools import wraps
+import atexit
+import os
+import threading
+import time
+import uuid
+
+# Calls per calendar month; None means unlimited
+TIER_LIMITS = {'basic': 10, 'inventor': 100, 'guru': None}
+
+# (burst capacity, tokens per second): smooths bursts even for unlimited tiers
+TIER_BURST = {'basic': (3, 1 / 20), 'inventor': (10, 1 / 6), 'guru': (20, 1 / 2)}
+
+DEFAULT_FLUSH_SECONDS = 5.0
+DEFAULT_REFRESH_SECONDS = 60.0
+# Longer than any bucket takes to refill, so forgetting an idle user never hands out extra burst
+DEFAULT_IDLE_SECONDS = 600.0
+LEASE_PARTS = 10  # a worker reserves a tenth of a monthly limit at a time
+LEASE_SECONDS = 120  # a lease not renewed by its worker's flushes for this long counts as returned
+LEASE_IDLE_SECONDS = 30.0  # unused reservations of users idle this long go back to the other workers
+
+def current_period():
+    return datetime.utcnow().strftime('%Y%m')
+
+def lease_size(limit):
+    return max(limit // LEASE_PARTS, 1)
+
+class QuotaExceeded(Exception):
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class _UserUsage:
+    __slots__ = ('tier', 'period', 'baseline', 'pending', 'granted', 'tokens', 'refilled_at', 'loaded_at', 'used_at')
+    
+    def __init__(self, tier, period, baseline, now):
+        self.tier = tier
+        self.period = period
+        self.baseline = baseline  # count already stored for this period
+        self.pending = {}  # feature -> calls not yet flushed
+        self.granted = 0  # this worker's lease: calls reserved in ai_usage_lease, pending ones included
+        capacity, _ = TIER_BURST.get(tier, TIER_BURST['basic'])
+        self.tokens = float(capacity)
+        self.refilled_at = now
+        self.loaded_at = now
+        self.used_at = now
+    
+    def used(self):
+        return self.baseline + sum(self.pending.values())
+    
+    def remaining(self):
+        return self.granted - sum(self.pending.values())
+
+# Calls are checked and counted in memory; the database is only touched by the background flush and
+# on cold paths (a user's first call in this worker, a new month, or a lease running dry).
+# Workers each see only their own calls, so a monthly limit is enforced through leases: a worker
+# reserves part of the user's remaining quota in ai_usage_lease with one conditional statement, and
+# reservations of all live workers plus stored usage never exceed the limit. The flush moves used
+# calls from the lease into ai_usage, renews the worker's leases, tops up active users' leases and
+# returns idle users' reservations so other workers can take them.
+class UsageMeter:
+    """Counts AI calls per user, enforces tier quotas against leased allowances and flushes counts in batches"""
+    
+    def __init__(self, flush_seconds=DEFAULT_FLUSH_SECONDS, refresh_seconds=DEFAULT_REFRESH_SECONDS,
+                 idle_seconds=DEFAULT_IDLE_SECONDS):
+        self.flush_seconds = flush_seconds
+        self.refresh_seconds = refresh_seconds
+        self.idle_seconds = idle_seconds
+        self.app = None
+        self._lock = threading.Lock()
+        self._lease_lock = threading.Lock()  # orders lease statements with the local counts they update
+        self._users = {}
+        self._unwritten = []  # rows of a failed flush whose user state has since been replaced
+        self._worker = None
+        self._new_worker_id()
+        if hasattr(os, 'register_at_fork'):
+            # A forked worker must not spend its parent's leases
+            os.register_at_fork(after_in_child=self._after_fork)
+    
+    def init_app(self, app):
+        self.app = app
+        self.flush_seconds = app.config.get('USAGE_FLUSH_SECONDS', self.flush_seconds)
+        self.refresh_seconds = app.config.get('USAGE_REFRESH_SECONDS', self.refresh_seconds)
+        self.idle_seconds = app.config.get('USAGE_IDLE_SECONDS', self.idle_seconds)
+        app.extensions['usage_meter'] = self
+        atexit.register(self.flush)
+    
+    def _new_worker_id(self):
+        self.worker_id = uuid.uuid4().hex
+    
+    def _after_fork(self):
+        self._new_worker_id()
+        self._lock = threading.Lock()
+        self._lease_lock = threading.Lock()
+        self._users = {}
+        self._unwritten = []
+        self._worker = None
+    
+    def clear(self):
+        """Forget every user's counters and leases without writing them"""
+        with self._lease_lock, self._lock:
+            self._users.clear()
+            self._unwritten = []
+    
+    def _load(self, user_id, period):
+        """Cold path: read the tier and stored count for the period"""
+        tier = db.session.query(User.subscription_tier).filter(User.id == user_id).scalar()
+        baseline = db.session.query(func.coalesce(func.sum(AIUsage.count), 0)).filter(
+            AIUsage.user_id == user_id,
+            AIUsage.period == period
+        ).scalar()
+        return tier, baseline
+    
+    def _state(self, user_id):
+        period = current_period()
+        state = self._users.get(user_id)
+        if state is not None and state.period == period:
+            return state
+        
+        # Cold path: the user's first call in this worker, or the first of a new month
+        tier, baseline = self._load(user_id, period)
+        with self._lock:
+            state = self._users.get(user_id)
+            if state is None or state.period != period:
+                if state is not None:
+                    # Last month's calls are still written by the next flush
+                    self._unwritten.extend(self._take(user_id, state)[0])
+                state = self._users[user_id] = _UserUsage(tier, period, baseline, time.monotonic())
+        return state
+    
+    def consume(self, user_id, feature):
+        """Take one call from the user's burst bucket and monthly quota, or raise QuotaExceeded"""
+        state = self._state(user_id)
+        limit = TIER_LIMITS.get(state.tier, TIER_LIMITS['basic'])
+        capacity, rate = TIER_BURST.get(state.tier, TIER_BURST['basic'])
+        if limit is not None and state.remaining() < 1 and state.used() < limit:
+            # Cold path: this worker's share is used up, reserve more before counting the call
+            self._lease(user_id, state, limit)
+        now = time.monotonic()
+        
+        with self._lock:
+            if limit is not None and (state.used() >= limit or state.remaining() < 1):
+                raise QuotaExceeded('Monthly AI usage limit reached')
+            
+            state.tokens = min(capacity, state.tokens + (now - state.refilled_at) * rate)
+            state.refilled_at = now
+            state.used_at = now
+            if state.tokens < 1:
+                raise QuotaExceeded('Too many AI requests, slow down', retry_after=(1 - state.tokens) / rate)
+            
+            state.tokens -= 1
+            state.pending[feature] = state.pending.get(feature, 0) + 1
+        
+        self._ensure_worker()
+    
+    def refund(self, user_id, feature):
+        """Give back a call whose request failed before doing any work"""
+        with self._lock:
+            state = self._users.get(user_id)
+            if state is not None:
+                # May go negative when a flush already wrote the call; the next flush then takes it back
+                state.pending[feature] = state.pending.get(feature, 0) - 1
+                capacity, _ = TIER_BURST.get(state.tier, TIER_BURST['basic'])
+                state.tokens = min(capacity, state.tokens + 1)
+    
+    def stats(self, user_id):
+        """Live usage for the current period, including calls not yet flushed"""
+        state = self._state(user_id)
+        limit = TIER_LIMITS.get(state.tier, TIER_LIMITS['basic'])
+        by_feature = dict(
+            db.session.query(AIUsage.feature, AIUsage.count).filter(
+                AIUsage.user_id == user_id,
+                AIUsage.period == state.period
+            ).all()
+        )
+        with self._lock:
+            for feature, count in state.pending.items():
+                by_feature[feature] = by_feature.get(feature, 0) + count
+            used = state.used()
+        return {
+            'subscription_tier': state.tier,
+            'period': state.period,
+            'monthly_limit': -1 if limit is None else limit,
+            'used_this_month': used,
+            'remaining': -1 if limit is None else max(limit - used, 0),
+            'by_feature': by_feature
+        }
+    
+    # Leases
+    
+    def _lease(self, user_id, state, limit):
+        with self._lease_lock:
+            if state.remaining() >= 1:
+                return  # another thread leased while this one waited
+            granted = self._acquire(user_id, state.period, limit)
+            if granted is not None:
+                with self._lock:
+                    state.granted = granted
+    
+    def _acquire(self, user_id, period, limit):
+        """Reserve up to a lease's worth of the user's unclaimed quota; returns this worker's new total or None"""
+        lease = AIUsageLease.__table__
+        usage = AIUsage.__table__
+        now = datetime.utcnow()
+        used = select(func.coalesce(func.sum(usage.c.count), 0)).where(
+            usage.c.user_id == user_id,
+            usage.c.period == period
+        ).scalar_subquery()
+        reserved = select(func.coalesce(func.sum(lease.c.granted), 0)).where(
+            lease.c.user_id == user_id,
+            lease.c.period == period,
+            lease.c.expires_at > now
+        ).scalar_subquery()
+        amount = func.min(lease_size(limit), limit - used - reserved)
+        # One statement, so no other worker can reserve between the check and the grant
+        statement = sqlite_insert(lease).from_select(
+            ['user_id', 'period', 'worker', 'granted', 'expires_at'],
+            select(literal(user_id), literal(period), literal(self.worker_id), amount,
+                   literal(now + timedelta(seconds=LEASE_SECONDS))).where(amount > 0)
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=['user_id', 'period', 'worker'],
+            set_={
+                # An expired lease no longer counted in `reserved`, so it restarts from the new grant
+                'granted': db.case((lease.c.expires_at > now, lease.c.granted), else_=0) + statement.excluded.granted,
+                'expires_at': statement.excluded.expires_at
+            }
+        ).returning(lease.c.granted)
+        with db.engine.begin() as connection:
+            return connection.execute(statement).scalar()
+    
+    def _maintain(self, now):
+        """After a flush: renew this worker's leases, return idle reservations, refresh and top up users"""
+        lease = AIUsageLease.__table__
+        wall = datetime.utcnow()
+        releases = []
+        with self._lock:
+            for user_id, state in self._users.items():
+                limit = TIER_LIMITS.get(state.tier, TIER_LIMITS['basic'])
+                spare = state.remaining()
+                if spare > 0 and (limit is None or now - state.used_at > LEASE_IDLE_SECONDS):
+                    releases.append({'_user_id': user_id, '_period': state.period, '_count': spare})
+                    state.granted -= spare
+        with db.engine.begin() as connection:
+            connection.execute(
+                lease.update().where(lease.c.worker == self.worker_id).values(expires_at=wall + timedelta(seconds=LEASE_SECONDS))
+            )
+            if releases:
+                connection.execute(self._lease_decrement(), releases)
+            connection.execute(lease.delete().where(
+                ((lease.c.worker == self.worker_id) & (lease.c.granted <= 0)) | (lease.c.expires_at <= wall)
+            ))
+        
+        for user_id, state in list(self._users.items()):
+            if now - state.loaded_at >= self.refresh_seconds:
+                # Pick up tier changes and other workers' flushed counts
+                tier, baseline = self._load(user_id, state.period)
+                with self._lock:
+                    state.tier, state.baseline, state.loaded_at = tier, baseline, now
+            limit = TIER_LIMITS.get(state.tier, TIER_LIMITS['basic'])
+            if (limit is not None and now - state.used_at <= LEASE_IDLE_SECONDS
+                    and state.remaining() * 2 < lease_size(limit) and state.used() < limit):
+                granted = self._acquire(user_id, state.period, limit)
+                if granted is not None:
+                    with self._lock:
+                        state.granted = granted
+        
+        with self._lock:
+            for user_id, state in list(self._users.items()):
+                if now - state.used_at > self.idle_seconds and not any(state.pending.values()) and state.granted <= 0:
+                    del self._users[user_id]
+    
+    def _lease_decrement(self):
+        lease = AIUsageLease.__table__
+        return lease.update().where(
+            lease.c.user_id == bindparam('_user_id'),
+            lease.c.period == bindparam('_period'),
+            lease.c.worker == self.worker_id
+        ).values(granted=func.max(lease.c.granted - bindparam('_count'), 0))
+    
+    # Flushing
+    
+    def _take(self, user_id, state):
+        """Move a user's pending calls into flush rows (lock held); returns them and the part taken from the lease"""
+        rows = []
+        for feature, count in state.pending.items():
+            if count:
+                rows.append({'user_id': user_id, 'period': state.period, 'feature': feature, 'count': count})
+        taken = sum(state.pending.values())
+        leased = 0
+        if TIER_LIMITS.get(state.tier, TIER_LIMITS['basic']) is not None:
+            leased = min(taken, state.granted)
+            state.granted -= leased
+        state.baseline += taken
+        state.pending = {}
+        return rows, leased
+    
+    def flush(self):
+        """Upsert pending counts in one executemany, then maintain leases; returns rows written"""
+        if self.app is None:
+            return 0
+        with self._lease_lock:
+            now = time.monotonic()
+            leased = {}
+            with self._lock:
+                rows, self._unwritten = self._unwritten, []
+                for user_id, state in self._users.items():
+                    user_rows, leased[user_id] = self._take(user_id, state)
+                    rows.extend(user_rows)
+            with self.app.app_context():
+                if rows:
+                    try:
+                        self._write(rows)
+                    except Exception:
+                        self._restore(rows, leased)
+                        raise
+                self._maintain(now)
+        return len(rows)
+    
+    def _write(self, rows):
+        now = datetime.utcnow()
+        usage_rows = [dict(row, updated_at=now) for row in rows]
+        lease_rows = [{'_user_id': row['user_id'], '_period': row['period'], '_count': row['count']} for row in rows]
+        statement = sqlite_insert(AIUsage.__table__)
+        statement = statement.on_conflict_do_update(
+            index_elements=['user_id', 'period', 'feature'],
+            set_={'count': AIUsage.__table__.c.count + statement.excluded.count, 'updated_at': statement.excluded.updated_at}
+        )
+        # A separate connection keeps the flush out of any request's transaction; used calls leave the
+        # lease in the same transaction that adds them to the usage, so they are never counted twice
+        with db.engine.begin() as connection:
+            connection.execute(statement, usage_rows)
+            connection.execute(self._lease_decrement(), lease_rows)
+    
+    def _restore(self, rows, leased):
+        """Put the counts of an unwritten flush back, so quotas still see them and the next flush retries"""
+        with self._lock:
+            for user_id, amount in leased.items():
+                state = self._users.get(user_id)
+                if state is not None:
+                    state.granted += amount
+            for row in rows:
+                state = self._users.get(row['user_id'])
+                if state is None or state.period != row['period']:
+                    self._unwritten.append(row)
+                    continue
+                state.baseline = max(state.baseline - row['count'], 0)
+                state.pending[row['feature']] = state.pending.get(row['feature'], 0) + row['count']
+    
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            with self._lock:
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = threading.Thread(target=self._run, name='usage-flusher', daemon=True)
+                    self._worker.start()
+    
+    def _run(self):
+        while True:
+            time.sleep(self.flush_seconds)
+            try:
+                self.flush()
+            except Exception:
+                if self.app is not None:
+                    self.app.logger.exception('Usage flush failed')
+
+meter = UsageMeter()
+
+# free(*args, **kwargs) may answer first with a response that costs nothing, such as a stored result
+def metered(feature, free=None):
+    """Charge one AI call against the caller's quota before the view runs; failed calls are refunded"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if free is not None:
+                response = free(*args, **kwargs)
+                if response is not None:
+                    return response
+            user_id = get_jwt_identity()
+            try:
+                meter.consume(user_id, feature)
+            except QuotaExceeded as e:
+                response = jsonify({'error': str(e), 'usage': meter.stats(user_id)})
+                if e.retry_after is not None:
+                    response.headers['Retry-After'] = str(max(int(e.retry_after + 0.999), 1))
+                return response, 429
+            
+            try:
+                result = view(*args, **kwargs)
+            except Exception:
+                meter.refund(user_id, feature)
+                raise
+            status = result[1] if isinstance(result, tuple) and len(result) > 1 else getattr(result, 'status_code', 200)
+            if status >= 400:
+                meter.refund(user_id, feature)
+            return result
+        return wrapper
+    return decorator
@@ -0,0 +1,131 @@
+from datetime import datetime
+import hashlib
+import struct
+
+READ_CHUNK_SIZE = 1024 * 1024
+ZIP64_LIMIT = 0xFFFFFFFF  # sizes and offsets from here on move into zip64 extra fields
+ZIP64_COUNT_LIMIT = 0xFFFF
+MARKER_32 = 0xFFFFFFFF  # what the 32-bit field holds once the real value is in the extra field
+MARKER_16 = 0xFFFF
+
+UTF8_FLAG = 0x0800
+STORED = 0
+VERSION = 20
+VERSION_ZIP64 = 45
+
+class ZipMember:
+    """One archive entry backed by an open binary file whose size and CRC-32 are already known"""
+    
+    __slots__ = ('name', 'source', 'size', 'crc', 'mtime')
+    
+    def __init__(self, name, source, size, crc, mtime):
+        self.name = name
+        self.source = source
+        self.size = size
+        self.crc = crc
+        self.mtime = mtime
+
+def _dos_datetime(timestamp):
+    moment = datetime.fromtimestamp(timestamp)
+    if moment.year < 1980:
+        moment = datetime(1980, 1, 1)
+    date = (moment.year - 1980) << 9 | moment.month << 5 | moment.day
+    time = moment.hour << 11 | moment.minute << 5 | moment.second // 2
+    return time, date
+
+def _zip64_extra(*values):
+    return struct.pack('<HH', 0x0001, 8 * len(values)) + b''.join(struct.pack('<Q', value) for value in values)
+
+# Every header is built before any data is read: the total length is known for Content-Length,
+# any byte range can be produced for Range requests, and streaming holds one read buffer at a time.
+# Members are read from handles opened before the headers were built, so a file replaced in the
+# meantime still streams the bytes its size and CRC describe.
+class ZipStream:
+    """A ZIP of stored (uncompressed) entries laid out up front; owns and closes its members' files"""
+    
+    def __init__(self, members):
+        self.members = list(members)
+        self.segments = []  # bytes, or (file, size) for member data
+        central = []
+        offset = 0
+        for member in self.members:
+            name = member.name.encode('utf-8')
+            time, date = _dos_datetime(member.mtime)
+            large = member.size >= ZIP64_LIMIT
+            size_field = MARKER_32 if large else member.size
+            local_extra = _zip64_extra(member.size, member.size) if large else b''
+            local = struct.pack(
+                '<IHHHHHIIIHH', 0x04034b50, VERSION_ZIP64 if large else VERSION, UTF8_FLAG, STORED,
+                time, date, member.crc, size_field, size_field, len(name), len(local_extra)
+            ) + name + local_extra
+            self.segments.append(local)
+            self.segments.append((member.source, member.size))
+            
+            far = offset >= ZIP64_LIMIT
+            zip64_values = ([member.size, member.size] if large else []) + ([offset] if far else [])
+            central_extra = _zip64_extra(*zip64_values) if zip64_values else b''
+            version = VERSION_ZIP64 if zip64_values else VERSION
+            central.append(struct.pack(
+                '<IHHHHHHIIIHHHHHII', 0x02014b50, version, version, UTF8_FLAG, STORED,
+                time, date, member.crc, size_field, size_field, len(name), len(central_extra), 0, 0, 0, 0,
+                MARKER_32 if far else offset
+            ) + name + central_extra)
+            offset += len(local) + member.size
+        
+        directory = b''.join(central)
+        count = len(self.members)
+        tail = b''
+        zip64 = offset >= ZIP64_LIMIT or len(directory) >= ZIP64_LIMIT or count >= ZIP64_COUNT_LIMIT
+        if zip64:
+            end64_offset = offset + len(directory)
+            tail = struct.pack(
+                '<IQHHIIQQQQ', 0x06064b50, 44, VERSION_ZIP64, VERSION_ZIP64, 0, 0,
+                count, count, len(directory), offset
+            ) + struct.pack('<IIQI', 0x07064b50, 0, end64_offset, 1)
+        tail += struct.pack(
+            '<IHHHHIIH', 0x06054b50, 0, 0, MARKER_16 if zip64 else count, MARKER_16 if zip64 else count,
+            MARKER_32 if zip64 else len(directory), MARKER_32 if zip64 else offset, 0
+        )
+        self.segments.append(directory + tail)
+        self.length = offset + len(directory) + len(tail)
+    
+    def etag(self):
+        """Changes whenever any member's name, size, checksum or mtime does"""
+        digest = hashlib.sha256()
+        for member in self.members:
+            digest.update(f'{member.name}\0{member.size}\0{member.crc}\0{member.mtime}\0'.encode('utf-8'))
+        return digest.hexdigest()[:32]
+    
+    def iter_bytes(self, start=0, stop=None, chunk_size=READ_CHUNK_SIZE):
+        """Yield the archive bytes in [start, stop)"""
+        stop = self.length if stop is None else stop
+        position = 0
+        for segment in self.segments:
+            size = len(segment) if isinstance(segment, bytes) else segment[1]
+            begin, end = max(start, position), min(stop, position + size)
+            if begin < end:
+                if isinstance(segment, bytes):
+                    yield segment[begin - position:end - position]
+                else:
+                    source = segment[0]
+                    source.seek(begin - position)
+                    remaining = end - begin
+                    while remaining:
+                        chunk = source.read(min(chunk_size, remaining))
+                        if not chunk:
+                            raise IOError(f'{getattr(source, "name", "member")} shrank while streaming')
+                        remaining -= len(chunk)
+                        yield chunk
+            position += size
+            if position >= stop:
+                break
+    
+    def close(self):
+        for member in self.members:
+            member.source.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,69 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Point the app at a throwaway database before src.main creates its tables
+_db_dir = tempfile.mkdtemp(prefix='thinkfast-tests-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.main import app as flask_app
+from src.models.user import db, User
+from src.services.activity_log import activity_log, partition_table
+from src.services.entitlements import entitlements
+from src.services.rate_limit import limiter
+from src.services.usage_meter import meter
+from flask_jwt_extended import create_access_token
+
+# The shared meter's background flush would otherwise write one test's counts into a later test's database
+meter.flush_seconds = 24 * 3600
+activity_log.flush_seconds = 24 * 3600
+
+@pytest.fixture
+def app():
+    flask_app.config['TESTING'] = True
+    # Tokens carry the integer user id as their subject, which PyJWT 2.10 would otherwise reject
+    flask_app.config['JWT_VERIFY_SUB'] = False
+    with flask_app.app_context():
+        # Activity partitions are created on demand outside db.metadata, so drop_all leaves them behind
+        for month in activity_log.partitions():
+            partition_table(month).drop(db.engine)
+        db.drop_all()
+        db.create_all()
+    activity_log.clear()
+    # User and item ids restart with every database, so nothing cached from the last one may survive
+    entitlements.clear()
+    meter.clear()
+    # Every test client shares 127.0.0.1, so limits would otherwise carry over between tests
+    limiter.clear()
+    flask_app.extensions['autocomplete'].clear()
+    yield flask_app
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def make_user(app):
+    def make(username, user_type='creator', subscription_tier='guru'):
+        with app.app_context():
+            user = User(
+                username=username,
+                email=f'{username}@example.com',
+                password_hash='x',
+                user_type=user_type,
+                subscription_tier=subscription_tier
+            )
+            db.session.add(user)
+            db.session.commit()
+            return user.id
+    return make
+
+@pytest.fixture
+def auth_headers(app):
+    def headers(user_id):
+        with app.app_context():
+            return {'Authorization': f'Bearer {create_access_token(identity=user_id)}'}
+    return headers
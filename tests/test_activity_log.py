@@ -0,0 +1,144 @@
+from datetime import datetime
+
+import pytest
+
+from src.models.user import db
+from src.models.team import Team, TeamMember, TeamProject
+from src.services import activity_log
+from src.services.activity_log import ActivityLog, IdGenerator, month_of_id, partition_table, to_dicts
+
+class RecordingLog:
+    def __init__(self):
+        self.appended = []
+    
+    def append(self, team_id, user_id, activity_type, activity_data=None, project_id=None, is_public=True):
+        self.appended.append((team_id, user_id, activity_type, project_id))
+
+@pytest.fixture
+def recording_log(app, monkeypatch):
+    log = RecordingLog()
+    monkeypatch.setitem(app.extensions, 'activity_log', log)
+    return log
+
+def test_ids_unique_past_a_full_millisecond():
+    generator = IdGenerator(node=5)
+    when = datetime(2026, 3, 1, 12, 0, 0)
+    ids = [generator.next_id(when) for _ in range(5000)]
+    assert len(set(ids)) == len(ids)
+    assert ids == sorted(ids)
+    assert month_of_id(ids[-1]) == '202603'
+
+def test_generators_get_distinct_nodes():
+    nodes = {IdGenerator().node for _ in range(20)}
+    assert len(nodes) > 1
+    assert all(0 < node < 1024 for node in nodes)
+
+def test_partitions_follow_external_changes(app):
+    log = ActivityLog()
+    with app.app_context():
+        table = partition_table('202401')
+        table.create(db.engine, checkfirst=True)
+        assert '202401' in log.partitions()
+        table.drop(db.engine)
+        assert '202401' not in log.partitions()
+
+def test_failed_flush_requeues_rows(app, monkeypatch):
+    log = ActivityLog()
+    log.app = app
+    monkeypatch.setattr(log, '_ensure_worker', lambda: None)
+    first = log.append(1, 1, 'created')
+    
+    def fail(rows):
+        raise RuntimeError('database is locked')
+    monkeypatch.setattr(log, 'write', fail)
+    with pytest.raises(RuntimeError):
+        log.flush()
+    second = log.append(1, 1, 'updated')
+    assert [row['id'] for row in log._pending] == [first, second]
+    
+    monkeypatch.undo()
+    assert log.flush() == 2
+    with app.app_context():
+        assert [row['id'] for row in log.iter_team(1)] == [second, first]
+
+def test_batch_is_dead_lettered_after_repeated_failures(app, tmp_path, monkeypatch):
+    log = ActivityLog()
+    log.app = app
+    log.archive_dir = str(tmp_path)
+    monkeypatch.setattr(log, '_ensure_worker', lambda: None)
+    monkeypatch.setattr(activity_log, 'MAX_FLUSH_ATTEMPTS', 3)
+    first = log.append(7, 1, 'created', activity_data={'name': 'Launch'})
+    
+    def fail(rows):
+        raise RuntimeError('no such table')
+    monkeypatch.setattr(log, 'write', fail)
+    for _ in range(3):
+        with pytest.raises(RuntimeError):
+            log.flush()
+    assert log._pending == []
+    assert (tmp_path / 'dead_letter.ndjson').exists()
+    
+    monkeypatch.undo()
+    second = log.append(7, 1, 'updated')
+    assert log.flush() == 1
+    with app.app_context():
+        assert log.replay_dead_letters() == 1
+        assert not (tmp_path / 'dead_letter.ndjson').exists()
+        rows = list(log.iter_team(7))
+        assert [row['id'] for row in rows] == [second, first]
+        assert rows[1]['activity_data'] == '{"name": "Launch"}'
+
+def test_serialized_ids_are_strings(app, make_user):
+    user_id = make_user('owner')
+    row = {'id': (1 << 60) + 1, 'team_id': 1, 'project_id': None, 'user_id': user_id,
+           'activity_type': 'created', 'activity_data': None, 'created_at': datetime(2026, 3, 1), 'is_public': True}
+    with app.app_context():
+        data = to_dicts([row])[0]
+    assert data['id'] == str((1 << 60) + 1)
+    assert data['created_at'] == '2026-03-01T00:00:00'
+    assert data['user']['id'] == user_id
+
+def test_team_changes_are_logged_on_commit(app, make_user, recording_log):
+    owner = make_user('owner')
+    member = make_user('member')
+    with app.app_context():
+        team = Team(name='Team', owner_id=owner)
+        db.session.add(team)
+        db.session.flush()
+        project = TeamProject(team_id=team.id, name='Launch', project_type='campaign', created_by=owner)
+        joining = TeamMember(team_id=team.id, user_id=member, status='active')
+        db.session.add_all([project, joining])
+        db.session.flush()
+        assert recording_log.appended == []
+        db.session.commit()
+        assert sorted(recording_log.appended) == sorted([
+            (team.id, owner, 'project_created', project.id),
+            (team.id, member, 'member_joined', None),
+        ])
+        
+        recording_log.appended.clear()
+        joining.status = 'inactive'
+        db.session.commit()
+        assert recording_log.appended == [(team.id, member, 'member_left', None)]
+
+def test_rolled_back_savepoint_is_not_logged(app, make_user, recording_log):
+    owner = make_user('owner')
+    member = make_user('member')
+    with app.app_context():
+        team = Team(name='Team', owner_id=owner)
+        db.session.add(team)
+        db.session.flush()
+        db.session.add(TeamProject(team_id=team.id, name='Kept', project_type='campaign', created_by=owner))
+        savepoint = db.session.begin_nested()
+        db.session.add(TeamMember(team_id=team.id, user_id=member, status='active'))
+        db.session.flush()
+        savepoint.rollback()
+        db.session.commit()
+        assert [entry[2] for entry in recording_log.appended] == ['project_created']
+        
+        recording_log.appended.clear()
+        db.session.add(TeamMember(team_id=team.id, user_id=member, status='active'))
+        db.session.flush()
+        db.session.rollback()
+        db.session.commit()
+        assert recording_log.appended == []
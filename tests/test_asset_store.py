@@ -0,0 +1,33 @@
+import io
+import os
+import threading
+import zlib
+
+from src.services.asset_store import AssetStore
+
+def make_store(tmp_path):
+    store = AssetStore()
+    store.root = str(tmp_path)
+    return store
+
+def test_save_writes_a_matching_checksum(tmp_path):
+    store = make_store(tmp_path)
+    data = os.urandom(300000)
+    assert store.save(1, 'source', io.BytesIO(data)) == len(data)
+    assert store.checksum(1, 'source') == zlib.crc32(data)
+    assert sorted(os.listdir(os.path.dirname(store.path_for(1, 'source')))) == ['source', 'source.crc']
+
+def test_concurrent_saves_never_mix(tmp_path):
+    store = make_store(tmp_path)
+    bodies = [bytes([n]) * (200000 + n) for n in range(8)]
+    threads = [threading.Thread(target=store.save, args=(1, 'source', io.BytesIO(body))) for body in bodies]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    with open(store.path_for(1, 'source'), 'rb') as handle:
+        stored = handle.read()
+    assert stored in bodies
+    assert store.checksum(1, 'source') == zlib.crc32(stored)
+    assert not [name for name in os.listdir(os.path.dirname(store.path_for(1, 'source'))) if name.endswith('.tmp')]
@@ -0,0 +1,113 @@
+import json
+import random
+
+from src.models.user import db
+from src.models.business_idea import BusinessIdea
+from src.models.service import Service
+from src.services import autocomplete
+from src.services.autocomplete import AutocompleteIndex, _Entry, _PrefixTable
+
+def add_idea(app, creator, title, category='Tech', tags=(), sales=0, published=True):
+    with app.app_context():
+        idea = BusinessIdea(title=title, description='d', category=category, price=10.0, creator_id=creator,
+                            tags=json.dumps(list(tags)), sales_count=sales, is_published=published)
+        db.session.add(idea)
+        db.session.commit()
+        return idea.id
+
+def suggest(client, prefix, limit=10):
+    response = client.get('/api/marketplace/autocomplete', query_string={'q': prefix, 'limit': limit})
+    assert response.status_code == 200
+    return [(entry['kind'], entry['text']) for entry in response.get_json()['suggestions']]
+
+def test_prefix_matches_titles_words_groups_and_creators(app, client, make_user):
+    creator = make_user('mealmaker')
+    add_idea(app, creator, 'Meal Planner Pro', category='Health', tags=['meal prep'], sales=5)
+    add_idea(app, creator, 'Smart Meal Kits', category='Food', sales=1)
+    add_idea(app, creator, 'Hidden Meal', published=False)
+    
+    assert suggest(client, 'meal') == [
+        ('creator', 'mealmaker'),
+        ('title', 'Meal Planner Pro'),
+        ('tag', 'meal prep'),
+        ('title', 'Smart Meal Kits'),
+    ]
+    assert suggest(client, 'MEAL  P') == [('title', 'Meal Planner Pro'), ('tag', 'meal prep')]
+    assert suggest(client, 'heal') == [('category', 'Health')]
+    assert suggest(client, 'meal', limit=1) == [('creator', 'mealmaker')]
+    assert suggest(client, 'zzz') == []
+    assert suggest(client, '   ') == []
+
+def test_committed_changes_reach_a_built_index(app, client, make_user):
+    creator = make_user('creator')
+    idea_id = add_idea(app, creator, 'Solar Roof')
+    assert suggest(client, 'solar') == [('title', 'Solar Roof')]
+    
+    with app.app_context():
+        idea = db.session.get(BusinessIdea, idea_id)
+        idea.title = 'Wind Farm'
+        db.session.add(Service(title='Solar Audit', description='d', category='Energy', starting_price=5.0,
+                               delivery_time='3 days', creator_id=creator, is_published=True))
+        db.session.commit()
+    assert suggest(client, 'solar') == [('title', 'Solar Audit')]
+    assert suggest(client, 'wind') == [('title', 'Wind Farm')]
+    
+    with app.app_context():
+        db.session.delete(db.session.get(BusinessIdea, idea_id))
+        db.session.commit()
+    assert suggest(client, 'wind') == []
+    assert suggest(client, 'tech') == []
+
+def test_catalog_import_reaches_a_built_index(app, client, make_user, auth_headers):
+    creator = make_user('creator')
+    assert suggest(client, 'drone') == []
+    rows = [
+        {'title': 'Drone Delivery', 'description': 'd', 'category': 'Logistics', 'price': 10, 'is_published': True},
+        {'title': 'Drone Draft', 'description': 'd', 'category': 'Logistics', 'price': 10},
+    ]
+    response = client.post('/api/marketplace/import?item_type=business_idea',
+                           data='\n'.join(map(json.dumps, rows)), content_type='application/x-ndjson',
+                           headers=auth_headers(creator))
+    assert response.status_code == 201
+    assert suggest(client, 'drone') == [('title', 'Drone Delivery')]
+    assert suggest(client, 'logi') == [('category', 'Logistics')]
+
+def test_batched_updates_match_a_full_scan(monkeypatch):
+    monkeypatch.setattr(autocomplete, 'DELTA_LIMIT', 16)
+    monkeypatch.setattr(autocomplete, 'SCAN_LIMIT', 8)
+    rng = random.Random(7)
+    words = ['alpha', 'alps', 'beta', 'bet', 'gamma', 'game']
+    
+    def make(n):
+        return _Entry('title', 'business_idea', n, ' '.join(rng.choice(words) for _ in range(3)), rng.random())
+    index = AutocompleteIndex()
+    table = _PrefixTable()
+    live = [make(n) for n in range(40)]
+    for entry in live:
+        table.add(entry)
+    table.finish(warm_length=2)
+    index._state['table'] = table
+    
+    # Merges finish a few changes after their snapshot, as they would while other writers hold the lock
+    merges = 0
+    snapshot = None
+    for n in range(40, 400):
+        with index._lock:
+            if live and rng.random() < 0.4:
+                table.remove(live.pop(rng.randrange(len(live))))
+            else:
+                live.append(make(n))
+                table.add(live[-1])
+            if snapshot is None and table.merge_due():
+                snapshot, finish_at = table.start_merge(), n + rng.randrange(4)
+        if snapshot is not None and n >= finish_at:
+            index._merge(table, snapshot)
+            snapshot = None
+            merges += 1
+        for prefix in ('a', 'al', 'ga', 'game', 'bet'):
+            expected = sorted((e for e in live if any(key.startswith(prefix) for key in e.keys)),
+                              key=lambda e: e.weight, reverse=True)[:5]
+            assert table.top(prefix, 5) == expected
+    assert merges > 5
+    kept = [entry for entry in table.entries if entry not in table._dropped]
+    assert len(kept) + len(table._delta_keys) == sum(len(entry.keys) for entry in live)
@@ -0,0 +1,48 @@
+import copy
+import json
+import random
+
+import pytest
+
+from src.routes import ai_business_builder
+from src.services.business_templates import FrozenDict, FrozenList, templates
+
+def dumps(value):
+    return json.dumps(value, sort_keys=True)
+
+@pytest.mark.parametrize('industry', ['technology', 'healthcare', 'retail', 'unknown'])
+def test_same_seed_renders_the_same_idea_and_plan(industry):
+    first = templates.render_idea(industry, 'small businesses', '50k_100k', rng=random.Random(42))
+    second = templates.render_idea(industry, 'small businesses', '50k_100k', rng=random.Random(42))
+    assert dumps(first) == dumps(second)
+    assert dumps(templates.render_plan(first)) == dumps(templates.render_plan(second))
+
+def test_same_seed_renders_the_same_validation():
+    assert dumps(templates.render_validation(random.Random(7))) == dumps(templates.render_validation(random.Random(7)))
+    scores = {templates.render_validation(random.Random(seed))['overall_score'] for seed in range(20)}
+    assert len(scores) > 1
+
+def test_shared_sections_are_frozen_and_copy_to_plain_values():
+    idea = templates.render_idea('technology', 'students', '10k_50k', rng=random.Random(1))
+    assert isinstance(idea['financial_projections'], FrozenDict)
+    assert isinstance(idea['risk_analysis'], FrozenList)
+    with pytest.raises(TypeError):
+        idea['financial_projections']['year1'] = {}
+    
+    copied = copy.deepcopy(idea)
+    assert type(copied['financial_projections']) is dict
+    assert type(copied['risk_analysis']) is list
+    assert dumps(copied) == dumps(idea)
+
+def test_seeded_requests_return_identical_bytes(client, make_user, auth_headers, monkeypatch):
+    monkeypatch.setattr(ai_business_builder.time, 'sleep', lambda seconds: None)
+    headers = auth_headers(make_user('builder'))
+    body = {'business_idea': {'title': 'Idea'}, 'seed': 11}
+    
+    first = client.post('/api/ai-business-builder/validate', json=body, headers=headers)
+    second = client.post('/api/ai-business-builder/validate', json=body, headers=headers)
+    assert first.status_code == 200
+    assert first.get_data() == second.get_data()
+    
+    other = client.post('/api/ai-business-builder/validate', json=dict(body, seed=12), headers=headers)
+    assert other.get_data() != first.get_data()
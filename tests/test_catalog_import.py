@@ -0,0 +1,48 @@
+import json
+
+from src.models.user import db
+from src.models.business_idea import BusinessIdea
+from src.models.tag import TagAssignment
+from src.services.catalog_import import catalog_imported, import_catalog
+
+def idea(title, tags=(), **extra):
+    return dict({'title': title, 'description': 'd', 'category': 'Tech', 'price': '10', 'tags': list(tags)}, **extra)
+
+def ndjson(*rows):
+    return '\n'.join(json.dumps(row) for row in rows) + '\n'
+
+def test_signal_is_sent_once_per_committed_chunk(app, make_user):
+    creator = make_user('creator')
+    received = []
+    
+    def receiver(sender, item_type, ids, creator_id):
+        received.append((item_type, list(ids), creator_id))
+    rows = [(1, idea('One')), (2, {'title': 'Broken'}), (3, idea('Two')), (4, idea('Three'))]
+    with app.app_context(), catalog_imported.connected_to(receiver):
+        report = import_catalog('business_idea', rows, creator, chunk_size=2)
+    assert report['imported'] == 3
+    assert report['failed'] == 1
+    assert [(item_type, len(ids), creator_id) for item_type, ids, creator_id in received] == [
+        ('business_idea', 2, creator),
+        ('business_idea', 1, creator),
+    ]
+    assert [id for _, ids, _ in received for id in ids] == report['ids']
+
+def test_imported_tags_are_indexed(app, client, make_user, auth_headers):
+    creator = make_user('creator')
+    body = ndjson(
+        idea('Meal planner', tags=['AI', 'Health']),
+        idea('Fitness coach', tags=['#health']),
+        idea('Untagged'),
+    )
+    response = client.post('/api/marketplace/import?item_type=business_idea', data=body,
+                           content_type='application/x-ndjson', headers=auth_headers(creator))
+    assert response.status_code == 201
+    assert response.get_json()['report']['imported'] == 3
+    
+    response = client.get('/api/marketplace/tags?type=business_idea')
+    assert response.get_json()['tags'] == [{'name': 'health', 'count': 2}, {'name': 'ai', 'count': 1}]
+    with app.app_context():
+        planner = BusinessIdea.query.filter_by(title='Meal planner').one()
+        assigned = TagAssignment.query.filter_by(subject_type='business_idea', subject_id=planner.id).count()
+        assert assigned == 2
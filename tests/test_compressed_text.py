@@ -0,0 +1,54 @@
+import pytest
+
+zstandard = pytest.importorskip('zstandard')
+
+from src.models.business_idea import BusinessIdea
+from src.models.compressed_text import MAGIC, ZSTD_LEVEL, codec, dictionary_id
+from src.models.user import db
+from src.services.compression import _raw, recompress_column
+
+TEXT = 'Executive summary: a subscription service for independent coffee roasters. ' * 20
+FIRST = ('subscription coffee roasters independent executive summary ' * 40).encode('utf-8')
+SECOND = ('market analysis competitors growth revenue projections ' * 40).encode('utf-8')
+
+@pytest.fixture
+def restore_codec():
+    yield
+    codec.configure()
+
+def test_values_name_their_dictionary(restore_codec):
+    codec.configure(dictionary=FIRST)
+    stored = codec.encode(TEXT)
+    assert stored.startswith(MAGIC + b'D' + dictionary_id(FIRST).to_bytes(4, 'big'))
+    
+    codec.configure(dictionary=SECOND, previous_dictionaries=[FIRST])
+    assert codec.decode(stored) == TEXT
+    assert codec.encode(TEXT)[3:7] == dictionary_id(SECOND).to_bytes(4, 'big')
+    
+    codec.configure(dictionary=SECOND)
+    with pytest.raises(RuntimeError, match=f'{dictionary_id(FIRST):08x}'):
+        codec.decode(stored)
+
+def test_values_without_a_dictionary_id_stay_readable(restore_codec):
+    dictionary = zstandard.ZstdCompressionDict(FIRST)
+    legacy = MAGIC + b'd' + zstandard.ZstdCompressor(level=ZSTD_LEVEL, dict_data=dictionary).compress(TEXT.encode('utf-8'))
+    codec.configure(dictionary=FIRST)
+    assert codec.decode(legacy) == TEXT
+
+def test_recompress_moves_rows_to_the_new_dictionary(app, make_user, restore_codec):
+    creator_id = make_user('creator')
+    codec.configure(dictionary=FIRST)
+    with app.app_context():
+        idea = BusinessIdea(title='Idea', description='d', category='tech', price=1.0, creator_id=creator_id, executive_summary=TEXT)
+        db.session.add(idea)
+        db.session.commit()
+        idea_id = idea.id
+        
+        codec.configure(dictionary=SECOND, previous_dictionaries=[FIRST])
+        table = BusinessIdea.__table__
+        assert recompress_column(table, table.c.executive_summary) == 1
+        assert recompress_column(table, table.c.executive_summary) == 0
+        
+        codec.configure(dictionary=SECOND)
+        raw = db.session.execute(db.select(_raw(table.c.executive_summary)).where(table.c.id == idea_id)).scalar()
+        assert codec.decode(raw) == TEXT
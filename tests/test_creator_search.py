@@ -0,0 +1,70 @@
+import threading
+
+from src.services import creator_search
+from src.services.creator_search import CreatorSearchIndex
+
+def doc(profile_id, skills):
+    return {
+        'id': profile_id, 'skills': tuple(skills), 'industries': (), 'languages': (),
+        'hourly_rate': None, 'years_experience': None, 'is_available_for_hire': True,
+        'is_verified': False, 'client_satisfaction': 0.0, 'profile_completion': 0,
+        'completed_projects': 0, 'location': None,
+    }
+
+def test_facet_cache_follows_upserts(monkeypatch):
+    monkeypatch.setattr(creator_search, 'FACET_SCAN_LIMIT', 2)
+    index = CreatorSearchIndex()
+    index.load([doc(1, ['python']), doc(2, ['python']), doc(3, ['go']), doc(4, ['rust'])])
+    assert 'python' in index.search()['facets']['skills']
+    
+    for profile_id in range(5, 9):
+        index.upsert(doc(profile_id, ['design']))
+    skills = index.search()['facets']['skills']
+    assert skills['design'] == 4
+    
+    for profile_id in range(5, 9):
+        index.remove(profile_id)
+    assert 'design' not in index.search()['facets']['skills']
+
+def test_zero_per_page_is_clamped(client):
+    response = client.get('/api/creators/search?per_page=0')
+    assert response.status_code == 200
+    assert response.get_json()['pagination']['per_page'] == 1
+    assert client.get('/api/creators?per_page=0').status_code == 200
+
+def test_published_snapshots_are_never_modified():
+    index = CreatorSearchIndex()
+    index.load([doc(1, ['python'])])
+    before = index._snapshot
+    postings = dict(before.postings['skills'])
+    
+    index.upsert(doc(2, ['go']))
+    index.remove(1)
+    assert index._snapshot is not before
+    assert before.postings['skills'] == postings
+    assert before.ids_by_slot == [1]
+    assert index.search(skills=['go'])['ids'] == [2]
+
+def test_searches_run_while_commits_update_the_index():
+    index = CreatorSearchIndex()
+    index.load([doc(n, [f'skill{n}']) for n in range(50)])
+    errors = []
+    done = threading.Event()
+    
+    def search():
+        try:
+            while not done.is_set():
+                index.search(location='x', facet_limit=50)
+        except Exception as e:
+            errors.append(e)
+    
+    readers = [threading.Thread(target=search) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    for n in range(50, 2050):
+        index.upsert(dict(doc(n, [f'skill{n}']), location=f'city{n}'))
+    done.set()
+    for reader in readers:
+        reader.join()
+    assert errors == []
+    assert index.search()['total'] == 2050
@@ -0,0 +1,69 @@
+from sqlalchemy import event
+
+from src.models.business_idea import BusinessIdea
+from src.models.user import db
+
+PLAN = 'Plan text. ' * 200
+
+def add_idea(app, creator_id):
+    with app.app_context():
+        idea = BusinessIdea(
+            title='Idea',
+            description='Description',
+            category='tech',
+            price=10.0,
+            creator_id=creator_id,
+            is_published=True,
+            executive_summary=PLAN,
+            market_analysis=PLAN
+        )
+        db.session.add(idea)
+        db.session.commit()
+        return idea.id
+
+class StatementLog:
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+    
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+        return self
+    
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+    
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+    
+    def loading(self, column):
+        # Pagination's count wraps the entity query in a subquery that SQLite flattens; only row loads matter
+        return [
+            s for s in self.statements
+            if s.lstrip().upper().startswith('SELECT') and not s.lstrip().upper().startswith('SELECT COUNT') and column in s
+        ]
+
+def test_listing_does_not_load_plan_columns(app, client, make_user):
+    add_idea(app, make_user('creator'))
+    with app.app_context():
+        engine = db.engine
+    with StatementLog(engine) as log:
+        response = client.get('/api/marketplace/business-ideas')
+    assert response.status_code == 200
+    listed = response.get_json()['business_ideas']
+    assert len(listed) == 1
+    assert 'executive_summary' not in listed[0]
+    assert log.loading('business_idea.title')
+    assert log.loading('executive_summary') == []
+
+def test_detail_loads_plan_for_creator(app, client, make_user, auth_headers):
+    creator_id = make_user('creator')
+    idea_id = add_idea(app, creator_id)
+    
+    anonymous = client.get(f'/api/marketplace/business-ideas/{idea_id}').get_json()['business_idea']
+    assert 'executive_summary' not in anonymous
+    
+    response = client.get(f'/api/marketplace/business-ideas/{idea_id}', headers=auth_headers(creator_id))
+    detail = response.get_json()['business_idea']
+    assert detail['executive_summary'] == PLAN
+    assert detail['market_analysis'] == PLAN
@@ -0,0 +1,97 @@
+import csv
+import gzip
+import io
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.models.user import db
+from src.models.transaction import Transaction, ExportJob
+from src.services.exports import EXPORT_COLUMNS, runner
+
+@pytest.fixture
+def export_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(runner, 'export_dir', str(tmp_path))
+    # Keep the background sweep out of the way; tests call purge() themselves
+    monkeypatch.setattr(runner, '_last_purge', time.monotonic())
+    return tmp_path
+
+def add_transactions(app, buyer, seller, count):
+    with app.app_context():
+        for n in range(count):
+            db.session.add(Transaction(
+                user_id=buyer, seller_id=seller, transaction_type='purchase', item_type='service',
+                item_id=n + 1, amount=10.0 + n, status='completed', created_at=datetime(2026, 3, 1 + n)
+            ))
+        db.session.commit()
+
+def wait_for(client, headers, job_id):
+    for _ in range(100):
+        export = client.get(f'/api/finance/exports/{job_id}', headers=headers).get_json()['export']
+        if export['status'] not in ('pending', 'running'):
+            return export
+        time.sleep(0.05)
+    raise AssertionError(f'export {job_id} did not finish')
+
+def test_background_export_writes_gzip_csv(app, client, make_user, auth_headers, export_dir):
+    buyer = make_user('buyer')
+    seller = make_user('seller')
+    other = make_user('other')
+    add_transactions(app, buyer, seller, 3)
+    add_transactions(app, other, seller, 2)
+    headers = auth_headers(buyer)
+    
+    response = client.post('/api/finance/exports', json={'format': 'csv', 'start': '2026-03-02'}, headers=headers)
+    assert response.status_code == 202
+    export = wait_for(client, headers, response.get_json()['export']['id'])
+    assert export['status'] == 'completed'
+    assert export['row_count'] == 2
+    
+    response = client.get(f'/api/finance/exports/{export["id"]}/download', headers=headers)
+    assert response.status_code == 200
+    assert response.mimetype == 'application/gzip'
+    rows = list(csv.reader(io.StringIO(gzip.decompress(response.data).decode('utf-8'))))
+    assert rows[0] == list(EXPORT_COLUMNS)
+    assert [row[EXPORT_COLUMNS.index('buyer_username')] for row in rows[1:]] == ['buyer', 'buyer']
+    assert [row[EXPORT_COLUMNS.index('item_id')] for row in rows[1:]] == ['2', '3']
+    assert list(export_dir.iterdir()) == [export_dir / f'{export["id"]}.csv.gz']
+    
+    other_headers = auth_headers(other)
+    assert client.get(f'/api/finance/exports/{export["id"]}/download', headers=other_headers).status_code == 404
+
+def test_finished_exports_expire_after_retention(app, client, make_user, auth_headers, export_dir):
+    buyer = make_user('buyer')
+    add_transactions(app, buyer, None, 1)
+    headers = auth_headers(buyer)
+    job_ids = []
+    for export_format in ('csv', 'ndjson'):
+        response = client.post('/api/finance/exports', json={'format': export_format}, headers=headers)
+        job_ids.append(wait_for(client, headers, response.get_json()['export']['id'])['id'])
+    
+    with app.app_context():
+        old = db.session.get(ExportJob, job_ids[0])
+        old.completed_at = datetime.utcnow() - timedelta(hours=runner.retention_hours + 1)
+        db.session.commit()
+        assert runner.purge() == 1
+        assert db.session.get(ExportJob, job_ids[0]).file_path is None
+    
+    assert sorted(path.name for path in export_dir.iterdir()) == [f'{job_ids[1]}.ndjson.gz']
+    response = client.get(f'/api/finance/exports/{job_ids[0]}/download', headers=headers)
+    assert response.status_code == 410
+    assert response.get_json()['export']['status'] == 'expired'
+    assert client.get(f'/api/finance/exports/{job_ids[1]}/download', headers=headers).status_code == 200
+
+def test_requeue_runs_jobs_left_by_a_restart(app, client, make_user, auth_headers, export_dir):
+    buyer = make_user('buyer')
+    add_transactions(app, buyer, None, 2)
+    with app.app_context():
+        # What a process that died mid-export leaves behind
+        db.session.add(ExportJob(id='a' * 32, user_id=buyer, format='ndjson', filters=f'{{"user_id": {buyer}}}', status='running'))
+        db.session.add(ExportJob(id='b' * 32, user_id=buyer, format='csv', filters='{}', status='completed'))
+        db.session.commit()
+        assert runner.requeue() == 1
+    
+    export = wait_for(client, auth_headers(buyer), 'a' * 32)
+    assert export['status'] == 'completed'
+    assert export['row_count'] == 2
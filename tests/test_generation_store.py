@@ -0,0 +1,100 @@
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from src.models.generation import GeneratedArtifact
+from src.models.user import db
+from src.routes import ai_business_builder
+from src.services import generation_store
+from src.services.generation_store import MAX_CHAIN_LENGTH, apply_delta, make_delta, materialize, save
+from src.services.usage_meter import meter
+
+IDEA = {
+    'title': 'Meal kits',
+    'executive_summary': 'Weekly kits',
+    'features': ['recipes', 'delivery'],
+    'pricing': {'basic': 20},
+    'notes': 'draft',
+}
+
+@pytest.fixture
+def cold_cache(monkeypatch):
+    monkeypatch.setattr(generation_store, '_cache', generation_store._Cache())
+
+def test_delta_round_trip():
+    refined = dict(IDEA, features=IDEA['features'] + ['gift cards'], pricing={'basic': 25})
+    del refined['notes']
+    delta = make_delta(IDEA, refined)
+    assert delta == {'append': {'features': ['gift cards']}, 'set': {'pricing': {'basic': 25}}, 'unset': ['notes']}
+    assert apply_delta(IDEA, delta) == refined
+    assert IDEA['features'] == ['recipes', 'delivery']
+
+def test_identical_content_is_stored_once(app, make_user):
+    user_id = make_user('maker')
+    with app.app_context():
+        first, created = save(user_id, 'idea', dict(IDEA, generated_at='today'))
+        again, created_again = save(user_id, 'idea', dict(IDEA, generated_at='tomorrow'))
+        assert created and not created_again
+        assert again.id == first.id
+        
+        db.session.add(GeneratedArtifact(user_id=user_id, kind='idea', content_hash=first.content_hash,
+                                         blob_hash=first.blob_hash))
+        with pytest.raises(IntegrityError):
+            db.session.commit()
+        db.session.rollback()
+
+def test_concurrent_duplicate_returns_the_stored_version(app, make_user, monkeypatch):
+    user_id = make_user('maker')
+    with app.app_context():
+        first, _ = save(user_id, 'idea', IDEA)
+        lookups = iter([None])
+        # The other request commits between this one's lookup and its insert
+        find = generation_store._find
+        monkeypatch.setattr(generation_store, '_find', lambda *key: next(lookups, None) or find(*key))
+        second, created = save(user_id, 'idea', IDEA)
+        assert not created
+        assert second.id == first.id
+        assert GeneratedArtifact.query.count() == 1
+
+def test_refinements_are_deltas_until_the_chain_is_long(app, make_user, cold_cache, monkeypatch):
+    user_id = make_user('maker')
+    with app.app_context():
+        version, _ = save(user_id, 'idea', IDEA)
+        versions = [(version.id, IDEA)]
+        for step in range(MAX_CHAIN_LENGTH + 2):
+            content = dict(versions[-1][1], features=versions[-1][1]['features'] + [f'extra {step}'])
+            version, _ = save(user_id, 'idea', content, parent=version)
+            versions.append((version.id, content))
+        
+        chains = [(a.is_delta, a.chain_length) for a in GeneratedArtifact.query.order_by(GeneratedArtifact.id)]
+        assert chains[:MAX_CHAIN_LENGTH + 1] == [(False, 0)] + [(True, n) for n in range(1, MAX_CHAIN_LENGTH + 1)]
+        assert chains[MAX_CHAIN_LENGTH + 1:] == [(False, 0), (True, 1)]
+    
+    # Rebuilt from the stored blobs in a fresh session and an empty cache
+    monkeypatch.setattr(generation_store, '_cache', generation_store._Cache())
+    with app.app_context():
+        for artifact_id, content in reversed(versions):
+            assert materialize(db.session.get(GeneratedArtifact, artifact_id)) == content
+
+def test_materialized_content_is_a_copy(app, make_user):
+    user_id = make_user('maker')
+    with app.app_context():
+        artifact, _ = save(user_id, 'idea', IDEA)
+        content = materialize(artifact)
+        content['features'].append('mutated')
+        assert materialize(artifact) == IDEA
+
+def test_stored_plans_do_not_use_quota(client, make_user, auth_headers, monkeypatch):
+    monkeypatch.setattr(ai_business_builder.time, 'sleep', lambda seconds: None)
+    user_id = make_user('maker', subscription_tier='basic')
+    headers = auth_headers(user_id)
+    generated = client.post('/api/ai-business-builder/generate', headers=headers, json={
+        'prompt': 'meal kits', 'industry': 'Food & Beverage', 'target_market': 'families', 'budget_range': 'low'
+    })
+    idea_id = generated.get_json()['data']['artifact_id']
+    
+    plans = [client.post('/api/ai-business-builder/business-plan', headers=headers, json={'idea_id': idea_id})
+             for _ in range(3)]
+    assert [plan.status_code for plan in plans] == [200, 200, 200]
+    assert len({plan.get_json()['data']['artifact_id'] for plan in plans}) == 1
+    with client.application.app_context():
+        assert meter.stats(user_id)['by_feature'] == {'business_generation': 1, 'business_plan': 1}
@@ -0,0 +1,73 @@
+def start_conversation(client, auth_headers, owner, *others):
+    response = client.post('/api/messages/conversations', json={'participant_ids': list(others)},
+                           headers=auth_headers(owner))
+    assert response.status_code == 201
+    return response.get_json()['conversation']['id']
+
+def send(client, auth_headers, user_id, conversation_id, content):
+    response = client.post(f'/api/messages/conversations/{conversation_id}/messages',
+                           json={'content': content}, headers=auth_headers(user_id))
+    assert response.status_code == 201
+    return response.get_json()['data']['id']
+
+def mark_read(client, auth_headers, user_id, conversation_id, up_to=None):
+    body = {} if up_to is None else {'up_to_message_id': up_to}
+    return client.post(f'/api/messages/conversations/{conversation_id}/read', json=body,
+                       headers=auth_headers(user_id))
+
+def unread_total(client, auth_headers, user_id):
+    return client.get('/api/messages/conversations', headers=auth_headers(user_id)).get_json()['unread_total']
+
+def test_reads_are_counted_per_participant(client, make_user, auth_headers):
+    alice, bob, carol = make_user('alice'), make_user('bob'), make_user('carol')
+    conversation_id = start_conversation(client, auth_headers, alice, bob, carol)
+    send(client, auth_headers, alice, conversation_id, 'one')
+    send(client, auth_headers, alice, conversation_id, 'two')
+    assert unread_total(client, auth_headers, bob) == 2
+    assert unread_total(client, auth_headers, carol) == 2
+    
+    response = mark_read(client, auth_headers, bob, conversation_id)
+    assert response.get_json()['marked_read'] == 2
+    assert unread_total(client, auth_headers, bob) == 0
+    
+    response = mark_read(client, auth_headers, carol, conversation_id)
+    assert response.get_json()['marked_read'] == 2
+    assert response.get_json()['unread_count'] == 0
+    assert mark_read(client, auth_headers, carol, conversation_id).get_json()['marked_read'] == 0
+
+def test_partial_read_leaves_the_rest_unread(client, make_user, auth_headers):
+    alice, bob = make_user('alice'), make_user('bob')
+    conversation_id = start_conversation(client, auth_headers, alice, bob)
+    first = send(client, auth_headers, alice, conversation_id, 'one')
+    send(client, auth_headers, alice, conversation_id, 'two')
+    send(client, auth_headers, alice, conversation_id, 'three')
+    
+    body = mark_read(client, auth_headers, bob, conversation_id, up_to=first).get_json()
+    assert body['marked_read'] == 1
+    assert body['unread_count'] == 2
+    assert unread_total(client, auth_headers, bob) == 2
+
+def test_marker_is_clamped_to_the_last_message(client, make_user, auth_headers):
+    alice, bob = make_user('alice'), make_user('bob')
+    conversation_id = start_conversation(client, auth_headers, alice, bob)
+    last = send(client, auth_headers, alice, conversation_id, 'one')
+    
+    body = mark_read(client, auth_headers, bob, conversation_id, up_to=10 ** 9).get_json()
+    assert body['marked_read'] == 1
+    assert body['last_read_message_id'] == last
+    
+    send(client, auth_headers, alice, conversation_id, 'two')
+    assert unread_total(client, auth_headers, bob) == 1
+    assert mark_read(client, auth_headers, bob, conversation_id).get_json()['marked_read'] == 1
+    assert unread_total(client, auth_headers, bob) == 0
+
+def test_message_from_another_conversation_is_rejected(client, make_user, auth_headers):
+    alice, bob, carol = make_user('alice'), make_user('bob'), make_user('carol')
+    conversation_id = start_conversation(client, auth_headers, alice, bob)
+    other_id = start_conversation(client, auth_headers, carol, bob)
+    send(client, auth_headers, alice, conversation_id, 'one')
+    foreign = send(client, auth_headers, carol, other_id, 'elsewhere')
+    
+    assert mark_read(client, auth_headers, bob, conversation_id, up_to=foreign).status_code == 400
+    assert mark_read(client, auth_headers, bob, conversation_id, up_to='latest').status_code == 400
+    assert unread_total(client, auth_headers, bob) == 2
@@ -0,0 +1,98 @@
+from datetime import timedelta
+
+from flask_jwt_extended import create_access_token
+
+from src.models.business_idea import BusinessIdea
+from src.models.service import Service
+from src.models.transaction import Transaction
+from src.models.user import db
+
+def add_idea(app, creator_id, price=49.0):
+    with app.app_context():
+        idea = BusinessIdea(
+            title='Idea',
+            description='Description',
+            category='tech',
+            price=price,
+            creator_id=creator_id,
+            is_published=True,
+            executive_summary='The plan'
+        )
+        db.session.add(idea)
+        db.session.commit()
+        return idea.id
+
+def purchase(client, headers, idea_id, **extra):
+    return client.post(
+        '/api/marketplace/purchase',
+        json=dict(item_type='business_idea', item_id=idea_id, **extra),
+        headers=headers
+    )
+
+def test_purchase_charges_the_listed_price_once(app, client, make_user, auth_headers):
+    creator_id = make_user('creator')
+    buyer = auth_headers(make_user('buyer'))
+    idea_id = add_idea(app, creator_id)
+    
+    response = purchase(client, buyer, idea_id, amount=0.01)
+    assert response.status_code == 201
+    transaction = response.get_json()['transaction']
+    assert transaction['amount'] == 49.0
+    assert transaction['seller_id'] == creator_id
+    
+    assert purchase(client, buyer, idea_id).status_code == 409
+    with app.app_context():
+        assert Transaction.query.count() == 1
+
+def test_services_can_be_ordered_again(app, client, make_user, auth_headers):
+    creator_id = make_user('creator')
+    buyer = auth_headers(make_user('buyer'))
+    with app.app_context():
+        service = Service(
+            title='Logo design',
+            description='Description',
+            category='design',
+            starting_price=120.0,
+            creator_id=creator_id,
+            delivery_time='3 days',
+            is_published=True
+        )
+        db.session.add(service)
+        db.session.commit()
+        service_id = service.id
+    
+    for _ in range(2):
+        response = client.post('/api/marketplace/purchase', json={'item_type': 'service', 'item_id': service_id},
+                               headers=buyer)
+        assert response.status_code == 201
+        assert response.get_json()['transaction']['amount'] == 120.0
+    with app.app_context():
+        assert Transaction.query.count() == 2
+        assert db.session.get(Service, service_id).orders_count == 2
+
+def test_bad_tokens_read_public_pages_anonymously(app, client, make_user):
+    creator_id = make_user('creator')
+    idea_id = add_idea(app, creator_id)
+    with app.app_context():
+        expired = create_access_token(identity=creator_id, expires_delta=timedelta(seconds=-1))
+    
+    for token in (expired, 'not-a-token'):
+        response = client.get(f'/api/marketplace/business-ideas/{idea_id}', headers={'Authorization': f'Bearer {token}'})
+        assert response.status_code == 200
+        assert 'executive_summary' not in response.get_json()['business_idea']
+
+def test_refunded_purchases_list_without_the_plan(app, client, make_user, auth_headers):
+    buyer_id = make_user('buyer')
+    headers = auth_headers(buyer_id)
+    idea_id = add_idea(app, make_user('creator'))
+    transaction_id = purchase(client, headers, idea_id).get_json()['transaction']['id']
+    
+    purchases = client.get('/api/marketplace/my-purchases', headers=headers).get_json()['purchases']
+    assert purchases[0]['business_idea']['executive_summary'] == 'The plan'
+    
+    with app.app_context():
+        db.session.get(Transaction, transaction_id).status = 'refunded'
+        db.session.commit()
+    purchases = client.get('/api/marketplace/my-purchases', headers=headers).get_json()['purchases']
+    assert len(purchases) == 1
+    assert 'business_idea' not in purchases[0]
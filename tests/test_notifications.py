@@ -0,0 +1,83 @@
+import pytest
+
+from src.models.user import db
+from src.models.networking import Notification
+from src.services import pubsub
+from src.services import notifications
+from src.services.notifications import NotificationPipeline
+
+def test_flush_coalesces_and_pushes_stored_rows(app, make_user):
+    owner, alice, bob = make_user('owner'), make_user('alice'), make_user('bob')
+    pipeline = NotificationPipeline()
+    pipeline.app = app
+    pipeline.notify(owner, 'follow', actor_id=alice)
+    pipeline.notify(owner, 'follow', actor_id=bob)
+    pipeline.notify(owner, 'follow', actor_id=alice)
+    subscription = app.extensions['pubsub'].subscribe(pubsub.user_channel(owner))
+    
+    assert pipeline.flush(force=True) == 1
+    
+    with app.app_context():
+        stored = Notification.query.filter_by(user_id=owner).one()
+        assert stored.actor_count == 2
+        assert stored.message == 'alice and 1 other started following you'
+        expected = stored.to_dict()
+    event = subscription.get(timeout=1)
+    subscription.close()
+    assert event[1] == 'notification'
+    assert pubsub.json.loads(event[2]) == expected
+
+def test_failed_write_requeues_groups(app, make_user, monkeypatch):
+    owner, alice = make_user('owner'), make_user('alice')
+    pipeline = NotificationPipeline()
+    pipeline.app = app
+    pipeline.notify(owner, 'post_like', actor_id=alice, post_id=None)
+    
+    def fail(*args, **kwargs):
+        raise RuntimeError('database is locked')
+    with monkeypatch.context() as patch:
+        patch.setattr(db.session, 'scalars', fail)
+        with pytest.raises(RuntimeError):
+            pipeline.flush(force=True)
+    assert pipeline.pending_count() == 1
+    
+    assert pipeline.flush(force=True) == 1
+    with app.app_context():
+        assert Notification.query.filter_by(user_id=owner).count() == 1
+
+def test_aggregates_count_the_other_actors(app, make_user):
+    owner = make_user('owner')
+    actors = [make_user(name) for name in ('alice', 'bob', 'carol')]
+    pipeline = NotificationPipeline()
+    pipeline.app = app
+    for actor in actors:
+        pipeline.notify(owner, 'post_like', actor_id=actor, post_id=7)
+    pipeline.notify(owner, 'mention', actor_id=actors[1], post_id=7)
+    
+    assert pipeline.flush(force=True) == 2
+    with app.app_context():
+        messages = {n.notification_type: n.message for n in Notification.query.filter_by(user_id=owner)}
+    assert messages == {'post_like': 'alice and 2 others liked your post', 'mention': 'bob mentioned you'}
+
+def test_groups_that_keep_failing_are_dropped(app, make_user, monkeypatch):
+    owner, alice, bob = make_user('owner'), make_user('alice'), make_user('bob')
+    monkeypatch.setattr(notifications, 'MAX_FLUSH_ATTEMPTS', 2)
+    pipeline = NotificationPipeline()
+    pipeline.app = app
+    pipeline.notify(owner, 'follow', actor_id=alice)
+    
+    def fail(*args, **kwargs):
+        raise RuntimeError('constraint failed')
+    with monkeypatch.context() as patch:
+        patch.setattr(db.session, 'scalars', fail)
+        with pytest.raises(RuntimeError):
+            pipeline.flush(force=True)
+        assert pipeline.pending_count() == 1
+        with pytest.raises(RuntimeError):
+            pipeline.flush(force=True)
+        assert pipeline.pending_count() == 0
+    
+    pipeline.notify(owner, 'follow', actor_id=bob)
+    assert pipeline.flush(force=True) == 1
+    with app.app_context():
+        assert Notification.query.filter_by(user_id=owner).one().message == 'bob started following you'
@@ -0,0 +1,70 @@
+import pytest
+from sqlalchemy import event
+
+from src.models.creator_profile import CreatorProfile, ServicePackage
+from src.models.user import db
+
+@pytest.fixture
+def packages(app, make_user):
+    ids = []
+    users = [make_user(name) for name in ('alice', 'bob')]
+    with app.app_context():
+        for n, user_id in enumerate(users):
+            profile = CreatorProfile(user_id=user_id, professional_title=f'Designer {n}', hourly_rate=50.0 + n)
+            db.session.add(profile)
+            db.session.flush()
+            for tier in ('Basic', 'Pro'):
+                db.session.add(ServicePackage(creator_profile_id=profile.id, name=f'{tier} logo', description='Logo',
+                                              category='design', price=100.0, delivery_time='3 days'))
+            ids.append(profile.id)
+        db.session.commit()
+    return ids
+
+@pytest.fixture
+def statements(app):
+    seen = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        seen.append(statement)
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    yield seen
+    event.remove(engine, 'before_cursor_execute', record)
+
+def test_nested_fields_load_in_batches(client, packages, statements):
+    response = client.get('/api/creators/service-packages?fields=name,price,creator_profile.user.username')
+    assert response.status_code == 200
+    rows = response.get_json()['service_packages']
+    assert len(rows) == 4
+    for row in rows:
+        assert set(row) == {'id', 'name', 'price', 'creator_profile'}
+        assert set(row['creator_profile']) == {'id', 'user'}
+        assert set(row['creator_profile']['user']) == {'id', 'username'}
+    assert {row['creator_profile']['user']['username'] for row in rows} == {'alice', 'bob'}
+    
+    selects = [s for s in statements if s.lstrip().upper().startswith('SELECT')]
+    # Pagination count, the packages, then one IN query per relation level
+    assert len(selects) == 4
+    assert 'description' not in selects[1] and 'password_hash' not in selects[3]
+
+def test_detail_projects_child_collections(client, packages):
+    response = client.get(f'/api/creators/{packages[0]}?fields=professional_title,service_packages.name')
+    assert response.status_code == 200
+    creator = response.get_json()['creator']
+    assert creator['professional_title'] == 'Designer 0'
+    assert set(creator) == {'id', 'professional_title', 'service_packages'}
+    assert sorted(p['name'] for p in creator['service_packages']) == ['Basic logo', 'Pro logo']
+
+def test_default_fields_when_none_are_asked_for(client, packages):
+    creators = client.get('/api/creators').get_json()['creators']
+    assert len(creators) == 2
+    assert 'hourly_rate' in creators[0] and 'resume_url' not in creators[0]
+    assert set(creators[0]['user']) == {
+        'id', 'username', 'user_type', 'subscription_tier', 'profile_image', 'profile_thumbnail_url', 'bio'
+    }
+
+@pytest.mark.parametrize('fields', ['user.password_hash', 'nonsense', 'service_packages.creator_profile.user.email'])
+def test_fields_outside_the_allowlist_are_rejected(client, packages, fields):
+    response = client.get(f'/api/creators?fields={fields}')
+    assert response.status_code == 400
@@ -0,0 +1,30 @@
+from src.services.rate_limit import MemoryStore
+
+def login(client, email, ip):
+    return client.post(
+        '/api/auth/login',
+        json={'email': email, 'password': 'wrong'},
+        environ_base={'REMOTE_ADDR': ip}
+    )
+
+def test_login_attempts_are_limited_per_email_and_ip(client):
+    for _ in range(5):
+        assert login(client, 'victim@example.com', '203.0.113.1').status_code == 401
+    response = login(client, 'victim@example.com', '203.0.113.1')
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+    
+    # Another client can still sign in to the same account
+    assert login(client, 'victim@example.com', '203.0.113.2').status_code == 401
+
+def test_login_attempts_are_limited_per_account_across_ips(client):
+    # A burst of 10 per account, spread over addresses that each stay under their own limits
+    statuses = [login(client, 'victim@example.com', f'198.51.100.{n}').status_code for n in range(12)]
+    assert statuses == [401] * 10 + [429] * 2
+    assert login(client, 'other@example.com', '198.51.100.1').status_code == 401
+
+def test_sweep_drops_only_expired_keys():
+    store = MemoryStore()
+    store._tats = {'expired': 1.0, 'live': 100.0}
+    store._sweep(50.0)
+    assert store._tats == {'live': 100.0}
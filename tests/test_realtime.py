@@ -0,0 +1,88 @@
+import threading
+import tracemalloc
+
+from flask_jwt_extended import create_access_token
+from src.routes import realtime
+from src.services import pubsub
+
+IDLE_STREAMS = 2000
+
+def test_replay_resumes_after_last_event_id(app):
+    broker = pubsub.InProcessBroker()
+    first = broker.publish('user:1', 'message', {'n': 1})
+    broker.publish('user:1', 'message', {'n': 2})
+    subscription = broker.subscribe('user:1', last_event_id=first)
+    assert subscription.get(timeout=0)[2] == '{"n": 2}'
+    assert subscription.get(timeout=0) is None
+
+def test_history_of_abandoned_channels_is_pruned(app, monkeypatch):
+    broker = pubsub.InProcessBroker()
+    broker.publish('user:1', 'message', 'old')
+    kept = broker.subscribe('user:2')
+    broker.publish('user:2', 'message', 'old')
+    monkeypatch.setattr(pubsub, 'HISTORY_TTL_SECONDS', -1)
+    monkeypatch.setattr(pubsub, 'PRUNE_INTERVAL_SECONDS', -1)
+    broker.publish('user:3', 'message', 'new')
+    assert 'user:1' not in broker._history
+    assert 'user:2' in broker._history
+    kept.close()
+
+def test_thousands_of_idle_streams(app, client):
+    # Idle SSE connections cost a queue each: no threads, no per-connection polling
+    broker = app.extensions['pubsub']
+    with app.app_context():
+        tickets = [realtime.make_ticket(user_id) for user_id in range(1, IDLE_STREAMS + 1)]
+    baseline_subscribers = broker.subscriber_count()
+    baseline_threads = threading.active_count()
+    
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    streams = []
+    for ticket in tickets:
+        response = client.get(f'/api/realtime/stream?ticket={ticket}', buffered=False)
+        assert response.status_code == 200
+        assert response.mimetype == 'text/event-stream'
+        # Started, so each generator is parked on its queue the way a live connection is
+        chunks = iter(response.response)
+        assert next(chunks).startswith(b'retry:')
+        streams.append((response, chunks))
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    
+    per_stream = sum(stat.size_diff for stat in after.compare_to(before, 'filename')) / IDLE_STREAMS
+    assert broker.subscriber_count() == baseline_subscribers + IDLE_STREAMS
+    assert threading.active_count() == baseline_threads
+    assert per_stream < 64 * 1024
+    
+    # One user's event reaches only that user's stream
+    with app.app_context():
+        broker.publish(pubsub.user_channel(IDLE_STREAMS // 2 + 1), 'message', {'ok': True})
+    assert b'data: {"ok": true}' in next(streams[IDLE_STREAMS // 2][1])
+    assert all(subscription.queue.empty() for subscription in broker._subscribers[pubsub.user_channel(1)])
+    
+    for response, _ in streams:
+        response.close()
+    assert broker.subscriber_count() == baseline_subscribers
+
+def test_stream_needs_a_ticket_or_header(app, client, make_user, auth_headers, monkeypatch):
+    user_id = make_user('reader')
+    headers = auth_headers(user_id)
+    token = headers['Authorization'].split()[1]
+    assert client.get(f'/api/realtime/stream?jwt={token}').status_code == 401
+    assert client.get('/api/realtime/stream?ticket=forged').status_code == 401
+    
+    response = client.get('/api/realtime/stream', headers=headers, buffered=False)
+    assert response.status_code == 200
+    response.close()
+    
+    issued = client.post('/api/realtime/ticket', headers=headers)
+    assert issued.status_code == 201
+    ticket = issued.get_json()['ticket']
+    response = client.get(f'/api/realtime/stream?ticket={ticket}', buffered=False)
+    assert response.status_code == 200
+    response.close()
+    
+    monkeypatch.setitem(app.config, 'STREAM_TICKET_SECONDS', -1)
+    expired = client.get(f'/api/realtime/stream?ticket={ticket}')
+    assert expired.status_code == 401
+    assert expired.get_json()['error'] == 'Stream ticket expired'
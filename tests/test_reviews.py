@@ -0,0 +1,108 @@
+import pytest
+
+from src.models.user import db
+from src.models.business_idea import BusinessIdea
+from src.models.creator_profile import CreatorProfile, CreatorReview, RatingAggregate
+from src.services.reputation import get_aggregate, recompute
+
+@pytest.fixture
+def creator(app, make_user):
+    def make(username):
+        user_id = make_user(username)
+        with app.app_context():
+            profile = CreatorProfile(user_id=user_id)
+            idea = BusinessIdea(title='Idea', description='d', category='tech', price=10, creator_id=user_id)
+            db.session.add_all([profile, idea])
+            db.session.commit()
+            return profile.id, idea.id
+    return make
+
+def test_review_validation(app, client, make_user, auth_headers, creator):
+    profile_id, own_idea = creator('bob')
+    _, other_idea = creator('carol')
+    headers = auth_headers(make_user('alice'))
+    url = f'/api/creators/{profile_id}/reviews'
+    
+    assert client.post(url, json={'rating': True}, headers=headers).status_code == 400
+    assert client.post(url, json={'rating': 5, 'business_idea_id': other_idea}, headers=headers).status_code == 404
+    assert client.post(url, json={'rating': 5, 'business_idea_id': own_idea}, headers=headers).status_code == 201
+    
+    duplicate = client.post(url, json={'rating': 1, 'business_idea_id': own_idea}, headers=headers)
+    assert duplicate.status_code == 409
+    with app.app_context():
+        idea = db.session.get(BusinessIdea, own_idea)
+        assert (idea.rating, idea.review_count) == (5.0, 1)
+
+def add_review(profile_id, reviewer_id, rating, **fields):
+    review = CreatorReview(creator_profile_id=profile_id, reviewer_id=reviewer_id, rating=rating, **fields)
+    db.session.add(review)
+    db.session.commit()
+    return review
+
+def aggregate_of(subject_type, subject_id):
+    aggregate = get_aggregate(subject_type, subject_id)
+    return (aggregate.review_count, aggregate.rating_sum, aggregate.quality_sum, aggregate.quality_count)
+
+def test_edits_move_the_aggregates(app, make_user, creator):
+    profile_id, first_idea = creator('bob')
+    _, second_idea = creator('carol')
+    alice, dave = make_user('alice'), make_user('dave')
+    with app.app_context():
+        review = add_review(profile_id, alice, 4, business_idea_id=first_idea, quality_rating=5)
+        add_review(profile_id, dave, 2, business_idea_id=first_idea)
+        assert aggregate_of('business_idea', first_idea) == (2, 6, 5, 1)
+        
+        review.rating = 5
+        review.quality_rating = None
+        db.session.flush()
+        # Rows already loaded see the new average before the commit
+        assert db.session.get(BusinessIdea, first_idea).rating == 3.5
+        db.session.commit()
+        assert aggregate_of('business_idea', first_idea) == (2, 7, 0, 0)
+        assert aggregate_of('creator_profile', profile_id) == (2, 7, 0, 0)
+        
+        review.business_idea_id = second_idea
+        db.session.commit()
+        assert aggregate_of('business_idea', first_idea) == (1, 2, 0, 0)
+        assert aggregate_of('business_idea', second_idea) == (1, 5, 0, 0)
+        assert (db.session.get(BusinessIdea, second_idea).rating,
+                db.session.get(BusinessIdea, second_idea).review_count) == (5.0, 1)
+        assert aggregate_of('creator_profile', profile_id) == (2, 7, 0, 0)
+
+def test_deletes_are_subtracted(app, make_user, creator):
+    profile_id, idea_id = creator('bob')
+    alice, dave = make_user('alice'), make_user('dave')
+    with app.app_context():
+        kept = add_review(profile_id, alice, 5, business_idea_id=idea_id)
+        removed = add_review(profile_id, dave, 1, business_idea_id=idea_id, quality_rating=2)
+        
+        db.session.delete(removed)
+        db.session.commit()
+        assert aggregate_of('business_idea', idea_id) == (1, 5, 0, 0)
+        assert db.session.get(CreatorProfile, profile_id).client_satisfaction == 5.0
+        
+        db.session.delete(kept)
+        db.session.commit()
+        idea = db.session.get(BusinessIdea, idea_id)
+        assert (idea.rating, idea.review_count) == (0.0, 0)
+
+def test_recompute_rebuilds_drifted_aggregates(app, make_user, creator):
+    profile_id, idea_id = creator('bob')
+    alice, dave = make_user('alice'), make_user('dave')
+    with app.app_context():
+        add_review(profile_id, alice, 4, business_idea_id=idea_id, quality_rating=3)
+        add_review(profile_id, dave, 3)
+        expected = {
+            ('creator_profile', profile_id): aggregate_of('creator_profile', profile_id),
+            ('business_idea', idea_id): aggregate_of('business_idea', idea_id),
+        }
+        
+        db.session.execute(RatingAggregate.__table__.update().values(review_count=99, rating_sum=0))
+        db.session.execute(BusinessIdea.__table__.update().values(rating=1.0, review_count=99))
+        db.session.commit()
+        
+        assert recompute() == 2
+        assert {key: aggregate_of(*key) for key in expected} == expected
+        idea = db.session.get(BusinessIdea, idea_id)
+        assert (idea.rating, idea.review_count) == (4.0, 1)
+        assert db.session.get(CreatorProfile, profile_id).client_satisfaction == 3.5
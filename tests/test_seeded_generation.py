@@ -0,0 +1,66 @@
+import time
+
+import pytest
+
+from src.services.usage_meter import meter
+
+@pytest.fixture(autouse=True)
+def no_delay(monkeypatch):
+    # The generators sleep to imitate model latency
+    monkeypatch.setattr(time, 'sleep', lambda seconds: None)
+
+def used(app, user_id):
+    with app.app_context():
+        return meter.stats(user_id)['used_this_month']
+
+def generate(client, headers, body, etag=None):
+    if etag is not None:
+        headers = dict(headers, **{'If-None-Match': etag})
+    return client.post('/api/ai-studio/generate-idea', json=body, headers=headers)
+
+def test_seeded_requests_repeat_and_revalidate(app, client, make_user, auth_headers):
+    creator = make_user('creator')
+    headers = auth_headers(creator)
+    body = {'industry': 'Health', 'keywords': ['meals'], 'seed': 42}
+    
+    first = generate(client, headers, body)
+    assert first.status_code == 200
+    assert first.headers['Cache-Control'] == 'private, no-cache'
+    etag = first.headers['ETag']
+    second = generate(client, headers, {'seed': 42, 'keywords': ['meals'], 'industry': 'Health'})
+    assert second.data == first.data
+    assert second.headers['ETag'] == etag
+    assert used(app, creator) == 2
+    
+    revalidated = generate(client, headers, body, etag=etag)
+    assert revalidated.status_code == 304
+    assert revalidated.data == b''
+    assert revalidated.headers['ETag'] == etag
+    # Answered from the ETag alone: the generator did not run and nothing was charged
+    assert used(app, creator) == 2
+    
+    other_seed = generate(client, headers, dict(body, seed=7), etag=etag)
+    assert other_seed.status_code == 200
+    assert other_seed.headers['ETag'] != etag
+    assert used(app, creator) == 3
+
+def test_etag_is_per_caller(app, client, make_user, auth_headers):
+    first = make_user('first')
+    second = make_user('second')
+    body = {'industry': 'Health', 'seed': 1}
+    mine = generate(client, auth_headers(first), body)
+    theirs = generate(client, auth_headers(second), body, etag=mine.headers['ETag'])
+    assert theirs.status_code == 200
+    assert theirs.data == mine.data
+    assert theirs.headers['ETag'] != mine.headers['ETag']
+
+def test_unseeded_requests_carry_no_etag(app, client, make_user, auth_headers, monkeypatch):
+    creator = make_user('creator')
+    response = generate(client, auth_headers(creator), {'industry': 'Health'})
+    assert response.status_code == 200
+    assert 'ETag' not in response.headers
+    
+    monkeypatch.setitem(app.config, 'AI_DETERMINISTIC', True)
+    deterministic = generate(client, auth_headers(creator), {'industry': 'Health'})
+    again = generate(client, auth_headers(creator), {'industry': 'Health'}, etag=deterministic.headers['ETag'])
+    assert again.status_code == 304
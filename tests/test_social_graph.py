@@ -0,0 +1,65 @@
+from src.models.user import db
+from src.models.networking import Connection, Follow
+from src.services.social_graph import SocialGraph
+
+def connect(a, b):
+    db.session.add(Connection(requester_id=a, recipient_id=b, status='accepted'))
+    db.session.commit()
+
+def test_workers_see_each_others_commits(app, make_user):
+    alice, bob = make_user('alice'), make_user('bob')
+    with app.app_context():
+        connect(alice, bob)
+        worker_a, worker_b = SocialGraph(), SocialGraph()
+        worker_a.sync()
+        worker_b.sync()
+        assert worker_b.are_connected(alice, bob)
+        
+        db.session.delete(Connection.query.one())
+        db.session.commit()
+        worker_b.sync()
+        assert not worker_b.are_connected(alice, bob)
+        assert worker_b.visible_post_levels(bob, alice) == ['public']
+
+def test_commit_during_build_is_replayed(app, make_user, monkeypatch):
+    alice, bob = make_user('alice'), make_user('bob')
+    with app.app_context():
+        graph = SocialGraph()
+        original = db.session.query
+        calls = []
+        
+        def commit_after_connection_rows(*args, **kwargs):
+            # build() reads the log position, then connections, then follows
+            calls.append(args)
+            if len(calls) == 3:
+                monkeypatch.undo()
+                connect(alice, bob)
+            return original(*args, **kwargs)
+        monkeypatch.setattr(db.session, 'query', commit_after_connection_rows)
+        graph.build()
+        assert not graph.are_connected(alice, bob)
+        graph.sync()
+        assert graph.are_connected(alice, bob)
+
+def test_rolled_back_savepoint_is_not_applied(app, make_user):
+    alice, bob, carol = make_user('alice'), make_user('bob'), make_user('carol')
+    with app.app_context():
+        graph = SocialGraph()
+        graph.sync()
+        savepoint = db.session.begin_nested()
+        db.session.add(Follow(follower_id=alice, following_id=bob))
+        db.session.flush()
+        savepoint.rollback()
+        db.session.add(Follow(follower_id=alice, following_id=carol))
+        db.session.commit()
+        graph.sync()
+        assert graph.is_following(alice, carol)
+        assert not graph.is_following(alice, bob)
+
+def test_follow_from_a_stale_worker_is_not_an_error(app, client, make_user, auth_headers, monkeypatch):
+    alice, bob = make_user('alice'), make_user('bob')
+    monkeypatch.setattr(SocialGraph, 'is_following', lambda self, a, b: False)
+    assert client.post(f'/api/network/follow/{bob}', headers=auth_headers(alice)).status_code == 201
+    response = client.post(f'/api/network/follow/{bob}', headers=auth_headers(alice))
+    assert response.status_code == 200
+    assert response.get_json() == {'message': 'Already following'}
@@ -0,0 +1,79 @@
+from src.models.user import db
+from src.models.team import Team, TeamMember, TeamProject
+from src.services.activity_log import activity_log
+
+def make_team(app, owner, members=(), projects=(), name='Team', is_active=True):
+    with app.app_context():
+        team = Team(name=name, owner_id=owner, is_active=is_active)
+        db.session.add(team)
+        db.session.flush()
+        for user_id, status in members:
+            db.session.add(TeamMember(team_id=team.id, user_id=user_id, status=status))
+        for project_name, status, priority in projects:
+            db.session.add(TeamProject(team_id=team.id, name=project_name, project_type='campaign',
+                                       status=status, priority=priority, created_by=owner))
+        db.session.commit()
+        return team.id
+
+def test_dashboard_summarises_members_and_projects(app, client, make_user, auth_headers):
+    owner = make_user('owner')
+    active = make_user('active')
+    former = make_user('former')
+    team_id = make_team(app, owner, members=[(active, 'active'), (former, 'inactive')], projects=[
+        ('Launch', 'active', 'high'),
+        ('Rebrand', 'active', 'medium'),
+        ('Pilot', 'completed', 'high'),
+    ])
+    
+    response = client.get('/api/teams/dashboard', headers=auth_headers(owner))
+    assert response.status_code == 200
+    [team] = response.get_json()['teams']
+    assert team['id'] == team_id
+    assert team['owner']['id'] == owner
+    assert team['member_count'] == 2
+    assert team['active_member_count'] == 1
+    assert team['projects'] == {
+        'total': 3,
+        'by_status': {'active': 2, 'completed': 1},
+        'by_priority': {'high': 2, 'medium': 1},
+    }
+
+def test_dashboard_lists_only_accessible_teams(app, client, make_user, auth_headers):
+    owner = make_user('owner')
+    member = make_user('member')
+    former = make_user('former')
+    outsider = make_user('outsider')
+    shared = make_team(app, owner, members=[(member, 'active'), (former, 'inactive')], name='Shared')
+    make_team(app, owner, name='Closed', is_active=False)
+    own = make_team(app, member, name='Own')
+    
+    def team_ids(user_id):
+        response = client.get('/api/teams/dashboard', headers=auth_headers(user_id))
+        assert response.status_code == 200
+        return sorted(team['id'] for team in response.get_json()['teams'])
+    
+    assert team_ids(owner) == [shared]
+    assert team_ids(member) == sorted([shared, own])
+    assert team_ids(former) == []
+    assert team_ids(outsider) == []
+
+def test_dashboard_includes_recent_activity_per_team(app, client, make_user, auth_headers):
+    owner = make_user('owner')
+    member = make_user('member')
+    first = make_team(app, owner, members=[(member, 'active')], projects=[
+        ('Launch', 'active', 'high'),
+        ('Rebrand', 'active', 'medium'),
+    ], name='First')
+    second = make_team(app, owner, projects=[('Pilot', 'active', 'low')], name='Second')
+    assert activity_log.flush() == 4
+    
+    response = client.get('/api/teams/dashboard?activity_limit=2', headers=auth_headers(owner))
+    assert response.status_code == 200
+    teams = {team['id']: team for team in response.get_json()['teams']}
+    assert len(teams[first]['recent_activity']) == 2
+    assert {entry['team_id'] for entry in teams[first]['recent_activity']} == {first}
+    assert [entry['activity_type'] for entry in teams[second]['recent_activity']] == ['project_created']
+    assert all(isinstance(entry['id'], str) for entry in teams[first]['recent_activity'])
+    
+    response = client.get('/api/teams/dashboard?activity_limit=0', headers=auth_headers(owner))
+    assert all(team['recent_activity'] == [] for team in response.get_json()['teams'])
@@ -0,0 +1,109 @@
+import os
+import time
+
+import pytest
+from PIL import Image
+
+from src.models.business_idea import BusinessIdea
+from src.models.user import db
+from src.services import thumbnails as thumbnails_module
+from src.services.thumbnails import ThumbnailService, thumbnails
+
+def write_image(root, name, color, size=(800, 600)):
+    path = root / 'images' / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    Image.new('RGB', size, color).save(path, 'PNG')
+    return f'/images/{name}'
+
+@pytest.fixture
+def service(tmp_path):
+    service = ThumbnailService()
+    service.source_root = str(tmp_path / 'static')
+    service.cache_dir = str(tmp_path / 'cache')
+    service.workers = 1
+    yield service
+    service.shutdown()
+
+@pytest.fixture
+def site_thumbnails(tmp_path, monkeypatch):
+    monkeypatch.setattr(thumbnails, 'source_root', str(tmp_path / 'static'))
+    monkeypatch.setattr(thumbnails, 'cache_dir', str(tmp_path / 'cache'))
+    monkeypatch.setattr(thumbnails, '_versions', type(thumbnails._versions)())
+    monkeypatch.setattr(thumbnails, '_digests', type(thumbnails._digests)())
+    monkeypatch.setattr(thumbnails, '_entries', None)
+    yield thumbnails
+    thumbnails.shutdown()
+
+def test_derivative_is_a_bounded_webp(tmp_path, service):
+    source = write_image(tmp_path / 'static', 'wide.png', 'red')
+    path, key = service.derivative(service.resolve(source), 'thumb')
+    with Image.open(path) as image:
+        assert image.format == 'WEBP'
+        assert image.size == (240, 180)
+    assert service.derivative(service.resolve(source), 'thumb') == (path, key)
+    with pytest.raises(KeyError):
+        service.derivative(service.resolve(source), 'poster')
+
+def test_cache_evicts_least_recently_used(tmp_path, service):
+    first = service.resolve(write_image(tmp_path / 'static', 'a.png', 'red'))
+    second = service.resolve(write_image(tmp_path / 'static', 'b.png', 'blue'))
+    first_path, _ = service.derivative(first, 'avatar')
+    service.max_bytes = os.path.getsize(first_path) + 1
+    
+    second_path, _ = service.derivative(second, 'avatar')
+    # The render's done callback may still be unlinking the evicted file
+    deadline = time.monotonic() + 5
+    while os.path.exists(first_path) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not os.path.exists(first_path)
+    assert os.path.exists(second_path)
+    assert service._total <= service.max_bytes
+    
+    restarted = ThumbnailService()
+    restarted.cache_dir = service.cache_dir
+    restarted._scan()
+    assert list(restarted._entries) == [os.path.basename(second_path)[:-5]]
+
+def test_versions_follow_source_changes(tmp_path, service, monkeypatch):
+    source = write_image(tmp_path / 'static', 'logo.png', 'red')
+    version = service.version(source)
+    assert version and service.version('/images/missing.png') is None
+    
+    write_image(tmp_path / 'static', 'logo.png', 'green', size=(640, 480))
+    assert service.version(source) == version
+    assert service.version(source, fresh=True) != version
+    
+    monkeypatch.setattr(thumbnails_module, 'VERSION_RECHECK_SECONDS', 0)
+    os.remove(tmp_path / 'static' / 'images' / 'logo.png')
+    assert service.version(source) is None
+
+def test_listings_carry_thumbnail_urls(app, client, make_user, tmp_path, site_thumbnails, monkeypatch):
+    source = write_image(tmp_path / 'static', 'idea.png', 'red')
+    with app.app_context():
+        db.session.add(BusinessIdea(title='Idea', description='Description', category='tech', price=10.0,
+                                    creator_id=make_user('creator'), is_published=True, image_url=source))
+        db.session.add(BusinessIdea(title='Plain', description='Description', category='tech', price=10.0,
+                                    creator_id=make_user('other'), is_published=True))
+        db.session.commit()
+    
+    ideas = client.get('/api/marketplace/business-ideas').get_json()['business_ideas']
+    by_title = {idea['title']: idea for idea in ideas}
+    url = by_title['Idea']['thumbnail_url']
+    assert url.startswith('/api/images/card/images/idea.png?v=')
+    assert by_title['Plain']['thumbnail_url'] is None
+    
+    # Repeat listings are served without touching the filesystem
+    def no_stat(*args):
+        raise AssertionError('stat on the listing path')
+    with monkeypatch.context() as patched:
+        patched.setattr(site_thumbnails, 'resolve', no_stat)
+        assert client.get('/api/marketplace/business-ideas').get_json()['business_ideas'] == ideas
+    
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.mimetype == 'image/webp'
+    assert 'immutable' in response.headers['Cache-Control']
+    
+    stale = client.get('/api/images/card/images/idea.png?v=old')
+    assert stale.status_code == 302
+    assert stale.headers['Location'].endswith(url)
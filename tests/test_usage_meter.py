@@ -0,0 +1,130 @@
+import time
+
+import pytest
+from sqlalchemy import event
+
+from src.models.usage import AIUsage, AIUsageLease
+from src.models.user import db
+from src.services import usage_meter
+from src.services.usage_meter import LEASE_IDLE_SECONDS, QuotaExceeded, UsageMeter
+
+@pytest.fixture
+def no_burst(monkeypatch):
+    for tier in usage_meter.TIER_BURST:
+        monkeypatch.setitem(usage_meter.TIER_BURST, tier, (1000, 1.0))
+
+def make_meter(app):
+    meter = UsageMeter()
+    meter.app = app
+    meter._ensure_worker = lambda: None
+    return meter
+
+def stored(app, user_id):
+    with app.app_context():
+        return sum(row.count for row in AIUsage.query.filter_by(user_id=user_id))
+
+def leased(app, user_id):
+    with app.app_context():
+        return {row.worker: row.granted for row in AIUsageLease.query.filter_by(user_id=user_id)}
+
+def consume_all(meter, user_id, attempts):
+    allowed = 0
+    for _ in range(attempts):
+        try:
+            meter.consume(user_id, 'idea_generation')
+            allowed += 1
+        except QuotaExceeded:
+            pass
+    return allowed
+
+def test_workers_share_the_monthly_limit(app, make_user, no_burst):
+    user_id = make_user('basic', subscription_tier='basic')
+    workers = [make_meter(app), make_meter(app)]
+    allowed = 0
+    with app.app_context():
+        for attempt in range(16):
+            allowed += consume_all(workers[attempt % 2], user_id, 1)
+    assert allowed == usage_meter.TIER_LIMITS['basic']
+    
+    for worker in workers:
+        worker.flush()
+    assert stored(app, user_id) == usage_meter.TIER_LIMITS['basic']
+    assert sum(leased(app, user_id).values()) == 0
+
+def test_calls_within_a_lease_do_not_touch_the_database(app, make_user, no_burst):
+    user_id = make_user('inventor', subscription_tier='inventor')
+    meter = make_meter(app)
+    statements = []
+    with app.app_context():
+        meter.consume(user_id, 'idea_generation')
+        engine = db.engine
+        record = lambda *args: statements.append(args[2])
+        event.listen(engine, 'before_cursor_execute', record)
+        try:
+            assert consume_all(meter, user_id, usage_meter.lease_size(100) - 1) == usage_meter.lease_size(100) - 1
+        finally:
+            event.remove(engine, 'before_cursor_execute', record)
+    assert statements == []
+    assert stored(app, user_id) == 0
+    
+    meter.flush()
+    assert stored(app, user_id) == usage_meter.lease_size(100)
+    # The flush tops the lease up for an active user
+    assert leased(app, user_id) == {meter.worker_id: usage_meter.lease_size(100)}
+
+def test_idle_reservations_go_back_to_other_workers(app, make_user, no_burst):
+    user_id = make_user('basic', subscription_tier='basic')
+    first, second = make_meter(app), make_meter(app)
+    with app.app_context():
+        assert consume_all(first, user_id, 1) == 1
+    first.flush()
+    assert leased(app, user_id) == {first.worker_id: 1}
+    
+    first._users[user_id].used_at = time.monotonic() - LEASE_IDLE_SECONDS - 1
+    first.flush()
+    assert leased(app, user_id) == {}
+    with app.app_context():
+        assert consume_all(second, user_id, 20) == usage_meter.TIER_LIMITS['basic'] - 1
+
+def test_refund_returns_the_call(app, make_user, no_burst):
+    user_id = make_user('inventor', subscription_tier='inventor')
+    meter = make_meter(app)
+    with app.app_context():
+        meter.consume(user_id, 'idea_generation')
+        meter.flush()
+        meter.refund(user_id, 'idea_generation')
+        assert meter.stats(user_id)['used_this_month'] == 0
+        meter.flush()
+    assert stored(app, user_id) == 0
+
+def test_failed_flush_keeps_counts(app, make_user, monkeypatch):
+    user_id = make_user('guru')
+    meter = make_meter(app)
+    with app.app_context():
+        for _ in range(3):
+            meter.consume(user_id, 'idea_generation')
+    
+    def fail(rows):
+        raise RuntimeError('database is locked')
+    monkeypatch.setattr(meter, '_write', fail)
+    with pytest.raises(RuntimeError):
+        meter.flush()
+    assert meter._users[user_id].pending == {'idea_generation': 3}
+    assert meter._users[user_id].used() == 3
+    
+    monkeypatch.undo()
+    assert meter.flush() == 1
+    assert stored(app, user_id) == 3
+
+def test_idle_users_are_forgotten(app, make_user):
+    active = make_user('active')
+    idle = make_user('idle')
+    meter = make_meter(app)
+    with app.app_context():
+        meter.consume(active, 'idea_generation')
+        meter.consume(idle, 'idea_generation')
+    meter._users[idle].used_at = time.monotonic() - meter.idle_seconds - 1
+    assert meter.flush() == 2
+    assert list(meter._users) == [active]
+    assert stored(app, active) == 1
+    assert stored(app, idle) == 1
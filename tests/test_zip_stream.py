@@ -0,0 +1,119 @@
+import io
+import os
+import zipfile
+import zlib
+
+from src.routes.graphics import bundle_for
+from src.services.asset_store import store as asset_store
+from src.services.zip_stream import ZIP64_LIMIT, ZipMember, ZipStream
+
+MTIME = 1767225600  # 2026-01-01
+
+class Zeros:
+    """A huge member of zero bytes, produced on demand"""
+    
+    def __init__(self, size):
+        self.size = size
+        self.position = 0
+        self.closed = False
+    
+    def seek(self, offset):
+        self.position = offset
+    
+    def read(self, count):
+        count = max(min(count, self.size - self.position), 0)
+        self.position += count
+        return bytes(count)
+    
+    def close(self):
+        self.closed = True
+
+class ArchiveReader(io.RawIOBase):
+    """Random access into a ZipStream through iter_bytes, the way Range requests read it"""
+    
+    def __init__(self, stream):
+        self.stream = stream
+        self.position = 0
+    
+    def readable(self):
+        return True
+    
+    def seekable(self):
+        return True
+    
+    def tell(self):
+        return self.position
+    
+    def seek(self, offset, whence=io.SEEK_SET):
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self.position, io.SEEK_END: self.stream.length}[whence]
+        self.position = base + offset
+        return self.position
+    
+    def readinto(self, buffer):
+        stop = min(self.position + len(buffer), self.stream.length)
+        data = b''.join(self.stream.iter_bytes(self.position, stop))
+        buffer[:len(data)] = data
+        self.position += len(data)
+        return len(data)
+
+def member(name, data):
+    return ZipMember(name, io.BytesIO(data), len(data), zlib.crc32(data), MTIME)
+
+def test_archive_matches_its_declared_length():
+    bodies = {'logo.svg': b'<svg/>' * 1000, 'docs/über.txt': os.urandom(70000), 'empty': b''}
+    stream = ZipStream(member(name, data) for name, data in bodies.items())
+    data = b''.join(stream.iter_bytes(chunk_size=4096))
+    assert len(data) == stream.length
+    
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert archive.testzip() is None
+        assert {name: archive.read(name) for name in archive.namelist()} == bodies
+
+def test_ranges_concatenate_to_the_whole():
+    stream = ZipStream([member('a', os.urandom(5000)), member('b', os.urandom(3000))])
+    whole = b''.join(stream.iter_bytes())
+    cuts = [0, 1, 29, 30, 4000, 5100, 8100, stream.length]
+    pieces = [b''.join(stream.iter_bytes(start, stop, chunk_size=700)) for start, stop in zip(cuts, cuts[1:])]
+    assert b''.join(pieces) == whole
+    assert b''.join(stream.iter_bytes(5100, 5200)) == whole[5100:5200]
+
+def test_etag_follows_member_changes():
+    first = ZipStream([member('a', b'one')])
+    assert first.etag() == ZipStream([member('a', b'one')]).etag()
+    assert first.etag() != ZipStream([member('a', b'two')]).etag()
+
+def test_members_past_four_gigabytes_use_zip64():
+    huge = Zeros(ZIP64_LIMIT + 10)
+    tail = os.urandom(1000)
+    stream = ZipStream([
+        ZipMember('huge.bin', huge, huge.size, 0, MTIME),
+        member('tail.bin', tail),
+    ])
+    assert stream.length > ZIP64_LIMIT
+    
+    with zipfile.ZipFile(ArchiveReader(stream)) as archive:
+        first, second = archive.infolist()
+        assert first.file_size == huge.size
+        assert second.header_offset > ZIP64_LIMIT
+        assert archive.read('tail.bin') == tail
+    
+    stream.close()
+    assert huge.closed
+
+def test_replacing_a_file_after_the_headers_keeps_the_archive_valid(tmp_path, monkeypatch):
+    monkeypatch.setattr(asset_store, 'root', str(tmp_path))
+    original = os.urandom(200000)
+    asset_store.save(7, 'source', io.BytesIO(original))
+    asset_store.save(7, 'preview', io.BytesIO(b'preview'))
+    
+    bundle = bundle_for({'id': 7, 'title': 'Brand Kit'})
+    # Same size, so a length check alone would not notice
+    asset_store.save(7, 'source', io.BytesIO(os.urandom(len(original))))
+    with bundle:
+        data = b''.join(bundle.iter_bytes())
+    
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert archive.testzip() is None
+        assert archive.read('Brand_Kit_Source_Files.zip') == original
+        assert archive.namelist() == ['Brand_Kit_Source_Files.zip', 'Brand_Kit_Preview.pdf']
+    assert all(member.source.closed for member in bundle.members)